@@ -70,6 +70,7 @@ def setup_database(app: flask.Flask) -> None:
     with app.app_context():
         db.metadata.create_all(bind=db.engine)
         sampledb.models.Objects.bind = db.engine
+        sampledb.logic.utils.setup_request_cache_invalidation(db.engine)
         sampledb.models.migrations.run(db)
 
 
@@ -211,6 +212,7 @@ def create_app(include_dashboard: bool = True) -> flask.Flask:
         if sig == signal.SIGTERM:
             if app.config['ENABLE_BACKGROUND_TASKS']:
                 sampledb.logic.background_tasks.stop_handler_threads(app)
+            sampledb.logic.api_log.stop_writer_thread(app)
             sys.exit(0)
 
     signal.signal(signal.SIGTERM, signal_handler)
@@ -3,6 +3,9 @@
 API for data exchange in SampleDB federations
 """
 
+import gzip
+
+import flask
 from flask import Blueprint
 from .federation import UpdateHook, ImportStatus, Objects, Users, File, Components
 
@@ -13,3 +16,27 @@ federation_api.add_url_rule('/federation/v1/shares/objects/', endpoint='object_u
 federation_api.add_url_rule('/federation/v1/shares/users/', endpoint='users', view_func=Users.as_view('users'))
 federation_api.add_url_rule('/federation/v1/shares/objects/<int:object_id>/files/<int:file_id>', endpoint='file', view_func=File.as_view('file'))
 federation_api.add_url_rule('/federation/v1/shares/components/', endpoint='components', view_func=Components.as_view('components'))
+
+# minimum size of a JSON response in bytes for it to be compressed
+MIN_COMPRESSED_RESPONSE_SIZE = 1024
+
+
+@federation_api.after_request
+def compress_response(response: flask.Response) -> flask.Response:
+    # shared data can be large and compresses well, so JSON responses are
+    # compressed if the requesting component accepts it
+    if (
+        response.status_code != 200 or
+        response.direct_passthrough or
+        response.mimetype != 'application/json' or
+        'Content-Encoding' in response.headers or
+        not flask.request.accept_encodings['gzip']
+    ):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESSED_RESPONSE_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
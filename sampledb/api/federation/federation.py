@@ -7,22 +7,25 @@ import datetime
 import typing
 
 import flask
+import werkzeug.exceptions
 
 from ..utils import Resource, ResponseData
 from ...logic import errors
 from ...logic.components import Component, get_components, get_component_infos
-from ...logic.shares import get_shares_for_component, get_share, ObjectShare, set_object_share_import_status, parse_object_share_import_status
+from ...logic.shares import get_shares_for_component, get_changed_entities_referenced_by_shares, get_entities_referenced_by_objects, get_share, ObjectShare, set_object_share_import_status, parse_object_share_import_status
 from ...logic.federation.action_types import shared_action_type_preprocessor
 from ...logic.federation.actions import shared_action_preprocessor
 from ...logic.federation.instruments import shared_instrument_preprocessor
 from ...logic.federation.location_types import shared_location_type_preprocessor
 from ...logic.federation.locations import shared_location_preprocessor
 from ...logic.federation.objects import shared_object_preprocessor
+from ...logic.federation.references import ReferenceCollector
 from ...logic.federation.update import import_updates, PROTOCOL_VERSION_MAJOR, PROTOCOL_VERSION_MINOR
 from ...logic.federation.users import shared_user_preprocessor
 from ...api.federation.authentication import http_token_auth
 from ...logic.files import get_file
 from ...logic.users import get_user_aliases_for_component, get_users, get_user_email_hashes, User
+from ...utils import send_file_content
 from ...models import UserType
 
 preprocessors = {
@@ -56,6 +59,18 @@ def _get_last_sync(args: typing.Dict[str, typing.Any]) -> typing.Optional[dateti
         return None
 
 
+def _get_optional_positive_int(args: typing.Dict[str, typing.Any], name: str) -> typing.Optional[int]:
+    if name not in args.keys():
+        return None
+    try:
+        value = int(args[name])
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise ValueError(f'{name} must be a positive integer')
+    return value
+
+
 def share_to_json(share: ObjectShare) -> typing.Dict[str, typing.Any]:
     return {
         'object_id': share.object_id,
@@ -123,18 +138,47 @@ class ImportStatus(Resource):
 class Objects(Resource):
     @http_token_auth.login_required
     def get(self) -> ResponseData:
+        """
+        Return the objects shared with the requesting component.
+
+        If a last_sync_timestamp is given, only objects which have been
+        changed or whose share has been modified since then are returned, and
+        for objects with an unmodified share only versions created since then.
+        Actions, instruments, locations and their types which have been
+        changed since then are returned if any shared object references them.
+        Otherwise all shared objects are returned, e.g. for the first sync.
+
+        If a limit is given, at most that many objects are returned and the
+        response contains a next_cursor which can be passed as cursor to get
+        the next page, until it is None.
+        """
         component = flask.g.component
-        shares = get_shares_for_component(component.id)
-        refs: typing.List[typing.Tuple[str, int]] = []
+        last_sync = _get_last_sync(flask.request.args)
+        if last_sync is not None:
+            # send changes from shortly before the last sync again, to allow
+            # for clock differences and changes committed during the last sync
+            modified_since = last_sync - datetime.timedelta(seconds=flask.current_app.config['VALID_TIME_DELTA'])
+        else:
+            modified_since = None
+        try:
+            limit = _get_optional_positive_int(flask.request.args, 'limit')
+            after_object_id = _get_optional_positive_int(flask.request.args, 'cursor')
+        except ValueError as e:
+            return {
+                "message": str(e)
+            }, 400
+        shares = get_shares_for_component(
+            component.id,
+            modified_since=modified_since,
+            after_object_id=after_object_id,
+            limit=limit
+        )
+        if limit is not None and len(shares) == limit:
+            next_cursor = str(shares[-1].object_id)
+        else:
+            next_cursor = None
+        refs = ReferenceCollector()
         markdown_images: typing.Dict[str, str] = {}
-        ref_ids: typing.Dict[str, typing.List[int]] = {
-            'actions': [],
-            'users': [],
-            'instruments': [],
-            'locations': [],
-            'location_types': [],
-            'action_types': []
-        }
 
         result_lists: typing.Dict[str, typing.List[typing.Any]] = {
             'actions': [],
@@ -146,19 +190,39 @@ class Objects(Resource):
             'action_types': []
         }
 
+        # load the entities referenced by the shared objects in bulk, with
+        # one query per entity type
+        entity_ids_by_type: typing.Dict[str, typing.Set[int]] = {
+            'users': {share.user_id for share in shares if share.user_id is not None}
+        }
+        for type, id in get_entities_referenced_by_objects(share.object_id for share in shares):
+            entity_ids_by_type.setdefault(type, set()).add(id)
+        for type, ids in entity_ids_by_type.items():
+            refs.load(type, ids)
         for share in shares:
-            obj = shared_object_preprocessor(share.object_id, share.policy, refs, markdown_images, sharing_user_id=share.user_id)
+            if modified_since is not None and share.last_modified < modified_since:
+                versions_created_since = modified_since
+            else:
+                versions_created_since = None
+            obj = shared_object_preprocessor(share.object_id, share.policy, refs, markdown_images, sharing_user_id=share.user_id, versions_created_since=versions_created_since)
             result_lists['objects'].append(obj)
 
-        while len(refs) > 0:
-            type, id = refs.pop()
+        if modified_since is not None and after_object_id is None:
+            # entities referenced by unchanged objects are sent again if they
+            # have been changed, once for all pages
+            for type, id in get_changed_entities_referenced_by_shares(component.id, modified_since):
+                refs.add(type, id)
+
+        # entities that have not been loaded yet are loaded together with all
+        # other pending references of the same type
+        while (ref := refs.pop_pending()) is not None:
+            type, id = ref
             if type == 'instruments' and flask.current_app.config['DISABLE_INSTRUMENTS']:
                 continue
-            if type in ref_ids and id not in ref_ids[type]:
+            if type in preprocessors:
                 processed = preprocessors[type](id, component, refs, markdown_images)
                 if processed is not None:
                     result_lists[type].append(processed)
-                ref_ids[type].append(id)
 
         return {
             'header': _get_header(component),
@@ -169,7 +233,8 @@ class Objects(Resource):
             'locations': result_lists['locations'],
             'location_types': result_lists['location_types'],
             'objects': result_lists['objects'],
-            'action_types': result_lists['action_types']
+            'action_types': result_lists['action_types'],
+            'next_cursor': next_cursor
         }
 
 
@@ -254,10 +319,10 @@ class File(Resource):
 
         if file.storage == 'database':
             try:
-                with file.open() as f:
-                    response = flask.make_response(f.read())
-                    response.headers.set('Content-Disposition', 'attachment', filename=file.original_file_name)
-                    return response
+                # stream the content with support for range requests
+                return send_file_content(file, as_attachment=True)
+            except werkzeug.exceptions.RequestedRangeNotSatisfiable:
+                raise
             except Exception:
                 return {
                     "message": f"file {file_id} of object {object_id} could not be read"
@@ -8,8 +8,11 @@ from .objects import Object, Objects, ObjectVersion, ObjectVersions, RelatedObje
 from .actions import Action, Actions
 from .action_types import ActionType, ActionTypes
 from .authentication import AccessTokens
+from .background_tasks import BackgroundTaskMetrics
 from .comments import ObjectComment, ObjectComments
+from .exports import Export, Exports, ExportFile
 from .files import ObjectFile, ObjectFiles
+from .file_uploads import ObjectFileUpload, ObjectFileUploads, ObjectFileUploadChunk, ObjectFileUploadFinalization
 from .instruments import Instrument, Instruments
 from .instrument_log import InstrumentLogEntry, InstrumentLogEntries, InstrumentLogEntryFileAttachment, InstrumentLogEntryFileAttachments, InstrumentLogEntryObjectAttachment, InstrumentLogEntryObjectAttachments, InstrumentLogCategory, InstrumentLogCategories
 from .locations import Location, Locations, ObjectLocationAssignment, ObjectLocationAssignments, LocationType, LocationTypes
@@ -48,6 +51,10 @@ api.add_url_rule('/api/v1/location_types/', endpoint='location_types', view_func
 api.add_url_rule('/api/v1/location_types/<int(signed=True):location_type_id>', endpoint='location_type', view_func=LocationType.as_view('location_type'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/files/', endpoint='object_files', view_func=ObjectFiles.as_view('object_files'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/files/<int:file_id>', endpoint='object_file', view_func=ObjectFile.as_view('object_file'))
+api.add_url_rule('/api/v1/objects/<int:object_id>/file_uploads/', endpoint='object_file_uploads', view_func=ObjectFileUploads.as_view('object_file_uploads'))
+api.add_url_rule('/api/v1/objects/<int:object_id>/file_uploads/<int:upload_id>', endpoint='object_file_upload', view_func=ObjectFileUpload.as_view('object_file_upload'))
+api.add_url_rule('/api/v1/objects/<int:object_id>/file_uploads/<int:upload_id>/chunks/<int:offset>', endpoint='object_file_upload_chunk', view_func=ObjectFileUploadChunk.as_view('object_file_upload_chunk'))
+api.add_url_rule('/api/v1/objects/<int:object_id>/file_uploads/<int:upload_id>/finalize', endpoint='object_file_upload_finalization', view_func=ObjectFileUploadFinalization.as_view('object_file_upload_finalization'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/locations/', endpoint='object_location_assignments', view_func=ObjectLocationAssignments.as_view('object_location_assignments'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/locations/<int:object_location_assignment_index>', endpoint='object_location_assignment', view_func=ObjectLocationAssignment.as_view('object_location_assignment'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/permissions/users/', endpoint='users_object_permissions', view_func=UsersObjectPermissions.as_view('users_object_permissions'))
@@ -66,4 +73,8 @@ api.add_url_rule('/api/v1/groups/', endpoint='groups', view_func=Groups.as_view(
 api.add_url_rule('/api/v1/groups/<int:group_id>', endpoint='group', view_func=Group.as_view('group'))
 api.add_url_rule('/api/v1/projects/', endpoint='projects', view_func=Projects.as_view('projects'))
 api.add_url_rule('/api/v1/projects/<int:project_id>', endpoint='project', view_func=Project.as_view('project'))
+api.add_url_rule('/api/v1/exports/', endpoint='exports', view_func=Exports.as_view('exports'))
+api.add_url_rule('/api/v1/exports/<int:export_id>', endpoint='export', view_func=Export.as_view('export'))
+api.add_url_rule('/api/v1/exports/<int:export_id>/file', endpoint='export_file', view_func=ExportFile.as_view('export_file'))
+api.add_url_rule('/api/v1/background_tasks/metrics', endpoint='background_task_metrics', view_func=BackgroundTaskMetrics.as_view('background_task_metrics'))
 api.add_url_rule('/api/v1/object_log_entries/', endpoint='object_log_entries', view_func=ObjectLogEntries.as_view('object_log_entry'))
@@ -0,0 +1,27 @@
+# coding: utf-8
+"""
+RESTful API for SampleDB
+"""
+
+import flask
+
+from .authentication import multi_auth
+from ..utils import Resource, ResponseData
+from ...logic.api_log import get_log_writer_statistics_as_prometheus_text
+from ...logic.background_tasks.metrics import PROMETHEUS_CONTENT_TYPE, get_background_task_metrics_as_prometheus_text
+
+__author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
+
+
+class BackgroundTaskMetrics(Resource):
+    @multi_auth.login_required
+    def get(self) -> ResponseData:
+        if not flask.g.user.is_admin:
+            return {
+                "message": "only administrators can read background task metrics"
+            }, 403
+        return flask.Response(
+            get_background_task_metrics_as_prometheus_text() + get_log_writer_statistics_as_prometheus_text(),
+            status=200,
+            content_type=PROMETHEUS_CONTENT_TYPE
+        )
@@ -0,0 +1,124 @@
+# coding: utf-8
+"""
+RESTful API for SampleDB
+"""
+
+import os
+import typing
+
+import flask
+
+from .authentication import multi_auth
+from ..utils import Resource, ResponseData
+from ... import logic
+from ...models import BackgroundTaskStatus
+
+__author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
+
+
+def _get_export_task_result(export_id: int) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    try:
+        task = logic.background_tasks.core.get_background_task(export_id)
+    except logic.errors.BackgroundTaskDoesNotExistError:
+        return None
+    if task.type not in ('export', 'pdfexport') or task.data.get('requesting_user_id') != flask.g.user.id:
+        return None
+    return logic.background_tasks.get_background_task_result(export_id, False)
+
+
+class Exports(Resource):
+    @multi_auth.login_required
+    def post(self) -> ResponseData:
+        if not flask.current_app.config['ENABLE_BACKGROUND_TASKS']:
+            return {
+                "message": "exports require background tasks to be enabled"
+            }, 400
+        request_json = flask.request.get_json(force=True, silent=True)
+        if not isinstance(request_json, dict):
+            return {
+                "message": "JSON body should contain object"
+            }, 400
+        if set(request_json.keys()) != {'file_extension'}:
+            return {
+                "message": "JSON body should only contain file_extension"
+            }, 400
+        file_extension = request_json['file_extension']
+        if file_extension == '.pdf':
+            task = logic.background_tasks.post_pdfexport_task(
+                user_id=flask.g.user.id,
+                requesting_user_id=flask.g.user.id,
+                base_url=flask.request.url_root
+            )[1]
+        elif file_extension in logic.export.FILE_FORMATS:
+            task = logic.background_tasks.post_export_task(
+                user_id=flask.g.user.id,
+                requesting_user_id=flask.g.user.id,
+                file_extension=file_extension,
+                base_url=flask.request.url_root
+            )[1]
+        else:
+            return {
+                "message": "file_extension must be one of: " + ', '.join(['.pdf'] + list(logic.export.FILE_FORMATS))
+            }, 400
+        if task is None:
+            return {
+                "message": "failed to create export"
+            }, 500
+        return {
+            "export_id": task.id,
+            "status": "pending"
+        }, 202, {
+            'Location': flask.url_for('api.export', export_id=task.id, _external=True)
+        }
+
+
+class Export(Resource):
+    @multi_auth.login_required
+    def get(self, export_id: int) -> ResponseData:
+        task_result = _get_export_task_result(export_id)
+        if task_result is None:
+            return {
+                "message": f"export {export_id} does not exist"
+            }, 404
+        export_json: typing.Dict[str, typing.Any] = {
+            "export_id": export_id
+        }
+        if task_result['status'] == BackgroundTaskStatus.DONE:
+            export_json.update({
+                "status": "done",
+                "file_name": task_result['result'].get('file_name'),
+                "size": task_result['result'].get('size'),
+                "download_url": flask.url_for('api.export_file', export_id=export_id, _external=True)
+            })
+        elif task_result['status'] == BackgroundTaskStatus.FAILED:
+            export_json.update({
+                "status": "failed",
+                "error_message": task_result['result'].get('error_message')
+            })
+        else:
+            export_json.update({
+                "status": "pending",
+                "progress": task_result['result'].get('progress', {})
+            })
+        return export_json
+
+
+class ExportFile(Resource):
+    @multi_auth.login_required
+    def get(self, export_id: int) -> ResponseData:
+        task_result = _get_export_task_result(export_id)
+        if task_result is None or task_result['status'] != BackgroundTaskStatus.DONE:
+            return {
+                "message": f"export {export_id} does not exist or has not been completed"
+            }, 404
+        file_path = logic.background_tasks.background_export.get_export_result_path(export_id)
+        if file_path is None:
+            return {
+                "message": f"export {export_id} does not exist or has not been completed"
+            }, 404
+        return flask.send_file(
+            file_path,
+            mimetype=task_result['result'].get('mime_type', 'application/octet-stream'),
+            as_attachment=True,
+            download_name=task_result['result'].get('file_name', os.path.basename(file_path))
+        )
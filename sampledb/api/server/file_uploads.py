@@ -0,0 +1,193 @@
+# coding: utf-8
+"""
+RESTful API for SampleDB
+"""
+
+import typing
+
+import flask
+
+from .authentication import object_permissions_required
+from ..utils import Resource, ResponseData
+from ...logic import errors
+from ...logic.actions import get_action
+from ...logic.files import File, SUPPORTED_HASH_ALGORITHMS
+from ...logic.file_uploads import FileUpload, create_file_upload, delete_file_upload, finalize_file_upload, get_file_upload, write_file_upload_chunk
+from ...logic.objects import get_object
+from ...models import Permissions
+
+__author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
+
+
+def file_upload_to_json(file_upload: FileUpload) -> typing.Dict[str, typing.Any]:
+    return {
+        'object_id': file_upload.object_id,
+        'upload_id': file_upload.id,
+        'original_file_name': file_upload.file_name,
+        'size': file_upload.size,
+        'received_size': file_upload.received_size
+    }
+
+
+def _get_own_file_upload(object_id: int, upload_id: int) -> typing.Optional[FileUpload]:
+    try:
+        file_upload = get_file_upload(upload_id, object_id=object_id)
+    except errors.FileUploadDoesNotExistError:
+        return None
+    if file_upload.user_id != flask.g.user.id:
+        return None
+    return file_upload
+
+
+def _file_upload_not_found(object_id: int, upload_id: int) -> ResponseData:
+    return {
+        "message": f"file upload {upload_id} of object {object_id} does not exist"
+    }, 404
+
+
+class ObjectFileUploads(Resource):
+    @object_permissions_required(Permissions.WRITE)
+    def post(self, object_id: int) -> ResponseData:
+        request_json = flask.request.get_json(force=True)
+        if not isinstance(request_json, dict):
+            return {
+                "message": "JSON object body required"
+            }, 400
+        object = get_object(object_id=object_id)
+        if object.action_id is not None:
+            action = get_action(action_id=object.action_id)
+            if action.type is None or not action.type.enable_files:
+                return {
+                    "message": "Adding files is not enabled for objects of this type"
+                }, 403
+        for key in request_json:
+            if key not in {'object_id', 'original_file_name', 'size'}:
+                return {
+                    "message": f"invalid key '{key}'"
+                }, 400
+        if 'object_id' in request_json:
+            if request_json['object_id'] != object.object_id:
+                return {
+                    "message": f"object_id must be {object.object_id}"
+                }, 400
+        original_file_name = request_json.get('original_file_name')
+        if not original_file_name or not isinstance(original_file_name, str):
+            return {
+                "message": "original_file_name must be set"
+            }, 400
+        size = request_json.get('size')
+        if type(size) is not int or size < 0:
+            return {
+                "message": "size must be a non-negative integer"
+            }, 400
+        try:
+            file_upload = create_file_upload(
+                object_id=object_id,
+                user_id=flask.g.user.id,
+                file_name=original_file_name,
+                size=size
+            )
+        except errors.FileNameTooLongError:
+            return {
+                "message": "original_file_name must be at most 150 bytes long"
+            }, 400
+        return file_upload_to_json(file_upload), 201, {
+            'Location': flask.url_for('api.object_file_upload', object_id=object_id, upload_id=file_upload.id, _external=True)
+        }
+
+
+class ObjectFileUpload(Resource):
+    @object_permissions_required(Permissions.WRITE)
+    def get(self, object_id: int, upload_id: int) -> ResponseData:
+        file_upload = _get_own_file_upload(object_id, upload_id)
+        if file_upload is None:
+            return _file_upload_not_found(object_id, upload_id)
+        return file_upload_to_json(file_upload)
+
+    @object_permissions_required(Permissions.WRITE)
+    def delete(self, object_id: int, upload_id: int) -> ResponseData:
+        if _get_own_file_upload(object_id, upload_id) is None:
+            return _file_upload_not_found(object_id, upload_id)
+        try:
+            delete_file_upload(upload_id, object_id=object_id)
+        except errors.FileUploadDoesNotExistError:
+            return _file_upload_not_found(object_id, upload_id)
+        return flask.Response(status=204)
+
+
+class ObjectFileUploadChunk(Resource):
+    @object_permissions_required(Permissions.WRITE)
+    def put(self, object_id: int, upload_id: int, offset: int) -> ResponseData:
+        if _get_own_file_upload(object_id, upload_id) is None:
+            return _file_upload_not_found(object_id, upload_id)
+        try:
+            file_upload = write_file_upload_chunk(
+                upload_id=upload_id,
+                offset=offset,
+                stream=typing.cast(typing.BinaryIO, flask.request.stream),
+                object_id=object_id
+            )
+        except errors.FileUploadDoesNotExistError:
+            return _file_upload_not_found(object_id, upload_id)
+        except errors.InvalidFileUploadOffsetError as e:
+            return {
+                "message": f"offset must be at most {e.received_size}",
+                "received_size": e.received_size
+            }, 409
+        except errors.FileUploadSizeError:
+            return {
+                "message": "chunk exceeds the size of the file"
+            }, 400
+        return file_upload_to_json(file_upload)
+
+
+class ObjectFileUploadFinalization(Resource):
+    @object_permissions_required(Permissions.WRITE)
+    def post(self, object_id: int, upload_id: int) -> ResponseData:
+        if _get_own_file_upload(object_id, upload_id) is None:
+            return _file_upload_not_found(object_id, upload_id)
+        request_json = flask.request.get_json(force=True, silent=True)
+        if request_json is None:
+            request_json = {}
+        if not isinstance(request_json, dict):
+            return {
+                "message": "JSON object body required"
+            }, 400
+        for key in request_json:
+            if key != 'hash':
+                return {
+                    "message": f"invalid key '{key}'"
+                }, 400
+        hash = None
+        if 'hash' in request_json:
+            if not isinstance(request_json['hash'], dict) or set(request_json['hash'].keys()) != {'hexdigest', 'algorithm'} or not isinstance(request_json['hash']['algorithm'], str) or not isinstance(request_json['hash']['hexdigest'], str):
+                return {
+                    "message": "hash must contain algorithm and hexdigest as strings"
+                }, 400
+            if request_json['hash']['algorithm'] not in SUPPORTED_HASH_ALGORITHMS:
+                return {
+                    "message": "only the following hash algorithms are supported: " + ", ".join(SUPPORTED_HASH_ALGORITHMS)
+                }, 400
+            hash = File.HashInfo(
+                algorithm=request_json['hash']['algorithm'],
+                hexdigest=request_json['hash']['hexdigest']
+            )
+        try:
+            file = finalize_file_upload(upload_id, hash=hash, object_id=object_id)
+        except errors.FileUploadDoesNotExistError:
+            return _file_upload_not_found(object_id, upload_id)
+        except errors.FileUploadSizeError:
+            return {
+                "message": "the file upload is incomplete"
+            }, 400
+        except errors.FileUploadHashMismatchError:
+            return {
+                "message": "hash hexdigest mismatch"
+            }, 400
+        file_url = flask.url_for(
+            'api.object_file',
+            object_id=file.object_id,
+            file_id=file.id,
+            _external=True
+        )
+        return flask.redirect(file_url, code=201)
@@ -15,8 +15,9 @@ from ...logic.action_types import check_action_type_exists
 from ...logic.actions import get_action, check_action_exists
 from ...logic.action_permissions import get_user_action_permissions
 from ...logic.object_search import generate_filter_func, wrap_filter_func
-from ...logic.objects import get_object, update_object, create_object
+from ...logic.objects import get_object, update_object, create_object, load_object_list_context
 from ...logic.object_permissions import get_objects_with_permissions
+from ...logic.object_sorting import encode_cursor, decode_cursor
 from ...logic.object_relationships import get_referencing_object_ids, get_related_object_ids
 from ...logic.schemas.data_diffs import apply_diff, calculate_diff
 from ...logic import errors, users
@@ -28,6 +29,9 @@ from .actions import action_to_json
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
+# the object list is sorted by descending object ID, cursors are only valid for this sorting
+OBJECTS_SORTING_NAME = '_object_id:desc'
+
 
 class ObjectVersion(Resource):
     @object_permissions_required(Permissions.READ)
@@ -269,6 +273,28 @@ class Objects(Resource):
         if offset is not None and not 0 <= offset < 1e15:
             offset = None
 
+        after = None
+        after_str = flask.request.args.get('after')
+        if after_str is not None:
+            after = decode_cursor(after_str, OBJECTS_SORTING_NAME)
+            if after is None:
+                return {
+                    'message': 'after must be a cursor returned in a previous response'
+                }, 400
+
+        before = None
+        before_str = flask.request.args.get('before')
+        if before_str is not None:
+            if after is not None:
+                return {
+                    'message': 'after and before cannot be used together'
+                }, 400
+            before = decode_cursor(before_str, OBJECTS_SORTING_NAME)
+            if before is None:
+                return {
+                    'message': 'before must be a cursor returned in a previous response'
+                }, 400
+
         name_only = text_to_bool(flask.request.args.get('name_only', ''))
         query_string = flask.request.args.get('q', '')
         if query_string:
@@ -286,6 +312,7 @@ class Objects(Resource):
 
             def filter_func(data: typing.Any) -> typing.Any:
                 return True
+        cursors: typing.List[typing.Optional[typing.Tuple[typing.Any, int]]] = []
         try:
             objects = get_objects_with_permissions(
                 user_id=flask.g.user.id,
@@ -296,11 +323,27 @@ class Objects(Resource):
                 project_id=project_id,
                 limit=limit,
                 offset=offset,
-                name_only=name_only
+                name_only=name_only,
+                after=after,
+                before=before,
+                cursors=cursors
             )
         except Exception as e:
             search_notes.append(('error', f"Error during search: {e}", 0, 0))
             objects = []
+        headers: typing.Dict[str, str] = {}
+        links = []
+        for relation, parameter_name, cursor in zip(('prev', 'next'), ('before', 'after'), cursors):
+            if cursor is not None:
+                parameters: typing.Dict[str, typing.Any] = {
+                    key: flask.request.args.getlist(key)
+                    for key in flask.request.args
+                    if key not in ('after', 'before', 'offset')
+                }
+                parameters[parameter_name] = encode_cursor(cursor, OBJECTS_SORTING_NAME)
+                links.append(f'<{flask.url_for("api.objects", _external=True, **parameters)}>; rel="{relation}"')
+        if links:
+            headers['Link'] = ', '.join(links)
         need_object_references = flask.request.args.get('get_referencing_objects', False)
         if any(search_note[0] == 'error' for search_note in search_notes):
             return {
@@ -310,10 +353,22 @@ class Objects(Resource):
                     if search_note[0] == 'error'
                 )
             }, 400
-        elif need_object_references:
+        ret: typing.List[typing.Dict[str, typing.Any]] = [
+            {
+                'object_id': object.object_id,
+                'version_id': object.version_id,
+                'action_id': object.action_id,
+                'schema': object.schema,
+                'data': object.data,
+                'fed_object_id': object.fed_object_id,
+                'fed_version_id': object.fed_version_id,
+                'component_id': object.component_id
+            }
+            for object in objects
+        ]
+        if need_object_references:
             object_references = get_referencing_object_ids({object.id for object in objects})
-            ret = []
-            for object in objects:
+            for object, object_json in zip(objects, ret):
                 references = object_references[object.object_id]
                 referenced: typing.List[typing.Dict[str, typing.Any]] = []
                 for ref in references:
@@ -326,34 +381,33 @@ class Objects(Resource):
                         if ref.eln_object_url is not None:
                             reference_dict['eln_object_id'] = ref.eln_object_url
                         referenced.append(reference_dict)
-                ret.append(
-                    {
-                        'object_id': object.object_id,
-                        'version_id': object.version_id,
-                        'action_id': object.action_id,
-                        'schema': object.schema,
-                        'data': object.data,
-                        'fed_object_id': object.fed_object_id,
-                        'fed_version_id': object.fed_version_id,
-                        'component_id': object.component_id,
-                        'referencing_objects': referenced
-                    }
-                )
-            return ret, 200
-        else:
-            return [
-                {
-                    'object_id': object.object_id,
-                    'version_id': object.version_id,
-                    'action_id': object.action_id,
-                    'schema': object.schema,
-                    'data': object.data,
-                    'fed_object_id': object.fed_object_id,
-                    'fed_version_id': object.fed_version_id,
-                    'component_id': object.component_id
-                }
-                for object in objects
-            ], 200
+                object_json['referencing_objects'] = referenced
+        embed_action = bool(flask.request.args.get('embed_action'))
+        embed_user = bool(flask.request.args.get('embed_user'))
+        if embed_action or embed_user:
+            object_list_context = load_object_list_context(
+                objects,
+                load_original_objects=False,
+                load_users=embed_user,
+                load_actions=embed_action,
+                load_files=False
+            )
+            readable_action_ids = {
+                action_id
+                for action_id in object_list_context.actions_by_id
+                if Permissions.READ in get_user_action_permissions(action_id=action_id, user_id=flask.g.user.id)
+            }
+            for object, object_json in zip(objects, ret):
+                if embed_action:
+                    action = object_list_context.get_action(object.action_id)
+                    if action is not None and action.id in readable_action_ids:
+                        object_json['action'] = action_to_json(action)
+                    else:
+                        object_json['action'] = None
+                if embed_user:
+                    user = object_list_context.get_user(object.user_id)
+                    object_json['user'] = user_to_json(user) if user is not None else None
+        return ret, 200, headers
 
     @multi_auth.login_required
     def post(self) -> ResponseData:
@@ -62,11 +62,17 @@ def parse_configuration_values() -> None:
         'INVITATION_TIME_LIMIT',
         'MAX_CONTENT_LENGTH',
         'MAX_BATCH_SIZE',
+        'OBJECT_LIST_COUNT_LIMIT',
         'VALID_TIME_DELTA',
+        'FEDERATION_CONNECTION_POOL_SIZE',
+        'FEDERATION_MAX_RETRIES',
         'DOWNLOAD_SERVICE_TIME_LIMIT',
         'TYPEAHEAD_OBJECT_LIMIT',
         'LDAP_CONNECT_TIMEOUT',
         'TEMPORARY_FILE_TIME_LIMIT',
+        'API_AUTHENTICATION_CACHE_TIME',
+        'API_ACCESS_TOKEN_REMOVAL_INTERVAL',
+        'BACKGROUND_TASK_HANDLER_THREADS',
         'SHARED_DEVICE_SIGN_OUT_MINUTES',
         'MIN_NUM_TEXT_CHOICES_FOR_SEARCH',
         'PDFEXPORT_LOGO_WIDTH',
@@ -104,6 +110,7 @@ def parse_configuration_values() -> None:
         'HIDE_OBJECT_TYPE_AND_ID_ON_OBJECT_PAGE',
         'DISABLE_INLINE_EDIT',
         'ENABLE_BACKGROUND_TASKS',
+        'ENABLE_BUFFERED_API_LOG',
         'ENABLE_MONITORINGDASHBOARD',
         'ENABLE_ANONYMOUS_USERS',
         'ENABLE_NUMERIC_TAGS',
@@ -326,6 +333,45 @@ def check_config(
         )
         show_config_info = True
 
+    file_storage_backend = config.get('FILE_STORAGE_BACKEND') or 'database'
+    if file_storage_backend not in {'database', 'filesystem', 's3'}:
+        print(
+            ansi_color(
+                f'Invalid FILE_STORAGE_BACKEND "{file_storage_backend}". '
+                'Please use either "database", "filesystem" or "s3".'
+                '\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+    elif file_storage_backend == 'filesystem' and 'FILE_STORAGE_DIRECTORY' not in defined_config_keys:
+        print(
+            ansi_color(
+                'FILE_STORAGE_BACKEND is set to "filesystem", but '
+                'FILE_STORAGE_DIRECTORY is missing.'
+                '\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+    elif file_storage_backend == 's3' and not {'FILE_STORAGE_S3_ENDPOINT_URL', 'FILE_STORAGE_S3_BUCKET'}.issubset(defined_config_keys):
+        print(
+            ansi_color(
+                'FILE_STORAGE_BACKEND is set to "s3", but '
+                'FILE_STORAGE_S3_ENDPOINT_URL or FILE_STORAGE_S3_BUCKET is '
+                'missing.'
+                '\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
     admin_password_set = 'ADMIN_PASSWORD' in defined_config_keys
     admin_username_set = 'ADMIN_USERNAME' in defined_config_keys
     admin_email_set = 'ADMIN_EMAIL' in defined_config_keys
@@ -711,6 +757,20 @@ DOWNLOAD_SERVICE_SECRET = None
 DOWNLOAD_SERVICE_WHITELIST: typing.Dict[str, typing.List[int]] = {}
 DOWNLOAD_SERVICE_TIME_LIMIT = 24 * 60 * 60
 
+# file storage settings
+# 'database', 'filesystem' or 's3'
+FILE_STORAGE_BACKEND = 'database'
+FILE_STORAGE_DIRECTORY = None
+FILE_STORAGE_S3_ENDPOINT_URL = None
+FILE_STORAGE_S3_BUCKET = None
+FILE_STORAGE_S3_ACCESS_KEY_ID = None
+FILE_STORAGE_S3_SECRET_ACCESS_KEY = None
+FILE_STORAGE_S3_REGION = 'us-east-1'
+# directory for staging chunked file uploads, defaults to a directory in the system's temporary directory
+FILE_UPLOAD_DIRECTORY = None
+# directory for storing the results of export tasks, defaults to a directory in the system's temporary directory
+EXPORT_DIRECTORY = None
+
 # PDF export settings
 PDFEXPORT_LOGO_URL = None
 PDFEXPORT_LOGO_ALIGNMENT = 'right'
@@ -763,10 +823,18 @@ HIDE_OBJECT_TYPE_AND_ID_ON_OBJECT_PAGE = False
 
 MAX_BATCH_SIZE = 100
 
+OBJECT_LIST_COUNT_LIMIT = 10000
+
 FEDERATION_UUID = None
 ENABLE_FEDERATION_DISCOVERABILITY = True
 ALLOW_HTTP = False
 VALID_TIME_DELTA = 300
+# maximum number of connections kept alive per component and of requests sent to components in parallel
+FEDERATION_CONNECTION_POOL_SIZE = 4
+# maximum number of times a failed request to another component is retried
+FEDERATION_MAX_RETRIES = 3
+# directory for caching the content of files stored in other components, caching is disabled if not set
+FEDERATION_FILE_CACHE_DIRECTORY = None
 ENABLE_DEFAULT_USER_ALIASES = False
 
 ENABLE_WEBHOOKS_FOR_USERS = False
@@ -774,6 +842,12 @@ WEBHOOKS_ALLOW_HTTP = False
 
 ENABLE_BACKGROUND_TASKS = False
 
+# number of background task handler threads per process, 0 to only handle tasks in a separate worker process
+BACKGROUND_TASK_HANDLER_THREADS = 4
+
+# write API log entries in batches in a background thread instead of during each request
+ENABLE_BUFFERED_API_LOG = True
+
 TIMEZONE = None
 
 ENABLE_ANONYMOUS_USERS = False
@@ -791,6 +865,12 @@ ENABLE_FUNCTION_CACHES = True
 # temporary file time limit
 TEMPORARY_FILE_TIME_LIMIT = 7 * 24 * 60 * 60
 
+# time in seconds that verified API credentials are cached, 0 to disable the cache
+API_AUTHENTICATION_CACHE_TIME = 5 * 60
+
+# time in seconds between two removals of expired API access tokens by a background task, 0 to disable them
+API_ACCESS_TOKEN_REMOVAL_INTERVAL = 60 * 60
+
 # CSP headers should be set, however this value can be used to disable them if necessary
 ENABLE_CONTENT_SECURITY_POLICY = True
 
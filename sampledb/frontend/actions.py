@@ -270,13 +270,12 @@ def action(action_id: int) -> FlaskResponseT:
     may_grant = Permissions.GRANT in permissions
     mode = flask.request.args.get('mode', None)
     if mode == 'edit':
-        action_schema = action.schema
+        action_schema = copy.deepcopy(action.schema)
         if action_schema:
-            original_schema = copy.deepcopy(action_schema)
             try:
                 reverse_substitute_templates(action_schema)
             except errors.ActionDoesNotExistError:
-                action_schema = original_schema
+                action_schema = action.schema
                 flask.flash(_('The used template does not exist anymore. Use the JSON editor to edit the existing action.'), 'error')
                 if get_user_setting(flask_login.current_user.id, "USE_SCHEMA_EDITOR"):
                     flask.abort(400)
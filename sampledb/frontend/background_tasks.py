@@ -6,6 +6,7 @@ import flask_login
 
 from . import frontend
 from ..logic.background_tasks import get_background_tasks
+from ..logic.background_tasks.metrics import METRICS_TIME_WINDOW, get_background_task_metrics
 from ..utils import FlaskResponseT
 
 
@@ -16,5 +17,7 @@ def background_tasks() -> FlaskResponseT:
         return flask.abort(HTTPStatus.FORBIDDEN)
     return flask.render_template(
         'admin/background_tasks.html',
-        tasks=get_background_tasks()
+        tasks=get_background_tasks(),
+        metrics=get_background_task_metrics(),
+        metrics_time_window=METRICS_TIME_WINDOW
     )
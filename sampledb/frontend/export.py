@@ -3,8 +3,12 @@
 
 """
 
+import os
+import typing
+
 import flask
 import flask_login
+import itsdangerous
 from flask_babel import _
 from flask_wtf import FlaskForm
 from wtforms import SelectField
@@ -12,7 +16,7 @@ from wtforms.validators import InputRequired
 
 from . import frontend
 from .. import logic
-from ..models import Permissions
+from ..models import BackgroundTaskStatus, Permissions
 from .pdfexport import create_pdfexport
 from ..utils import FlaskResponseT
 
@@ -47,6 +51,24 @@ def export(user_id: int) -> FlaskResponseT:
     ]
     if create_export_form.validate_on_submit():
         file_extension = create_export_form.file_extension.data
+        if flask.current_app.config['ENABLE_BACKGROUND_TASKS'] and (file_extension == '.pdf' or file_extension in logic.export.FILE_FORMATS):
+            # large exports may take a long time, so they are created in the background
+            if file_extension == '.pdf':
+                task = logic.background_tasks.post_pdfexport_task(
+                    user_id=user_id,
+                    requesting_user_id=flask_login.current_user.id,
+                    base_url=flask.request.url_root
+                )[1]
+            else:
+                task = logic.background_tasks.post_export_task(
+                    user_id=user_id,
+                    requesting_user_id=flask_login.current_user.id,
+                    file_extension=file_extension,
+                    base_url=flask.request.url_root
+                )[1]
+            if task is not None:
+                token = _get_export_task_serializer().dumps((flask_login.current_user.id, task.id))
+                return flask.redirect(flask.url_for('.export_loading', task_id=task.id, token=token))
         if file_extension == '.pdf':
             readable_objects = logic.object_permissions.get_objects_with_permissions(
                 user_id,
@@ -58,8 +80,15 @@ def export(user_id: int) -> FlaskResponseT:
             )))
             file_type = 'application/pdf'
         elif file_extension in logic.export.FILE_FORMATS:
-            file_bytes = logic.export.FILE_FORMATS[file_extension][1](user_id)
-            file_type = logic.export.FILE_FORMATS[file_extension][2]
+            # archives are streamed to avoid keeping all files in memory
+            return flask.Response(
+                flask.stream_with_context(logic.export.FILE_FORMATS[file_extension][1](user_id)),
+                200,
+                headers={
+                    'Content-Type': logic.export.FILE_FORMATS[file_extension][2],
+                    'Content-Disposition': f'attachment; filename=sampledb_export{file_extension}'
+                }
+            )
         else:
             flask.flash(_('Please select an export format.'), 'warning')
             file_bytes = None
@@ -77,3 +106,90 @@ def export(user_id: int) -> FlaskResponseT:
         'export.html',
         create_export_form=create_export_form
     )
+
+
+def _get_export_task_serializer() -> itsdangerous.URLSafeSerializer:
+    return itsdangerous.URLSafeSerializer(secret_key=flask.current_app.config['SECRET_KEY'], salt='export-task')
+
+
+def _get_export_task_result(task_id: int, token: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    try:
+        if _get_export_task_serializer().loads(token) != [flask_login.current_user.id, task_id]:
+            return flask.abort(403)
+    except itsdangerous.BadData:
+        return flask.abort(403)
+    return logic.background_tasks.get_background_task_result(task_id, False)
+
+
+def _get_export_progress_text(task_result: typing.Dict[str, typing.Any]) -> typing.Optional[str]:
+    progress = task_result['result'].get('progress', {})
+    if 'total_objects' in progress:
+        return _('%(processed_objects)s of %(total_objects)s objects have been exported.', processed_objects=progress['processed_objects'], total_objects=progress['total_objects'])
+    if 'written_bytes' in progress:
+        return _('%(written_megabytes)s MB have been exported.', written_megabytes=f"{progress['written_bytes'] / 1024 / 1024:.1f}")
+    return None
+
+
+@frontend.route('/export_tasks/<int:task_id>/', methods=['GET'])
+@flask_login.login_required
+def export_loading(task_id: int) -> FlaskResponseT:
+    token = flask.request.args.get('token', '')
+    task_result = _get_export_task_result(task_id, token)
+    if not task_result:
+        return flask.abort(404)
+    if task_result['status'] == BackgroundTaskStatus.DONE:
+        return flask.render_template(
+            'export_loading.html',
+            state='done',
+            download_url=flask.url_for('.export_download', task_id=task_id, token=token),
+            file_name=task_result['result'].get('file_name')
+        )
+    if task_result['status'] == BackgroundTaskStatus.FAILED:
+        return flask.render_template(
+            'export_loading.html',
+            state='failed',
+            error_message=task_result['result'].get('error_message')
+        )
+    return flask.render_template(
+        'export_loading.html',
+        state='polling',
+        task_id=task_id,
+        token=token,
+        progress_text=_get_export_progress_text(task_result)
+    ), 202
+
+
+@frontend.route('/export_tasks/<int:task_id>/status', methods=['GET'])
+@flask_login.login_required
+def export_status(task_id: int) -> FlaskResponseT:
+    token = flask.request.args.get('token', '')
+    task_result = _get_export_task_result(task_id, token)
+    if not task_result:
+        return flask.jsonify({
+            "error_message": "task_id not found"
+        }), 404
+    if task_result['status'].is_final():
+        return flask.jsonify({
+            "url": flask.url_for('.export_loading', task_id=task_id, token=token)
+        }), 200 if task_result['status'] == BackgroundTaskStatus.DONE else 406
+    return flask.jsonify({
+        "progress": task_result['result'].get('progress', {}),
+        "progress_text": _get_export_progress_text(task_result)
+    }), 202
+
+
+@frontend.route('/export_tasks/<int:task_id>/download', methods=['GET'])
+@flask_login.login_required
+def export_download(task_id: int) -> FlaskResponseT:
+    task_result = _get_export_task_result(task_id, flask.request.args.get('token', ''))
+    if not task_result or task_result['status'] != BackgroundTaskStatus.DONE:
+        return flask.abort(404)
+    file_path = logic.background_tasks.background_export.get_export_result_path(task_id)
+    if file_path is None:
+        return flask.abort(404)
+    return flask.send_file(
+        file_path,
+        mimetype=task_result['result'].get('mime_type', 'application/octet-stream'),
+        as_attachment=True,
+        download_name=task_result['result'].get('file_name', os.path.basename(file_path))
+    )
@@ -19,7 +19,7 @@ from ...logic.objects import get_object
 from ...models import Permissions
 from ...logic.errors import UserDoesNotExistError, FederationFileNotAvailableError
 from .forms import FileForm, FileInformationForm, FileHidingForm, ExternalLinkForm
-from ...utils import object_permissions_required, FlaskResponseT
+from ...utils import object_permissions_required, send_file_content, FlaskResponseT
 from ..utils import check_current_user_is_not_readonly
 from .permissions import on_unauthorized
 from ...logic.temporary_files import create_temporary_file, delete_expired_temporary_files
@@ -68,12 +68,12 @@ def object_file(object_id: int, file_id: int) -> FlaskResponseT:
             mime_type = mime_types.get(file_extension, None)
             if mime_type is not None:
                 try:
-                    return flask.send_file(file.open(), mimetype=mime_type, last_modified=file.utc_datetime)
+                    return send_file_content(file, mimetype=mime_type)
                 except FederationFileNotAvailableError:
                     flask.flash(_('File stored in other database is not available.'), 'error')
                     return flask.abort(404)
         try:
-            return flask.send_file(file.open(), as_attachment=True, download_name=file.original_file_name, last_modified=file.utc_datetime)
+            return send_file_content(file, as_attachment=True)
         except FederationFileNotAvailableError:
             flask.flash(_('File stored in other database is not available.'), 'error')
             return flask.abort(404)
@@ -18,15 +18,14 @@ from ... import logic
 from ... import models
 from ...logic import user_log, object_sorting
 from ...logic.instruments import get_instruments, get_instrument
-from ...logic.actions import get_action, Action
+from ...logic.actions import get_action
 from ...logic.action_types import get_action_type
 from ...logic.action_permissions import get_sorted_actions_for_user
 from ...logic.object_permissions import get_objects_with_permissions, get_object_info_with_permissions, ObjectInfo
-from ...logic.users import get_user, get_users, get_users_by_name, check_user_exists, User
+from ...logic.users import get_user, get_users, get_users_by_name, check_user_exists
 from ...logic.settings import get_user_settings, set_user_settings
 from ...logic.object_search import generate_filter_func, wrap_filter_func
 from ...logic.groups import get_group
-from ...logic.objects import get_object
 from ...logic.projects import get_project, get_user_project_permissions
 from ...logic.locations import get_location, get_object_ids_at_location
 from ...logic.location_permissions import get_locations_with_user_permissions
@@ -157,6 +156,9 @@ def objects() -> FlaskResponseT:
         pagination_offset = None
         pagination_enabled = True
         num_objects_found = len(db_objects)
+        num_objects_found_is_limited = False
+        previous_cursor = None
+        next_cursor = None
         sorting_enabled = False
         sorting_property_name = None
         sorting_order_name = None
@@ -430,7 +432,7 @@ def objects() -> FlaskResponseT:
         sorting_property_name = flask.request.args.get('sortby', None)
 
         if sorting_order is None:
-            if sorting_property_name is None:
+            if sorting_property_name is None or sorting_property_name == '_search_rank':
                 sorting_order_name = 'desc'
                 sorting_order = object_sorting.descending
             else:
@@ -446,11 +448,29 @@ def objects() -> FlaskResponseT:
             sorting_property = object_sorting.creation_date()
         elif sorting_property_name == '_last_modification_date':
             sorting_property = object_sorting.last_modification_date()
+        elif sorting_property_name == '_search_rank':
+            sorting_property = object_sorting.search_rank(flask.request.args.get('q', ''))
         else:
             sorting_property = object_sorting.property_value(sorting_property_name)
 
         sorting_function = sorting_order(sorting_property)
 
+        # keyset pagination, using cursors that are only valid for the current sorting
+        sorting_name = f'{sorting_property_name}:{sorting_order_name}'
+        pagination_after = None
+        pagination_before = None
+        if pagination_limit is not None:
+            if flask.request.args.get('after'):
+                pagination_after = object_sorting.decode_cursor(flask.request.args['after'], sorting_name)
+            elif flask.request.args.get('before'):
+                pagination_before = object_sorting.decode_cursor(flask.request.args['before'], sorting_name)
+            if pagination_after is not None or pagination_before is not None:
+                pagination_offset = None
+        previous_cursor = None
+        next_cursor = None
+        num_objects_found_is_limited = False
+        count_limit = flask.current_app.config['OBJECT_LIST_COUNT_LIMIT'] or None
+
         query_string = flask.request.args.get('q', '')
         if query_string:
             name_only = False
@@ -560,11 +580,14 @@ def objects() -> FlaskResponseT:
                 pagination_enabled = False
                 pagination_limit = None
                 pagination_offset = None
+                pagination_after = None
+                pagination_before = None
             if object_ids is not None and not object_ids:
                 db_objects = []
                 num_objects_found = 0
             else:
                 num_objects_found_list: typing.List[int] = []
+                cursors: typing.List[typing.Optional[typing.Tuple[typing.Any, int]]] = []
                 # do not actually filter by permissions for an administrator
                 # with GRANT permissions for all objects
                 if filter_user_id == flask_login.current_user.id and flask_login.current_user.has_admin_permissions:
@@ -600,9 +623,18 @@ def objects() -> FlaskResponseT:
                     anonymous_users_permissions=filter_anonymous_permissions,
                     object_ids=list(object_ids) if object_ids is not None else None,
                     num_objects_found=num_objects_found_list,
-                    name_only=name_only
+                    name_only=name_only,
+                    after=pagination_after,
+                    before=pagination_before,
+                    cursors=cursors,
+                    count_limit=count_limit
                 )
                 num_objects_found = num_objects_found_list[0]
+                num_objects_found_is_limited = count_limit is not None and num_objects_found >= count_limit
+                if cursors[0] is not None:
+                    previous_cursor = object_sorting.encode_cursor(cursors[0], sorting_name)
+                if cursors[1] is not None:
+                    next_cursor = object_sorting.encode_cursor(cursors[1], sorting_name)
         except Exception as exc:
             search_notes.append(('error', f"Error during search: {exc}", 0, 0))
             db_objects = []
@@ -611,34 +643,24 @@ def objects() -> FlaskResponseT:
             db_objects = []
             advanced_search_had_error = True
 
-    cached_actions: typing.Dict[typing.Optional[int], typing.Optional[Action]] = {None: None}
-    if all_actions:
-        for action in all_actions:
-            cached_actions[action.id] = action
-    cached_users: typing.Dict[typing.Optional[int], typing.Optional[User]] = {None: None}
+    object_list_context = logic.objects.load_object_list_context(
+        db_objects,
+        known_actions=all_actions
+    )
 
     objects: typing.List[typing.Dict[str, typing.Any]] = []
     for i, obj in enumerate(db_objects):
-        if obj.version_id == 0:
-            original_object = obj
-        else:
-            original_object = get_object(object_id=obj.object_id, version_id=0)
-        if obj.action_id is not None and obj.action_id not in cached_actions:
-            cached_actions[obj.action_id] = get_action(obj.action_id)
-        if obj.user_id is not None and obj.user_id not in cached_users:
-            cached_users[obj.user_id] = get_user(obj.user_id)
-        if original_object.user_id is not None and original_object.user_id not in cached_users:
-            cached_users[original_object.user_id] = get_user(original_object.user_id)
+        original_object = object_list_context.get_original_object(obj)
         objects.append({
             'object_id': obj.object_id,
-            'created_by': cached_users[original_object.user_id],
+            'created_by': object_list_context.get_user(original_object.user_id),
             'created_at': original_object.utc_datetime,
-            'modified_by': cached_users[obj.user_id],
+            'modified_by': object_list_context.get_user(obj.user_id),
             'last_modified_at': obj.utc_datetime,
             'data': obj.data,
             'schema': obj.schema,
             'name': obj.name,
-            'action': cached_actions[obj.action_id],
+            'action': object_list_context.get_action(obj.action_id),
             'fed_id': obj.fed_object_id,
             'component_id': obj.component_id,
             'display_properties': {},
@@ -646,7 +668,7 @@ def objects() -> FlaskResponseT:
             'eln_import_id': obj.eln_import_id,
             'eln_object_id': obj.eln_object_id,
             'eln_import': obj.eln_import,
-            'files': logic.files.get_files_for_object(obj.object_id),
+            'files': object_list_context.get_files(obj.object_id),
         })
 
         for property_name in display_properties:
@@ -1080,6 +1102,9 @@ def objects() -> FlaskResponseT:
         offset=pagination_offset,
         pagination_enabled=pagination_enabled,
         num_objects_found=num_objects_found,
+        num_objects_found_is_limited=num_objects_found_is_limited,
+        previous_cursor=previous_cursor,
+        next_cursor=next_cursor,
         get_user=get_user,
         get_location=get_location,
         get_component=get_component,
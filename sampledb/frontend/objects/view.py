@@ -1019,7 +1019,15 @@ def export_data(object_id: int) -> FlaskResponseT:
         pdf_data = pdfexport.create_pdfexport(object_ids, sections, lang_code)
         file_bytes = io.BytesIO(pdf_data)
     elif file_extension in logic.export.FILE_FORMATS:
-        file_bytes = io.BytesIO(logic.export.FILE_FORMATS[file_extension][1](flask_login.current_user.id, object_ids=object_ids))
+        # archives are streamed to avoid keeping all files in memory
+        return flask.Response(
+            flask.stream_with_context(logic.export.FILE_FORMATS[file_extension][1](flask_login.current_user.id, object_ids=object_ids)),
+            200,
+            headers={
+                'Content-Disposition': f'attachment; filename=sampledb_export{file_extension}',
+                'Content-Type': logic.export.FILE_FORMATS[file_extension][2]
+            }
+        )
     else:
         file_bytes = None
     if file_bytes:
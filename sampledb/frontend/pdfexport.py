@@ -38,7 +38,8 @@ SECTIONS = frozenset({
 def create_pdfexport(
         object_ids: typing.Sequence[int],
         sections: typing.Union[typing.Set[str], typing.FrozenSet[str]] = SECTIONS,
-        lang_code: str = 'en'
+        lang_code: str = 'en',
+        progress_callback: typing.Optional[typing.Callable[[int, int], None]] = None
 ) -> bytes:
     exported_files: typing.Dict[typing.Tuple[int, int], logic.files.File] = {}
 
@@ -82,7 +83,9 @@ def create_pdfexport(
         return typing.cast(typing.Dict[str, bytes], default_url_fetcher(url))
 
     objects = []
-    for object_id in object_ids:
+    for object_index, object_id in enumerate(object_ids):
+        if progress_callback is not None:
+            progress_callback(object_index, len(object_ids))
         object = get_object(object_id)
 
         activity_log_entries = []
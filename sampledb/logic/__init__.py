@@ -14,9 +14,11 @@ from . import background_tasks
 from . import comments
 from . import components
 from . import component_authentication
+from . import database_indexes
 from . import datatypes
 from . import dataverse_export
 from . import default_permissions
+from . import effective_object_permissions
 from . import eln_export
 from . import eln_import
 from . import errors
@@ -25,7 +27,9 @@ from . import favorites
 from . import federation
 from . import fed_logs
 from . import files
+from . import file_uploads
 from . import groups
+from . import indexed_properties
 from . import group_categories
 from . import instruments
 from . import instrument_log_entries
@@ -40,6 +44,7 @@ from . import markdown_to_html
 from . import notebook_templates
 from . import notifications
 from . import objects
+from . import object_changes
 from . import object_log
 from . import object_relationships
 from . import object_search
@@ -80,9 +85,11 @@ __all__ = [
     'authentication',
     'background_tasks',
     'comments',
+    'database_indexes',
     'datatypes',
     'dataverse_export',
     'default_permissions',
+    'effective_object_permissions',
     'eln_export',
     'eln_import',
     'errors',
@@ -93,8 +100,10 @@ __all__ = [
     'federation',
     'fed_logs',
     'files',
+    'file_uploads',
     'groups',
     'group_categories',
+    'indexed_properties',
     'instruments',
     'instrument_translations',
     'instrument_log_entries',
@@ -109,6 +118,7 @@ __all__ = [
     'notebook_templates',
     'notifications',
     'objects',
+    'object_changes',
     'object_log',
     'object_relationships',
     'object_search',
@@ -135,3 +145,4 @@ __all__ = [
 
 Objects._data_validator = validate
 Objects._schema_validator = validate_schema
+Objects._search_text_extractor = object_search.extract_search_texts
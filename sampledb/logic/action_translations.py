@@ -11,7 +11,7 @@ import typing
 from flask_babel import _
 
 from .. import db
-from . import errors, actions, languages
+from . import errors, actions, languages, object_changes
 from .languages import Language
 from .. import models
 
@@ -86,6 +86,7 @@ def set_action_translation(
         action_translation.description = description
         action_translation.short_description = short_description
     db.session.add(action_translation)
+    object_changes.record_entity_change('actions', action_id)
     db.session.commit()
     return ActionTranslation.from_database(action_translation)
 
@@ -206,4 +207,5 @@ def delete_action_translation(
         raise errors.ActionTranslationDoesNotExistError()
 
     db.session.delete(action_translation)
+    object_changes.record_entity_change('actions', action_id)
     db.session.commit()
@@ -10,7 +10,7 @@ import dataclasses
 import typing
 
 from .. import db
-from . import errors, languages, action_types
+from . import errors, languages, action_types, object_changes
 from ..logic.languages import Language
 from .. import models
 
@@ -139,6 +139,7 @@ def set_action_type_translation(
         action_type_translation.view_text = view_text
         action_type_translation.perform_text = perform_text
     db.session.add(action_type_translation)
+    object_changes.record_entity_change('action_types', action_type_id)
     db.session.commit()
     return ActionTypeTranslation.from_database(action_type_translation)
 
@@ -162,4 +163,5 @@ def delete_action_type_translation(
     if action_type_translation is None:
         raise errors.ActionTypeTranslationDoesNotExistError()
     db.session.delete(action_type_translation)
+    object_changes.record_entity_change('action_types', action_type_id)
     db.session.commit()
@@ -1,8 +1,8 @@
 import dataclasses
 import typing
 
-from . import errors, components
-from .utils import cache
+from . import errors, components, object_changes
+from .utils import cache, request_cache
 from .. import db, models
 from ..models import SciCatExportType
 
@@ -115,6 +115,25 @@ def check_action_type_exists(
         raise errors.ActionTypeDoesNotExistError()
 
 
+def get_action_types_by_ids(action_type_ids: typing.Iterable[int]) -> typing.Dict[int, ActionType]:
+    """
+    Returns the action types with the given action type IDs.
+
+    Action type IDs that do not belong to an existing action type are ignored.
+
+    :param action_type_ids: the IDs of action types
+    :return: a dict mapping action type IDs to the action types
+    """
+    action_type_ids = set(action_type_ids)
+    if not action_type_ids:
+        return {}
+    return {
+        action_type.id: ActionType.from_database(action_type)
+        for action_type in models.ActionType.query.filter(models.ActionType.id.in_(action_type_ids)).all()
+    }
+
+
+@request_cache
 def get_action_type(action_type_id: int, component_id: typing.Optional[int] = None) -> ActionType:
     """
     Returns the action type with the given action type ID or composite federation ID.
@@ -137,6 +156,7 @@ def get_action_type(action_type_id: int, component_id: typing.Optional[int] = No
     return ActionType.from_database(action_type)
 
 
+@request_cache
 def get_action_types(
         filter_fed_defaults: bool = False
 ) -> typing.List[ActionType]:
@@ -369,6 +389,7 @@ def update_action_type(
     ]
     action_type.scicat_export_type = scicat_export_type
     db.session.add(action_type)
+    object_changes.record_entity_change('action_types', action_type_id)
     db.session.commit()
     return ActionType.from_database(action_type)
 
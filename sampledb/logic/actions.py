@@ -25,8 +25,8 @@ import typing
 
 from .. import db
 from .. import models
-from . import errors, instruments, users, schemas, components, topics, favorites
-from .utils import cache, get_translated_text
+from . import errors, instruments, users, schemas, components, topics, favorites, object_changes
+from .utils import cache, get_translated_text, request_cache
 from .action_types import check_action_type_exists, ActionType
 
 
@@ -255,6 +255,35 @@ def get_actions(
     ]
 
 
+def get_actions_by_ids(action_ids: typing.Iterable[int]) -> typing.Dict[int, Action]:
+    """
+    Returns the actions with the given action IDs.
+
+    The actions and their related instruments, components and topics are
+    loaded using a fixed number of queries. Action IDs that do not belong to
+    an existing action are ignored.
+
+    :param action_ids: the IDs of actions
+    :return: a dict mapping action IDs to the actions
+    """
+    action_ids = set(action_ids)
+    if not action_ids:
+        return {}
+    actions = models.Action.query.filter(
+        models.Action.id.in_(action_ids)
+    ).options(
+        db.selectinload(models.Action.component),
+        db.selectinload(models.Action.topics),
+        db.selectinload(models.Action.instrument).selectinload(models.Instrument.component),
+        db.selectinload(models.Action.instrument).selectinload(models.Instrument.location),
+        db.selectinload(models.Action.instrument).selectinload(models.Instrument.topics),
+    ).all()
+    return {
+        action.id: Action.from_database(action)
+        for action in actions
+    }
+
+
 @cache
 def check_action_exists(
         action_id: int
@@ -313,6 +342,7 @@ def get_mutable_action(
     return action
 
 
+@request_cache
 def get_action(
         action_id: int,
         component_id: typing.Optional[int] = None
@@ -378,6 +408,7 @@ def update_action(
         if action.instrument_id is not None or use_instrument_topics is False:
             action.use_instrument_topics = use_instrument_topics
     db.session.add(action)
+    object_changes.record_entity_change('actions', action_id)
     db.session.commit()
     update_actions_using_template_action(action_id)
 
@@ -393,7 +424,7 @@ def update_actions_using_template_action(
     template_action_schema = get_action(template_action_id).schema
     if template_action_schema is None:
         return
-    template_action_schema = schemas.templates.process_template_action_schema(template_action_schema)
+    template_action_schema = schemas.templates.process_template_action_schema(copy.deepcopy(template_action_schema))
     actions = get_actions()
     updated_template_action_ids = []
     for action in actions:
@@ -411,6 +442,7 @@ def update_actions_using_template_action(
             mutable_action = get_mutable_action(action.id)
             mutable_action.schema = updated_schema
             db.session.add(mutable_action)
+            object_changes.record_entity_change('actions', action.id)
             if action.type is not None and action.type.is_template:
                 updated_template_action_ids.append(action.id)
     db.session.commit()
@@ -1,15 +1,81 @@
 # coding: utf-8
 """
+Logic module for the API log
 
+Each request authenticated with an API token creates a log entry. To keep
+the database round trip and commit out of the request, log entries are
+buffered in a bounded in-process queue by default and written in batches by
+a background thread, either when API_LOG_FLUSH_SIZE entries are pending or
+after API_LOG_FLUSH_INTERVAL seconds. If the queue is full, further entries
+are dropped and counted. Pending entries are written when the process exits.
+The queue, the writer thread and the counters are kept per app, and the
+counters are included in the background task metrics.
+
+For deployments that require every request to be logged before it is
+answered, the ENABLE_BUFFERED_API_LOG configuration value can be set to False
+to write each log entry synchronously instead.
 """
 
+import atexit
+import dataclasses
 import datetime
+import queue
+import threading
 import typing
-from ..models import APILogEntry, HTTPMethod
+
+import flask
+import sqlalchemy.exc
+
+from ..models import APILogEntry, Authentication, HTTPMethod
 from .. import db
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
+# maximum number of log entries waiting to be written
+API_LOG_QUEUE_SIZE = 10000
+# number of pending log entries that triggers writing them
+API_LOG_FLUSH_SIZE = 500
+# maximum time in seconds that a log entry waits before being written
+API_LOG_FLUSH_INTERVAL = 1.0
+
+
+@dataclasses.dataclass(frozen=True)
+class LogWriterStatistics:
+    """
+    Counters of the buffered API log writer of this process.
+    """
+    num_pending_log_entries: int
+    num_flushed_log_entries: int
+    num_dropped_log_entries: int
+    num_failed_flushes: int
+
+
+class _LogWriter:
+    """
+    The buffer and writer thread for the API log entries of an app.
+    """
+
+    def __init__(self) -> None:
+        self.log_entry_queue: 'queue.Queue[typing.Dict[str, typing.Any]]' = queue.Queue(maxsize=API_LOG_QUEUE_SIZE)
+        self.wake_event = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.writer_lock = threading.Lock()
+        self.writer_thread: typing.Optional[threading.Thread] = None
+        self.should_stop = False
+        self.is_stopped_at_exit = False
+        self.num_flushed_log_entries = 0
+        self.num_dropped_log_entries = 0
+        self.num_failed_flushes = 0
+
+
+def _get_log_writer(app: typing.Optional[flask.Flask] = None) -> _LogWriter:
+    if app is None:
+        app = flask.current_app
+    log_writer = app.extensions.get('sampledb_api_log_writer')
+    if log_writer is None:
+        log_writer = app.extensions.setdefault('sampledb_api_log_writer', _LogWriter())
+    return typing.cast(_LogWriter, log_writer)
+
 
 def get_api_log_entries(api_token_id: int) -> typing.List[APILogEntry]:
     """
@@ -18,6 +84,8 @@ def get_api_log_entries(api_token_id: int) -> typing.List[APILogEntry]:
     :param api_token_id: the ID of an existing API token
     :return: a list of API log entries for this token
     """
+    # include entries still buffered by this process
+    flush_log_entries()
     return APILogEntry.query.filter_by(api_token_id=api_token_id).order_by(db.desc(APILogEntry.utc_datetime)).all()
 
 
@@ -29,15 +97,179 @@ def create_log_entry(
     """
     Create a new API log entry.
 
+    If the buffered API log is enabled, the entry will be written by a
+    background thread.
+
     :param api_token_id: the ID of an existing API token
     :param method: the HTTP method
     :param route: the route
     """
-    api_log_entry = APILogEntry(
-        api_token_id=api_token_id,
-        method=method,
-        route=route,
-        utc_datetime=datetime.datetime.now(datetime.timezone.utc)
+    utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    if not flask.current_app.config['ENABLE_BUFFERED_API_LOG']:
+        api_log_entry = APILogEntry(
+            api_token_id=api_token_id,
+            method=method,
+            route=route,
+            utc_datetime=utc_datetime
+        )
+        db.session.add(api_log_entry)
+        db.session.commit()
+        return
+    log_writer = _get_log_writer()
+    _start_writer_thread(flask.current_app)
+    try:
+        log_writer.log_entry_queue.put_nowait({
+            'api_token_id': api_token_id,
+            'method': method,
+            'route': route,
+            'utc_datetime': utc_datetime
+        })
+    except queue.Full:
+        log_writer.num_dropped_log_entries += 1
+    if log_writer.log_entry_queue.qsize() >= API_LOG_FLUSH_SIZE:
+        log_writer.wake_event.set()
+
+
+def flush_log_entries() -> int:
+    """
+    Write all log entries buffered by this process.
+
+    Entries for API tokens which have been deleted in the meantime are
+    dropped.
+
+    :return: the number of written log entries
+    """
+    log_writer = _get_log_writer()
+    with log_writer.flush_lock:
+        log_entries = []
+        while True:
+            try:
+                log_entries.append(log_writer.log_entry_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not log_entries:
+            return 0
+        num_log_entries = len(log_entries)
+        try:
+            try:
+                _insert_log_entries(log_entries)
+            except sqlalchemy.exc.IntegrityError:
+                # an API token might have been deleted after its use was logged
+                log_entries = _filter_log_entries_for_existing_api_tokens(log_entries)
+                if log_entries:
+                    _insert_log_entries(log_entries)
+        except Exception:
+            log_writer.num_dropped_log_entries += num_log_entries
+            log_writer.num_failed_flushes += 1
+            raise
+        log_writer.num_dropped_log_entries += num_log_entries - len(log_entries)
+        log_writer.num_flushed_log_entries += len(log_entries)
+        return len(log_entries)
+
+
+def _filter_log_entries_for_existing_api_tokens(
+        log_entries: typing.List[typing.Dict[str, typing.Any]]
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    api_token_ids = {log_entry['api_token_id'] for log_entry in log_entries}
+    with db.engine.connect() as connection:
+        existing_api_token_ids = set(connection.execute(
+            db.select(Authentication.id).where(Authentication.id.in_(api_token_ids))
+        ).scalars())
+    return [
+        log_entry
+        for log_entry in log_entries
+        if log_entry['api_token_id'] in existing_api_token_ids
+    ]
+
+
+def _insert_log_entries(log_entries: typing.List[typing.Dict[str, typing.Any]]) -> None:
+    # use a separate connection, so that the session of the current request is not committed
+    with db.engine.begin() as connection:
+        connection.execute(db.insert(APILogEntry.__table__), log_entries)
+
+
+def get_log_writer_statistics() -> LogWriterStatistics:
+    """
+    Return the counters of the buffered API log writer of this process.
+
+    :return: the log writer statistics
+    """
+    log_writer = _get_log_writer()
+    return LogWriterStatistics(
+        num_pending_log_entries=log_writer.log_entry_queue.qsize(),
+        num_flushed_log_entries=log_writer.num_flushed_log_entries,
+        num_dropped_log_entries=log_writer.num_dropped_log_entries,
+        num_failed_flushes=log_writer.num_failed_flushes
     )
-    db.session.add(api_log_entry)
-    db.session.commit()
+
+
+def get_log_writer_statistics_as_prometheus_text() -> str:
+    """
+    Return the counters of the buffered API log writer of this process in
+    the Prometheus text format.
+
+    :return: the counters as text
+    """
+    statistics = get_log_writer_statistics()
+    lines = []
+    for name, metric_type, description, value in [
+        ('sampledb_api_log_entries_pending', 'gauge', 'Number of API log entries waiting to be written by this process.', statistics.num_pending_log_entries),
+        ('sampledb_api_log_entries_flushed_total', 'counter', 'Number of API log entries written by this process.', statistics.num_flushed_log_entries),
+        ('sampledb_api_log_entries_dropped_total', 'counter', 'Number of API log entries dropped by this process, as the queue was full, their API token was deleted or writing them failed.', statistics.num_dropped_log_entries),
+        ('sampledb_api_log_flushes_failed_total', 'counter', 'Number of failed attempts of this process to write buffered API log entries.', statistics.num_failed_flushes),
+    ]:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.append(f'{name} {float(value)!r}')
+    return '\n'.join(lines) + '\n'
+
+
+def _start_writer_thread(app: flask.Flask) -> None:
+    # get actual app instead of thread local proxy from this thread to pass it to the new thread
+    get_current_app = getattr(app, '_get_current_object', None)
+    if get_current_app is not None:
+        app = get_current_app()
+    log_writer = _get_log_writer(app)
+    if log_writer.writer_thread is not None and log_writer.writer_thread.is_alive():
+        return
+    with log_writer.writer_lock:
+        if log_writer.writer_thread is not None and log_writer.writer_thread.is_alive():
+            return
+        log_writer.should_stop = False
+        log_writer.writer_thread = threading.Thread(target=_write_log_entries, args=[app, log_writer], daemon=True)
+        log_writer.writer_thread.start()
+        if not log_writer.is_stopped_at_exit:
+            # write pending entries when the process exits, as the daemon thread will not be joined
+            atexit.register(stop_writer_thread, app)
+            log_writer.is_stopped_at_exit = True
+
+
+def stop_writer_thread(app: flask.Flask) -> None:
+    """
+    Stop the buffered API log writer thread of an app after writing all
+    pending entries.
+
+    :param app: the Flask app
+    """
+    log_writer = _get_log_writer(app)
+    writer_thread = log_writer.writer_thread
+    if writer_thread is None:
+        return
+    log_writer.should_stop = True
+    log_writer.wake_event.set()
+    writer_thread.join()
+
+
+def _write_log_entries(app: flask.Flask, log_writer: _LogWriter) -> None:
+    with app.app_context():
+        while True:
+            log_writer.wake_event.wait(API_LOG_FLUSH_INTERVAL)
+            log_writer.wake_event.clear()
+            try:
+                flush_log_entries()
+            except Exception:
+                # the entries of a failed flush are dropped and counted, but
+                # later entries should still be written
+                app.logger.exception("Failed to write buffered API log entries")
+            if log_writer.should_stop:
+                return
@@ -1,19 +1,23 @@
 import base64
 import datetime
 import functools
+import hashlib
+import hmac
 import secrets
+import time
 import typing
 import urllib.parse
 
 import bcrypt
 import flask
 import fido2.features
+import sqlalchemy.exc
 from fido2.server import Fido2Server
 from fido2.webauthn import AttestationConveyancePreference, PublicKeyCredentialRpEntity, AttestedCredentialData
 
 from .. import logic, db
 from .ldap import validate_user, create_user_from_ldap, is_ldap_configured
-from ..models import Authentication, AuthenticationType, TwoFactorAuthenticationMethod, HTTPMethod
+from ..models import Authentication, AuthenticationType, TwoFactorAuthenticationMethod, HTTPMethod, APILogEntry
 from . import errors, api_log
 
 # enable JSON mapping for webauthn options
@@ -25,6 +29,19 @@ fido2.features.webauthn_json_mapping.enabled = True
 # overriding this in tests
 NUM_BCYRPT_ROUNDS = 12
 
+# maximum number of entries in the verified credentials cache
+MAX_VERIFIED_CREDENTIALS_CACHE_SIZE = 10000
+
+# Verifying a password, API token or refresh token with bcrypt is slow by
+# design, so verified credentials are cached for API_AUTHENTICATION_CACHE_TIME
+# seconds. The cache maps a keyed digest of the credentials to the ID of the
+# authentication method and the bcrypt hash they were verified against. As the
+# authentication method is still loaded for each request, a cached entry is
+# only used while the authentication method exists with the same hash, so
+# revoked tokens and changed passwords are rejected immediately, even by other
+# processes.
+_verified_credentials_cache: typing.Dict[str, typing.Tuple[float, int, str]] = {}
+
 
 def _hash_password(password: str) -> str:
     return str(bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=NUM_BCYRPT_ROUNDS)).decode('utf-8'))
@@ -34,9 +51,76 @@ def _validate_password_hash(password: str, password_hash: str) -> bool:
     return bool(bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')))
 
 
+def _get_credentials_digest(*credentials: str) -> str:
+    return hmac.new(
+        flask.current_app.config['SECRET_KEY'].encode('utf-8'),
+        '\0'.join(credentials).encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def _validate_password_hash_cached(
+        password: str,
+        password_hash: str,
+        credentials_digest: str,
+        authentication_method_id: int
+) -> bool:
+    """
+    Validate a password against a bcrypt hash, using the verified credentials cache.
+
+    :param password: the password, API token or refresh token to validate
+    :param password_hash: the bcrypt hash of the authentication method
+    :param credentials_digest: the keyed digest of the credentials
+    :param authentication_method_id: the ID of the authentication method
+    :return: whether the password is valid
+    """
+    cache_time = flask.current_app.config['API_AUTHENTICATION_CACHE_TIME']
+    current_time = time.monotonic()
+    cache_entry = _verified_credentials_cache.get(credentials_digest)
+    if cache_entry is not None:
+        expiration_time, cached_authentication_method_id, cached_password_hash = cache_entry
+        if expiration_time > current_time and cached_authentication_method_id == authentication_method_id and hmac.compare_digest(cached_password_hash, password_hash):
+            return True
+        _verified_credentials_cache.pop(credentials_digest, None)
+    if not _validate_password_hash(password, password_hash):
+        return False
+    if cache_time > 0:
+        if len(_verified_credentials_cache) >= MAX_VERIFIED_CREDENTIALS_CACHE_SIZE:
+            _remove_expired_verified_credentials(current_time)
+        if len(_verified_credentials_cache) < MAX_VERIFIED_CREDENTIALS_CACHE_SIZE:
+            _verified_credentials_cache[credentials_digest] = (current_time + cache_time, authentication_method_id, password_hash)
+    return True
+
+
+def _remove_expired_verified_credentials(current_time: float) -> None:
+    for credentials_digest, (expiration_time, _, _) in list(_verified_credentials_cache.items()):
+        if expiration_time <= current_time:
+            _verified_credentials_cache.pop(credentials_digest, None)
+
+
+def invalidate_verified_credentials(authentication_method_id: typing.Optional[int] = None) -> None:
+    """
+    Remove verified credentials from the cache of this process.
+
+    :param authentication_method_id: the ID of an authentication method to
+        remove the credentials for, or None to clear the whole cache
+    """
+    if authentication_method_id is None:
+        _verified_credentials_cache.clear()
+        return
+    for credentials_digest, (_, cached_authentication_method_id, _) in list(_verified_credentials_cache.items()):
+        if cached_authentication_method_id == authentication_method_id:
+            _verified_credentials_cache.pop(credentials_digest, None)
+
+
 def _validate_password_authentication(authentication_method: Authentication, password: str) -> bool:
     password_hash = authentication_method.login['bcrypt_hash']
-    return _validate_password_hash(password, password_hash)
+    return _validate_password_hash_cached(
+        password,
+        password_hash,
+        _get_credentials_digest(authentication_method.type.name, authentication_method.login['login'], password),
+        authentication_method.id
+    )
 
 
 def _add_password_authentication(user_id: int, login: str, password: str, authentication_type: AuthenticationType, confirmed: bool = True) -> None:
@@ -127,12 +211,20 @@ def add_api_token(user_id: int, api_token: str, description: str) -> None:
     :param user_id: the ID of an existing user
     :param api_token: the api token as a 64 character string
     :param description: a description for the token
+    :raise errors.AuthenticationMethodAlreadyExists: when an API token with
+        the same identification part already exists
     """
 
     assert len(api_token) == 64
     api_token = api_token.lower()
     # split into a short part (8 hex digits / 4 bytes) for identification and a long part for authentication
     login, password = api_token[:8], api_token[8:]
+    # the identification part is unique, so that only one bcrypt hash has to be checked when authenticating
+    if Authentication.query.filter(
+        Authentication.login['login'].astext == login,
+        Authentication.type == AuthenticationType.API_TOKEN
+    ).first() is not None:
+        raise errors.AuthenticationMethodAlreadyExists()
     authentication = Authentication(
         login={
             'login': login,
@@ -144,7 +236,12 @@ def add_api_token(user_id: int, api_token: str, description: str) -> None:
         user_id=user_id
     )
     db.session.add(authentication)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except sqlalchemy.exc.IntegrityError:
+        # another API token with the same identification part has been added concurrently
+        db.session.rollback()
+        raise errors.AuthenticationMethodAlreadyExists()
 
 
 def add_fido2_passkey(user_id: int, credential_data: AttestedCredentialData, description: str) -> None:
@@ -335,23 +432,40 @@ def generate_api_access_token(
     }
 
 
-def remove_expired_api_access_tokens() -> None:
+def remove_expired_api_access_tokens() -> int:
     """
-    Delete all expired API access tokens.
+    Delete all expired API access tokens and their API log entries.
+
+    :return: the number of deleted API access tokens
     """
-    authentication_methods = Authentication.query.filter_by(
-        type=AuthenticationType.API_ACCESS_TOKEN
-    ).all()
-    current_utc_datetime = datetime.datetime.now(datetime.timezone.utc)
-    for authentication_method in authentication_methods:
-        expiration_utc_datetime_str = authentication_method.login['expiration_utc_datetime']
-        expiration_utc_datetime = datetime.datetime.strptime(
-            expiration_utc_datetime_str,
-            '%Y-%m-%d %H:%M:%S'
-        ).replace(tzinfo=datetime.timezone.utc)
-        if expiration_utc_datetime <= current_utc_datetime:
-            db.session.delete(authentication_method)
+    expired_api_access_token_ids = db.session.execute(
+        db.select(Authentication.id).where(
+            Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+            _api_access_token_expired_clause()
+        )
+    ).scalars().all()
+    if not expired_api_access_token_ids:
+        return 0
+    db.session.execute(
+        db.delete(APILogEntry).where(APILogEntry.api_token_id.in_(expired_api_access_token_ids))
+    )
+    db.session.execute(
+        db.delete(Authentication).where(Authentication.id.in_(expired_api_access_token_ids))
+    )
     db.session.commit()
+    for authentication_method_id in expired_api_access_token_ids:
+        invalidate_verified_credentials(authentication_method_id)
+    return len(expired_api_access_token_ids)
+
+
+def _api_access_token_expired_clause(
+        current_utc_datetime: typing.Optional[datetime.datetime] = None
+) -> typing.Any:
+    if current_utc_datetime is None:
+        current_utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    # expiration datetimes are stored as zero-padded strings, so that they
+    # can be compared lexicographically
+    return Authentication.login['expiration_utc_datetime'].astext <= current_utc_datetime.strftime('%Y-%m-%d %H:%M:%S')
 
 
 def refresh_api_access_token(api_refresh_token: str) -> typing.Optional[typing.Dict[str, str]]:
@@ -361,22 +475,27 @@ def refresh_api_access_token(api_refresh_token: str) -> typing.Optional[typing.D
     :param api_refresh_token: the refresh token
     :return: a dict containing the new access token information
     """
-    remove_expired_api_access_tokens()
+    if not flask.current_app.config['ENABLE_BACKGROUND_TASKS']:
+        # without background tasks, expired tokens are not removed periodically
+        remove_expired_api_access_tokens()
     api_refresh_token = api_refresh_token.lower().strip()
     refresh_token_login, refresh_token_password = api_refresh_token[:8], api_refresh_token[8:]
     authentication_methods = Authentication.query.filter(
         db.and_(
             Authentication.login['refresh_token_login'].astext == refresh_token_login,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+            db.not_(_api_access_token_expired_clause())
         )
     ).all()
     expiration_utc_datetime = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
     expiration_utc_datetime_str = expiration_utc_datetime.strftime('%Y-%m-%d %H:%M:%S')
 
+    credentials_digest = _get_credentials_digest('refresh_token', api_refresh_token)
     for authentication_method in authentication_methods:
         if not authentication_method.confirmed:
             continue
-        if _validate_password_hash(refresh_token_password, authentication_method.login['refresh_token_hash']):
+        if _validate_password_hash_cached(refresh_token_password, authentication_method.login['refresh_token_hash'], credentials_digest, authentication_method.id):
+            invalidate_verified_credentials(authentication_method.id)
             new_access_token = secrets.token_hex(32)
             new_refresh_token = secrets.token_hex(32)
             refresh_token_login, refresh_token_password = new_refresh_token[:8], new_refresh_token[8:]
@@ -408,20 +527,21 @@ def login_via_api_access_token(api_access_token: str) -> typing.Optional[logic.u
     """
     # convert to lower case to enforce case insensitivity
     api_access_token = api_access_token.lower().strip()
-    remove_expired_api_access_tokens()
-    authentication_methods = Authentication.query.filter(
+    # expired tokens are removed periodically, so they are filtered out here
+    authentication_method = Authentication.query.filter(
         db.and_(
             Authentication.login['access_token'].astext == api_access_token,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            db.not_(_api_access_token_expired_clause()),
+            Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+            Authentication.confirmed.is_(True)
         )
-    ).all()
-
-    for authentication_method in authentication_methods:
-        if not authentication_method.confirmed:
-            continue
-        api_log.create_log_entry(authentication_method.id, HTTPMethod.from_name(flask.request.method), flask.request.path)
-        return logic.users.User.from_database(authentication_method.user)
-    return None
+    ).options(
+        db.joinedload(Authentication.user)
+    ).first()
+    if authentication_method is None:
+        return None
+    api_log.create_log_entry(authentication_method.id, HTTPMethod.from_name(flask.request.method), flask.request.path)
+    return logic.users.User.from_database(authentication_method.user)
 
 
 def login_via_api_refresh_token(api_refresh_token: str) -> typing.Optional[logic.users.User]:
@@ -434,18 +554,19 @@ def login_via_api_refresh_token(api_refresh_token: str) -> typing.Optional[logic
     # convert to lower case to enforce case insensitivity
     api_refresh_token = api_refresh_token.lower().strip()
     refresh_token_login, refresh_token_password = api_refresh_token[:8], api_refresh_token[8:]
-    remove_expired_api_access_tokens()
     authentication_methods = Authentication.query.filter(
         db.and_(
             Authentication.login['refresh_token_login'].astext == refresh_token_login,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+            db.not_(_api_access_token_expired_clause())
         )
     ).all()
 
+    credentials_digest = _get_credentials_digest('refresh_token', api_refresh_token)
     for authentication_method in authentication_methods:
         if not authentication_method.confirmed:
             continue
-        if _validate_password_hash(refresh_token_password, authentication_method.login['refresh_token_hash']):
+        if _validate_password_hash_cached(refresh_token_password, authentication_method.login['refresh_token_hash'], credentials_digest, authentication_method.id):
             api_log.create_log_entry(authentication_method.id, HTTPMethod.from_name(flask.request.method), flask.request.path)
             return logic.users.User.from_database(authentication_method.user)
     return None
@@ -496,6 +617,7 @@ def remove_authentication_method(authentication_method_id: int) -> bool:
         authentication_methods_count = Authentication.query.filter(Authentication.user_id == authentication_method.user_id, Authentication.type != AuthenticationType.API_TOKEN, Authentication.type != AuthenticationType.API_ACCESS_TOKEN).count()
         if authentication_methods_count <= 1:
             raise errors.OnlyOneAuthenticationMethod('one authentication-method must at least exist, delete not possible')
+    invalidate_verified_credentials(authentication_method.id)
     db.session.delete(authentication_method)
     db.session.commit()
     return True
@@ -518,6 +640,7 @@ def change_password_in_authentication_method(authentication_method_id: int, pass
         return False
     if authentication_method.type not in {AuthenticationType.EMAIL, AuthenticationType.OTHER}:
         return False
+    invalidate_verified_credentials(authentication_method.id)
     authentication_method.login = {'login': authentication_method.login['login'], 'bcrypt_hash': _hash_password(password)}
     db.session.add(authentication_method)
     db.session.commit()
@@ -2,16 +2,22 @@
 from . import core
 from . import send_mail
 from . import background_dataverse_export
+from . import background_export
+from . import metrics
 from .core import start_handler_threads, stop_handler_threads, post_background_task, get_background_tasks, get_background_task_result
 from .send_mail import post_send_mail_task
 from .background_dataverse_export import post_dataverse_export_task
+from .background_export import post_export_task, post_pdfexport_task
 from .poke_components import post_poke_components_task
+from .remove_expired_api_access_tokens import post_remove_expired_api_access_tokens_task
 from .trigger_webhooks import post_trigger_object_log_webhooks
 
 __all__ = [
     'core',
     'send_mail',
     'background_dataverse_export',
+    'background_export',
+    'metrics',
     'post_send_mail_task',
     'start_handler_threads',
     'stop_handler_threads',
@@ -19,6 +25,9 @@ __all__ = [
     'get_background_tasks',
     'get_background_task_result',
     'post_dataverse_export_task',
+    'post_export_task',
+    'post_pdfexport_task',
     'post_poke_components_task',
+    'post_remove_expired_api_access_tokens_task',
     'post_trigger_object_log_webhooks',
 ]
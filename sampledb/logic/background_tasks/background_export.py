@@ -0,0 +1,284 @@
+import contextlib
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import typing
+
+import flask
+import flask_login
+
+from . import core
+from ... import logic
+from ...models import BackgroundTask, BackgroundTaskStatus, Permissions
+from ... import db
+
+# minimum time in seconds between two progress updates of a running task
+PROGRESS_UPDATE_INTERVAL = 5
+
+
+def post_export_task(
+        user_id: int,
+        requesting_user_id: int,
+        file_extension: str,
+        base_url: str
+) -> typing.Tuple[BackgroundTaskStatus, typing.Optional[BackgroundTask]]:
+    """
+    Post a task to create an export archive of all objects a user can read.
+
+    :param user_id: the ID of the user whose readable objects should be exported
+    :param requesting_user_id: the ID of the user who requested the export
+    :param file_extension: the file extension of an archive format in
+        logic.export.FILE_FORMATS
+    :param base_url: the URL root used for building external URLs
+    :return: the task status and the task object itself
+    """
+    return core.post_background_task(
+        type='export',
+        data={
+            'user_id': user_id,
+            'requesting_user_id': requesting_user_id,
+            'file_extension': file_extension,
+            'base_url': base_url
+        },
+        auto_delete=False
+    )
+
+
+def post_pdfexport_task(
+        user_id: int,
+        requesting_user_id: int,
+        base_url: str,
+        lang_code: str = 'en'
+) -> typing.Tuple[BackgroundTaskStatus, typing.Optional[BackgroundTask]]:
+    """
+    Post a task to create a PDF export of all objects a user can read.
+
+    :param user_id: the ID of the user whose readable objects should be exported
+    :param requesting_user_id: the ID of the user who requested the export
+    :param base_url: the URL root used for building external URLs
+    :param lang_code: the language code for the metadata in the PDF file
+    :return: the task status and the task object itself
+    """
+    return core.post_background_task(
+        type='pdfexport',
+        data={
+            'user_id': user_id,
+            'requesting_user_id': requesting_user_id,
+            'base_url': base_url,
+            'lang_code': lang_code
+        },
+        auto_delete=False
+    )
+
+
+def get_export_directory() -> str:
+    """
+    Return the directory that the results of export tasks are stored in.
+
+    :return: the absolute path of the directory
+    """
+    directory = flask.current_app.config['EXPORT_DIRECTORY']
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), 'sampledb_exports')
+    return os.path.abspath(str(directory))
+
+
+def get_export_result_path(task_id: int) -> typing.Optional[str]:
+    """
+    Return the path of the file created by a finished export or pdfexport task.
+
+    :param task_id: the ID of an export or pdfexport task
+    :return: the absolute path of the file or None, if it does not exist (anymore)
+    """
+    task = BackgroundTask.query.filter_by(id=task_id).first()
+    if task is None or task.type not in ('export', 'pdfexport') or not task.result or 'file_path' not in task.result:
+        return None
+    export_directory = get_export_directory()
+    file_path = os.path.abspath(str(task.result['file_path']))
+    if os.path.commonpath([export_directory, file_path]) != export_directory or not os.path.isfile(file_path):
+        return None
+    return file_path
+
+
+def delete_expired_export_files() -> None:
+    """
+    Delete the results of export tasks which have expired.
+
+    Results expire after the time limit for temporary files, just like the
+    export tasks themselves.
+    """
+    export_directory = get_export_directory()
+    if not os.path.isdir(export_directory):
+        return
+    expiration_time = time.time() - flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT']
+    for entry in os.scandir(export_directory):
+        if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < expiration_time:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def handle_export_task(
+        data: typing.Dict[str, typing.Any],
+        task_id: typing.Optional[int]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    file_extension: str = data['file_extension']
+    if file_extension not in logic.export.FILE_FORMATS:
+        return _set_export_task_failed(task_id, 'Unknown export format.')
+    file_format_info = logic.export.FILE_FORMATS[file_extension]
+    progress_reporter = _ProgressReporter(task_id)
+    with _export_request_context(data):
+        return _store_export_result(
+            task_id,
+            f'sampledb_export{file_extension}',
+            file_format_info[2],
+            _report_written_bytes(file_format_info[1](data['user_id']), progress_reporter)
+        )
+
+
+def _report_written_bytes(
+        chunks: typing.Iterable[bytes],
+        progress_reporter: '_ProgressReporter'
+) -> typing.Iterator[bytes]:
+    written_bytes = 0
+    for chunk in chunks:
+        yield chunk
+        written_bytes += len(chunk)
+        progress_reporter.update({'written_bytes': written_bytes})
+
+
+def handle_pdfexport_task(
+        data: typing.Dict[str, typing.Any],
+        task_id: typing.Optional[int]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    # the PDF export relies on the frontend templates
+    from ...frontend.pdfexport import create_pdfexport
+
+    progress_reporter = _ProgressReporter(task_id)
+    with _export_request_context(data):
+        object_ids = sorted(
+            object.id
+            for object in logic.object_permissions.get_objects_with_permissions(data['user_id'], Permissions.READ)
+        )
+        binary_data = create_pdfexport(
+            object_ids,
+            lang_code=data.get('lang_code', 'en'),
+            progress_callback=lambda processed_objects, total_objects: progress_reporter.update({
+                'processed_objects': processed_objects,
+                'total_objects': total_objects
+            })
+        )
+    return _store_export_result(task_id, 'sampledb_export.pdf', 'application/pdf', [binary_data])
+
+
+class _ProgressReporter:
+    """
+    Helper for storing the progress of a running task in its result.
+
+    Updates are written using a separate connection, so that the session used
+    by the export itself is not committed, and are limited to one update per
+    PROGRESS_UPDATE_INTERVAL seconds.
+    """
+
+    def __init__(self, task_id: typing.Optional[int]) -> None:
+        self.task_id = task_id
+        self.last_update_time = time.monotonic()
+
+    def update(self, progress: typing.Dict[str, typing.Any]) -> None:
+        if self.task_id is None:
+            return
+        now = time.monotonic()
+        if now - self.last_update_time < PROGRESS_UPDATE_INTERVAL:
+            return
+        self.last_update_time = now
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    db.update(BackgroundTask).where(BackgroundTask.id == self.task_id).values(result={'progress': progress})
+                )
+        except Exception:
+            # progress information is optional, so the export can continue
+            pass
+
+
+@contextlib.contextmanager
+def _export_request_context(data: typing.Dict[str, typing.Any]) -> typing.Iterator[None]:
+    """
+    Perform an export in a request context as the requesting user.
+
+    Exports contain external URLs and, in case of PDF exports, rendered
+    templates, so they require a request context even when they are performed
+    in a background task.
+    """
+    with flask.current_app.test_request_context('/', base_url=data['base_url']):
+        try:
+            flask_login.login_user(logic.users.get_user(data['requesting_user_id']))
+            yield
+        finally:
+            # the handler thread's app context and its g outlive the request context
+            logic.utils.clear_request_cache()
+
+
+def _store_export_result(
+        task_id: typing.Optional[int],
+        file_name: str,
+        mime_type: str,
+        chunks: typing.Iterable[bytes]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    # clean up the results of previous exports
+    delete_expired_export_files()
+    export_directory = get_export_directory()
+    os.makedirs(export_directory, exist_ok=True)
+    if task_id is not None:
+        result_directory = os.path.join(export_directory, str(task_id))
+        os.makedirs(result_directory, exist_ok=True)
+    else:
+        result_directory = tempfile.mkdtemp(dir=export_directory, prefix='export_')
+    file_path = os.path.join(result_directory, file_name)
+    # write to a temporary file first, so that partially written results are never visible
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=result_directory, prefix='.export_')
+    try:
+        size = 0
+        with os.fdopen(file_descriptor, 'wb') as temporary_file:
+            for chunk in chunks:
+                temporary_file.write(chunk)
+                size += len(chunk)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except FileNotFoundError:
+            pass
+        raise
+    result = {
+        'file_path': file_path,
+        'file_name': file_name,
+        'mime_type': mime_type,
+        'size': size
+    }
+    if task_id is not None:
+        expiration_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT'])
+        BackgroundTask.query.filter_by(id=task_id).update({
+            "result": result,
+            "expiration_date": expiration_date
+        })
+        db.session.commit()
+    return True, result
+
+
+def _set_export_task_failed(
+        task_id: typing.Optional[int],
+        error_message: str
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    if task_id is not None:
+        expiration_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=30)
+        BackgroundTask.query.filter_by(id=task_id).update({
+            "result": {
+                "error_message": error_message
+            },
+            "expiration_date": expiration_date
+        })
+        db.session.commit()
+    return False, {
+        "error_message": error_message
+    }
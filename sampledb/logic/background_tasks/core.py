@@ -9,25 +9,68 @@ in the background, as well as querying tasks to check their status or results.
 Currently, background tasks need to be enabled via the ENABLE_BACKGROUND_TASKS
 configuration value. If they are not enabled, tasks will be performed
 synchronously instead.
+
+Posted tasks are stored in the database and claimed by handler threads using
+SELECT ... FOR UPDATE SKIP LOCKED, so that handler threads in several
+processes, e.g. in a separate process started with the
+run_background_task_worker script, can share the work. Handler threads are
+woken up using PostgreSQL NOTIFY when a task is posted by any process.
+
+Tasks are claimed in order of their priority and then in the order they were
+posted. TASK_TYPE_POLICIES defines the default priority of each task type, how
+often a failed task is attempted, the delay between attempts and how many
+tasks of a type may be handled concurrently by the handler threads of a
+process, so that e.g. mails do not have to wait for long running exports.
+
+While a task is handled, its handler thread regularly updates the task's
+last_heartbeat_date. Tasks which have been claimed but have not received a
+heartbeat for STALE_CLAIM_TIMEOUT seconds, e.g. because the process handling
+them crashed, are treated as failed attempts by the maintenance, so that
+they are posted again if their policy allows further attempts.
+
+When a task is finished, a FinishedBackgroundTask record with its timestamps
+is kept for FINISHED_TASK_RETENTION_TIME seconds, so that metrics can be
+collected even for tasks that are deleted automatically.
+
+Maintenance tasks in PERIODIC_TASKS are posted by the first handler thread of
+each process whenever their interval, set via a configuration value, has
+passed.
 """
 
+import contextlib
+import dataclasses
+import datetime
+import select
 import sys
 import threading
+import time
 import traceback
 import typing
 
 import flask
 
 from ... import db
-from ...models import BackgroundTask, BackgroundTaskStatus
+from ...models import BackgroundTask, BackgroundTaskStatus, FinishedBackgroundTask
 from .. import errors
 from .background_dataverse_export import handle_dataverse_export_task
+from .background_export import handle_export_task, handle_pdfexport_task
 from .send_mail import handle_send_mail_task
 from .poke_components import handle_poke_components_task
+from .remove_expired_api_access_tokens import handle_remove_expired_api_access_tokens_task
 from .trigger_webhooks import handle_trigger_object_log_webhooks, handle_webhook_send
 
+# maximum time in seconds that handler threads wait before checking for tasks
 TASK_WAIT_TIMEOUT = 30
-NUM_HANDLER_THREADS = 4
+# time in seconds before trying to listen for notifications again after an error
+LISTENER_RETRY_DELAY = 5
+# PostgreSQL channel used to notify handler threads about posted tasks
+NOTIFICATION_CHANNEL = 'sampledb_background_tasks'
+# time in seconds that records of finished tasks are kept for metrics
+FINISHED_TASK_RETENTION_TIME = 24 * 60 * 60
+# time in seconds between two heartbeats of a task that is being handled
+CLAIM_HEARTBEAT_INTERVAL = 60
+# time in seconds without a heartbeat after which a claimed task is considered abandoned
+STALE_CLAIM_TIMEOUT = 10 * 60
 
 HANDLERS: typing.Dict[str, typing.Callable[[typing.Dict[str, typing.Any], typing.Optional[int]], typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]]] = {
     'send_mail': handle_send_mail_task,
@@ -35,12 +78,64 @@ HANDLERS: typing.Dict[str, typing.Callable[[typing.Dict[str, typing.Any], typing
     'poke_components': handle_poke_components_task,
     'trigger_object_log_webhooks': handle_trigger_object_log_webhooks,
     'webhook_send': handle_webhook_send,
+    'export': handle_export_task,
+    'pdfexport': handle_pdfexport_task,
+    'remove_expired_api_access_tokens': handle_remove_expired_api_access_tokens_task,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class TaskTypePolicy:
+    """
+    Policy for handling the tasks of a type.
+
+    A failed task is posted again until it has been attempted max_attempts
+    times, with the delay before the next attempt starting at retry_delay
+    seconds and being doubled for each further attempt.
+    """
+    priority: int = 0
+    max_attempts: int = 1
+    retry_delay: float = 60
+    max_concurrency: typing.Optional[int] = None
+
+    def get_retry_delay(self, num_attempts: int) -> float:
+        return float(self.retry_delay * 2 ** max(num_attempts - 1, 0))
+
+
+DEFAULT_TASK_TYPE_POLICY = TaskTypePolicy()
+
+TASK_TYPE_POLICIES: typing.Dict[str, TaskTypePolicy] = {
+    'send_mail': TaskTypePolicy(priority=10, max_attempts=3),
+    'trigger_object_log_webhooks': TaskTypePolicy(priority=10),
+    # retry failed deliveries once requests to a paused target URL are allowed
+    # again, see WEBHOOK_CIRCUIT_BREAKER_TIMEOUT in logic.webhooks
+    'webhook_send': TaskTypePolicy(priority=10, max_attempts=3, retry_delay=5 * 60),
+    'poke_components': TaskTypePolicy(priority=5),
+    'remove_expired_api_access_tokens': TaskTypePolicy(priority=-5),
+    # long running tasks should not block all handler threads
+    'dataverse_export': TaskTypePolicy(priority=-10, max_concurrency=1),
+    'export': TaskTypePolicy(priority=-10, max_concurrency=1),
+    'pdfexport': TaskTypePolicy(priority=-10, max_concurrency=1),
 }
 
+# task types that are posted periodically, with the configuration values
+# containing their intervals in seconds (0 to disable the task)
+PERIODIC_TASKS: typing.Dict[str, str] = {
+    'remove_expired_api_access_tokens': 'API_ACCESS_TOKEN_REMOVAL_INTERVAL',
+}
+
+# monotonic times at which periodic tasks should be posted next by this process
+next_periodic_task_times: typing.Dict[str, float] = {}
+
 should_stop = False
 wake_event = threading.Event()
 
 handler_threads: typing.List[threading.Thread] = []
+listener_thread: typing.Optional[threading.Thread] = None
+
+# number of tasks of each type that are currently handled by this process
+_num_running_tasks: typing.Dict[str, int] = {}
+_claim_lock = threading.Lock()
 
 
 def get_background_tasks() -> typing.Sequence[BackgroundTask]:
@@ -54,10 +149,21 @@ def get_background_task(task_id: int) -> BackgroundTask:
     return task
 
 
+def get_task_type_policy(type: str) -> TaskTypePolicy:
+    """
+    Return the policy for handling tasks of a given type.
+
+    :param type: the type of the task
+    :return: the task type policy
+    """
+    return TASK_TYPE_POLICIES.get(type, DEFAULT_TASK_TYPE_POLICY)
+
+
 def post_background_task(
         type: str,
         data: typing.Dict[str, typing.Any],
-        auto_delete: bool = True
+        auto_delete: bool = True,
+        priority: typing.Optional[int] = None
 ) -> typing.Tuple[BackgroundTaskStatus, typing.Optional[BackgroundTask]]:
     """
     Create a background task and post it to be performed.
@@ -71,16 +177,12 @@ def post_background_task(
     :param data: data for the task
     :param auto_delete: whether the task should be deleted automatically, once
         it is done or has failed
+    :param priority: the priority of the task, or None to use the priority of
+        the task type policy
     :return: the task status and the task object itself
     """
     if flask.current_app.config['ENABLE_BACKGROUND_TASKS']:
-        task = BackgroundTask(
-            type=type,
-            auto_delete=auto_delete,
-            data=data,
-            status=BackgroundTaskStatus.POSTED
-        )
-        db.session.add(task)
+        task = _add_background_task(type, data, auto_delete, priority)
         db.session.commit()
         wake_event.set()
         start_handler_threads(flask.current_app)
@@ -89,16 +191,40 @@ def post_background_task(
         return _handle_background_task(type, data, None), None
 
 
+def _add_background_task(
+        type: str,
+        data: typing.Dict[str, typing.Any],
+        auto_delete: bool,
+        priority: typing.Optional[int] = None
+) -> BackgroundTask:
+    if priority is None:
+        priority = get_task_type_policy(type).priority
+    task = BackgroundTask(
+        type=type,
+        auto_delete=auto_delete,
+        data=data,
+        status=BackgroundTaskStatus.POSTED,
+        priority=priority,
+        posted_date=datetime.datetime.now(datetime.timezone.utc)
+    )
+    db.session.add(task)
+    # the notification is sent to the listening processes on commit
+    db.session.execute(db.select(db.func.pg_notify(NOTIFICATION_CHANNEL, type)))
+    return task
+
+
 def start_handler_threads(app: flask.Flask) -> None:
     """
     Start handler threads for background tasks.
 
     This function first cleans up all dead threads, then creates and starts
-    handler threads until the desired number of handler threads has been
-    reached.
+    handler threads until the number of handler threads set in the
+    BACKGROUND_TASK_HANDLER_THREADS configuration value has been reached, as
+    well as a thread listening for notifications about posted tasks.
 
     If background tasks are disabled, this function returns immediately.
     """
+    global should_stop, listener_thread
     if not app.config['ENABLE_BACKGROUND_TASKS']:
         return
 
@@ -107,17 +233,32 @@ def start_handler_threads(app: flask.Flask) -> None:
         if not handler_thread.is_alive():
             handler_threads.remove(handler_thread)
 
+    num_handler_threads = app.config['BACKGROUND_TASK_HANDLER_THREADS']
+    if num_handler_threads <= 0:
+        # tasks are handled by a separate worker process
+        return
+
+    if not handler_threads:
+        # handler threads might be started again after being stopped
+        should_stop = False
+
     # get actual app instead of thread local proxy from this thread to pass it to the new thread
     get_current_app = getattr(app, '_get_current_object', None)
     if get_current_app is not None:
         app = get_current_app()
     # use daemon threads during testing, as a failed test may circumvent the thread stop signal
     daemon = app.config.get('TESTING', False)
-    while len(handler_threads) < NUM_HANDLER_THREADS:
+    while len(handler_threads) < num_handler_threads:
         handler_thread = threading.Thread(target=_handle_background_tasks, args=[app, len(handler_threads) == 0], daemon=daemon)
         handler_thread.start()
         handler_threads.append(handler_thread)
 
+    if listener_thread is None or not listener_thread.is_alive():
+        # the listener thread only wakes up handler threads, so it does not
+        # need to be stopped explicitly
+        listener_thread = threading.Thread(target=_listen_for_notifications, args=[app], daemon=True)
+        listener_thread.start()
+
     if not daemon:
         # create thread that takes care of stopping the background task threads if
         # the main thread exits without stopping them, e.g. for scripts
@@ -176,6 +317,10 @@ def get_background_task_result(task_id: int, delete_when_final: bool = True) ->
 
     result = {"status": task.status, "result": ""}
 
+    if task.type in ('export', 'pdfexport'):
+        # export tasks report their progress while they are running
+        result["result"] = task.result or {}
+
     if task.status.is_final():
         if task.type == 'dataverse_export':
             if task.result is None:
@@ -192,47 +337,217 @@ def get_background_task_result(task_id: int, delete_when_final: bool = True) ->
     return result
 
 
-def _handle_background_tasks(app: flask.Flask, should_delete_expired_tasks: bool) -> None:
+def _handle_background_tasks(app: flask.Flask, should_perform_maintenance: bool) -> None:
     with app.app_context():
         while not should_stop:
-            if should_delete_expired_tasks:
-                BackgroundTask.delete_expired_tasks()
+            if should_perform_maintenance:
+                try:
+                    BackgroundTask.delete_expired_tasks()
+                    _delete_old_finished_tasks()
+                    _fail_stale_claimed_tasks()
+                except Exception:
+                    # database might be unavailable for the moment
+                    db.session.rollback()
+                _post_due_periodic_tasks()
             try:
-                task = BackgroundTask.query.filter_by(status=BackgroundTaskStatus.POSTED).first()
+                task = _claim_background_task()
             except Exception:
                 # database might be unavailable for the moment, so no task to work on
                 task = None
             if task is not None:
-                if _claim_background_task(task):
-                    _set_background_task_status(task, _handle_background_task(task.type, task.data, task.id))
-                else:
-                    # another thread might have claimed the task first
-                    continue
+                task_id, task_type, task_data = task
+                try:
+                    with _send_heartbeats(task_id):
+                        task_status = _handle_background_task(task_type, task_data, task_id)
+                finally:
+                    with _claim_lock:
+                        _num_running_tasks[task_type] -= 1
+                _finish_background_task(task_id, task_type, task_status)
             else:
                 wake_event.clear()
-                wake_event.wait(TASK_WAIT_TIMEOUT)
+                wake_event.wait(_get_wait_timeout())
+            # end the session of this iteration, so that no transaction is kept open while waiting
+            db.session.remove()
+
+
+def _delete_old_finished_tasks() -> None:
+    db.session.execute(db.delete(FinishedBackgroundTask).where(
+        FinishedBackgroundTask.finished_date < datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=FINISHED_TASK_RETENTION_TIME)
+    ))
+    db.session.commit()
+
+
+def _fail_stale_claimed_tasks() -> None:
+    """
+    Treat tasks that have not received a heartbeat in time as failed attempts.
+    """
+    stale_claim_conditions = (
+        BackgroundTask.status == BackgroundTaskStatus.CLAIMED,
+        db.func.coalesce(BackgroundTask.last_heartbeat_date, BackgroundTask.started_date) < datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=STALE_CLAIM_TIMEOUT)
+    )
+    stale_tasks = db.session.execute(
+        db.select(BackgroundTask.id, BackgroundTask.type).where(*stale_claim_conditions)
+    ).all()
+    db.session.rollback()
+    for task_id, task_type in stale_tasks:
+        # the task might have been finished by its handler in the meantime,
+        # so the conditions are checked again while the task is locked
+        _finish_background_task(task_id, task_type, BackgroundTaskStatus.FAILED, conditions=stale_claim_conditions)
+
+
+@contextlib.contextmanager
+def _send_heartbeats(task_id: int) -> typing.Iterator[None]:
+    """
+    Regularly update the heartbeat of a claimed task while it is handled.
+
+    :param task_id: the ID of the claimed task
+    """
+    engine = db.engine
+    stop_event = threading.Event()
+
+    def send_heartbeats() -> None:
+        while not stop_event.wait(CLAIM_HEARTBEAT_INTERVAL):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        db.update(BackgroundTask).where(
+                            BackgroundTask.id == task_id,
+                            BackgroundTask.status == BackgroundTaskStatus.CLAIMED
+                        ).values(last_heartbeat_date=db.func.now())
+                    )
+            except Exception:
+                # database might be unavailable for the moment, try again with the next heartbeat
+                pass
+
+    heartbeat_thread = threading.Thread(target=send_heartbeats, daemon=True)
+    heartbeat_thread.start()
+    try:
+        yield
+    finally:
+        stop_event.set()
+        heartbeat_thread.join()
+
+
+def _listen_for_notifications(app: flask.Flask) -> None:
+    with app.app_context():
+        while not should_stop:
+            try:
+                connection = db.engine.raw_connection()
+            except Exception:
+                time.sleep(LISTENER_RETRY_DELAY)
+                continue
+            # the connection is not returned to the pool, as it is used in autocommit mode
+            connection.detach()
+            try:
+                dbapi_connection = connection.driver_connection
+                if dbapi_connection is None:
+                    raise RuntimeError('connection has no DBAPI connection')
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFICATION_CHANNEL}')
+                # tasks might have been posted while no notifications were received
+                wake_event.set()
+                while not should_stop:
+                    if select.select([dbapi_connection], [], [], LISTENER_RETRY_DELAY) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    if dbapi_connection.notifies:
+                        dbapi_connection.notifies.clear()
+                        wake_event.set()
+            except Exception:
+                # the connection might have been lost, so try to listen again
+                time.sleep(LISTENER_RETRY_DELAY)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
 
 
-def _claim_background_task(
-        task: BackgroundTask
-) -> bool:
+def _get_wait_timeout() -> float:
     try:
-        stmt = (
-            db.update(
-                BackgroundTask
-            ).where(
-                BackgroundTask.id == task.id,
+        next_attempt_date: typing.Optional[datetime.datetime] = db.session.execute(
+            db.select(db.func.min(BackgroundTask.next_attempt_date)).where(
                 BackgroundTask.status == BackgroundTaskStatus.POSTED
-            ).values(
-                status=BackgroundTaskStatus.CLAIMED
             )
-        )
-        with db.engine.begin() as connection:
-            updated_rowcount = connection.execute(stmt).rowcount
-        return bool(updated_rowcount == 1)
+        ).scalar()
     except Exception:
-        # database might be temporarily unavailable, assume task was not claimed
-        return False
+        db.session.rollback()
+        return TASK_WAIT_TIMEOUT
+    if next_attempt_date is None:
+        return TASK_WAIT_TIMEOUT
+    seconds_until_next_attempt = (next_attempt_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    return min(max(seconds_until_next_attempt, 0.1), TASK_WAIT_TIMEOUT)
+
+
+def _post_due_periodic_tasks() -> None:
+    current_time = time.monotonic()
+    for type, interval_config_key in PERIODIC_TASKS.items():
+        interval = flask.current_app.config[interval_config_key]
+        if not interval or interval <= 0:
+            continue
+        if current_time < next_periodic_task_times.get(type, current_time):
+            continue
+        next_periodic_task_times[type] = current_time + interval
+        try:
+            # other processes might post the same periodic tasks
+            if BackgroundTask.query.filter(
+                BackgroundTask.type == type,
+                BackgroundTask.status.in_([BackgroundTaskStatus.POSTED, BackgroundTaskStatus.CLAIMED])
+            ).first() is not None:
+                continue
+            _add_background_task(type, {}, auto_delete=True)
+            db.session.commit()
+        except Exception:
+            # database might be unavailable for the moment, try again after the next interval
+            db.session.rollback()
+
+
+def _claim_background_task() -> typing.Optional[typing.Tuple[int, str, typing.Dict[str, typing.Any]]]:
+    """
+    Claim the next task that can be handled by this process.
+
+    :return: the ID, type and data of the claimed task, or None
+    """
+    with _claim_lock:
+        # skip task types that have reached their concurrency limit in this process
+        excluded_types = []
+        for type, num_running_tasks in _num_running_tasks.items():
+            max_concurrency = get_task_type_policy(type).max_concurrency
+            if max_concurrency is not None and num_running_tasks >= max_concurrency:
+                excluded_types.append(type)
+        stmt = db.select(
+            BackgroundTask.id,
+            BackgroundTask.type,
+            BackgroundTask.data
+        ).where(
+            BackgroundTask.status == BackgroundTaskStatus.POSTED,
+            db.or_(
+                BackgroundTask.next_attempt_date.is_(None),
+                BackgroundTask.next_attempt_date <= db.func.now()
+            )
+        ).order_by(
+            BackgroundTask.priority.desc(),
+            BackgroundTask.id
+        ).limit(1).with_for_update(skip_locked=True)
+        if excluded_types:
+            stmt = stmt.where(BackgroundTask.type.not_in(excluded_types))
+        with db.engine.begin() as connection:
+            task = connection.execute(stmt).first()
+            if task is None:
+                return None
+            connection.execute(
+                db.update(BackgroundTask).where(
+                    BackgroundTask.id == task.id
+                ).values(
+                    status=BackgroundTaskStatus.CLAIMED,
+                    num_attempts=BackgroundTask.num_attempts + 1,
+                    started_date=db.func.now(),
+                    last_heartbeat_date=db.func.now()
+                )
+            )
+        _num_running_tasks[task.type] = _num_running_tasks.get(task.type, 0) + 1
+        return task.id, task.type, task.data
 
 
 def _handle_background_task(
@@ -249,17 +564,43 @@ def _handle_background_task(
     return BackgroundTaskStatus.FAILED
 
 
-def _set_background_task_status(
-        task: BackgroundTask,
-        task_status: BackgroundTaskStatus
+def _finish_background_task(
+        task_id: int,
+        task_type: str,
+        task_status: BackgroundTaskStatus,
+        conditions: typing.Sequence[typing.Any] = ()
 ) -> None:
     try:
-        task.status = task_status
-        if task_status.is_final() and task.auto_delete:
+        if task_status == BackgroundTaskStatus.FAILED:
+            # the handler might have left the session in a failed transaction
+            db.session.rollback()
+        task = BackgroundTask.query.filter(BackgroundTask.id == task_id, *conditions).with_for_update().first()
+        if task is None:
+            db.session.rollback()
+            return
+        policy = get_task_type_policy(task_type)
+        if task_status == BackgroundTaskStatus.FAILED and task.num_attempts < policy.max_attempts:
+            # post the task again to retry it later
+            task.status = BackgroundTaskStatus.POSTED
+            task.next_attempt_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=policy.get_retry_delay(task.num_attempts))
+        else:
+            task.status = task_status
+        if task.status.is_final():
+            task.finished_date = datetime.datetime.now(datetime.timezone.utc)
+            db.session.add(FinishedBackgroundTask(
+                type=task.type,
+                status=task.status,
+                num_attempts=task.num_attempts,
+                # tasks posted before these dates were recorded
+                posted_date=task.posted_date or task.started_date or task.finished_date,
+                started_date=task.started_date or task.finished_date,
+                finished_date=task.finished_date
+            ))
+        if task.status.is_final() and task.auto_delete:
             db.session.delete(task)
         else:
             db.session.add(task)
         db.session.commit()
     except Exception:
         # task status could not be updated, no way to recover?
-        pass
+        db.session.rollback()
@@ -0,0 +1,243 @@
+"""
+Metrics for background tasks
+
+Metrics are aggregated per task type from the tasks waiting in the queue and
+from the records of tasks that have finished within a time window, so that
+the number of handler threads and worker processes can be sized from them.
+"""
+
+import dataclasses
+import datetime
+import typing
+
+from . import core
+from ... import db
+from ...models import BackgroundTask, BackgroundTaskStatus, FinishedBackgroundTask
+
+# time in seconds that finished tasks are aggregated over
+METRICS_TIME_WINDOW = 60 * 60
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@dataclasses.dataclass(frozen=True)
+class BackgroundTaskTypeMetrics:
+    """
+    Metrics for the tasks of a type.
+
+    Wait times are measured from posting a task until its last attempt was
+    started, so they include the delay between attempts of retried tasks. Run
+    times are measured for the last attempt of a task only.
+    """
+    type: str
+    num_queued_tasks: int
+    num_running_tasks: int
+    num_done_tasks: int
+    num_failed_tasks: int
+    num_retried_tasks: int
+    wait_time_p50: typing.Optional[float]
+    wait_time_p95: typing.Optional[float]
+    run_time_p50: typing.Optional[float]
+    run_time_p95: typing.Optional[float]
+    wait_time_sum: float
+    run_time_sum: float
+    time_window: int
+
+    @property
+    def num_finished_tasks(self) -> int:
+        return self.num_done_tasks + self.num_failed_tasks
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of tasks finished per minute within the time window.
+        """
+        return self.num_finished_tasks / self.time_window * 60
+
+
+def get_background_task_metrics(
+        time_window: int = METRICS_TIME_WINDOW
+) -> typing.List[BackgroundTaskTypeMetrics]:
+    """
+    Return the metrics for all known task types and for all other types of
+    tasks that are queued or have finished within the time window.
+
+    :param time_window: the time in seconds that finished tasks are
+        aggregated over, at most core.FINISHED_TASK_RETENTION_TIME
+    :return: the metrics, sorted by task type
+    """
+    queue_depths: typing.Dict[typing.Tuple[str, BackgroundTaskStatus], int] = {
+        (type, status): num_tasks
+        for type, status, num_tasks in db.session.execute(
+            db.select(
+                BackgroundTask.type,
+                BackgroundTask.status,
+                db.func.count(BackgroundTask.id)
+            ).where(
+                BackgroundTask.status.in_([BackgroundTaskStatus.POSTED, BackgroundTaskStatus.CLAIMED])
+            ).group_by(
+                BackgroundTask.type,
+                BackgroundTask.status
+            )
+        ).all()
+    }
+
+    wait_time = db.cast(db.extract('epoch', FinishedBackgroundTask.started_date - FinishedBackgroundTask.posted_date), db.Float)
+    run_time = db.cast(db.extract('epoch', FinishedBackgroundTask.finished_date - FinishedBackgroundTask.started_date), db.Float)
+    finished_task_statistics = {
+        row.type: row
+        for row in db.session.execute(
+            db.select(
+                FinishedBackgroundTask.type,
+                db.func.count(FinishedBackgroundTask.id).filter(FinishedBackgroundTask.status == BackgroundTaskStatus.DONE).label('num_done_tasks'),
+                db.func.count(FinishedBackgroundTask.id).filter(FinishedBackgroundTask.status == BackgroundTaskStatus.FAILED).label('num_failed_tasks'),
+                db.func.count(FinishedBackgroundTask.id).filter(FinishedBackgroundTask.num_attempts > 1).label('num_retried_tasks'),
+                db.func.percentile_cont(0.5).within_group(wait_time).label('wait_time_p50'),
+                db.func.percentile_cont(0.95).within_group(wait_time).label('wait_time_p95'),
+                db.func.percentile_cont(0.5).within_group(run_time).label('run_time_p50'),
+                db.func.percentile_cont(0.95).within_group(run_time).label('run_time_p95'),
+                db.func.coalesce(db.func.sum(wait_time), 0).label('wait_time_sum'),
+                db.func.coalesce(db.func.sum(run_time), 0).label('run_time_sum'),
+            ).where(
+                FinishedBackgroundTask.finished_date >= datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=time_window)
+            ).group_by(
+                FinishedBackgroundTask.type
+            )
+        ).all()
+    }
+
+    types = set(core.HANDLERS) | {type for type, _ in queue_depths} | set(finished_task_statistics)
+    metrics = []
+    for type in sorted(types):
+        row = finished_task_statistics.get(type)
+        metrics.append(BackgroundTaskTypeMetrics(
+            type=type,
+            num_queued_tasks=queue_depths.get((type, BackgroundTaskStatus.POSTED), 0),
+            num_running_tasks=queue_depths.get((type, BackgroundTaskStatus.CLAIMED), 0),
+            num_done_tasks=row.num_done_tasks if row is not None else 0,
+            num_failed_tasks=row.num_failed_tasks if row is not None else 0,
+            num_retried_tasks=row.num_retried_tasks if row is not None else 0,
+            wait_time_p50=row.wait_time_p50 if row is not None else None,
+            wait_time_p95=row.wait_time_p95 if row is not None else None,
+            run_time_p50=row.run_time_p50 if row is not None else None,
+            run_time_p95=row.run_time_p95 if row is not None else None,
+            wait_time_sum=row.wait_time_sum if row is not None else 0.0,
+            run_time_sum=row.run_time_sum if row is not None else 0.0,
+            time_window=time_window
+        ))
+    return metrics
+
+
+def get_background_task_metrics_as_prometheus_text(
+        time_window: int = METRICS_TIME_WINDOW
+) -> str:
+    """
+    Return the metrics for background tasks in the Prometheus text format.
+
+    :param time_window: the time in seconds that finished tasks are
+        aggregated over
+    :return: the metrics as text
+    """
+    metrics = get_background_task_metrics(time_window)
+    lines = []
+
+    def add_samples(
+            name: str,
+            samples: typing.Iterable[typing.Tuple[typing.Dict[str, str], typing.Optional[float]]]
+    ) -> None:
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_text = ','.join(
+                f'{label_name}="{_escape_prometheus_label_value(label_value)}"'
+                for label_name, label_value in labels.items()
+            )
+            lines.append(f'{name}{{{label_text}}} {float(value)!r}')
+
+    def add_metric(
+            name: str,
+            description: str,
+            samples: typing.Iterable[typing.Tuple[typing.Dict[str, str], typing.Optional[float]]]
+    ) -> None:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} gauge')
+        add_samples(name, samples)
+
+    def add_summary(
+            name: str,
+            description: str,
+            quantile_samples: typing.Iterable[typing.Tuple[typing.Dict[str, str], typing.Optional[float]]],
+            sum_samples: typing.Iterable[typing.Tuple[typing.Dict[str, str], float]],
+            count_samples: typing.Iterable[typing.Tuple[typing.Dict[str, str], float]]
+    ) -> None:
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} summary')
+        add_samples(name, quantile_samples)
+        add_samples(name + '_sum', sum_samples)
+        add_samples(name + '_count', count_samples)
+
+    add_metric(
+        'sampledb_background_tasks_queued',
+        'Number of background tasks waiting to be handled.',
+        (({'type': m.type}, m.num_queued_tasks) for m in metrics)
+    )
+    add_metric(
+        'sampledb_background_tasks_running',
+        'Number of background tasks currently being handled.',
+        (({'type': m.type}, m.num_running_tasks) for m in metrics)
+    )
+    add_metric(
+        'sampledb_background_tasks_finished',
+        f'Number of background tasks finished in the last {time_window} seconds.',
+        (
+            sample
+            for m in metrics
+            for sample in [
+                ({'type': m.type, 'status': 'done'}, float(m.num_done_tasks)),
+                ({'type': m.type, 'status': 'failed'}, float(m.num_failed_tasks)),
+            ]
+        )
+    )
+    add_metric(
+        'sampledb_background_tasks_retried',
+        f'Number of background tasks finished in the last {time_window} seconds after more than one attempt.',
+        (({'type': m.type}, m.num_retried_tasks) for m in metrics)
+    )
+    add_metric(
+        'sampledb_background_tasks_throughput_per_minute',
+        f'Number of background tasks finished per minute in the last {time_window} seconds.',
+        (({'type': m.type}, m.throughput) for m in metrics)
+    )
+    add_summary(
+        'sampledb_background_task_wait_seconds',
+        f'Time background tasks finished in the last {time_window} seconds waited before being started.',
+        (
+            sample
+            for m in metrics
+            for sample in [
+                ({'type': m.type, 'quantile': '0.5'}, m.wait_time_p50),
+                ({'type': m.type, 'quantile': '0.95'}, m.wait_time_p95),
+            ]
+        ),
+        (({'type': m.type}, m.wait_time_sum) for m in metrics),
+        (({'type': m.type}, float(m.num_finished_tasks)) for m in metrics)
+    )
+    add_summary(
+        'sampledb_background_task_run_seconds',
+        f'Time background tasks finished in the last {time_window} seconds took to run.',
+        (
+            sample
+            for m in metrics
+            for sample in [
+                ({'type': m.type, 'quantile': '0.5'}, m.run_time_p50),
+                ({'type': m.type, 'quantile': '0.95'}, m.run_time_p95),
+            ]
+        ),
+        (({'type': m.type}, m.run_time_sum) for m in metrics),
+        (({'type': m.type}, float(m.num_finished_tasks)) for m in metrics)
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def _escape_prometheus_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
@@ -21,10 +21,9 @@ def handle_poke_components_task(
     data: typing.Dict[str, typing.Any],
     task_id: typing.Optional[int]
 ) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
-    for component in logic.components.get_components():
-        if component.export_token_available:
-            try:
-                logic.federation.update.update_poke_component(component)
-            except Exception:
-                pass
+    logic.federation.update.update_poke_components([
+        component
+        for component in logic.components.get_components()
+        if component.export_token_available
+    ])
     return True, {}
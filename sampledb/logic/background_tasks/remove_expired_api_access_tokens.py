@@ -0,0 +1,27 @@
+import typing
+
+import flask
+
+from . import core
+from ... import logic
+
+
+def post_remove_expired_api_access_tokens_task() -> None:
+    if flask.current_app.config["ENABLE_BACKGROUND_TASKS"]:
+        core.post_background_task(
+            type='remove_expired_api_access_tokens',
+            data={},
+            auto_delete=True
+        )
+    else:
+        handle_remove_expired_api_access_tokens_task({}, None)
+
+
+def handle_remove_expired_api_access_tokens_task(
+    data: typing.Dict[str, typing.Any],
+    task_id: typing.Optional[int]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    num_removed_api_access_tokens = logic.authentication.remove_expired_api_access_tokens()
+    return True, {
+        'num_removed_api_access_tokens': num_removed_api_access_tokens
+    }
@@ -40,13 +40,42 @@ def handle_trigger_object_log_webhooks(
     task_id: typing.Optional[int]
 ) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
     webhooks = logic.webhooks.get_object_log_webhooks_for_object(data['object_id'])
+    if not flask.current_app.config['ENABLE_WEBHOOKS_FOR_USERS']:
+        admin_user_ids = {
+            user.id
+            for user in logic.users.get_users_by_ids({webhook.user_id for webhook in webhooks}).values()
+            if user.is_admin
+        }
+        webhooks = [
+            webhook
+            for webhook in webhooks
+            if webhook.user_id in admin_user_ids
+        ]
+    if not webhooks:
+        return True, {}
+
+    # the log entry only differs between users if it references another object
+    object_log_entry = logic.object_log.get_object_log_entry(data['object_log_entry_id'], webhooks[0].user_id)
+    is_user_specific = object_log_entry.type in logic.object_log.REFERENCED_OBJECT_TYPE_BY_LOG_ENTRY_TYPE
+    object_log_entry_json_by_user_id = {
+        webhooks[0].user_id: logic.object_log.object_log_entry_to_json(object_log_entry)
+    }
+    webhooks_and_data = []
     for webhook in webhooks:
-        user = logic.users.get_user(webhook.user_id)
-        if flask.current_app.config['ENABLE_WEBHOOKS_FOR_USERS'] or user.is_admin:
-            object_log_entry = logic.object_log.get_object_log_entry(data['object_log_entry_id'], webhook.user_id)
-            object_log_entry_json = logic.object_log.object_log_entry_to_json(object_log_entry)
-            post_webhook_send(object_log_entry_json, webhook.id)
+        if webhook.user_id not in object_log_entry_json_by_user_id:
+            if is_user_specific:
+                object_log_entry = logic.object_log.get_object_log_entry(data['object_log_entry_id'], webhook.user_id)
+                object_log_entry_json_by_user_id[webhook.user_id] = logic.object_log.object_log_entry_to_json(object_log_entry)
+            else:
+                object_log_entry_json_by_user_id[webhook.user_id] = object_log_entry_json_by_user_id[webhooks[0].user_id]
+        webhooks_and_data.append((webhook, object_log_entry_json_by_user_id[webhook.user_id]))
 
+    failed_webhooks = logic.webhooks.send_data_to_webhooks(webhooks_and_data)
+    if flask.current_app.config['ENABLE_BACKGROUND_TASKS']:
+        # failed deliveries are retried individually
+        for webhook, webhook_data in webhooks_and_data:
+            if webhook in failed_webhooks:
+                post_webhook_send(webhook_data, webhook.id)
     return True, {}
 
 
@@ -12,7 +12,7 @@ import datetime
 import typing
 
 from .. import db, models
-from . import user_log, object_log, objects, users, errors, components
+from . import user_log, object_log, object_changes, objects, users, errors, components
 
 
 @dataclasses.dataclass(frozen=True)
@@ -121,6 +121,7 @@ def create_comment(
     )
     db.session.add(comment)
     db.session.commit()
+    object_changes.record_object_change(object_id)
     if component_id is None and create_log_entry:
         # ensured by the if at the start of the function
         assert user_id is not None
@@ -172,6 +173,7 @@ def update_comment(
     comment.utc_datetime = utc_datetime
     db.session.add(comment)
     db.session.commit()
+    object_changes.record_object_change(comment.object_id)
 
 
 def get_comments_for_object(object_id: int) -> typing.List[Comment]:
@@ -12,7 +12,7 @@ import flask
 from .. import db
 from ..models import components, objects, component_authentication
 from . import errors
-from .utils import cache
+from .utils import cache, request_cache
 
 # component names are limited to this (semi-arbitrary) length
 MAX_COMPONENT_NAME_LENGTH = 100
@@ -169,6 +169,7 @@ def check_component_exists(
         raise errors.ComponentDoesNotExistError()
 
 
+@request_cache
 def get_component(
         component_id: int
 ) -> Component:
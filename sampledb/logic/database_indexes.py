@@ -0,0 +1,329 @@
+"""
+Verification of the secondary indexes of the database
+
+The indexes declared by the models are created by the migrations, those for
+indexed properties when the properties are indexed. To verify
+that the database matches these declarations and that the indexes are used,
+indexes can be reported as:
+
+- missing, if they are declared by a model but do not exist in the database,
+- unused, if they have not been scanned since the statistics of the database
+  have been reset, unless they enforce a unique or primary key constraint,
+- bloated, if they are considerably larger than a freshly built B-tree index
+  on the same columns would be.
+
+The trigram indexes for substring searches are only declared if the pg_trgm
+extension is installed, as they cannot be created otherwise.
+
+Additionally, the plans for frequently sent queries can be checked for
+sequential scans of large tables, which indicate that an index is missing or
+that the query planner chooses not to use it.
+"""
+
+import dataclasses
+import math
+import typing
+
+from .. import db
+from .indexed_properties import get_indexed_properties
+from .utils import request_cache
+from ..models import Comment, File, FileLogEntry, FileLogEntryType, GroupObjectPermissions, Notification, ObjectLocationAssignment, ObjectLogEntry, ProjectObjectPermissions, UserLogEntry, UserObjectPermissions
+from ..models.objects import Objects
+
+# minimum size in bytes for an index to be reported as bloated
+INDEX_BLOAT_MIN_SIZE = 1024 * 1024
+# minimum ratio of the actual to the estimated size of a bloated index
+INDEX_BLOAT_MIN_RATIO = 2
+# estimated size in bytes of a B-tree index tuple without its key, including
+# the tuple header, the item pointer and alignment padding
+BTREE_TUPLE_OVERHEAD = 16
+# fraction of B-tree leaf pages filled when an index is built
+BTREE_FILL_FACTOR = 0.9
+# minimum estimated number of rows of a table for its sequential scans to be
+# reported
+SEQUENTIAL_SCAN_MIN_NUM_ROWS = 1000
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexStatistics:
+    """
+    Usage and size statistics of an index.
+    """
+    table_name: str
+    index_name: str
+    num_scans: int
+    size: int
+    estimated_size: typing.Optional[int]
+    is_unique: bool
+
+    @property
+    def is_unused(self) -> bool:
+        # indexes enforcing constraints are needed even if they are not scanned
+        return self.num_scans == 0 and not self.is_unique
+
+    @property
+    def is_bloated(self) -> bool:
+        if self.estimated_size is None:
+            return False
+        return self.size >= INDEX_BLOAT_MIN_SIZE and self.size >= INDEX_BLOAT_MIN_RATIO * self.estimated_size
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexReport:
+    """
+    Report on the indexes of the database.
+
+    Missing indexes are given as pairs of table name and index name.
+    """
+    missing_indexes: typing.List[typing.Tuple[str, str]]
+    unused_indexes: typing.List[IndexStatistics]
+    bloated_indexes: typing.List[IndexStatistics]
+
+
+@dataclasses.dataclass(frozen=True)
+class SequentialScan:
+    """
+    A sequential scan in the plan for a frequently sent query.
+    """
+    query_name: str
+    table_name: str
+    num_rows: int
+
+
+def get_declared_indexes() -> typing.List[typing.Tuple[str, str]]:
+    """
+    Return the indexes declared by the models, the trigram indexes if the
+    pg_trgm extension is installed and the indexes maintained for indexed
+    properties.
+
+    :return: pairs of table name and index name, sorted by table name
+    """
+    trigram_indexes = []
+    if is_trigram_extension_installed():
+        trigram_indexes.append((Objects._current_table.name, Objects.search_text_trigram_index_name))
+        trigram_indexes.append((Objects._current_table.name, Objects.data_trigram_index_name))
+    return sorted(trigram_indexes + [
+        (table.name, index.name)
+        for table in db.metadata.sorted_tables
+        for index in table.indexes
+        if index.name is not None
+    ] + [
+        (Objects._current_table.name, indexed_property.index_name)
+        for indexed_property in get_indexed_properties()
+    ])
+
+
+def is_trigram_extension_installed() -> bool:
+    """
+    Return whether the pg_trgm extension is installed in the database.
+
+    :return: whether the extension is installed
+    """
+    return bool(db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM pg_extension
+        WHERE extname = 'pg_trgm'
+    """)).scalar())
+
+
+@request_cache
+def is_trigram_search_available() -> bool:
+    """
+    Return whether substring searches can use the trigram index on the
+    search texts of current objects.
+
+    :return: whether the trigram index exists
+    """
+    return bool(db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM pg_indexes
+        WHERE schemaname = current_schema() AND indexname = :index_name
+    """), {'index_name': Objects.search_text_trigram_index_name}).scalar())
+
+
+@request_cache
+def is_data_trigram_search_available() -> bool:
+    """
+    Return whether simple searches can use the trigram index on the data of
+    current objects.
+
+    :return: whether the trigram index exists
+    """
+    return bool(db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM pg_indexes
+        WHERE schemaname = current_schema() AND indexname = :index_name
+    """), {'index_name': Objects.data_trigram_index_name}).scalar())
+
+
+def get_index_statistics() -> typing.List[IndexStatistics]:
+    """
+    Return the usage and size statistics of all indexes of the database.
+
+    The size of B-tree indexes on columns is estimated from the number of
+    rows of the table and the average width of the indexed columns, as
+    collected by ANALYZE. For other indexes, the estimated size is None.
+
+    :return: the statistics, sorted by table name and index name
+    """
+    rows = db.session.execute(db.text("""
+        SELECT
+            s.relname AS table_name,
+            s.indexrelname AS index_name,
+            s.idx_scan AS num_scans,
+            pg_relation_size(s.indexrelid) AS size,
+            i.indisunique OR i.indisprimary AS is_unique,
+            am.amname = 'btree' AND i.indexprs IS NULL AS can_estimate_size,
+            greatest(c.reltuples, 0) AS num_rows,
+            current_setting('block_size')::integer AS block_size,
+            (
+                SELECT coalesce(sum(coalesce(st.avg_width, 8)), 0)
+                FROM pg_attribute a
+                LEFT JOIN pg_stats st ON st.schemaname = s.schemaname AND st.tablename = s.relname AND st.attname = a.attname
+                WHERE a.attrelid = s.relid AND a.attnum = ANY(i.indkey::smallint[])
+            ) AS key_width
+        FROM pg_stat_user_indexes s
+        JOIN pg_index i ON i.indexrelid = s.indexrelid
+        JOIN pg_class c ON c.oid = s.indexrelid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE s.schemaname = current_schema()
+        ORDER BY s.relname, s.indexrelname
+    """)).all()
+    statistics = []
+    for row in rows:
+        if row.can_estimate_size:
+            num_leaf_pages = math.ceil(row.num_rows * (row.key_width + BTREE_TUPLE_OVERHEAD) / (row.block_size * BTREE_FILL_FACTOR))
+            # one additional page for the metapage
+            estimated_size = (num_leaf_pages + 1) * row.block_size
+        else:
+            estimated_size = None
+        statistics.append(IndexStatistics(
+            table_name=row.table_name,
+            index_name=row.index_name,
+            num_scans=row.num_scans,
+            size=row.size,
+            estimated_size=estimated_size,
+            is_unique=row.is_unique
+        ))
+    return statistics
+
+
+def get_index_report() -> IndexReport:
+    """
+    Return a report on missing, unused and bloated indexes.
+
+    :return: the report
+    """
+    statistics = get_index_statistics()
+    existing_index_names = set(db.session.execute(db.text("""
+        SELECT indexname
+        FROM pg_indexes
+        WHERE schemaname = current_schema()
+    """)).scalars().all())
+    return IndexReport(
+        missing_indexes=[
+            (table_name, index_name)
+            for table_name, index_name in get_declared_indexes()
+            if index_name not in existing_index_names
+        ],
+        unused_indexes=[
+            index_statistics
+            for index_statistics in statistics
+            if index_statistics.is_unused
+        ],
+        bloated_indexes=[
+            index_statistics
+            for index_statistics in statistics
+            if index_statistics.is_bloated
+        ]
+    )
+
+
+def _get_hot_queries() -> typing.Dict[str, typing.Any]:
+    # queries in the shape they are sent in by the logic modules, with
+    # placeholder IDs, as the plans depend on the filters and orders only
+    objects_current = Objects._current_table
+    objects_previous = Objects._previous_table
+    return {
+        'object log entries of an object': db.select(ObjectLogEntry).filter_by(object_id=1).order_by(ObjectLogEntry.utc_datetime.desc()),
+        'object log entries of a user': db.select(ObjectLogEntry).filter_by(user_id=1),
+        'user log entries of a user': db.select(UserLogEntry).filter_by(user_id=1).order_by(UserLogEntry.utc_datetime.desc()),
+        'files of an object': db.select(File).filter_by(object_id=1).order_by(File.id),
+        'file log entries of a file': db.select(FileLogEntry).filter_by(object_id=1, file_id=1, type=FileLogEntryType.EDIT_TITLE).order_by(FileLogEntry.utc_datetime.desc()),
+        'comments of an object': db.select(Comment).filter_by(object_id=1).order_by(Comment.utc_datetime),
+        'location assignments of an object': db.select(ObjectLocationAssignment).filter_by(object_id=1).order_by(ObjectLocationAssignment.utc_datetime),
+        'location assignments to a location': db.select(ObjectLocationAssignment).filter_by(location_id=1),
+        'unhandled responsibility assignments of a user': db.select(ObjectLocationAssignment).filter_by(responsible_user_id=1, confirmed=False, declined=False),
+        'object permissions of a user': db.select(UserObjectPermissions).filter_by(user_id=1),
+        'object permissions of a group': db.select(GroupObjectPermissions).filter_by(group_id=1),
+        'object permissions of a project': db.select(ProjectObjectPermissions).filter_by(project_id=1),
+        'notifications of a user': db.select(Notification).filter_by(user_id=1).order_by(Notification.utc_datetime.desc()),
+        'objects of an action': db.select(objects_current.c.object_id).where(objects_current.c.action_id == 1),
+        'previous versions of an object': db.select(objects_previous).where(objects_previous.c.object_id == 1).order_by(objects_previous.c.version_id),
+    }
+
+
+def get_sequential_scans(
+        min_num_rows: int = SEQUENTIAL_SCAN_MIN_NUM_ROWS,
+        *,
+        disable_sequential_scans: bool = False
+) -> typing.List[SequentialScan]:
+    """
+    Return the sequential scans of large tables in the plans for frequently
+    sent queries.
+
+    For small tables the query planner prefers sequential scans even if a
+    suitable index exists. To check whether the queries can use an index
+    regardless of the size of the tables, sequential scans can be disabled
+    while the plans are created, so that they are only chosen if no index
+    can be used. Scans of all rows of a table using an index without an
+    index condition are reported as sequential scans as well.
+
+    :param min_num_rows: the minimum estimated number of rows of a table for
+        its sequential scans to be reported
+    :param disable_sequential_scans: whether sequential scans should be
+        disabled while creating the query plans
+    :return: the sequential scans
+    """
+    num_rows_by_table_name = {
+        table_name: max(int(num_rows), 0)
+        for table_name, num_rows in db.session.execute(db.text("""
+            SELECT c.relname, c.reltuples
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p')
+        """)).all()
+    }
+    if disable_sequential_scans:
+        db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    try:
+        sequential_scans = []
+        for query_name, query in _get_hot_queries().items():
+            query_text = str(query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            plans = db.session.execute(db.text('EXPLAIN (FORMAT JSON) ' + query_text)).scalar_one()
+            for table_name in _get_sequentially_scanned_table_names(plans[0]['Plan']):
+                num_rows = num_rows_by_table_name.get(table_name, 0)
+                if num_rows >= min_num_rows:
+                    sequential_scans.append(SequentialScan(
+                        query_name=query_name,
+                        table_name=table_name,
+                        num_rows=num_rows
+                    ))
+    finally:
+        if disable_sequential_scans:
+            db.session.execute(db.text("SET LOCAL enable_seqscan TO DEFAULT"))
+    return sequential_scans
+
+
+def _get_sequentially_scanned_table_names(plan: typing.Dict[str, typing.Any]) -> typing.List[str]:
+    table_names = []
+    node_type = plan.get('Node Type')
+    if node_type == 'Seq Scan':
+        table_names.append(plan['Relation Name'])
+    elif node_type in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in plan:
+        # with sequential scans disabled, the planner falls back to reading
+        # all rows using an unrelated index, e.g. that of the primary key
+        table_names.append(plan['Relation Name'])
+    for child_plan in plan.get('Plans', []):
+        table_names.extend(_get_sequentially_scanned_table_names(child_plan))
+    return table_names
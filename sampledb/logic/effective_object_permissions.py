@@ -0,0 +1,180 @@
+# coding: utf-8
+"""
+Logic for maintaining the effective_object_permissions table.
+
+The view user_object_permissions_by_all combines the permissions users
+have for objects via all users, anonymous users, instrument responsibility,
+individual user permissions, group memberships and project memberships.
+Evaluating this view requires several UNIONs and aggregations, so its
+contents are materialized in the effective_object_permissions table, which
+is updated incrementally whenever one of its sources is changed.
+
+Functions in this module do not commit, so that the effective permissions
+are updated in the same transaction as the change that caused the update.
+"""
+
+import dataclasses
+import typing
+
+from .. import db
+
+_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS = 'user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments'
+
+
+@dataclasses.dataclass(frozen=True)
+class EffectiveObjectPermissionsDifference:
+    """
+    A row that differs between the effective_object_permissions table and
+    the user_object_permissions_by_all view.
+    """
+    user_id: typing.Optional[int]
+    object_id: int
+    permissions_int: int
+    requires_anonymous_users: bool
+    requires_instruments: bool
+    is_missing: bool
+
+
+def update_effective_object_permissions_for_objects(object_ids: typing.Iterable[int]) -> None:
+    """
+    Recompute the effective permissions for the given objects.
+
+    :param object_ids: the IDs of existing objects
+    """
+    object_ids = tuple(set(object_ids))
+    if not object_ids:
+        return
+    # ensure pending ORM changes are visible to the view
+    db.session.flush()
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+        WHERE object_id IN :object_ids
+    """), {'object_ids': object_ids})
+    db.session.execute(db.text(f"""
+        INSERT INTO effective_object_permissions ({_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS})
+        SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+        FROM user_object_permissions_by_all
+        WHERE object_id IN :object_ids
+    """), {'object_ids': object_ids})
+
+
+def update_effective_object_permissions_for_actions(action_ids: typing.Iterable[int]) -> None:
+    """
+    Recompute the effective permissions for all objects created with the given actions.
+
+    This needs to be called whenever the instrument of these actions has
+    been changed, as the responsible users of the instrument have
+    permissions for these objects.
+
+    :param action_ids: the IDs of existing actions
+    """
+    action_ids = tuple(set(action_ids))
+    if not action_ids:
+        return
+    # ensure pending ORM changes are visible to the view
+    db.session.flush()
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+        WHERE object_id IN (
+            SELECT object_id
+            FROM objects_current
+            WHERE action_id IN :action_ids
+        )
+    """), {'action_ids': action_ids})
+    db.session.execute(db.text(f"""
+        INSERT INTO effective_object_permissions ({_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS})
+        SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+        FROM user_object_permissions_by_all
+        WHERE object_id IN (
+            SELECT object_id
+            FROM objects_current
+            WHERE action_id IN :action_ids
+        )
+    """), {'action_ids': action_ids})
+
+
+def update_effective_object_permissions_for_users(user_ids: typing.Iterable[int]) -> None:
+    """
+    Recompute the effective permissions of the given users for all objects.
+
+    This needs to be called whenever a change in group memberships, project
+    memberships or instrument responsibilities might have altered the
+    permissions of these users. Permissions for all or anonymous users are
+    not affected by this.
+
+    :param user_ids: the IDs of existing users
+    """
+    user_ids = tuple(set(user_ids))
+    if not user_ids:
+        return
+    # ensure pending ORM changes are visible to the view
+    db.session.flush()
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+        WHERE user_id IN :user_ids
+    """), {'user_ids': user_ids})
+    db.session.execute(db.text(f"""
+        INSERT INTO effective_object_permissions ({_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS})
+        SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+        FROM user_object_permissions_by_all
+        WHERE user_id IN :user_ids
+    """), {'user_ids': user_ids})
+
+
+def rebuild_effective_object_permissions() -> None:
+    """
+    Recompute the effective permissions for all users and objects.
+    """
+    db.session.flush()
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+    """))
+    db.session.execute(db.text(f"""
+        INSERT INTO effective_object_permissions ({_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS})
+        SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+        FROM user_object_permissions_by_all
+    """))
+
+
+def verify_effective_object_permissions() -> typing.List[EffectiveObjectPermissionsDifference]:
+    """
+    Compare the effective_object_permissions table to the view it is based on.
+
+    :return: a list of rows that are missing from or superfluous in the table
+    """
+    db.session.flush()
+    rows = db.session.execute(db.text(f"""
+        (
+            SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}, TRUE AS is_missing
+            FROM (
+                SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+                FROM user_object_permissions_by_all
+                EXCEPT
+                SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+                FROM effective_object_permissions
+            ) AS missing
+        )
+        UNION ALL
+        (
+            SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}, FALSE AS is_missing
+            FROM (
+                SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+                FROM effective_object_permissions
+                EXCEPT ALL
+                SELECT {_EFFECTIVE_OBJECT_PERMISSIONS_COLUMNS}
+                FROM user_object_permissions_by_all
+            ) AS superfluous
+        )
+        ORDER BY object_id, user_id
+    """)).fetchall()
+    return [
+        EffectiveObjectPermissionsDifference(
+            user_id=row.user_id,
+            object_id=row.object_id,
+            permissions_int=row.permissions_int,
+            requires_anonymous_users=row.requires_anonymous_users,
+            requires_instruments=row.requires_instruments,
+            is_missing=row.is_missing
+        )
+        for row in rows
+    ]
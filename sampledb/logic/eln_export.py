@@ -14,13 +14,24 @@ from .objects import find_object_references
 from .dataverse_export import flatten_metadata, get_title_for_property
 from .datatypes import Quantity
 from .units import get_un_cefact_code_for_unit
+from .export import ArchiveFileContent, CHUNK_SIZE, open_archive_file_content
+
+
+def _get_file_size_and_hash(file_content: ArchiveFileContent) -> typing.Tuple[int, str]:
+    file_size = 0
+    file_hash = hashlib.sha256()
+    with open_archive_file_content(file_content) as file:
+        while chunk := file.read(CHUNK_SIZE):
+            file_size += len(chunk)
+            file_hash.update(chunk)
+    return file_size, file_hash.hexdigest()
 
 
 def generate_ro_crate_metadata(
-        archive_files: typing.Dict[str, typing.Union[str, bytes]],
+        archive_files: typing.Dict[str, ArchiveFileContent],
         infos: typing.Dict[str, typing.Any]
-) -> typing.Dict[str, bytes]:
-    result_files: typing.Dict[str, bytes] = {}
+) -> typing.Dict[str, ArchiveFileContent]:
+    result_files: typing.Dict[str, ArchiveFileContent] = {}
     ro_crate_metadata: typing.Dict[str, typing.Any] = {
         "@context": "https://w3id.org/ro/crate/1.1/context",
         "@graph": [
@@ -242,10 +253,10 @@ def generate_ro_crate_metadata(
 
                 charset = None
                 if isinstance(file_content, str):
-                    file_content = file_content.encode('utf-8')
                     charset = 'UTF-8'
 
-                file_hash = hashlib.sha256(file_content).hexdigest()
+                # file contents are read in chunks, as they might be too large to keep in memory
+                file_size, file_hash = _get_file_size_and_hash(file_content)
 
                 file_extension = os.path.splitext(relative_file_name)[1]
                 supported_mime_types = flask.current_app.config['MIME_TYPES']
@@ -267,7 +278,7 @@ def generate_ro_crate_metadata(
                     } if file_info['uploader_id'] is not None else None,
                     "dateCreated": file_info['utc_datetime'],
                     "encodingFormat": file_type,
-                    "contentSize": len(file_content),
+                    "contentSize": file_size,
                     "contentUrl": flask.url_for('frontend.object_file', object_id=object_info['id'], file_id=file_info['id'], _external=True),
                     "sha256": file_hash
                 })
@@ -126,6 +126,20 @@ def get_eln_import(eln_import_id: int) -> ELNImport:
     return ELNImport.from_database(eln_import)
 
 
+def get_eln_imports_by_ids(eln_import_ids: typing.Iterable[int]) -> typing.Dict[int, ELNImport]:
+    eln_import_ids = set(eln_import_ids)
+    if not eln_import_ids:
+        return {}
+    return {
+        eln_import.id: ELNImport.from_database(eln_import)
+        for eln_import in eln_imports.ELNImport.query.filter(
+            eln_imports.ELNImport.id.in_(eln_import_ids)
+        ).options(
+            db.selectinload(eln_imports.ELNImport.user)
+        ).all()
+    }
+
+
 def create_eln_import(
         user_id: int,
         file_name: str,
@@ -49,6 +49,24 @@ class FederationFileNotAvailableError(Exception):
     pass
 
 
+class FileUploadDoesNotExistError(Exception):
+    pass
+
+
+class InvalidFileUploadOffsetError(Exception):
+    def __init__(self, received_size: int) -> None:
+        super().__init__(f'expected offset {received_size}')
+        self.received_size = received_size
+
+
+class FileUploadSizeError(Exception):
+    pass
+
+
+class FileUploadHashMismatchError(Exception):
+    pass
+
+
 class GroupDoesNotExistError(Exception):
     pass
 
@@ -498,3 +516,15 @@ class ELNUserInFederatedIdentityError(Exception):
 
 class FederatedIdentityNotFoundError(Exception):
     pass
+
+
+class IndexedPropertyDoesNotExistError(Exception):
+    pass
+
+
+class IndexedPropertyAlreadyExistsError(Exception):
+    pass
+
+
+class InvalidPropertyPathError(Exception):
+    pass
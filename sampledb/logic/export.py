@@ -3,11 +3,16 @@
 Export all SampleDB information readable by the user to an archive.
 """
 
+import contextlib
 import datetime
+import functools
+import gzip
 import io
 import json
 import os
+import shutil
 import tarfile
+import tempfile
 import time
 import typing
 import zipfile
@@ -17,6 +22,31 @@ import flask
 from .. import logic
 from ..models import Permissions, ObjectLogEntryType
 
+# file contents are either available directly or can be opened when they are
+# written to an archive, so that not all files need to be held in memory
+ArchiveFileContent = typing.Union[bytes, str, typing.Callable[[], typing.BinaryIO]]
+
+# size of the chunks read from files and yielded by archive generators
+CHUNK_SIZE = 1024 * 1024
+
+
+def open_archive_file_content(file_content: ArchiveFileContent) -> typing.BinaryIO:
+    """
+    Open the content of a file in an archive as a binary stream.
+
+    :param file_content: the file content
+    :return: the binary stream
+    """
+    if isinstance(file_content, str):
+        return io.BytesIO(file_content.encode('utf-8'))
+    if isinstance(file_content, bytes):
+        return io.BytesIO(file_content)
+    return file_content()
+
+
+def _get_rdf_file(user_id: typing.Optional[int], object_id: int) -> typing.BinaryIO:
+    return io.BytesIO(logic.rdf.generate_rdf(user_id, object_id).encode('utf-8'))
+
 
 def get_export_infos(
         user_id: typing.Optional[int],
@@ -26,8 +56,8 @@ def get_export_infos(
         include_users: bool = True,
         include_locations: bool = True,
         include_rdf_files: bool = True
-) -> typing.Tuple[typing.Dict[str, typing.Union[bytes, str]], typing.Dict[str, typing.Any]]:
-    archive_files: typing.Dict[str, typing.Union[bytes, str]] = {}
+) -> typing.Tuple[typing.Dict[str, ArchiveFileContent], typing.Dict[str, typing.Any]]:
+    archive_files: typing.Dict[str, ArchiveFileContent] = {}
     if object_ids is None:
         relevant_instrument_ids = {
             instrument.id
@@ -44,14 +74,22 @@ def get_export_infos(
         permissions=Permissions.READ,
         object_ids=object_ids
     )
+    if object_ids is not None:
+        objects = [
+            object
+            for object in objects
+            if object.id in object_ids
+        ]
+    # file contents are loaded individually when they are written to the archive
+    files_by_object_id = logic.files.get_files_for_objects(
+        object.id for object in objects
+    )
     infos = {}
     object_infos: typing.List[typing.Dict[str, typing.Any]] = []
     for object in objects:
-        if object_ids is not None and object.id not in object_ids:
-            continue
 
         if include_rdf_files:
-            archive_files[f"sampledb_export/{object.id}.rdf"] = logic.rdf.generate_rdf(user_id, object.id)
+            archive_files[f"sampledb_export/{object.id}.rdf"] = functools.partial(_get_rdf_file, user_id, object.id)
 
         object_infos.append({
             'id': object.id,
@@ -135,7 +173,7 @@ def get_export_infos(
                 object_infos[-1]['publications'][-1]['user_id'] = publication_log_entry.user_id
                 object_infos[-1]['publications'][-1]['utc_datetime'] = publication_log_entry.utc_datetime.replace(tzinfo=None).isoformat(timespec='microseconds')
 
-        for file_info in logic.files.get_files_for_object(object.id):
+        for file_info in files_by_object_id[object.id]:
             if not file_info.is_hidden:
                 relevant_user_ids.add(file_info.user_id)
                 object_infos[-1]['files'].append({
@@ -148,14 +186,9 @@ def get_export_infos(
                 })
                 if file_info.storage == 'database':
                     object_infos[-1]['files'][-1]['original_file_name'] = file_info.original_file_name
-                    try:
-                        file_bytes = file_info.open(read_only=True).read()
-                    except Exception:
-                        pass
-                    else:
-                        file_name = os.path.basename(file_info.original_file_name)
-                        object_infos[-1]['files'][-1]['path'] = f'objects/{object.id}/files/{file_info.id}/{file_name}'
-                        archive_files[f"sampledb_export/objects/{object.id}/files/{file_info.id}/{file_name}"] = file_bytes
+                    file_name = os.path.basename(file_info.original_file_name)
+                    object_infos[-1]['files'][-1]['path'] = f'objects/{object.id}/files/{file_info.id}/{file_name}'
+                    archive_files[f"sampledb_export/objects/{object.id}/files/{file_info.id}/{file_name}"] = functools.partial(file_info.open, read_only=True)
                 elif file_info.storage == 'url':
                     object_infos[-1]['files'][-1]['url'] = file_info.url
             else:
@@ -318,7 +351,7 @@ def get_export_infos(
     return archive_files, infos
 
 
-def get_archive_files(user_id: typing.Optional[int], object_ids: typing.Optional[typing.List[int]] = None) -> typing.Dict[str, bytes]:
+def get_archive_files(user_id: typing.Optional[int], object_ids: typing.Optional[typing.List[int]] = None) -> typing.Dict[str, ArchiveFileContent]:
     archive_files, infos = get_export_infos(user_id, object_ids)
     archive_files['sampledb_export/data.json'] = json.dumps(infos, indent=2)
 
@@ -342,45 +375,134 @@ This archive was created for an anonymous user at {datetime.datetime.now(datetim
 
     archive_files["sampledb_export/README.txt"] = readme_text
 
-    binary_archive_files = {}
-    for file_name, file_content in archive_files.items():
-        if isinstance(file_content, str):
-            binary_archive_files[file_name] = file_content.encode('utf-8')
-        else:
-            binary_archive_files[file_name] = file_content
+    return archive_files
 
-    return binary_archive_files
 
+class _ChunkBuffer(io.RawIOBase):
+    """
+    Unseekable stream collecting written data until it is yielded as chunks.
+    """
 
-def get_zip_archive(
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: typing.List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: typing.Any) -> int:
+        data = bytes(data)
+        if data:
+            self._chunks.append(data)
+        return len(data)
+
+    def pop_chunks(self) -> typing.List[bytes]:
+        chunks = self._chunks
+        self._chunks = []
+        return chunks
+
+
+def _get_stream_size(stream: typing.BinaryIO) -> typing.Optional[int]:
+    if not stream.seekable():
+        return None
+    position = stream.tell()
+    size = stream.seek(0, io.SEEK_END) - position
+    stream.seek(position)
+    return size
+
+
+def generate_zip_file(archive_files: typing.Dict[str, ArchiveFileContent]) -> typing.Iterator[bytes]:
+    """
+    Generate a zip file containing the given files, chunk by chunk.
+
+    The file contents are opened one at a time and copied in chunks, so that
+    the memory needed does not depend on the size of the archive.
+
+    :param archive_files: a dict mapping file names to file contents
+    :return: an iterator of the zip file chunks
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for file_name, file_content in archive_files.items():
+            with open_archive_file_content(file_content) as source:
+                zip_info = zipfile.ZipInfo(file_name, date_time=time.localtime(time.time())[:6])
+                zip_info.compress_type = zip_file.compression
+                zip_info.external_attr = 0o600 << 16
+                file_size = _get_stream_size(source)
+                if file_size is not None:
+                    zip_info.file_size = file_size
+                with zip_file.open(zip_info, 'w', force_zip64=file_size is None) as target:
+                    while chunk := source.read(CHUNK_SIZE):
+                        target.write(chunk)
+                        yield from buffer.pop_chunks()
+            yield from buffer.pop_chunks()
+    yield from buffer.pop_chunks()
+
+
+def generate_tar_gz_file(archive_files: typing.Dict[str, ArchiveFileContent]) -> typing.Iterator[bytes]:
+    """
+    Generate a gzip-compressed tar file containing the given files, chunk by chunk.
+
+    The file contents are opened one at a time and copied in chunks, so that
+    the memory needed does not depend on the size of the archive.
+
+    :param archive_files: a dict mapping file names to file contents
+    :return: an iterator of the tar.gz file chunks
+    """
+    buffer = _ChunkBuffer()
+    with gzip.GzipFile('sampledb_export.tar', 'wb', fileobj=buffer) as tar_gz_file:
+        tar_size = 0
+        for file_name, file_content in archive_files.items():
+            with contextlib.ExitStack() as exit_stack:
+                source = exit_stack.enter_context(open_archive_file_content(file_content))
+                file_size = _get_stream_size(source)
+                if file_size is None:
+                    # tar headers require the file size, so the content is
+                    # copied to a temporary file which is only held in memory
+                    # while it is small
+                    temporary_file = exit_stack.enter_context(tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE))
+                    shutil.copyfileobj(source, temporary_file, CHUNK_SIZE)
+                    file_size = temporary_file.tell()
+                    temporary_file.seek(0)
+                    source = typing.cast(typing.BinaryIO, temporary_file)
+                tar_info = tarfile.TarInfo(file_name)
+                tar_info.size = file_size
+                tar_info.mode = 0o444
+                tar_info.mtime = int(time.time())
+                tar_header = tar_info.tobuf(tarfile.DEFAULT_FORMAT, 'utf-8', 'surrogateescape')
+                tar_gz_file.write(tar_header)
+                while chunk := source.read(CHUNK_SIZE):
+                    tar_gz_file.write(chunk)
+                    yield from buffer.pop_chunks()
+                # pad the file data to a multiple of the block size
+                padding_size = -file_size % tarfile.BLOCKSIZE
+                tar_gz_file.write(tarfile.NUL * padding_size)
+                tar_size += len(tar_header) + file_size + padding_size
+            yield from buffer.pop_chunks()
+        # end the archive with two empty blocks and pad it to a multiple of the record size
+        tar_size += 2 * tarfile.BLOCKSIZE
+        tar_gz_file.write(tarfile.NUL * (2 * tarfile.BLOCKSIZE + -tar_size % tarfile.RECORDSIZE))
+    yield from buffer.pop_chunks()
+
+
+def generate_zip_archive(
         user_id: typing.Optional[int],
         object_ids: typing.Optional[typing.List[int]] = None
-) -> bytes:
-    archive_files = get_archive_files(user_id, object_ids=object_ids)
-    zip_bytes = io.BytesIO()
-    with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
-        for file_name, file_content in archive_files.items():
-            zip_file.writestr(file_name, file_content)
-    return zip_bytes.getvalue()
+) -> typing.Iterator[bytes]:
+    return generate_zip_file(get_archive_files(user_id, object_ids=object_ids))
 
 
-def get_tar_gz_archive(
+def generate_tar_gz_archive(
         user_id: typing.Optional[int],
         object_ids: typing.Optional[typing.List[int]] = None
-) -> bytes:
-    archive_files = get_archive_files(user_id, object_ids=object_ids)
-    tar_bytes = io.BytesIO()
-    with tarfile.open('sampledb_export.tar.gz', 'w:gz', fileobj=tar_bytes) as tar_file:
-        for file_name, file_content in archive_files.items():
-            tar_info = tarfile.TarInfo(file_name)
-            tar_info.size = len(file_content)
-            tar_info.mode = 0o444
-            tar_info.mtime = int(time.time())
-            tar_file.addfile(tar_info, fileobj=io.BytesIO(file_content))
-    return tar_bytes.getvalue()
+) -> typing.Iterator[bytes]:
+    return generate_tar_gz_file(get_archive_files(user_id, object_ids=object_ids))
 
 
-def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]] = None) -> bytes:
+def generate_eln_archive(
+        user_id: int,
+        object_ids: typing.Optional[typing.List[int]] = None
+) -> typing.Iterator[bytes]:
     archive_files, infos = get_export_infos(
         user_id=user_id,
         object_ids=object_ids,
@@ -390,16 +512,29 @@ def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]]
         include_instruments=False,
         include_locations=False,
     )
-    binary_archive_files = logic.eln_export.generate_ro_crate_metadata(archive_files, infos)
-    zip_bytes = io.BytesIO()
-    with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
-        for file_name, file_content in binary_archive_files.items():
-            zip_file.writestr(file_name, file_content)
-    return zip_bytes.getvalue()
+    return generate_zip_file(logic.eln_export.generate_ro_crate_metadata(archive_files, infos))
+
+
+def get_zip_archive(
+        user_id: typing.Optional[int],
+        object_ids: typing.Optional[typing.List[int]] = None
+) -> bytes:
+    return b''.join(generate_zip_archive(user_id, object_ids=object_ids))
+
+
+def get_tar_gz_archive(
+        user_id: typing.Optional[int],
+        object_ids: typing.Optional[typing.List[int]] = None
+) -> bytes:
+    return b''.join(generate_tar_gz_archive(user_id, object_ids=object_ids))
+
+
+def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]] = None) -> bytes:
+    return b''.join(generate_eln_archive(user_id, object_ids=object_ids))
 
 
 FILE_FORMATS = {
-    '.zip': ('.zip Archive', get_zip_archive, 'application/zip'),
-    '.tar.gz': ('.tar.gz Archive', get_tar_gz_archive, 'application/gzip'),
-    '.eln': ('.eln File', get_eln_archive, 'application/zip')
+    '.zip': ('.zip Archive', generate_zip_archive, 'application/zip'),
+    '.tar.gz': ('.tar.gz Archive', generate_tar_gz_archive, 'application/gzip'),
+    '.eln': ('.eln File', generate_eln_archive, 'application/zip')
 }
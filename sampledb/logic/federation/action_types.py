@@ -4,6 +4,7 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_bool, _get_str, _get_dict
+from .references import ReferenceCollector
 from ..languages import get_languages, get_language, get_language_by_lang_code
 from ..action_types import ActionType, get_action_type, create_action_type, update_action_type
 from ..action_type_translations import set_action_type_translation, get_action_type_translations_for_action_type
@@ -263,10 +264,10 @@ def _get_or_create_action_type_id(
 def shared_action_type_preprocessor(
         action_type_id: int,
         _component: Component,
-        _refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         _markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedActionTypeData]:
-    action_type = get_action_type(action_type_id)
+    action_type = refs.get_action_type(action_type_id)
     if action_type.component_id is not None:
         return None
     translations_data = {}
@@ -5,6 +5,7 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_bool, _get_str, _get_dict
+from .references import ReferenceCollector
 from .action_types import _parse_action_type_ref, _get_or_create_action_type_id, ActionTypeRef
 from .instruments import _parse_instrument_ref, _get_or_create_instrument_id, InstrumentRef
 from .users import _parse_user_ref, _get_or_create_user_id, UserRef
@@ -12,10 +13,9 @@ from ..action_permissions import set_action_permissions_for_all_users
 from ..actions import get_action, get_mutable_action, create_action, Action
 from ..action_translations import set_action_translation, get_action_translations_for_action
 from ..languages import get_languages, get_language, get_language_by_lang_code, get_language_codes
-from ..instruments import get_instrument
 from ..markdown_images import get_markdown_image, find_referenced_markdown_images
 from ..components import Component, get_component, get_component_by_uuid
-from ..users import get_user
+from ..effective_object_permissions import update_effective_object_permissions_for_actions
 from ..schemas.validate_schema import validate_schema
 from ..schemas.utils import schema_iter
 from .. import errors, fed_logs, markdown_to_html
@@ -170,6 +170,7 @@ def import_action(
                 for key, value in action_data.items()
                 if key not in ignored_keys
         ) or mutable_action.type_id != action_type_id or mutable_action.instrument_id != instrument_id or mutable_action.user_id != user_id or mutable_action.schema != schema:
+            instrument_changed = mutable_action.instrument_id != instrument_id
             mutable_action.type_id = action_type_id
             mutable_action.schema = schema
             mutable_action.instrument_id = instrument_id
@@ -178,6 +179,9 @@ def import_action(
             mutable_action.is_hidden = action_data['is_hidden']
             mutable_action.short_description_is_markdown = action_data['short_description_is_markdown']
             mutable_action.admin_only = action_data['admin_only']
+            if instrument_changed:
+                # instrument responsible users have permissions for the objects of this action
+                update_effective_object_permissions_for_actions([mutable_action.id])
             db.session.commit()
             fed_logs.update_action(mutable_action.id, component.id, action_data.get('import_notes', []))
         action = Action.from_database(mutable_action)
@@ -248,10 +252,10 @@ def _get_or_create_action_id(
 def shared_action_preprocessor(
         action_id: int,
         _component: Component,
-        refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedActionData]:
-    action = get_action(action_id)
+    action = refs.get_action(action_id)
     if action.component_id is not None:
         return None
     translations_data = {}
@@ -284,14 +288,14 @@ def shared_action_preprocessor(
     except errors.ActionTranslationDoesNotExistError:
         translations_data = {}
 
-    if action.instrument_id is not None and ('instruments', action.instrument_id) not in refs:
-        refs.append(('instruments', action.instrument_id))
-    if action.user_id is not None and ('users', action.user_id) not in refs:
-        refs.append(('users', action.user_id))
+    if action.instrument_id is not None:
+        refs.add('instruments', action.instrument_id)
+    if action.user_id is not None:
+        refs.add('users', action.user_id)
     if action.instrument_id is None or flask.current_app.config['DISABLE_INSTRUMENTS']:
         instrument = None
     else:
-        i = get_instrument(action.instrument_id)
+        i = refs.get_instrument(action.instrument_id)
         if i.component is None or i.fed_id is None:
             instrument = InstrumentRef(
                 instrument_id=i.id,
@@ -316,22 +320,11 @@ def shared_action_preprocessor(
                 action_type_id=action.type.fed_id,
                 component_uuid=comp.uuid
             )
-        if ('action_types', action.type.id) not in refs:
-            refs.append(('action_types', action.type.id))
+        refs.add('action_types', action.type.id)
     if action.user_id is None:
         user = None
     else:
-        u = get_user(action.user_id)
-        if u.component is None or u.fed_id is None:
-            user = UserRef(
-                user_id=u.id,
-                component_uuid=flask.current_app.config['FEDERATION_UUID']
-            )
-        else:
-            user = UserRef(
-                user_id=u.fed_id,
-                component_uuid=u.component.uuid
-            )
+        user = refs.get_user_ref(action.user_id)
     if action.schema is None:
         schema = None
     else:
@@ -395,7 +388,7 @@ def _parse_schema(
 
 def schema_entry_preprocessor(
         schema: typing.Union[typing.Dict[str, typing.Any], typing.List[typing.Any]],
-        refs: typing.List[typing.Tuple[str, int]]
+        refs: ReferenceCollector
 ) -> None:
     if type(schema) is list:
         for entry in schema:
@@ -407,9 +400,8 @@ def schema_entry_preprocessor(
         if schema.get('type') == 'object':
             template_action_id = schema.get('template')
             if type(template_action_id) is int:
-                if ('actions', template_action_id) not in refs:
-                    refs.append(('actions', template_action_id))
-                action = get_action(template_action_id)
+                refs.add('actions', template_action_id)
+                action = refs.get_action(template_action_id)
                 if action.component is not None and action.fed_id is not None:
                     comp = action.component
                     schema['template'] = ActionRef(
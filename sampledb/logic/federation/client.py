@@ -0,0 +1,399 @@
+# coding: utf-8
+"""
+HTTP client for requests to other components in a SampleDB federation
+
+Requests to a component are sent using one session per component, so that
+connections are kept alive and reused for further requests, e.g. for the
+files of the objects shared by the component. Requests that fail to connect
+or that are answered with a status indicating that the component is
+temporarily unavailable are retried with an exponential backoff, unless they
+might have changed data on the component. Compressed responses are accepted
+and decoded transparently, and files are streamed to a spooled temporary file
+instead of being read into memory at once, or passed on while they are
+received using FederationClient.open_stream.
+
+Independent requests, e.g. for the components, users and objects shared by a
+component or to notify several components of updates, can be sent in parallel
+with a bounded number of threads using FederationClient.get_in_parallel and
+FederationClient.send_in_parallel.
+
+Requests are authenticated using the own authentication token for the
+component. As this has to be read from the database, the headers for a
+request are prepared in the calling thread before the request is sent.
+"""
+
+import concurrent.futures
+import contextlib
+import dataclasses
+import tempfile
+import threading
+import typing
+
+import flask
+import requests
+import requests.adapters
+import urllib3.util
+
+from .. import errors
+from ..components import Component
+from ..component_authentication import get_own_authentication
+from ...models import ComponentAuthenticationType
+
+FEDERATION_TIMEOUT = 60
+# factor for the exponential backoff between retries, in seconds
+FEDERATION_RETRY_BACKOFF_FACTOR = 0.5
+# status codes of responses that are retried
+FEDERATION_RETRY_STATUS_CODES = (502, 503, 504)
+# size of the blocks read from a streamed response
+FEDERATION_STREAM_CHUNK_SIZE = 1024 * 1024
+# size up to which streamed files are kept in memory
+FEDERATION_MAX_IN_MEMORY_FILE_SIZE = 10 * 1024 * 1024
+
+T = typing.TypeVar('T')
+
+
+@dataclasses.dataclass(frozen=True)
+class FederationRequest:
+    """
+    A request to a component, prepared for being sent from any thread.
+    """
+    component_id: int
+    method: str
+    url: str
+    headers: typing.Dict[str, str]
+    params: typing.Dict[str, str]
+    data: typing.Optional[typing.Dict[str, typing.Any]] = None
+
+
+class FederationClient:
+    """
+    Client for sending requests to other components.
+
+    The client is thread-safe, so a single instance is shared by all threads
+    of a process. Use get_federation_client to get it.
+    """
+
+    def __init__(
+            self,
+            pool_size: int,
+            max_retries: int,
+            timeout: float = FEDERATION_TIMEOUT
+    ) -> None:
+        """
+        :param pool_size: the maximum number of connections kept alive per
+            component and of requests sent in parallel
+        :param max_retries: the maximum number of times a request is retried
+        :param timeout: the timeout for connecting to a component and for
+            reading from the connection, in seconds
+        """
+        self.pool_size = max(pool_size, 1)
+        self.max_retries = max(max_retries, 0)
+        self.timeout = timeout
+        self._sessions_by_component_id: typing.Dict[int, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self, component_id: int) -> requests.Session:
+        with self._sessions_lock:
+            session = self._sessions_by_component_id.get(component_id)
+            if session is None:
+                session = requests.Session()
+                # requests decodes compressed responses transparently
+                session.headers['Accept-Encoding'] = 'gzip, deflate'
+                retry = urllib3.util.Retry(
+                    total=self.max_retries,
+                    # POST requests might have been handled before failing
+                    allowed_methods=urllib3.util.Retry.DEFAULT_ALLOWED_METHODS,
+                    status_forcelist=FEDERATION_RETRY_STATUS_CODES,
+                    backoff_factor=FEDERATION_RETRY_BACKOFF_FACTOR,
+                    # the status of the last response is handled by the caller
+                    raise_on_status=False
+                )
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    max_retries=retry
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions_by_component_id[component_id] = session
+        return session
+
+    def close(self) -> None:
+        """
+        Close all sessions and the connections kept alive by them.
+        """
+        with self._sessions_lock:
+            sessions = list(self._sessions_by_component_id.values())
+            self._sessions_by_component_id.clear()
+        for session in sessions:
+            session.close()
+
+    def prepare_request(
+            self,
+            endpoint: str,
+            component: Component,
+            headers: typing.Optional[typing.Dict[str, str]] = None,
+            params: typing.Optional[typing.Dict[str, str]] = None,
+            *,
+            method: typing.Union[typing.Literal['get'], typing.Literal['post']] = 'get',
+            data: typing.Optional[typing.Dict[str, typing.Any]] = None
+    ) -> FederationRequest:
+        """
+        Prepare a request to a component.
+
+        :param endpoint: the endpoint, starting with a slash
+        :param component: the component to send the request to
+        :param headers: additional headers, or None
+        :param params: query parameters, or None
+        :param method: the HTTP method
+        :param data: form data to send, or None
+        :return: the prepared request
+        :raise errors.MissingComponentAddressError: when the component has no
+            address
+        """
+        url, headers = self._get_url_and_headers(endpoint, component, headers)
+        return FederationRequest(
+            component_id=component.id,
+            method=method.upper(),
+            url=url,
+            headers=headers,
+            params=dict(params) if params else {},
+            data=data
+        )
+
+    def _get_url_and_headers(
+            self,
+            endpoint: str,
+            component: Component,
+            headers: typing.Optional[typing.Dict[str, str]]
+    ) -> typing.Tuple[str, typing.Dict[str, str]]:
+        if component.address is None:
+            raise errors.MissingComponentAddressError()
+        headers = dict(headers) if headers else {}
+        auth = get_own_authentication(component.id, ComponentAuthenticationType.TOKEN)
+        if auth:
+            headers['Authorization'] = 'Bearer ' + auth.login['token']
+        url = component.address.rstrip('/') + endpoint
+        return url, headers
+
+    def send_request(
+            self,
+            method: typing.Union[typing.Literal['get'], typing.Literal['post'], typing.Literal['put']],
+            endpoint: str,
+            component: Component,
+            headers: typing.Optional[typing.Dict[str, str]] = None,
+            **kwargs: typing.Any
+    ) -> requests.Response:
+        """
+        Send a request to a component.
+
+        :param method: the HTTP method
+        :param endpoint: the endpoint, starting with a slash
+        :param component: the component to send the request to
+        :param headers: additional headers, or None
+        :param kwargs: additional arguments for requests.Session.request
+        :return: the response
+        :raise errors.MissingComponentAddressError: when the component has no
+            address
+        """
+        url, headers = self._get_url_and_headers(endpoint, component, headers)
+        return self._get_session(component.id).request(
+            method.upper(),
+            url,
+            headers=headers,
+            timeout=self.timeout,
+            **kwargs
+        )
+
+    def send(self, request: FederationRequest) -> requests.Response:
+        """
+        Send a prepared request.
+
+        This may be called from any thread.
+
+        :param request: the prepared request
+        :return: the response
+        """
+        return self._get_session(request.component_id).request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            params=request.params,
+            data=request.data,
+            timeout=self.timeout
+        )
+
+    def get(self, request: FederationRequest) -> typing.Dict[str, typing.Any]:
+        """
+        Send a prepared GET request and parse the JSON response.
+
+        This may be called from any thread.
+
+        :param request: the prepared request
+        :return: the parsed JSON response
+        :raise errors.UnauthorizedRequestError: when the component responds
+            with status 401
+        :raise errors.RequestServerError: when the component responds with a
+            server error
+        :raise errors.RequestError: when the component responds with any other
+            status than 200
+        :raise errors.InvalidJSONError: when the response is not valid JSON
+        """
+        with self.send(request) as response:
+            _check_response_status(response)
+            try:
+                return response.json()  # type: ignore
+            except ValueError:
+                raise errors.InvalidJSONError()
+
+    def get_in_parallel(
+            self,
+            federation_requests: typing.Sequence[FederationRequest]
+    ) -> typing.List['concurrent.futures.Future[typing.Dict[str, typing.Any]]']:
+        """
+        Send prepared GET requests in parallel and parse the JSON responses.
+
+        At most pool_size requests are sent at the same time. The returned
+        futures are done, so calling their result method returns the parsed
+        response or raises the exception that get raised for the request.
+
+        :param federation_requests: the prepared requests
+        :return: a future for each request, in the same order
+        """
+        return self._run_in_parallel(self.get, federation_requests)
+
+    def send_in_parallel(
+            self,
+            federation_requests: typing.Sequence[FederationRequest]
+    ) -> typing.List['concurrent.futures.Future[int]']:
+        """
+        Send prepared requests in parallel.
+
+        At most pool_size requests are sent at the same time. The returned
+        futures are done, so calling their result method returns the status
+        code of the response or raises the exception raised while sending the
+        request.
+
+        :param federation_requests: the prepared requests
+        :return: a future for each request, in the same order
+        """
+        def send(request: FederationRequest) -> int:
+            with self.send(request) as response:
+                return response.status_code
+
+        return self._run_in_parallel(send, federation_requests)
+
+    def _run_in_parallel(
+            self,
+            function: typing.Callable[[FederationRequest], T],
+            federation_requests: typing.Sequence[FederationRequest]
+    ) -> typing.List['concurrent.futures.Future[T]']:
+        if not federation_requests:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.pool_size, len(federation_requests))) as executor:
+            futures = [
+                executor.submit(function, request)
+                for request in federation_requests
+            ]
+        return futures
+
+    def get_binary(
+            self,
+            endpoint: str,
+            component: Component,
+            headers: typing.Optional[typing.Dict[str, str]] = None
+    ) -> typing.BinaryIO:
+        """
+        Send a GET request to a component and stream the response content.
+
+        :param endpoint: the endpoint, starting with a slash
+        :param component: the component to send the request to
+        :param headers: additional headers, or None
+        :return: a file-like object containing the response content
+        :raise errors.MissingComponentAddressError: when the component has no
+            address
+        :raise errors.UnauthorizedRequestError: when the component responds
+            with status 401
+        :raise errors.RequestServerError: when the component responds with a
+            server error
+        :raise errors.RequestError: when the component responds with any other
+            status than 200
+        """
+        with contextlib.ExitStack() as exit_stack:
+            content = exit_stack.enter_context(tempfile.SpooledTemporaryFile(max_size=FEDERATION_MAX_IN_MEMORY_FILE_SIZE))
+            with self.send_request('get', endpoint, component, headers, stream=True) as response:
+                _check_response_status(response)
+                for chunk in response.iter_content(FEDERATION_STREAM_CHUNK_SIZE):
+                    content.write(chunk)
+            content.seek(0)
+            # the content is only closed if it could not be received completely
+            exit_stack.pop_all()
+        return typing.cast(typing.BinaryIO, content)
+
+    def open_stream(
+            self,
+            endpoint: str,
+            component: Component,
+            headers: typing.Optional[typing.Dict[str, str]] = None
+    ) -> requests.Response:
+        """
+        Send a GET request to a component without reading the response
+        content, so that it can be passed on while it is received.
+
+        Besides responses with status 200, responses to range requests with
+        status 206 or 416 are returned. The caller has to close the response.
+
+        :param endpoint: the endpoint, starting with a slash
+        :param component: the component to send the request to
+        :param headers: additional headers, or None
+        :return: the response
+        :raise errors.MissingComponentAddressError: when the component has no
+            address
+        :raise errors.UnauthorizedRequestError: when the component responds
+            with status 401
+        :raise errors.RequestServerError: when the component responds with a
+            server error
+        :raise errors.RequestError: when the component responds with any other
+            unexpected status
+        """
+        with contextlib.ExitStack() as exit_stack:
+            response = exit_stack.enter_context(self.send_request('get', endpoint, component, headers, stream=True))
+            if response.status_code not in (206, 416):
+                _check_response_status(response)
+            # the response is only closed if it has an unexpected status
+            exit_stack.pop_all()
+        return response
+
+
+def _check_response_status(response: requests.Response) -> None:
+    if response.status_code == 401:
+        # 401 Unauthorized
+        raise errors.UnauthorizedRequestError()
+    if response.status_code in [500, 501, 502, 503, 504]:
+        raise errors.RequestServerError()
+    if response.status_code != 200:
+        raise errors.RequestError()
+
+
+_client: typing.Optional[FederationClient] = None
+_client_lock = threading.Lock()
+
+
+def get_federation_client() -> FederationClient:
+    """
+    Return the federation client of this process.
+
+    If the pool size or number of retries have been changed in the
+    configuration, a new client is created.
+
+    :return: the federation client
+    """
+    global _client
+    pool_size = flask.current_app.config['FEDERATION_CONNECTION_POOL_SIZE']
+    max_retries = flask.current_app.config['FEDERATION_MAX_RETRIES']
+    with _client_lock:
+        if _client is None or (_client.pool_size, _client.max_retries) != (max(pool_size, 1), max(max_retries, 0)):
+            if _client is not None:
+                _client.close()
+            _client = FederationClient(pool_size=pool_size, max_retries=max_retries)
+        return _client
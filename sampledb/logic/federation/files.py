@@ -8,7 +8,7 @@ from .utils import _get_id, _get_uuid, _get_utc_datetime, _get_str, _get_dict
 from .users import _parse_user_ref, _get_or_create_user_id, UserRef
 from ..files import get_mutable_file, create_fed_file, hide_file, File
 from ..components import Component
-from .. import errors, fed_logs, object_log
+from .. import errors, fed_logs, object_changes, object_log
 from ..utils import parse_url
 from ...models import Object
 from ... import db
@@ -103,6 +103,7 @@ def import_file(
             db_file.data = file_data['data']
             db_file.utc_datetime = file_data['utc_datetime']
             db.session.commit()
+            object_changes.record_object_change(object.object_id)
             fed_logs.update_file(db_file.id, object.object_id, component.id)
     except errors.FileDoesNotExistError:
         assert component_id is not None
@@ -5,6 +5,7 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_bool, _get_str, _get_dict
+from .references import ReferenceCollector
 from ..languages import get_languages, get_language, get_language_by_lang_code
 from ..instruments import get_instrument, get_mutable_instrument, create_instrument, Instrument
 from ..instrument_translations import set_instrument_translation, get_instrument_translations_for_instrument
@@ -192,10 +193,10 @@ def _parse_instrument_ref(
 def shared_instrument_preprocessor(
         instrument_id: int,
         _component: Component,
-        _refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedInstrumentData]:
-    instrument = get_instrument(instrument_id)
+    instrument = refs.get_instrument(instrument_id)
     if instrument.component_id is not None:
         return None
     translations_data = {}
@@ -4,6 +4,7 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_bool, _get_translation
+from .references import ReferenceCollector
 from ..locations import get_location_type, create_location_type, update_location_type, LocationType
 from ..components import Component
 from .. import errors, fed_logs
@@ -184,10 +185,10 @@ def _get_or_create_location_type_id(
 def shared_location_type_preprocessor(
         location_type_id: int,
         _component: Component,
-        _refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         _markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedLocationTypeData]:
-    location_type = get_location_type(location_type_id)
+    location_type = refs.get_location_type(location_type_id)
     if location_type.component_id is not None:
         return None
     return SharedLocationTypeData(
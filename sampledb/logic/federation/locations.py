@@ -5,9 +5,10 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_list, _get_dict, _get_translation
+from .references import ReferenceCollector
 from .location_types import _parse_location_type_ref, _get_or_create_location_type_id, LocationTypeRef
 from .users import _parse_user_ref, _get_or_create_user_id, import_user, UserRef, UserData
-from ..locations import LocationType, get_location_type, set_location_responsible_users, get_location, get_locations, create_location, update_location, Location
+from ..locations import LocationType, set_location_responsible_users, get_location, get_locations, create_location, update_location, Location
 from ..components import Component, get_component, get_component_by_uuid
 from .. import errors, fed_logs
 
@@ -188,16 +189,15 @@ def _get_or_create_location_id(
 def shared_location_preprocessor(
         location_id: int,
         _component: Component,
-        refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         _markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedLocationData]:
-    location = get_location(location_id)
+    location = refs.get_location(location_id)
     if location.component_id is not None:
         return None
     if location.parent_location_id is not None:
-        if ('locations', location.parent_location_id) not in refs:
-            refs.append(('locations', location.parent_location_id))
-        parent = get_location(location.parent_location_id)
+        refs.add('locations', location.parent_location_id)
+        parent = refs.get_location(location.parent_location_id)
         if parent.component is None or parent.fed_id is None:
             parent_location = LocationRef(
                 location_id=parent.id,
@@ -212,9 +212,8 @@ def shared_location_preprocessor(
     else:
         parent_location = None
     if location.type_id is not None:
-        if ('location_types', location.type_id) not in refs:
-            refs.append(('location_types', location.type_id))
-        location_type = get_location_type(location.type_id)
+        refs.add('location_types', location.type_id)
+        location_type = refs.get_location_type(location.type_id)
         if location_type.component is None or location_type.fed_id is None:
             location_type_ref = LocationTypeRef(
                 location_type_id=location_type.id,
@@ -230,8 +229,7 @@ def shared_location_preprocessor(
     responsible_users: typing.List[UserRef] = []
     if location.responsible_users:
         for responsible_user in location.responsible_users:
-            if ('users', responsible_user.id) not in refs:
-                refs.append(('users', responsible_user.id))
+            refs.add('users', responsible_user.id)
             if responsible_user.component is None or responsible_user.fed_id is None:
                 responsible_user_ref = UserRef(
                     user_id=responsible_user.id,
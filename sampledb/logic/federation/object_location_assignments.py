@@ -9,7 +9,7 @@ from .users import _parse_user_ref, _get_or_create_user_id, UserRef
 from .locations import _get_or_create_location_id, _parse_location_ref, LocationRef
 from ..locations import create_fed_assignment, get_fed_object_location_assignment, ObjectLocationAssignment, _get_mutable_object_location_assignment
 from ..components import Component
-from .. import errors, fed_logs, object_log
+from .. import errors, fed_logs, object_changes, object_log
 from ...models import Object
 from ... import db
 
@@ -57,6 +57,7 @@ def import_object_location_assignment(
         assignment.utc_datetime = assignment_data['utc_datetime']
         assignment.declined = assignment_data.get('declined', False)
         db.session.commit()
+        object_changes.record_object_change(object.object_id)
         fed_logs.update_object_location_assignment(assignment.id, component.id)
     return ObjectLocationAssignment.from_database(assignment)
 
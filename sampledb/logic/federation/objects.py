@@ -5,6 +5,7 @@ import typing
 import flask
 
 from .utils import _get_id, _get_uuid, _get_str, _get_dict, _get_list, _get_utc_datetime, _get_permissions
+from .references import ReferenceCollector
 from .users import _parse_user_ref, _get_or_create_user_id, UserRef
 from .actions import _parse_action_ref, _get_or_create_action_id, schema_entry_preprocessor, _parse_schema, ActionRef
 from .comments import import_comment, parse_comment, CommentData
@@ -16,11 +17,10 @@ from ..markdown_images import find_referenced_markdown_images, get_markdown_imag
 from ..object_permissions import set_user_object_permissions, set_group_object_permissions, set_project_object_permissions, set_object_permissions_for_all_users, object_permissions
 from ..schemas import validate_schema, validate
 from ..schemas.validate import validate_eln_urls
-from ..actions import get_action
 from ..comments import get_comments_for_object
 from ..components import get_component_by_uuid, get_component, Component
 from ..groups import get_group
-from ..locations import get_location, get_object_location_assignments
+from ..locations import get_object_location_assignments
 from ..objects import get_fed_object, get_object, update_object_version, insert_fed_object_version, get_object_versions
 from ..object_log import create_object, edit_object
 from ..projects import get_project
@@ -354,10 +354,11 @@ def parse_import_object(
 def shared_object_preprocessor(
         object_id: int,
         policy: typing.Dict[str, typing.Any],
-        refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         markdown_images: typing.Dict[str, str],
         *,
-        sharing_user_id: typing.Optional[int] = None
+        sharing_user_id: typing.Optional[int] = None,
+        versions_created_since: typing.Optional[datetime.datetime] = None
 ) -> SharedObjectData:
     result = SharedObjectData(
         object_id=object_id,
@@ -371,26 +372,16 @@ def shared_object_preprocessor(
         sharing_user=None
     )
     if sharing_user_id is not None:
-        if ('users', sharing_user_id) not in refs:
-            refs.append(('users', sharing_user_id))
-        sharing_user = get_user(sharing_user_id)
-        if sharing_user.fed_id is not None and sharing_user.component is not None:
-            result['sharing_user'] = {
-                'user_id': sharing_user.fed_id,
-                'component_uuid': sharing_user.component.uuid
-            }
-        else:
-            result['sharing_user'] = {
-                'user_id': sharing_user.id,
-                'component_uuid': flask.current_app.config['FEDERATION_UUID']
-            }
+        refs.add('users', sharing_user_id)
+        result['sharing_user'] = refs.get_user_ref(sharing_user_id)
     object = get_object(object_id)
-    object_versions = get_object_versions(object_id)
+    # previous versions of local objects do not change, so versions created
+    # before the last synchronization do not need to be sent again
+    object_versions = get_object_versions(object_id, created_since=versions_created_since)
     if 'access' in policy:
         if 'action' in policy['access'] and policy['access']['action'] and object.action_id is not None:
-            if ('actions', object.action_id) not in refs:
-                refs.append(('actions', object.action_id))
-            action = get_action(object.action_id)
+            refs.add('actions', object.action_id)
+            action = refs.get_action(object.action_id)
             if action.component is not None and action.fed_id is not None:
                 comp = action.component
                 result['action'] = ActionRef(
@@ -420,20 +411,8 @@ def shared_object_preprocessor(
                 res_comment['content'] = comment.content
                 res_comment['utc_datetime'] = comment.utc_datetime.strftime('%Y-%m-%d %H:%M:%S.%f') if comment.utc_datetime is not None else None
                 if 'users' in policy['access'] and policy['access']['users'] and comment.user_id is not None:
-                    if ('users', comment.user_id) not in refs:
-                        refs.append(('users', comment.user_id))
-                    user = get_user(comment.user_id)
-                    if user.fed_id is not None and user.component is not None:
-                        comp = user.component
-                        res_comment['user'] = {
-                            'user_id': user.fed_id,
-                            'component_uuid': comp.uuid
-                        }
-                    else:
-                        res_comment['user'] = {
-                            'user_id': comment.user_id,
-                            'component_uuid': flask.current_app.config['FEDERATION_UUID']
-                        }
+                    refs.add('users', comment.user_id)
+                    res_comment['user'] = refs.get_user_ref(comment.user_id)
                 result['comments'].append(SharedCommentData(
                     comment_id=res_comment['comment_id'],
                     component_uuid=res_comment['component_uuid'],
@@ -458,20 +437,8 @@ def shared_object_preprocessor(
                     }
                 res_file['utc_datetime'] = file.utc_datetime.strftime('%Y-%m-%d %H:%M:%S.%f') if file.utc_datetime else None
                 if 'users' in policy['access'] and policy['access']['users'] and file.user_id is not None:
-                    if ('users', file.user_id) not in refs:
-                        refs.append(('users', file.user_id))
-                    user = get_user(file.user_id)
-                    if user.fed_id is not None and user.component is not None:
-                        comp = user.component
-                        res_file['user'] = {
-                            'user_id': user.fed_id,
-                            'component_uuid': comp.uuid
-                        }
-                    else:
-                        res_file['user'] = {
-                            'user_id': file.user_id,
-                            'component_uuid': flask.current_app.config['FEDERATION_UUID']
-                        }
+                    refs.add('users', file.user_id)
+                    res_file['user'] = refs.get_user_ref(file.user_id)
                 if file.is_hidden:
                     log_entry = FileLogEntry.query.filter_by(
                         object_id=file.object_id,
@@ -483,25 +450,18 @@ def shared_object_preprocessor(
                         'utc_datetime': log_entry.utc_datetime.strftime('%Y-%m-%d %H:%M:%S.%f') if log_entry is not None else None
                     }
                     if log_entry is not None:
-                        if ('users', log_entry.user_id) not in refs:
-                            refs.append(('users', log_entry.user_id))
+                        refs.add('users', log_entry.user_id)
                     if file.user_id:
-                        user = get_user(file.user_id)
-                        if user.fed_id is not None and user.component is not None:
-                            comp = user.component
-                            res_file['hidden']['user'] = {
-                                'user_id': user.fed_id,
-                                'component_uuid': comp.uuid
-                            }
-                        else:
-                            res_file['hidden']['user'] = {
-                                'user_id': file.user_id,
-                                'component_uuid': flask.current_app.config['FEDERATION_UUID']
-                            }
+                        res_file['hidden']['user'] = refs.get_user_ref(file.user_id)
                     else:
                         res_file['hidden']['user'] = None
                 else:
-                    res_file['data'] = file.data
+                    # the storage backend is an implementation detail of this database
+                    res_file['data'] = {
+                        key: value
+                        for key, value in file.data.items()
+                        if key not in {'storage_backend', 'storage_key'}
+                    }
                     if file.storage == 'database':
                         res_file['data']['storage'] = 'federation'
 
@@ -516,14 +476,14 @@ def shared_object_preprocessor(
         if 'object_location_assignments' in policy['access'] and policy['access']['object_location_assignments']:
             olas = get_object_location_assignments(object_id)
             for ola in olas:
-                if ola.location_id is not None and ('locations', ola.location_id) not in refs:
-                    refs.append(('locations', ola.location_id))
-                if ola.user_id is not None and ('users', ola.user_id) not in refs:
-                    refs.append(('users', ola.user_id))
-                if ola.responsible_user_id is not None and ('users', ola.responsible_user_id) not in refs:
-                    refs.append(('users', ola.responsible_user_id))
                 if ola.location_id is not None:
-                    location = get_location(ola.location_id)
+                    refs.add('locations', ola.location_id)
+                if ola.user_id is not None:
+                    refs.add('users', ola.user_id)
+                if ola.responsible_user_id is not None:
+                    refs.add('users', ola.responsible_user_id)
+                if ola.location_id is not None:
+                    location = refs.get_location(ola.location_id)
                     if location.component is not None and location.fed_id is not None:
                         comp = location.component
                         location_ref = LocationRef(
@@ -538,33 +498,11 @@ def shared_object_preprocessor(
                 else:
                     location_ref = None
                 if ola.responsible_user_id is not None:
-                    responsible_user = get_user(ola.responsible_user_id)
-                    if responsible_user.component is not None and responsible_user.fed_id is not None:
-                        comp = responsible_user.component
-                        responsible_user_ref = UserRef(
-                            user_id=responsible_user.fed_id,
-                            component_uuid=comp.uuid
-                        )
-                    else:
-                        responsible_user_ref = UserRef(
-                            user_id=responsible_user.id,
-                            component_uuid=flask.current_app.config['FEDERATION_UUID']
-                        )
+                    responsible_user_ref = refs.get_user_ref(ola.responsible_user_id)
                 else:
                     responsible_user_ref = None
                 if ola.user_id is not None:
-                    ola_user = get_user(ola.user_id)
-                    if ola_user.component is not None and ola_user.fed_id is not None:
-                        comp = ola_user.component
-                        c_user = UserRef(
-                            user_id=ola_user.fed_id,
-                            component_uuid=comp.uuid
-                        )
-                    else:
-                        c_user = UserRef(
-                            user_id=ola_user.id,
-                            component_uuid=flask.current_app.config['FEDERATION_UUID']
-                        )
+                    c_user = refs.get_user_ref(ola.user_id)
                 else:
                     c_user = None
                 if ola.component_id is None:
@@ -595,20 +533,8 @@ def shared_object_preprocessor(
                 version_schema = version.schema.copy()
                 schema_entry_preprocessor(version_schema, refs)
         if policy.get('access', {}).get('users', False) and version.user_id:
-            if ('users', version.user_id) not in refs:
-                refs.append(('users', version.user_id))
-            user = get_user(version.user_id)
-            if user.component is not None and user.fed_id is not None:
-                comp = user.component
-                version_user = UserRef(
-                    user_id=user.fed_id,
-                    component_uuid=comp.uuid
-                )
-            else:
-                version_user = UserRef(
-                    user_id=user.id,
-                    component_uuid=flask.current_app.config['FEDERATION_UUID']
-                )
+            refs.add('users', version.user_id)
+            version_user = refs.get_user_ref(version.user_id)
         if 'modification' in policy:
             modification = policy['modification']
             if 'insert' in modification:
@@ -646,7 +572,7 @@ def shared_object_preprocessor(
 
 def entry_preprocessor(
         data: typing.Any,
-        refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         markdown_images: typing.Dict[str, str]
 ) -> None:
     if type(data) is list:
@@ -669,7 +595,7 @@ def entry_preprocessor(
             if data['_type'] == 'user':
                 if (data.get('component_uuid') is None or data.get('component_uuid') == flask.current_app.config['FEDERATION_UUID']) and 'eln_source_url' not in data:
                     try:
-                        u = get_user(data.get('user_id'))  # type: ignore
+                        u = refs.get_user(data.get('user_id'))  # type: ignore
                         if u.component_id is not None:
                             c = get_component(u.component_id)
                             data['user_id'] = u.fed_id
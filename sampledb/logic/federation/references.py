@@ -0,0 +1,286 @@
+"""
+Collection of the entities referenced by data shared with other components
+
+When objects are shared with a component, the users, actions, locations and
+other entities referenced by them are sent along with them. These references
+are collected while the shared objects are preprocessed, and each referenced
+entity is preprocessed once afterwards, possibly adding further references.
+
+A ReferenceCollector keeps the collected references in a set, so that adding
+a reference and checking whether it has been collected take constant time
+regardless of the number of shared objects. The referenced entities are
+cached for the duration of the collection and loaded in bulk, with one query
+per entity type: either explicitly for IDs collected beforehand, or for all
+pending references of a type when an entity that has not been loaded yet is
+requested.
+"""
+
+import typing
+
+import flask
+
+from .. import errors
+from ..action_types import ActionType, get_action_type, get_action_types_by_ids
+from ..actions import Action, get_action, get_actions_by_ids
+from ..instruments import Instrument, get_instrument, get_instruments_by_ids
+from ..locations import Location, LocationType, get_location, get_location_type, get_locations_by_ids, get_location_types_by_ids
+from ..users import User, UserFederationAlias, get_user, get_users_by_ids, get_user_aliases_by_user_ids
+from ...models import UserType
+
+if typing.TYPE_CHECKING:
+    from .users import UserRef
+
+Reference = typing.Tuple[str, int]
+
+T = typing.TypeVar('T')
+
+
+class ReferenceCollector:
+    """
+    Collector for the references to entities by shared data.
+    """
+
+    def __init__(self) -> None:
+        # dict instead of set to keep the order the references were added in
+        self._references: typing.Dict[Reference, None] = {}
+        self._pending_references: typing.List[Reference] = []
+        self._users_by_id: typing.Dict[int, User] = {}
+        self._actions_by_id: typing.Dict[int, Action] = {}
+        self._action_types_by_id: typing.Dict[int, ActionType] = {}
+        self._instruments_by_id: typing.Dict[int, Instrument] = {}
+        self._locations_by_id: typing.Dict[int, Location] = {}
+        self._location_types_by_id: typing.Dict[int, LocationType] = {}
+        self._user_refs_by_id: typing.Dict[int, 'UserRef'] = {}
+        self._user_aliases_by_ids: typing.Dict[typing.Tuple[int, int], typing.Optional[UserFederationAlias]] = {}
+
+    def add(self, type: str, id: int) -> None:
+        """
+        Add a reference, unless it has been added before.
+
+        :param type: the type of the referenced entity, e.g. 'users'
+        :param id: the ID of the referenced entity
+        """
+        reference = (type, id)
+        if reference not in self._references:
+            self._references[reference] = None
+            self._pending_references.append(reference)
+
+    def __contains__(self, reference: object) -> bool:
+        return reference in self._references
+
+    def __iter__(self) -> typing.Iterator[Reference]:
+        return iter(self._references)
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    def pop_pending(self) -> typing.Optional[Reference]:
+        """
+        Return the reference added most recently that has not been returned
+        by this method before.
+
+        :return: the reference, or None if all references have been returned
+        """
+        if not self._pending_references:
+            return None
+        return self._pending_references.pop()
+
+    def get_pending_ids(self, type: str) -> typing.Set[int]:
+        """
+        Return the IDs of the entities of a type with pending references.
+
+        :param type: the type of the referenced entities, e.g. 'users'
+        :return: the IDs of the referenced entities
+        """
+        return {
+            id
+            for reference_type, id in self._pending_references
+            if reference_type == type
+        }
+
+    def _load(
+            self,
+            entities_by_id: typing.Dict[int, T],
+            get_entities_by_ids: typing.Callable[[typing.Iterable[int]], typing.Dict[int, T]],
+            entity_ids: typing.Iterable[int]
+    ) -> None:
+        entity_ids = set(entity_ids) - set(entities_by_id)
+        if entity_ids:
+            entities_by_id.update(get_entities_by_ids(entity_ids))
+
+    def _get(
+            self,
+            type: str,
+            entities_by_id: typing.Dict[int, T],
+            get_entities_by_ids: typing.Callable[[typing.Iterable[int]], typing.Dict[int, T]],
+            get_entity: typing.Callable[[int], T],
+            entity_id: int
+    ) -> T:
+        entity = entities_by_id.get(entity_id)
+        if entity is None:
+            # load the entities of this type with pending references as well,
+            # as they will most likely be requested next
+            self._load(entities_by_id, get_entities_by_ids, self.get_pending_ids(type) | {entity_id})
+            entity = entities_by_id.get(entity_id)
+        if entity is None:
+            # raise the appropriate error for a missing entity
+            entity = get_entity(entity_id)
+            entities_by_id[entity_id] = entity
+        return entity
+
+    def load(self, type: str, entity_ids: typing.Iterable[int]) -> None:
+        """
+        Load the entities of a type with the given IDs using a single query.
+
+        Entities which have been loaded before and IDs that do not belong to
+        an existing entity are ignored.
+
+        :param type: the type of the entities, e.g. 'users'
+        :param entity_ids: the IDs of the entities
+        """
+        if type == 'users':
+            self._load(self._users_by_id, get_users_by_ids, entity_ids)
+        elif type == 'actions':
+            self._load(self._actions_by_id, get_actions_by_ids, entity_ids)
+        elif type == 'action_types':
+            self._load(self._action_types_by_id, get_action_types_by_ids, entity_ids)
+        elif type == 'instruments':
+            self._load(self._instruments_by_id, get_instruments_by_ids, entity_ids)
+        elif type == 'locations':
+            self._load(self._locations_by_id, get_locations_by_ids, entity_ids)
+        elif type == 'location_types':
+            self._load(self._location_types_by_id, get_location_types_by_ids, entity_ids)
+
+    def load_users(self, user_ids: typing.Iterable[int]) -> None:
+        """
+        Load the users with the given IDs using a single query.
+
+        Users which have been loaded before and IDs that do not belong to an
+        existing user are ignored.
+
+        :param user_ids: the IDs of users
+        """
+        self.load('users', user_ids)
+
+    def get_user(self, user_id: int) -> User:
+        """
+        Return a user, loading it only if it has not been loaded before.
+
+        :param user_id: the ID of an existing user
+        :return: the user
+        :raise errors.UserDoesNotExistError: when no user with the given
+            user ID exists
+        """
+        return self._get('users', self._users_by_id, get_users_by_ids, get_user, user_id)
+
+    def get_action(self, action_id: int) -> Action:
+        """
+        Return an action, loading it only if it has not been loaded before.
+
+        :param action_id: the ID of an existing action
+        :return: the action
+        :raise errors.ActionDoesNotExistError: when no action with the given
+            action ID exists
+        """
+        return self._get('actions', self._actions_by_id, get_actions_by_ids, get_action, action_id)
+
+    def get_action_type(self, action_type_id: int) -> ActionType:
+        """
+        Return an action type, loading it only if it has not been loaded before.
+
+        :param action_type_id: the ID of an existing action type
+        :return: the action type
+        :raise errors.ActionTypeDoesNotExistError: when no action type with
+            the given action type ID exists
+        """
+        return self._get('action_types', self._action_types_by_id, get_action_types_by_ids, get_action_type, action_type_id)
+
+    def get_instrument(self, instrument_id: int) -> Instrument:
+        """
+        Return an instrument, loading it only if it has not been loaded before.
+
+        :param instrument_id: the ID of an existing instrument
+        :return: the instrument
+        :raise errors.InstrumentDoesNotExistError: when no instrument with
+            the given instrument ID exists
+        """
+        return self._get('instruments', self._instruments_by_id, get_instruments_by_ids, get_instrument, instrument_id)
+
+    def get_location(self, location_id: int) -> Location:
+        """
+        Return a location, loading it only if it has not been loaded before.
+
+        :param location_id: the ID of an existing location
+        :return: the location
+        :raise errors.LocationDoesNotExistError: when no location with the
+            given location ID exists
+        """
+        return self._get('locations', self._locations_by_id, get_locations_by_ids, get_location, location_id)
+
+    def get_location_type(self, location_type_id: int) -> LocationType:
+        """
+        Return a location type, loading it only if it has not been loaded before.
+
+        :param location_type_id: the ID of an existing location type
+        :return: the location type
+        :raise errors.LocationTypeDoesNotExistError: when no location type
+            with the given location type ID exists
+        """
+        return self._get('location_types', self._location_types_by_id, get_location_types_by_ids, get_location_type, location_type_id)
+
+    def get_user_alias(self, user_id: int, component_id: int) -> UserFederationAlias:
+        """
+        Return the alias of a user for a component, loading it only if it has
+        not been loaded before.
+
+        :param user_id: the ID of an existing user
+        :param component_id: the ID of an existing component
+        :return: the user alias
+        :raise errors.UserDoesNotExistError: when no user with the given
+            user ID exists
+        :raise errors.UserAliasDoesNotExistError: when the user has no alias
+            for the component and no default alias can be used
+        """
+        if (user_id, component_id) not in self._user_aliases_by_ids:
+            # load the aliases of the users with pending references as well
+            user_ids = {
+                id
+                for id in self.get_pending_ids('users') | {user_id}
+                if (id, component_id) not in self._user_aliases_by_ids
+            }
+            user_aliases = get_user_aliases_by_user_ids(user_ids, component_id)
+            for id in user_ids:
+                self._user_aliases_by_ids[(id, component_id)] = user_aliases.get(id)
+        user_alias = self._user_aliases_by_ids[(user_id, component_id)]
+        if user_alias is None:
+            user = self.get_user(user_id)
+            if flask.current_app.config['ENABLE_DEFAULT_USER_ALIASES'] and user.type == UserType.PERSON:
+                return UserFederationAlias.from_user(user, component_id)
+            raise errors.UserAliasDoesNotExistError()
+        return user_alias
+
+    def get_user_ref(self, user_id: int) -> 'UserRef':
+        """
+        Return the reference to a user as it is sent to other components.
+
+        :param user_id: the ID of an existing user
+        :return: the user reference
+        :raise errors.UserDoesNotExistError: when no user with the given
+            user ID exists
+        """
+        user_ref = self._user_refs_by_id.get(user_id)
+        if user_ref is None:
+            user = self.get_user(user_id)
+            if user.component is not None and user.fed_id is not None:
+                user_ref = {
+                    'user_id': user.fed_id,
+                    'component_uuid': user.component.uuid
+                }
+            else:
+                user_ref = {
+                    'user_id': user.id,
+                    'component_uuid': flask.current_app.config['FEDERATION_UUID']
+                }
+            self._user_refs_by_id[user_id] = user_ref
+        # copy the cached reference, as it may be modified by the caller
+        return typing.cast('UserRef', dict(user_ref))
@@ -4,12 +4,12 @@ Logic module handling communication with other components in a SampleDB federati
 """
 import typing
 import datetime
-import io
 
 import requests
 import flask
 
-from .utils import _get_dict, _get_list, _get_bool
+from .client import FederationRequest, get_federation_client
+from .utils import _get_dict, _get_list, _get_bool, _get_str
 from .users import import_user, parse_user
 from .components import import_component_info, parse_component_info
 from .location_types import import_location_type, parse_location_type
@@ -20,15 +20,14 @@ from .markdown_images import parse_markdown_image, import_markdown_image
 from .actions import import_action, parse_action
 from .objects import import_object, parse_object
 from ..components import Component, set_component_discoverable
-from ..component_authentication import get_own_authentication
 from ..users import link_users_by_email_hashes
 from .. import errors
-from ...models import ComponentAuthenticationType
 
 PROTOCOL_VERSION_MAJOR = 0
 PROTOCOL_VERSION_MINOR = 1
 
-FEDERATION_TIMEOUT = 60
+# number of shared objects requested per page
+OBJECTS_PAGE_SIZE = 100
 
 
 def _send_request(
@@ -38,28 +37,7 @@ def _send_request(
         headers: typing.Optional[typing.Dict[str, str]] = None,
         **kwargs: typing.Any
 ) -> requests.Response:
-    if component.address is None:
-        raise errors.MissingComponentAddressError()
-    if headers is None:
-        headers = {}
-    auth = get_own_authentication(component.id, ComponentAuthenticationType.TOKEN)
-
-    if auth:
-        headers['Authorization'] = 'Bearer ' + auth.login['token']
-
-    url = component.address.rstrip('/') + endpoint
-
-    method_callable = {
-        'get': requests.get,
-        'post': requests.post,
-        'put': requests.put,
-    }[method]
-    return method_callable(  # type: ignore
-        url,
-        headers=headers,
-        timeout=FEDERATION_TIMEOUT,
-        **kwargs
-    )
+    return get_federation_client().send_request(method, endpoint, component, headers, **kwargs)
 
 
 def post(
@@ -68,7 +46,7 @@ def post(
         payload: typing.Optional[typing.Dict[str, typing.Any]] = None,
         headers: typing.Optional[typing.Dict[str, str]] = None
 ) -> None:
-    _send_request('post', endpoint, component, headers, data=payload)
+    _send_request('post', endpoint, component, headers, data=payload).close()
 
 
 def put(
@@ -77,7 +55,7 @@ def put(
         headers: typing.Optional[typing.Dict[str, str]] = None,
         **kwargs: typing.Any
 ) -> None:
-    _send_request('put', endpoint, component, headers, **kwargs)
+    _send_request('put', endpoint, component, headers, **kwargs).close()
 
 
 def get_binary(
@@ -85,53 +63,41 @@ def get_binary(
     component: Component,
     headers: typing.Optional[typing.Dict[str, str]] = None
 ) -> typing.BinaryIO:
-    response = _send_request('get', endpoint, component, headers)
-    if response.status_code == 401:
-        # 401 Unauthorized
-        raise errors.UnauthorizedRequestError()
-    if response.status_code in [500, 501, 502, 503, 504]:
-        raise errors.RequestServerError()
-    if response.status_code != 200:
-        raise errors.RequestError()
-    return io.BytesIO(response.content)
+    return get_federation_client().get_binary(endpoint, component, headers)
 
 
-def get(
+def open_stream(
+    endpoint: str,
+    component: Component,
+    headers: typing.Optional[typing.Dict[str, str]] = None
+) -> requests.Response:
+    return get_federation_client().open_stream(endpoint, component, headers)
+
+
+def _prepare_get_request(
         endpoint: str,
         component: Component,
         headers: typing.Optional[typing.Dict[str, str]] = None,
         *,
-        ignore_last_sync_time: bool = False
-) -> typing.Dict[str, typing.Any]:
-    if component.address is None:
-        raise errors.MissingComponentAddressError()
-    if headers is None:
-        headers = {}
-    auth = get_own_authentication(component.id, ComponentAuthenticationType.TOKEN)
-
-    if auth:
-        headers['Authorization'] = 'Bearer ' + auth.login['token']
-
-    parameters = {}
+        ignore_last_sync_time: bool = False,
+        parameters: typing.Optional[typing.Dict[str, str]] = None
+) -> FederationRequest:
+    parameters = dict(parameters) if parameters else {}
     if component.last_sync_timestamp is not None and not ignore_last_sync_time:
         parameters['last_sync_timestamp'] = component.last_sync_timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')
-    req = requests.get(
-        component.address.rstrip('/') + endpoint,
-        headers=headers,
-        params=parameters,
-        timeout=FEDERATION_TIMEOUT
-    )
-    if req.status_code == 401:
-        # 401 Unauthorized
-        raise errors.UnauthorizedRequestError()
-    if req.status_code in [500, 501, 502, 503, 504]:
-        raise errors.RequestServerError()
-    if req.status_code != 200:
-        raise errors.RequestError()
-    try:
-        return req.json()  # type: ignore
-    except ValueError:
-        raise errors.InvalidJSONError()
+    return get_federation_client().prepare_request(endpoint, component, headers, parameters)
+
+
+def get(
+        endpoint: str,
+        component: Component,
+        headers: typing.Optional[typing.Dict[str, str]] = None,
+        *,
+        ignore_last_sync_time: bool = False,
+        parameters: typing.Optional[typing.Dict[str, str]] = None
+) -> typing.Dict[str, typing.Any]:
+    request = _prepare_get_request(endpoint, component, headers, ignore_last_sync_time=ignore_last_sync_time, parameters=parameters)
+    return get_federation_client().get(request)
 
 
 def update_poke_component(
@@ -140,6 +106,33 @@ def update_poke_component(
     post('/federation/v1/hooks/update/', component)
 
 
+def update_poke_components(
+        components: typing.Sequence[Component]
+) -> typing.List[Component]:
+    """
+    Notify components in parallel that updates are available.
+
+    :param components: the components to notify
+    :return: the components that could not be notified
+    """
+    client = get_federation_client()
+    failed_components = []
+    requested_components = []
+    federation_requests = []
+    for component in components:
+        try:
+            federation_requests.append(client.prepare_request('/federation/v1/hooks/update/', component, method='post'))
+        except errors.MissingComponentAddressError:
+            failed_components.append(component)
+        else:
+            requested_components.append(component)
+    futures = client.send_in_parallel(federation_requests)
+    for component, future in zip(requested_components, futures):
+        if future.exception() is not None:
+            failed_components.append(component)
+    return failed_components
+
+
 def _validate_header(
         header: typing.Optional[typing.Dict[str, typing.Any]],
         component: Component
@@ -169,9 +162,16 @@ def import_updates(
     if flask.current_app.config['FEDERATION_UUID'] is None:
         raise errors.ComponentNotConfiguredForFederationError()
     timestamp = datetime.datetime.now(datetime.timezone.utc)
+    # the shared data is requested in parallel, but imported in order, as
+    # objects may reference the imported components and users
+    components_future, users_future, updates_future = get_federation_client().get_in_parallel([
+        _prepare_get_request('/federation/v1/shares/components/', component, ignore_last_sync_time=ignore_last_sync_time),
+        _prepare_get_request('/federation/v1/shares/users/', component, ignore_last_sync_time=ignore_last_sync_time),
+        _prepare_get_request('/federation/v1/shares/objects/', component, ignore_last_sync_time=ignore_last_sync_time, parameters={'limit': str(OBJECTS_PAGE_SIZE)}),
+    ])
     components = None
     try:
-        components = get('/federation/v1/shares/components/', component, ignore_last_sync_time=ignore_last_sync_time)
+        components = components_future.result()
     except errors.InvalidJSONError:
         raise errors.InvalidDataExportError('Received an invalid JSON string.')
     except errors.RequestServerError:
@@ -182,7 +182,7 @@ def import_updates(
         update_components(component, components)
     users = None
     try:
-        users = get('/federation/v1/shares/users/', component, ignore_last_sync_time=ignore_last_sync_time)
+        users = users_future.result()
     except errors.InvalidJSONError:
         raise errors.InvalidDataExportError('Received an invalid JSON string.')
     except errors.RequestServerError:
@@ -192,11 +192,19 @@ def import_updates(
     if users:
         update_users(component, users)
     try:
-        updates = get('/federation/v1/shares/objects/', component, ignore_last_sync_time=ignore_last_sync_time)
+        updates = updates_future.result()
     except errors.InvalidJSONError:
         raise errors.InvalidDataExportError('Received an invalid JSON string.')
-    if updates:
+    while updates:
         update_shares(component, updates)
+        # components not supporting pagination return all objects at once
+        next_cursor = _get_str(updates.get('next_cursor'))
+        if next_cursor is None:
+            break
+        try:
+            updates = get('/federation/v1/shares/objects/', component, ignore_last_sync_time=ignore_last_sync_time, parameters={'limit': str(OBJECTS_PAGE_SIZE), 'cursor': next_cursor})
+        except errors.InvalidJSONError:
+            raise errors.InvalidDataExportError('Received an invalid JSON string.')
     component.update_last_sync_timestamp(timestamp)
 
 
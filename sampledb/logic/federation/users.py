@@ -4,7 +4,8 @@ import flask
 
 from .components import _get_or_create_component_id
 from .utils import _get_id, _get_uuid, _get_str, _get_dict
-from ..users import get_mutable_user, create_user, set_user_hidden, get_user, get_user_alias, User
+from .references import ReferenceCollector
+from ..users import get_mutable_user, create_user, set_user_hidden, get_user, User
 from ..components import Component
 from .. import errors, fed_logs
 from ...models import UserType
@@ -177,14 +178,14 @@ def _get_or_create_user_id(
 def shared_user_preprocessor(
         user_id: int,
         component: Component,
-        _refs: typing.List[typing.Tuple[str, int]],
+        refs: ReferenceCollector,
         _markdown_images: typing.Dict[str, str]
 ) -> typing.Optional[SharedUserData]:
-    user = get_user(user_id)
+    user = refs.get_user(user_id)
     if user.component_id is not None:
         return None
     try:
-        alias = get_user_alias(user_id, component.id)
+        alias = refs.get_user_alias(user_id, component.id)
         return SharedUserData(
             user_id=user.id,
             component_uuid=flask.current_app.config['FEDERATION_UUID'],
@@ -0,0 +1,499 @@
+# coding: utf-8
+"""
+Logic module for file storage backends
+
+By default, the content of uploaded files is stored in the binary_data column
+of the file_blobs table. As this increases the size of the database, its
+write-ahead log and its backups, the content of newly uploaded files can
+instead be stored in a directory or in an S3-compatible object store, by
+setting the FILE_STORAGE_BACKEND configuration value to 'filesystem' or 's3'.
+
+The content of uploaded files is stored in file blobs, which are addressed by
+the SHA-256 hash of their content. Identical content uploaded several times,
+e.g. the same reference file for several objects, is only stored once and
+files reference the blob via their blob_sha256 column, with the number of
+referencing files being counted in the blob's reference_count.
+
+Files uploaded before file blobs were introduced may still store their
+content in the binary_data column of the files table, or in a backend given
+by 'storage_backend' and 'storage_key' in their data.
+"""
+
+import abc
+import dataclasses
+import datetime
+import hashlib
+import hmac
+import io
+import os
+import shutil
+import tempfile
+import typing
+import urllib.parse
+
+import flask
+import requests
+
+from . import errors
+from .. import db
+from ..models import FileBlob
+
+DATABASE_STORAGE_BACKEND = 'database'
+
+# size of the ranged requests when reading from an S3-compatible object store
+S3_READ_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class FileStorageBackend(abc.ABC):
+    """
+    Base class for storage backends for the content of uploaded files.
+    """
+    name: str = ''
+
+    @abc.abstractmethod
+    def save(self, key: str, stream: typing.BinaryIO, size: int) -> None:
+        """
+        Save the content of a file.
+
+        :param key: the key to store the content under
+        :param stream: a binary stream positioned at the start of the content
+        :param size: the size of the content in bytes
+        """
+
+    @abc.abstractmethod
+    def open(self, key: str) -> typing.BinaryIO:
+        """
+        Open the content of a file for reading.
+
+        :param key: the key the content is stored under
+        :return: a seekable binary stream
+        :raise errors.FileDoesNotExistError: when there is no content with the
+            given key
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Delete the content of a file, if it exists.
+
+        :param key: the key the content is stored under
+        """
+
+    @abc.abstractmethod
+    def get_local_path(self, key: str) -> typing.Optional[str]:
+        """
+        Return the path of the content in the local filesystem, if it has one.
+
+        :param key: the key the content is stored under
+        :return: the absolute path or None
+        """
+
+
+class FilesystemFileStorageBackend(FileStorageBackend):
+    """
+    Storage backend for storing file content in a local directory.
+    """
+    name = 'filesystem'
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.abspath(directory)
+
+    def _get_path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.directory, *key.split('/')))
+        if os.path.commonpath([self.directory, path]) != self.directory or path == self.directory:
+            raise ValueError(f'invalid storage key: {key}')
+        return path
+
+    def save(self, key: str, stream: typing.BinaryIO, size: int) -> None:
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file first, so that partially written content is never visible
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload_')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                shutil.copyfileobj(stream, temporary_file)
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+            os.replace(temporary_path, path)
+        except BaseException:
+            try:
+                os.remove(temporary_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, key: str) -> typing.BinaryIO:
+        try:
+            return open(self._get_path(key), 'rb')
+        except FileNotFoundError:
+            raise errors.FileDoesNotExistError()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_local_path(self, key: str) -> typing.Optional[str]:
+        return self._get_path(key)
+
+
+class S3FileStorageBackend(FileStorageBackend):
+    """
+    Storage backend for storing file content in an S3-compatible object store.
+
+    Requests use path-style URLs and are signed using AWS Signature Version 4,
+    so that the backend can be used with Amazon S3 as well as with other
+    implementations of the S3 API, such as MinIO.
+    """
+    name = 's3'
+
+    def __init__(
+            self,
+            endpoint_url: str,
+            bucket: str,
+            access_key_id: str,
+            secret_access_key: str,
+            region: str = 'us-east-1',
+            session: typing.Optional[requests.Session] = None
+    ) -> None:
+        self.endpoint_url = endpoint_url.rstrip('/')
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.session = session if session is not None else requests.Session()
+
+    def _get_signed_headers(
+            self,
+            method: str,
+            path: str,
+            headers: typing.Dict[str, str],
+            utc_datetime: typing.Optional[datetime.datetime] = None
+    ) -> typing.Dict[str, str]:
+        if utc_datetime is None:
+            utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = utc_datetime.strftime('%Y%m%dT%H%M%SZ')
+        date_stamp = utc_datetime.strftime('%Y%m%d')
+        headers = dict(headers)
+        headers['host'] = urllib.parse.urlsplit(self.endpoint_url).netloc
+        headers['x-amz-date'] = amz_date
+        # the payload is not signed, so that uploads can be streamed
+        headers['x-amz-content-sha256'] = 'UNSIGNED-PAYLOAD'
+        signed_header_names = sorted(name.lower() for name in headers if name.lower() == 'host' or name.lower().startswith('x-amz-'))
+        lowercase_headers = {name.lower(): value.strip() for name, value in headers.items()}
+        canonical_request = '\n'.join([
+            method,
+            urllib.parse.quote(path, safe='/-_.~'),
+            '',
+            ''.join(f'{name}:{lowercase_headers[name]}\n' for name in signed_header_names),
+            ';'.join(signed_header_names),
+            'UNSIGNED-PAYLOAD'
+        ])
+        scope = f'{date_stamp}/{self.region}/s3/aws4_request'
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+        signing_key = ('AWS4' + self.secret_access_key).encode('utf-8')
+        for scope_part in (date_stamp, self.region, 's3', 'aws4_request'):
+            signing_key = hmac.new(signing_key, scope_part.encode('utf-8'), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['Authorization'] = f'AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, SignedHeaders={";".join(signed_header_names)}, Signature={signature}'
+        return headers
+
+    def _request(
+            self,
+            method: str,
+            key: str,
+            headers: typing.Optional[typing.Dict[str, str]] = None,
+            data: typing.Optional[typing.BinaryIO] = None
+    ) -> requests.Response:
+        path = f'/{self.bucket}/{key}'
+        return self.session.request(
+            method,
+            self.endpoint_url + urllib.parse.quote(path, safe='/-_.~'),
+            headers=self._get_signed_headers(method, path, headers or {}),
+            data=data
+        )
+
+    def save(self, key: str, stream: typing.BinaryIO, size: int) -> None:
+        response = self._request('PUT', key, headers={'Content-Length': str(size)}, data=stream)
+        response.raise_for_status()
+
+    def open(self, key: str) -> typing.BinaryIO:
+        response = self._request('HEAD', key)
+        if response.status_code == 404:
+            raise errors.FileDoesNotExistError()
+        response.raise_for_status()
+        size = int(response.headers['Content-Length'])
+        return typing.cast(typing.BinaryIO, io.BufferedReader(_S3ObjectReader(self, key, size), buffer_size=S3_READ_CHUNK_SIZE))
+
+    def delete(self, key: str) -> None:
+        response = self._request('DELETE', key)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    def get_local_path(self, key: str) -> typing.Optional[str]:
+        return None
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """
+    Seekable reader for an object in an S3-compatible object store.
+
+    Content is read using ranged requests, so that only the requested parts
+    of an object are transferred and held in memory.
+    """
+
+    def __init__(self, backend: S3FileStorageBackend, key: str, size: int) -> None:
+        super().__init__()
+        self.backend = backend
+        self.key = key
+        self.size = size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f'invalid whence: {whence}')
+        self.position = max(0, self.position)
+        return self.position
+
+    def readinto(self, buffer: typing.Any) -> int:
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        response = self.backend._request('GET', self.key, headers={'Range': f'bytes={self.position}-{self.position + length - 1}'})
+        response.raise_for_status()
+        content = response.content[:length]
+        buffer[:len(content)] = content
+        self.position += len(content)
+        return len(content)
+
+
+def get_file_storage_backend(name: typing.Optional[str] = None) -> typing.Optional[FileStorageBackend]:
+    """
+    Return a file storage backend.
+
+    :param name: the name of the backend, or None to use the backend set via
+        the FILE_STORAGE_BACKEND configuration value
+    :return: the backend, or None for files stored in the database
+    :raise errors.InvalidFileStorageError: when the backend is unknown or
+        has not been configured
+    """
+    config = flask.current_app.config
+    if name is None:
+        name = config['FILE_STORAGE_BACKEND'] or DATABASE_STORAGE_BACKEND
+    if name == DATABASE_STORAGE_BACKEND:
+        return None
+    if name == FilesystemFileStorageBackend.name:
+        if not config['FILE_STORAGE_DIRECTORY']:
+            raise errors.InvalidFileStorageError()
+        return FilesystemFileStorageBackend(config['FILE_STORAGE_DIRECTORY'])
+    if name == S3FileStorageBackend.name:
+        if not config['FILE_STORAGE_S3_ENDPOINT_URL'] or not config['FILE_STORAGE_S3_BUCKET']:
+            raise errors.InvalidFileStorageError()
+        return S3FileStorageBackend(
+            endpoint_url=config['FILE_STORAGE_S3_ENDPOINT_URL'],
+            bucket=config['FILE_STORAGE_S3_BUCKET'],
+            access_key_id=config['FILE_STORAGE_S3_ACCESS_KEY_ID'] or '',
+            secret_access_key=config['FILE_STORAGE_S3_SECRET_ACCESS_KEY'] or '',
+            region=config['FILE_STORAGE_S3_REGION'] or 'us-east-1'
+        )
+    raise errors.InvalidFileStorageError()
+
+
+@dataclasses.dataclass(frozen=True)
+class FileDeduplicationStatistics:
+    """
+    Storage statistics for the files of an object or uploaded by a user.
+    """
+    id: typing.Optional[int]
+    num_files: int
+    total_size: int
+    saved_size: int
+
+
+def get_blob_storage_key(sha256: str) -> str:
+    """
+    Return the storage backend key for the content of a file blob.
+
+    :param sha256: the SHA-256 hexdigest of the content
+    :return: the storage key
+    """
+    return f'sha256/{sha256[:2]}/{sha256}'
+
+
+def store_file_blob(
+        content_file: typing.BinaryIO,
+        size: int,
+        sha256: str
+) -> None:
+    """
+    Store content as a file blob and add a reference to it.
+
+    If a blob with the same content already exists, only its reference count
+    is incremented. Otherwise, the content is stored in the configured storage
+    backend first, so that a blob is never visible without its content. As
+    the content is addressed by its hash, storing it again if another upload
+    of the same content happened concurrently is harmless.
+
+    The changes are not committed.
+
+    :param content_file: a stream positioned at the start of the content
+    :param size: the size of the content in bytes
+    :param sha256: the SHA-256 hexdigest of the content
+    """
+    if _add_file_blob_reference(sha256):
+        return
+    backend = get_file_storage_backend()
+    if backend is None:
+        storage_backend = DATABASE_STORAGE_BACKEND
+        storage_key = None
+        binary_data: typing.Optional[bytes] = content_file.read()
+    else:
+        storage_backend = backend.name
+        storage_key = get_blob_storage_key(sha256)
+        backend.save(storage_key, content_file, size)
+        binary_data = None
+    db.session.execute(db.text("""
+        INSERT INTO file_blobs (sha256, size, storage_backend, storage_key, binary_data, reference_count, utc_datetime)
+        VALUES (:sha256, :size, :storage_backend, :storage_key, :binary_data, 1, :utc_datetime)
+        ON CONFLICT (sha256) DO UPDATE SET reference_count = file_blobs.reference_count + 1
+    """), {
+        'sha256': sha256,
+        'size': size,
+        'storage_backend': storage_backend,
+        'storage_key': storage_key,
+        'binary_data': binary_data,
+        'utc_datetime': datetime.datetime.now(datetime.timezone.utc)
+    })
+
+
+def _add_file_blob_reference(sha256: str) -> bool:
+    return bool(db.session.execute(
+        db.update(FileBlob).where(FileBlob.sha256 == sha256).values(reference_count=FileBlob.reference_count + 1)
+    ).rowcount)
+
+
+def open_file_blob(sha256: str) -> typing.BinaryIO:
+    """
+    Open the content of a file blob for reading.
+
+    :param sha256: the SHA-256 hexdigest of the content
+    :return: a seekable binary stream
+    :raise errors.FileDoesNotExistError: when there is no blob with the given
+        hash or its content is missing
+    """
+    blob = FileBlob.query.filter_by(sha256=sha256).first()
+    if blob is None:
+        raise errors.FileDoesNotExistError()
+    backend = get_file_storage_backend(blob.storage_backend)
+    if backend is None:
+        return io.BytesIO(blob.binary_data or b'')
+    if blob.storage_key is None:
+        raise errors.FileDoesNotExistError()
+    return backend.open(blob.storage_key)
+
+
+def get_file_blob_hashes_stored_in_database() -> typing.List[str]:
+    """
+    Return the hashes of all file blobs with content in the database.
+
+    :return: a list of SHA-256 hexdigests
+    """
+    return list(db.session.execute(
+        db.select(FileBlob.sha256).where(
+            FileBlob.storage_backend == DATABASE_STORAGE_BACKEND
+        ).order_by(FileBlob.utc_datetime, FileBlob.sha256)
+    ).scalars())
+
+
+def move_file_blob_to_storage_backend(
+        sha256: str,
+        backend_name: typing.Optional[str] = None
+) -> None:
+    """
+    Move the content of a file blob from the database to a storage backend.
+
+    :param sha256: the SHA-256 hexdigest of a file blob stored in the database
+    :param backend_name: the name of the storage backend, or None to use the
+        configured backend
+    :raise errors.FileDoesNotExistError: when there is no blob with the given
+        hash
+    :raise errors.InvalidFileStorageError: when the backend is the database
+        or the blob content is not stored in the database
+    """
+    backend = get_file_storage_backend(backend_name)
+    if backend is None:
+        raise errors.InvalidFileStorageError()
+    blob = FileBlob.query.filter_by(sha256=sha256).options(db.undefer(FileBlob.binary_data)).first()
+    if blob is None:
+        raise errors.FileDoesNotExistError()
+    if blob.storage_backend != DATABASE_STORAGE_BACKEND or blob.binary_data is None:
+        raise errors.InvalidFileStorageError()
+    storage_key = get_blob_storage_key(sha256)
+    backend.save(storage_key, io.BytesIO(blob.binary_data), len(blob.binary_data))
+    blob.storage_backend = backend.name
+    blob.storage_key = storage_key
+    blob.binary_data = None
+    db.session.commit()
+
+
+def get_file_deduplication_statistics(
+        group_by: str
+) -> typing.List[FileDeduplicationStatistics]:
+    """
+    Return how much storage is saved by deduplicating file content.
+
+    The first file referencing a blob is counted as storing its content, any
+    further files with the same content are counted as saving its size.
+
+    :param group_by: either 'object' or 'user'
+    :return: the statistics for each object or user, sorted by saved size
+    """
+    if group_by == 'object':
+        group_column = 'object_id'
+    elif group_by == 'user':
+        group_column = 'user_id'
+    else:
+        raise ValueError(f'invalid group_by: {group_by}')
+    rows = db.session.execute(db.text(f"""
+        SELECT {group_column} AS id, COUNT(*) AS num_files, SUM(size) AS total_size, COALESCE(SUM(size) FILTER (WHERE blob_index > 1), 0) AS saved_size
+        FROM (
+            SELECT files.object_id, files.user_id, file_blobs.size, ROW_NUMBER() OVER (
+                PARTITION BY files.blob_sha256
+                ORDER BY files.utc_datetime, files.object_id, files.id
+            ) AS blob_index
+            FROM files
+            JOIN file_blobs ON file_blobs.sha256 = files.blob_sha256
+        ) AS blob_files
+        GROUP BY {group_column}
+        ORDER BY saved_size DESC, {group_column}
+    """)).fetchall()
+    return [
+        FileDeduplicationStatistics(
+            id=row.id,
+            num_files=row.num_files,
+            total_size=int(row.total_size),
+            saved_size=int(row.saved_size)
+        )
+        for row in rows
+    ]
@@ -0,0 +1,330 @@
+# coding: utf-8
+"""
+Logic module for resumable file uploads
+
+Large files can be uploaded in chunks, so that an upload interrupted by a
+connection drop can be resumed and neither the client nor the server has to
+hold the whole file in memory. An upload is created with the name and size of
+the file, its content is then written in chunks at increasing offsets and
+staged in a file on disk, and finally the upload is finalized, optionally
+verifying a hash of the content, which creates a regular database file for
+the object.
+
+If a chunk is sent again, e.g. because the response to it was lost, it
+replaces the content from its offset onwards. Uploads that have not been
+written to for TEMPORARY_FILE_TIME_LIMIT seconds are deleted.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+import typing
+
+import flask
+
+from . import errors, objects
+from .files import File, SUPPORTED_HASH_ALGORITHMS, create_database_file
+from .. import db
+from ..models import file_uploads
+
+# size of the blocks read from a request when writing a chunk
+CHUNK_READ_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class FileUpload:
+    """
+    This class provides an immutable wrapper around models.file_uploads.FileUpload.
+    """
+    id: int
+    object_id: int
+    user_id: int
+    file_name: str
+    size: int
+    received_size: int
+    utc_datetime: datetime.datetime
+
+    @classmethod
+    def from_database(cls, file_upload: file_uploads.FileUpload) -> 'FileUpload':
+        return FileUpload(
+            id=file_upload.id,
+            object_id=file_upload.object_id,
+            user_id=file_upload.user_id,
+            file_name=file_upload.file_name,
+            size=file_upload.size,
+            received_size=file_upload.received_size,
+            utc_datetime=file_upload.utc_datetime
+        )
+
+
+def get_file_upload_directory() -> str:
+    """
+    Return the directory that the content of file uploads is staged in.
+
+    :return: the absolute path of the directory
+    """
+    directory = flask.current_app.config['FILE_UPLOAD_DIRECTORY']
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), 'sampledb_file_uploads')
+    return os.path.abspath(str(directory))
+
+
+def _get_staging_path(upload_id: int) -> str:
+    return os.path.join(get_file_upload_directory(), str(upload_id))
+
+
+def create_file_upload(
+        object_id: int,
+        user_id: int,
+        file_name: str,
+        size: int
+) -> FileUpload:
+    """
+    Create a new file upload for an object.
+
+    :param object_id: the ID of an existing object
+    :param user_id: the ID of an existing user
+    :param file_name: the original file name
+    :param size: the size of the file in bytes
+    :return: the created file upload
+    :raise errors.ObjectDoesNotExistError: when no object with the given
+        object ID exists
+    :raise errors.FileNameTooLongError: when the file name is longer than 150
+        bytes when encoded as UTF-8
+    :raise errors.FileUploadSizeError: when the size is negative
+    """
+    if len(file_name.encode('utf8')) > 150:
+        raise errors.FileNameTooLongError()
+    if size < 0:
+        raise errors.FileUploadSizeError()
+    objects.check_object_exists(object_id)
+    delete_expired_file_uploads()
+    file_upload = file_uploads.FileUpload(
+        object_id=object_id,
+        user_id=user_id,
+        file_name=file_name,
+        size=size,
+        received_size=0,
+        utc_datetime=datetime.datetime.now(datetime.timezone.utc)
+    )
+    db.session.add(file_upload)
+    db.session.flush()
+    os.makedirs(get_file_upload_directory(), exist_ok=True)
+    with open(_get_staging_path(file_upload.id), 'wb'):
+        pass
+    db.session.commit()
+    return FileUpload.from_database(file_upload)
+
+
+def get_file_upload(
+        upload_id: int,
+        object_id: typing.Optional[int] = None
+) -> FileUpload:
+    """
+    Get an existing file upload.
+
+    :param upload_id: the ID of an existing file upload
+    :param object_id: the ID of the object the upload is for, or None
+    :return: the file upload
+    :raise errors.FileUploadDoesNotExistError: when no file upload with the
+        given ID exists for the given object
+    """
+    return FileUpload.from_database(_get_mutable_file_upload(upload_id, object_id))
+
+
+def _get_mutable_file_upload(
+        upload_id: int,
+        object_id: typing.Optional[int] = None,
+        *,
+        lock: bool = False
+) -> file_uploads.FileUpload:
+    query = file_uploads.FileUpload.query.filter_by(id=upload_id)
+    if object_id is not None:
+        query = query.filter_by(object_id=object_id)
+    if lock:
+        # concurrent requests for the same upload have to wait for each other
+        query = query.with_for_update()
+    file_upload = query.first()
+    if file_upload is None:
+        raise errors.FileUploadDoesNotExistError()
+    return file_upload
+
+
+def write_file_upload_chunk(
+        upload_id: int,
+        offset: int,
+        stream: typing.BinaryIO,
+        object_id: typing.Optional[int] = None
+) -> FileUpload:
+    """
+    Write a chunk of content to a file upload.
+
+    The offset may be at most the number of bytes received so far. Content
+    received after the offset is replaced by the chunk.
+
+    :param upload_id: the ID of an existing file upload
+    :param offset: the offset of the chunk in the file
+    :param stream: a binary stream containing the chunk
+    :param object_id: the ID of the object the upload is for, or None
+    :return: the updated file upload
+    :raise errors.FileUploadDoesNotExistError: when no file upload with the
+        given ID exists for the given object
+    :raise errors.InvalidFileUploadOffsetError: when the offset is negative
+        or larger than the number of bytes received so far
+    :raise errors.FileUploadSizeError: when the chunk would exceed the size
+        of the file
+    """
+    file_size = _get_mutable_file_upload(upload_id, object_id).size
+    # end the transaction, so that it is not kept open while reading the chunk
+    db.session.rollback()
+    max_chunk_size = file_size - offset
+    # the chunk is read before locking the upload, so that the lock is not
+    # held while waiting for the client to send it
+    with tempfile.SpooledTemporaryFile(max_size=CHUNK_READ_SIZE) as chunk_file:
+        chunk_size = 0
+        while True:
+            block = stream.read(CHUNK_READ_SIZE)
+            if not block:
+                break
+            chunk_size += len(block)
+            if chunk_size > max_chunk_size:
+                break
+            chunk_file.write(block)
+        chunk_file.seek(0)
+        file_upload = _get_mutable_file_upload(upload_id, object_id, lock=True)
+        if offset < 0 or offset > file_upload.received_size:
+            received_size = file_upload.received_size
+            db.session.rollback()
+            raise errors.InvalidFileUploadOffsetError(received_size)
+        with open(_get_staging_path(upload_id), 'r+b') as staging_file:
+            staging_file.truncate(offset)
+            staging_file.seek(offset)
+            if chunk_size > max_chunk_size:
+                file_upload.received_size = offset
+                db.session.commit()
+                raise errors.FileUploadSizeError()
+            shutil.copyfileobj(chunk_file, staging_file, CHUNK_READ_SIZE)
+    file_upload.received_size = offset + chunk_size
+    file_upload.utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    db.session.commit()
+    return FileUpload.from_database(file_upload)
+
+
+def finalize_file_upload(
+        upload_id: int,
+        hash: typing.Optional[File.HashInfo] = None,
+        object_id: typing.Optional[int] = None
+) -> File:
+    """
+    Finalize a file upload and create a database file from its content.
+
+    The upload is only deleted once the content of the file has been stored,
+    so it is kept if the file cannot be created.
+
+    :param upload_id: the ID of an existing file upload
+    :param hash: the expected hash of the file content, or None
+    :param object_id: the ID of the object the upload is for, or None
+    :return: the created file
+    :raise errors.FileUploadDoesNotExistError: when no file upload with the
+        given ID exists for the given object
+    :raise errors.FileUploadSizeError: when not all content has been received
+    :raise errors.FileUploadHashMismatchError: when the hash of the content
+        does not match the given hash
+    :raise Exception: when the file cannot be created, e.g. because its
+        content cannot be stored, in which case the upload is kept
+    """
+    file_upload = _get_mutable_file_upload(upload_id, object_id, lock=True)
+    if file_upload.received_size != file_upload.size:
+        db.session.rollback()
+        raise errors.FileUploadSizeError()
+    content_hash = None
+    if hash is not None:
+        if hash.algorithm not in SUPPORTED_HASH_ALGORITHMS:
+            db.session.rollback()
+            raise errors.FileUploadHashMismatchError()
+        hash = File.HashInfo(algorithm=hash.algorithm, hexdigest=hash.hexdigest.lower())
+        content_hash = hashlib.new(hash.algorithm)
+    staging_path = _get_staging_path(upload_id)
+
+    def save_content(stream: typing.BinaryIO) -> None:
+        # the content is hashed while it is copied, so that the staged file
+        # only needs to be read once
+        with open(staging_path, 'rb') as staging_file:
+            while block := staging_file.read(CHUNK_READ_SIZE):
+                if content_hash is not None:
+                    content_hash.update(block)
+                stream.write(block)
+        if hash is not None and content_hash is not None and content_hash.hexdigest() != hash.hexdigest:
+            raise errors.FileUploadHashMismatchError()
+
+    def delete_upload() -> None:
+        # the upload is deleted in the same transaction that the content is
+        # stored in, so that it cannot be finalized twice
+        deleted_upload_ids = db.session.execute(
+            db.delete(file_uploads.FileUpload).where(
+                file_uploads.FileUpload.id == upload_id
+            ).returning(file_uploads.FileUpload.id)
+        ).scalars().all()
+        if not deleted_upload_ids:
+            raise errors.FileUploadDoesNotExistError()
+
+    try:
+        file = create_database_file(
+            object_id=file_upload.object_id,
+            user_id=file_upload.user_id,
+            file_name=file_upload.file_name,
+            save_content=save_content,
+            hash=hash,
+            on_content_stored=delete_upload
+        )
+    except Exception:
+        db.session.rollback()
+        if file_uploads.FileUpload.query.filter_by(id=upload_id).first() is None:
+            _remove_staging_file(upload_id)
+        raise
+    _remove_staging_file(upload_id)
+    return file
+
+
+def delete_file_upload(
+        upload_id: int,
+        object_id: typing.Optional[int] = None
+) -> None:
+    """
+    Delete a file upload and its staged content.
+
+    :param upload_id: the ID of an existing file upload
+    :param object_id: the ID of the object the upload is for, or None
+    :raise errors.FileUploadDoesNotExistError: when no file upload with the
+        given ID exists for the given object
+    """
+    file_upload = _get_mutable_file_upload(upload_id, object_id, lock=True)
+    db.session.delete(file_upload)
+    db.session.commit()
+    _remove_staging_file(upload_id)
+
+
+def delete_expired_file_uploads() -> None:
+    """
+    Delete all file uploads that have not been written to for longer than
+    the temporary file time limit.
+    """
+    time_limit = flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT']
+    expired_upload_ids = db.session.execute(
+        db.delete(file_uploads.FileUpload).where(
+            file_uploads.FileUpload.utc_datetime < datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=time_limit)
+        ).returning(file_uploads.FileUpload.id)
+    ).scalars().all()
+    db.session.commit()
+    for upload_id in expired_upload_ids:
+        _remove_staging_file(upload_id)
+
+
+def _remove_staging_file(upload_id: int) -> None:
+    try:
+        os.remove(_get_staging_path(upload_id))
+    except FileNotFoundError:
+        pass
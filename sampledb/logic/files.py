@@ -14,29 +14,44 @@ enough so that it will not be encountered in practice. As a result, the prefix
 will always be 5 characters in length (0000_ to 9999_). The actual file name
 may be up to 150 bytes in length (bytes, not characters, encoded as UTF-8).
 
-The files are stored in a directory named after the object's ID, which in turn
-will be inside folders named after the action's ID.
+The content of uploaded files is stored in content-addressed file blobs, so
+that identical content is only stored once. Depending on the
+FILE_STORAGE_BACKEND configuration value, blobs are stored in the database or
+in one of the storage backends from the file_storage module. Uploads are
+buffered in a temporary file, which is only held in memory while it is small,
+and hashed while they are written.
+
+Files stored in other components of a federation are streamed from them when
+they are downloaded. If the FEDERATION_FILE_CACHE_DIRECTORY configuration
+value is set, the content of these files is cached in that directory, keyed by
+the component, the file ID and the file hash, so that repeated downloads do
+not need to fetch the content again.
 """
 
+import contextlib
 import dataclasses
 import datetime
 import hashlib
 import io
 import os
+import re
+import shutil
+import tempfile
 import typing
 
 import flask
 import requests
 from flask_babel import gettext
 
-from . import components, errors, object_log, objects, user_log, users
+from . import components, errors, object_changes, object_log, objects, user_log, users
 from .components import get_component
 from .errors import FileDoesNotExistError, FileNameTooLongError, \
     InvalidFileStorageError, TooManyFilesForObjectError, FederationFileNotAvailableError
+from .file_storage import DATABASE_STORAGE_BACKEND, get_blob_storage_key, get_file_storage_backend, open_file_blob, store_file_blob
 from .objects import get_object
 from .users import get_user
 from .. import db
-from ..models import files
+from ..models import files, FileBlob
 from ..models.file_log import FileLogEntry, FileLogEntryType
 
 MAX_NUM_FILES: int = 10000
@@ -44,6 +59,13 @@ MAX_NUM_FILES: int = 10000
 SUPPORTED_HASH_ALGORITHMS = ['sha256', 'sha512']
 DEFAULT_HASH_ALGORITHM = 'sha256'
 
+# uploads larger than this are buffered on disk instead of in memory
+MAX_IN_MEMORY_UPLOAD_SIZE = 8 * 1024 * 1024
+# size of the blocks streamed from files stored in other components
+FEDERATION_FILE_CHUNK_SIZE = 1024 * 1024
+# response headers passed on when streaming files stored in other components
+FEDERATION_FILE_STREAM_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges')
+
 
 @dataclasses.dataclass(frozen=True)
 class File:
@@ -60,6 +82,8 @@ class File:
     component_id: typing.Optional[int] = None
     preview_image_binary_data: typing.Optional[bytes] = None
     preview_image_mime_type: typing.Optional[str] = None
+    blob_sha256: typing.Optional[str] = None
+    blob_storage_backend: typing.Optional[str] = None
 
     @dataclasses.dataclass(frozen=True)
     class HashInfo:
@@ -92,7 +116,7 @@ class File:
     _cache: InfoCache = dataclasses.field(default_factory=InfoCache, kw_only=True, repr=False, compare=False)
 
     @classmethod
-    def from_database(cls, file: files.File) -> 'File':
+    def from_database(cls, file: files.File, *, include_binary_data: bool = True) -> 'File':
         if file.data is not None:
             data = file.data
         else:
@@ -106,18 +130,26 @@ class File:
             )
         else:
             hash = None
+        binary_data = None
+        if include_binary_data:
+            if file.binary_data is not None:
+                binary_data = file.binary_data
+            elif file.blob is not None:
+                binary_data = file.blob.binary_data
         return File(
             id=file.id,
             object_id=file.object_id,
             user_id=file.user_id,
             utc_datetime=file.utc_datetime,
             data=data,
-            binary_data=file.binary_data,
+            binary_data=binary_data,
             fed_id=file.fed_id,
             component_id=file.component_id,
             hash=hash,
-            preview_image_binary_data=file.preview_image_binary_data,
+            preview_image_binary_data=file.preview_image_binary_data if include_binary_data else None,
             preview_image_mime_type=file.preview_image_mime_type,
+            blob_sha256=file.blob_sha256,
+            blob_storage_backend=file.blob.storage_backend if file.blob is not None else None,
         )
 
     @property
@@ -133,6 +165,37 @@ class File:
         else:
             raise InvalidFileStorageError()
 
+    @property
+    def storage_backend(self) -> str:
+        if self.data is not None and self.storage == 'database':
+            if self.blob_storage_backend is not None:
+                return self.blob_storage_backend
+            return str(self.data.get('storage_backend', DATABASE_STORAGE_BACKEND))
+        else:
+            raise InvalidFileStorageError()
+
+    @property
+    def local_path(self) -> typing.Optional[str]:
+        """
+        The path of the file content in the local filesystem, if it has one.
+
+        For files stored in other components, this is the path of the cached
+        content, if it has been cached.
+        """
+        if self.storage == 'federation':
+            cache_path = _get_federation_file_cache_path(self)
+            if cache_path is None or not os.path.isfile(cache_path):
+                return None
+            return cache_path
+        if self.storage != 'database' or self.storage_backend == DATABASE_STORAGE_BACKEND:
+            return None
+        backend = get_file_storage_backend(self.storage_backend)
+        if backend is None:
+            return None
+        if self.blob_sha256 is not None:
+            return backend.get_local_path(get_blob_storage_key(self.blob_sha256))
+        return backend.get_local_path(self.data['storage_key'])
+
     @property
     def filepath(self) -> str:
         if self.data is not None and self.storage in {'local_reference'}:
@@ -251,35 +314,227 @@ class File:
 
     def open(self, read_only: bool = True) -> typing.BinaryIO:
         if self.storage == 'database':
-            if self.binary_data is not None:
-                return io.BytesIO(self.binary_data)
+            if self.blob_sha256 is not None:
+                if self.binary_data is not None:
+                    return io.BytesIO(self.binary_data)
+                return open_file_blob(self.blob_sha256)
+            if self.storage_backend != DATABASE_STORAGE_BACKEND:
+                backend = get_file_storage_backend(self.storage_backend)
+                if backend is None:
+                    raise InvalidFileStorageError()
+                return backend.open(self.data['storage_key'])
+            binary_data = self.binary_data
+            if binary_data is None:
+                # the binary data might not have been loaded with the file information
+                binary_data = db.session.execute(
+                    db.select(files.File.binary_data).filter_by(id=self.id, object_id=self.object_id)
+                ).scalar()
+            if binary_data is not None:
+                return io.BytesIO(binary_data)
             else:
                 return io.BytesIO(b'')
         elif self.storage == 'federation':
-            object = get_object(self.object_id)
-            if self.component_id:
-                component = get_component(self.component_id)
-            else:
-                raise InvalidFileStorageError()
+            cache_path = _get_federation_file_cache_path(self)
+            if cache_path is not None and os.path.isfile(cache_path):
+                return open(cache_path, 'rb')
             from .federation.update import get_binary
-            try:
-                file_data = get_binary(f'/federation/v1/shares/objects/{object.fed_object_id}/files/{self.fed_id}', component)
-            except errors.UnauthorizedRequestError:
-                raise FederationFileNotAvailableError()
-            except errors.MissingComponentAddressError:
-                raise FederationFileNotAvailableError()
-            except errors.RequestServerError:
-                raise FederationFileNotAvailableError()
-            except errors.RequestError:
-                raise FederationFileNotAvailableError()
-            except requests.exceptions.ConnectionError:
-                raise FederationFileNotAvailableError()
-            except errors.NoAuthenticationMethodError:
-                raise FederationFileNotAvailableError()
+            with _federation_file_not_available_on_request_errors():
+                file_data = get_binary(self._federation_endpoint, self._federation_component)
+            if cache_path is not None and self.hash is not None:
+                with _FederationFileCacheWriter(cache_path, self.hash) as cache_writer:
+                    while chunk := file_data.read(FEDERATION_FILE_CHUNK_SIZE):
+                        cache_writer.write(chunk)
+                    cache_writer.commit()
+                file_data.seek(0)
             return file_data
         else:
             raise InvalidFileStorageError()
 
+    def open_stream(self, range: typing.Optional[str] = None) -> 'FederationFileStream':
+        """
+        Stream the content of a file stored in another component.
+
+        Unlike open, this does not wait for the content to be received, so
+        that it can be passed on while it is received. If the content is
+        requested completely and caching is enabled for the file, it is added
+        to the cache while it is streamed.
+
+        :param range: the value of a Range header to send to the other
+            component, or None
+        :return: the file stream
+        :raise errors.InvalidFileStorageError: when the file is not stored in
+            another component
+        :raise errors.FederationFileNotAvailableError: when the file cannot be
+            requested from the other component
+        """
+        if self.storage != 'federation':
+            raise InvalidFileStorageError()
+        from .federation.update import open_stream
+        headers = {
+            # the content is passed on as is, so it must not be compressed
+            'Accept-Encoding': 'identity'
+        }
+        if range:
+            headers['Range'] = range
+        with _federation_file_not_available_on_request_errors():
+            response = open_stream(self._federation_endpoint, self._federation_component, headers)
+        cache_writer = None
+        if response.status_code == 200 and self.hash is not None:
+            cache_path = _get_federation_file_cache_path(self)
+            if cache_path is not None:
+                # the cache writer is entered and exited by the chunk generator
+                cache_writer = _FederationFileCacheWriter(cache_path, self.hash)
+        return FederationFileStream(
+            status_code=response.status_code,
+            headers={
+                name: response.headers[name]
+                for name in FEDERATION_FILE_STREAM_HEADERS
+                if name in response.headers
+            },
+            chunks=_iter_federation_file_chunks(response, cache_writer)
+        )
+
+    @property
+    def _federation_endpoint(self) -> str:
+        object = get_object(self.object_id)
+        return f'/federation/v1/shares/objects/{object.fed_object_id}/files/{self.fed_id}'
+
+    @property
+    def _federation_component(self) -> components.Component:
+        if not self.component_id:
+            raise InvalidFileStorageError()
+        return get_component(self.component_id)
+
+
+@dataclasses.dataclass(frozen=True)
+class FederationFileStream:
+    """
+    The content of a file stored in another component, streamed from it.
+
+    The chunks have to be consumed completely or closed, so that the
+    connection to the other component is released.
+    """
+    status_code: int
+    headers: typing.Dict[str, str]
+    chunks: typing.Generator[bytes, None, None]
+
+
+def _iter_federation_file_chunks(
+        response: requests.Response,
+        cache_writer: typing.Optional['_FederationFileCacheWriter']
+) -> typing.Generator[bytes, None, None]:
+    with response, cache_writer or contextlib.nullcontext():
+        for chunk in response.iter_content(FEDERATION_FILE_CHUNK_SIZE):
+            if cache_writer is not None:
+                cache_writer.write(chunk)
+            yield chunk
+        if cache_writer is not None:
+            cache_writer.commit()
+
+
+@contextlib.contextmanager
+def _federation_file_not_available_on_request_errors() -> typing.Iterator[None]:
+    try:
+        yield
+    except (
+        errors.UnauthorizedRequestError,
+        errors.MissingComponentAddressError,
+        errors.RequestServerError,
+        errors.RequestError,
+        requests.exceptions.ConnectionError,
+        errors.NoAuthenticationMethodError
+    ):
+        raise FederationFileNotAvailableError()
+
+
+def _get_federation_file_cache_path(file: File) -> typing.Optional[str]:
+    cache_directory = flask.current_app.config['FEDERATION_FILE_CACHE_DIRECTORY']
+    if not cache_directory or file.component_id is None or file.fed_id is None or file.hash is None:
+        return None
+    # the hash is used as part of the file name, so it has to be validated
+    if file.hash.algorithm not in SUPPORTED_HASH_ALGORITHMS or not isinstance(file.hash.hexdigest, str) or not re.fullmatch('[0-9a-fA-F]+', file.hash.hexdigest):
+        return None
+    object = get_object(file.object_id)
+    if object.fed_object_id is None:
+        return None
+    component = get_component(file.component_id)
+    return os.path.join(
+        os.path.abspath(cache_directory),
+        component.uuid,
+        f'{object.fed_object_id}_{file.fed_id}_{file.hash.algorithm}_{file.hash.hexdigest.lower()}'
+    )
+
+
+class _FederationFileCacheWriter:
+    """
+    Writer for adding the content of a file stored in another component to
+    the cache.
+
+    The content is written to a temporary file in the cache directory and
+    only moved to the cache path if its hash matches, so that incomplete or
+    modified content is never read from the cache. As the cache is optional,
+    errors while writing to it only prevent the content from being cached.
+
+    The writer is used as a context manager, which discards the content if
+    it has not been committed.
+    """
+
+    def __init__(self, cache_path: str, hash: File.HashInfo) -> None:
+        self._cache_path = cache_path
+        self._hexdigest = hash.hexdigest.lower()
+        self._hasher = hashlib.new(hash.algorithm)
+        self._temporary_file: typing.Optional[typing.IO[bytes]] = None
+
+    def __enter__(self) -> '_FederationFileCacheWriter':
+        try:
+            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+            self._temporary_file = tempfile.NamedTemporaryFile(dir=os.path.dirname(self._cache_path), prefix='.', delete=False)
+        except OSError:
+            self._temporary_file = None
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:
+        self.discard()
+
+    def write(self, chunk: bytes) -> None:
+        if self._temporary_file is None:
+            return
+        try:
+            self._temporary_file.write(chunk)
+        except OSError:
+            self.discard()
+            return
+        self._hasher.update(chunk)
+
+    def commit(self) -> None:
+        temporary_file = self._temporary_file
+        if temporary_file is None:
+            return
+        self._temporary_file = None
+        try:
+            temporary_file.close()
+            if self._hasher.hexdigest() == self._hexdigest:
+                os.replace(temporary_file.name, self._cache_path)
+                return
+        except OSError:
+            pass
+        _remove_temporary_file(temporary_file.name)
+
+    def discard(self) -> None:
+        temporary_file = self._temporary_file
+        if temporary_file is None:
+            return
+        self._temporary_file = None
+        temporary_file.close()
+        _remove_temporary_file(temporary_file.name)
+
+
+def _remove_temporary_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 
 def create_local_file_reference(
         object_id: int,
@@ -387,7 +642,8 @@ def create_database_file(
         create_log_entry: bool = True,
         preview_image_binary_data: bytes,
         preview_image_mime_type: str,
-        utc_datetime: typing.Optional[datetime.datetime] = None
+        utc_datetime: typing.Optional[datetime.datetime] = None,
+        on_content_stored: typing.Optional[typing.Callable[[], None]] = None
 ) -> File:
     ...
 
@@ -403,7 +659,8 @@ def create_database_file(
         create_log_entry: bool = True,
         preview_image_binary_data: None = None,
         preview_image_mime_type: None = None,
-        utc_datetime: typing.Optional[datetime.datetime] = None
+        utc_datetime: typing.Optional[datetime.datetime] = None,
+        on_content_stored: typing.Optional[typing.Callable[[], None]] = None
 ) -> File:
     ...
 
@@ -418,7 +675,8 @@ def create_database_file(
         create_log_entry: bool = True,
         preview_image_binary_data: typing.Optional[bytes] = None,
         preview_image_mime_type: typing.Optional[str] = None,
-        utc_datetime: typing.Optional[datetime.datetime] = None
+        utc_datetime: typing.Optional[datetime.datetime] = None,
+        on_content_stored: typing.Optional[typing.Callable[[], None]] = None
 ) -> File:
     """
     Create a new database file and add it to the object and user logs.
@@ -435,6 +693,10 @@ def create_database_file(
     :param preview_image_binary_data: binary data for the preview image, or None
     :param preview_image_mime_type: mime type for the preview image, or None
     :param utc_datetime: the datetime for the file, or None
+    :param on_content_stored: a function which will be called after the
+        content has been stored, so that further changes are committed
+        together with it, or None. If the function raises an exception, the
+        file will be deleted.
     :return: the newly created file
     :raise errors.ObjectDoesNotExistError: when no object with the given
         object ID exists
@@ -447,29 +709,29 @@ def create_database_file(
     if len(file_name.encode('utf8')) > 150:
         raise FileNameTooLongError()
 
-    binary_data_file = io.BytesIO()
-    save_content(binary_data_file)
-    binary_data = binary_data_file.getvalue()
-    if hash is None:
-        hash = File.HashInfo.from_binary_data(
-            algorithm=DEFAULT_HASH_ALGORITHM,
-            binary_data=binary_data
-        )
+    with typing.cast(typing.BinaryIO, tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_UPLOAD_SIZE)) as content_file:
+        hashing_writer = _HashingWriter(content_file)
+        save_content(typing.cast(typing.BinaryIO, hashing_writer))
+        if hash is None:
+            hash = File.HashInfo(
+                algorithm='sha256',
+                hexdigest=hashing_writer.hexdigest()
+            )
 
-    db_file = _create_db_file(
-        object_id=object_id,
-        user_id=user_id,
-        data={
-            'storage': 'database',
-            'original_file_name': file_name,
-            'hash': {
-                'algorithm': hash.algorithm,
-                'hexdigest': hash.hexdigest
-            } if hash is not None else None
-        },
-        utc_datetime=utc_datetime
-    )
-    db_file.binary_data = binary_data
+        db_file = _create_db_file(
+            object_id=object_id,
+            user_id=user_id,
+            data={
+                'storage': 'database',
+                'original_file_name': file_name,
+                'hash': {
+                    'algorithm': hash.algorithm,
+                    'hexdigest': hash.hexdigest
+                } if hash is not None else None
+            },
+            utc_datetime=utc_datetime
+        )
+        _store_file_content(db_file, content_file, hashing_writer.hexdigest(), on_content_stored)
     db_file.preview_image_binary_data = preview_image_binary_data
     db_file.preview_image_mime_type = preview_image_mime_type.lower() if preview_image_mime_type else ''
     db.session.commit()
@@ -543,14 +805,144 @@ def create_fed_file(
     """
     file = _create_db_file(object_id, user_id, data, utc_datetime, fed_id, component_id)
     if save_content:
-        binary_data_file = io.BytesIO()
-        save_content(binary_data_file)
-        binary_data = binary_data_file.getvalue()
-        file.binary_data = binary_data
+        with typing.cast(typing.BinaryIO, tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_UPLOAD_SIZE)) as content_file:
+            hashing_writer = _HashingWriter(content_file)
+            save_content(typing.cast(typing.BinaryIO, hashing_writer))
+            _store_file_content(file, content_file, hashing_writer.hexdigest())
         db.session.commit()
     return file
 
 
+class _HashingWriter(io.RawIOBase):
+    """
+    Writable stream that computes the SHA-256 hash of all content while passing it on to a target stream.
+    """
+
+    def __init__(self, target: typing.BinaryIO) -> None:
+        super().__init__()
+        self._target = target
+        self._hash = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: typing.Any) -> int:
+        self._hash.update(data)
+        return self._target.write(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _store_file_content(
+        db_file: files.File,
+        content_file: typing.BinaryIO,
+        sha256: str,
+        on_content_stored: typing.Optional[typing.Callable[[], None]] = None
+) -> None:
+    """
+    Store the content of a new file as a file blob.
+
+    The changes to the file are not committed. If the content cannot be
+    stored, the file will be deleted.
+
+    :param db_file: the new file
+    :param content_file: a seekable stream containing the content
+    :param sha256: the SHA-256 hexdigest of the content
+    :param on_content_stored: a function which will be called after the
+        content has been stored, or None. If it raises an exception, the
+        file will be deleted.
+    """
+    content_file.seek(0, io.SEEK_END)
+    size = content_file.tell()
+    content_file.seek(0)
+    try:
+        store_file_blob(content_file, size, sha256)
+        if on_content_stored is not None:
+            on_content_stored()
+    except Exception:
+        db.session.rollback()
+        db.session.delete(db_file)
+        db.session.commit()
+        raise
+    db_file.blob_sha256 = sha256
+
+
+def get_file_ids_without_blob() -> typing.List[typing.Tuple[int, int]]:
+    """
+    Return the object and file IDs of all files with content outside of file blobs.
+
+    These files have been uploaded before file blobs were introduced and store
+    their content in the files table or directly in a storage backend.
+
+    :return: a list of object ID and file ID pairs
+    """
+    return [
+        (object_id, file_id)
+        for object_id, file_id in db.session.execute(
+            db.select(files.File.object_id, files.File.id).where(
+                files.File.blob_sha256.is_(None),
+                db.or_(
+                    files.File.binary_data.is_not(None),
+                    files.File.data['storage_key'].is_not(None)
+                )
+            ).order_by(files.File.object_id, files.File.id)
+        ).all()
+    ]
+
+
+def move_file_content_to_blob(
+        object_id: int,
+        file_id: int
+) -> None:
+    """
+    Move the content of a file uploaded before file blobs were introduced to a file blob.
+
+    If a blob with the same content already exists, the file will reference
+    it, otherwise the blob is stored in the configured storage backend.
+
+    :param object_id: the ID of an existing object
+    :param file_id: the ID of a file for the object with content outside of
+        file blobs
+    :raise errors.FileDoesNotExistError: when no file with the given object ID
+        and file ID exists
+    :raise errors.InvalidFileStorageError: when the file content is already
+        stored in a file blob or not stored at all
+    """
+    db_file = files.File.query.filter_by(object_id=object_id, id=file_id).options(db.undefer(files.File.binary_data)).first()
+    if db_file is None:
+        raise FileDoesNotExistError()
+    if db_file.blob_sha256 is not None:
+        raise InvalidFileStorageError()
+    data = db_file.data or {}
+    previous_backend = None
+    with typing.cast(typing.BinaryIO, tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_UPLOAD_SIZE)) as content_file:
+        hashing_writer = _HashingWriter(content_file)
+        if db_file.binary_data is not None:
+            hashing_writer.write(db_file.binary_data)
+        elif 'storage_key' in data:
+            previous_backend = get_file_storage_backend(data.get('storage_backend'))
+            if previous_backend is None:
+                raise InvalidFileStorageError()
+            with previous_backend.open(data['storage_key']) as previous_content_file:
+                shutil.copyfileobj(previous_content_file, hashing_writer)
+        else:
+            raise InvalidFileStorageError()
+        size = content_file.tell()
+        content_file.seek(0)
+        store_file_blob(content_file, size, hashing_writer.hexdigest())
+    db_file.blob_sha256 = hashing_writer.hexdigest()
+    db_file.binary_data = None
+    db_file.data = {
+        key: value
+        for key, value in data.items()
+        if key not in {'storage_backend', 'storage_key'}
+    }
+    db.session.commit()
+    if previous_backend is not None:
+        previous_backend.delete(data['storage_key'])
+
+
 def _create_file_logs(file: File) -> None:
     """
     Create object and user logs for a new file.
@@ -624,6 +1016,7 @@ def _create_db_file(
     )
     db.session.add(db_file)
     db.session.commit()
+    object_changes.record_object_change(object_id)
     return db_file
 
 
@@ -666,6 +1059,7 @@ def update_file_information(object_id: int, file_id: int, user_id: int, title: s
         })
         db.session.add(log_entry)
         db.session.commit()
+    object_changes.record_object_change(object_id)
 
 
 def hide_file(
@@ -696,6 +1090,7 @@ def hide_file(
     }, utc_datetime=utc_datetime)
     db.session.add(log_entry)
     db.session.commit()
+    object_changes.record_object_change(object_id)
 
 
 def get_file_for_object(object_id: int, file_id: int) -> typing.Optional[File]:
@@ -728,6 +1123,47 @@ def get_files_for_object(object_id: int) -> typing.List[File]:
     return [File.from_database(db_file) for db_file in db_files]
 
 
+def get_files_for_objects(
+        object_ids: typing.Iterable[int],
+        *,
+        include_binary_data: bool = False
+) -> typing.Dict[int, typing.List[File]]:
+    """
+    Returns the lists of files for several objects using a single query.
+
+    If the binary data is not included, it will be loaded when a file stored
+    in the database is opened.
+
+    :param object_ids: the IDs of existing objects
+    :param include_binary_data: whether the binary data of files stored in
+        the database and their preview images should be loaded
+    :return: a dict mapping object IDs to lists of files, sorted by upload
+        time from first to last
+    """
+    files_by_object_id: typing.Dict[int, typing.List[File]] = {
+        object_id: []
+        for object_id in object_ids
+    }
+    if not files_by_object_id:
+        return files_by_object_id
+    query = files.File.query.filter(
+        files.File.object_id.in_(files_by_object_id.keys())
+    ).order_by(db.asc(files.File.utc_datetime))
+    if include_binary_data:
+        query = query.options(
+            db.undefer(files.File.binary_data),
+            db.undefer(files.File.preview_image_binary_data),
+            db.selectinload(files.File.blob).undefer(FileBlob.binary_data)
+        )
+    else:
+        query = query.options(
+            db.selectinload(files.File.blob)
+        )
+    for db_file in query.all():
+        files_by_object_id[db_file.object_id].append(File.from_database(db_file, include_binary_data=include_binary_data))
+    return files_by_object_id
+
+
 def get_file_names_by_id_for_object(
         object_id: int
 ) -> typing.Dict[int, typing.Tuple[str, str]]:
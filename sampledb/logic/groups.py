@@ -25,8 +25,10 @@ from ..models import groups
 from .users import check_user_exists, get_mutable_user
 from .security_tokens import generate_token
 from .notifications import create_notification_for_being_invited_to_a_group
+from .effective_object_permissions import update_effective_object_permissions_for_users
 from ..logic.languages import get_language_by_lang_code, Language
 from . import errors
+from .utils import request_cache
 
 
 # group names are limited to this (semi-arbitrary) length
@@ -225,9 +227,11 @@ def delete_group(group_id: int) -> None:
     group = groups.Group.query.filter_by(id=group_id).first()
     if group is None:
         raise errors.GroupDoesNotExistError()
+    member_ids = [member.id for member in group.members]
     # group permissions and group default permissions will be deleted due to
     # ondelete = "CASCADE" in the model. No need to delete them manually here.
     db.session.delete(group)
+    update_effective_object_permissions_for_users(member_ids)
     db.session.commit()
 
 
@@ -271,6 +275,7 @@ def get_group_member_ids(group_id: int) -> typing.List[int]:
     return [user.id for user in group.members]
 
 
+@request_cache
 def get_user_groups(user_id: int) -> typing.List[Group]:
     """
     Returns a list of the group IDs of all groups the user with the given
@@ -368,6 +373,7 @@ def add_user_to_group(group_id: int, user_id: int) -> None:
     for mutable_invitation in mutable_invitations:
         mutable_invitation.accepted = True
         db.session.add(mutable_invitation)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -397,6 +403,7 @@ def remove_user_from_group(group_id: int, user_id: int) -> None:
     group.members.remove(user)
     if not group.members:
         db.session.delete(group)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -0,0 +1,225 @@
+# coding: utf-8
+"""
+Indexed properties allow searching and sorting objects by frequently used
+properties without evaluating the property of every object.
+
+For each indexed property, an expression index on the data of the current
+object versions is maintained by PostgreSQL:
+
+- for quantities, a B-tree index on the magnitude in base units,
+- for datetimes, a B-tree index on the UTC datetime string,
+- for other values, a GIN index on the whole property, supporting the
+  containment operator used for comparing text, booleans, references and tags.
+
+The advanced search adds conditions to its filters which can be answered by
+these indexes, while the original conditions are kept to ensure the exact
+same results, and sorting by an indexed quantity or datetime property uses
+the index key. For an index to be used, the expressions in the queries have to
+be identical to the indexed expressions, so they are created by the functions
+in this module.
+"""
+
+import dataclasses
+import re
+import typing
+
+from .. import db
+from . import errors
+from .utils import cache, request_cache
+from ..models import IndexedPropertyType, indexed_properties
+from ..models.objects import Objects
+
+# property names are limited to the characters allowed by the advanced search
+PROPERTY_NAME_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexedProperty:
+    """
+    This class provides an immutable wrapper around models.indexed_properties.IndexedProperty.
+    """
+    id: int
+    path: typing.Tuple[str, ...]
+    type: IndexedPropertyType
+
+    @classmethod
+    def from_database(cls, indexed_property: indexed_properties.IndexedProperty) -> 'IndexedProperty':
+        return IndexedProperty(
+            id=indexed_property.id,
+            path=tuple(indexed_property.path.split('.')),
+            type=indexed_property.type
+        )
+
+    @property
+    def index_name(self) -> str:
+        return f'ix_objects_current_indexed_property_{self.id}'
+
+
+def get_quantity_index_key(db_obj: typing.Any) -> typing.Any:
+    """
+    Return the key of a quantity index for a property.
+
+    :param db_obj: the SQLAlchemy object for the property
+    :return: the magnitude in base units for quantities, or NULL otherwise
+    """
+    return db.case(
+        (db_obj['_type'].astext == 'quantity', db_obj['magnitude_in_base_units'].astext.cast(db.Float)),
+        else_=db.null()
+    )
+
+
+def get_datetime_index_key(db_obj: typing.Any) -> typing.Any:
+    """
+    Return the key of a datetime index for a property.
+
+    :param db_obj: the SQLAlchemy object for the property
+    :return: the UTC datetime string for datetimes, or NULL otherwise
+    """
+    return db.case(
+        (db_obj['_type'].astext == 'datetime', db_obj['utc_datetime'].astext),
+        else_=db.null()
+    )
+
+
+def _get_create_index_statement(indexed_property: IndexedProperty) -> str:
+    # the indexed expression is compiled with the values inlined, as
+    # parameters cannot be used in CREATE INDEX statements
+    db_obj = db.column('data', Objects._current_table.c.data.type)[list(indexed_property.path)]
+    if indexed_property.type == IndexedPropertyType.QUANTITY:
+        index_definition = f'(({_compile(get_quantity_index_key(db_obj))}))'
+    elif indexed_property.type == IndexedPropertyType.DATETIME:
+        index_definition = f'(({_compile(get_datetime_index_key(db_obj))}))'
+    else:
+        index_definition = f'USING gin (({_compile(db_obj)}) jsonb_path_ops)'
+    return f'CREATE INDEX IF NOT EXISTS {indexed_property.index_name} ON {Objects._current_table.name} {index_definition}'
+
+
+def _compile(expression: typing.Any) -> str:
+    return str(expression.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def parse_property_path(path: str) -> typing.Tuple[str, ...]:
+    """
+    Parse a property path in the form used by the advanced search.
+
+    :param path: the property names, separated by dots, e.g. "sample.mass"
+    :return: the property names
+    :raise errors.InvalidPropertyPathError: when the path is not valid
+    """
+    property_names = tuple(path.strip().split('.'))
+    if not all(PROPERTY_NAME_PATTERN.fullmatch(property_name) for property_name in property_names):
+        raise errors.InvalidPropertyPathError()
+    return property_names
+
+
+def get_indexed_properties() -> typing.List[IndexedProperty]:
+    """
+    Return all indexed properties.
+
+    :return: the indexed properties, sorted by path and type
+    """
+    return [
+        IndexedProperty.from_database(indexed_property)
+        for indexed_property in indexed_properties.IndexedProperty.query.order_by(
+            indexed_properties.IndexedProperty.path,
+            indexed_properties.IndexedProperty.type
+        ).all()
+    ]
+
+
+def get_indexed_property(indexed_property_id: int) -> IndexedProperty:
+    """
+    Return an indexed property.
+
+    :param indexed_property_id: the ID of an existing indexed property
+    :return: the indexed property
+    :raise errors.IndexedPropertyDoesNotExistError: when no indexed property
+        with the given ID exists
+    """
+    indexed_property = indexed_properties.IndexedProperty.query.filter_by(id=indexed_property_id).first()
+    if indexed_property is None:
+        raise errors.IndexedPropertyDoesNotExistError()
+    return IndexedProperty.from_database(indexed_property)
+
+
+def create_indexed_property(
+        path: typing.Sequence[str],
+        type: IndexedPropertyType
+) -> IndexedProperty:
+    """
+    Create an indexed property and its index.
+
+    Creating the index reads all current object versions and blocks changes
+    to objects until it is done.
+
+    :param path: the property names leading to the property
+    :param type: the type of index to maintain for the property
+    :return: the new indexed property
+    :raise errors.InvalidPropertyPathError: when the path is not valid
+    :raise errors.IndexedPropertyAlreadyExistsError: when the property is
+        already indexed with the given type
+    """
+    path_str = '.'.join(parse_property_path('.'.join(path)))
+    if indexed_properties.IndexedProperty.query.filter_by(path=path_str, type=type).first() is not None:
+        raise errors.IndexedPropertyAlreadyExistsError()
+    db_indexed_property = indexed_properties.IndexedProperty(
+        path=path_str,
+        type=type
+    )
+    db.session.add(db_indexed_property)
+    db.session.flush()
+    indexed_property = IndexedProperty.from_database(db_indexed_property)
+    db.session.execute(db.text(_get_create_index_statement(indexed_property)))
+    db.session.commit()
+    return indexed_property
+
+
+def delete_indexed_property(indexed_property_id: int) -> None:
+    """
+    Delete an indexed property and its index.
+
+    :param indexed_property_id: the ID of an existing indexed property
+    :raise errors.IndexedPropertyDoesNotExistError: when no indexed property
+        with the given ID exists
+    """
+    indexed_property = get_indexed_property(indexed_property_id)
+    db.session.execute(db.text(f'DROP INDEX IF EXISTS {indexed_property.index_name}'))
+    indexed_properties.IndexedProperty.query.filter_by(id=indexed_property_id).delete()
+    db.session.commit()
+
+
+@cache
+def _has_indexed_properties_table() -> bool:
+    # the object tables can be used without the other tables of the app,
+    # e.g. in the tests of the object models
+    return bool(db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM information_schema.tables
+        WHERE table_schema = current_schema() AND table_name = :table_name
+    """), {'table_name': indexed_properties.IndexedProperty.__tablename__}).scalar())
+
+
+@request_cache
+def _get_indexed_property_types_by_path() -> typing.Dict[typing.Tuple[str, ...], typing.FrozenSet[IndexedPropertyType]]:
+    indexed_property_types_by_path: typing.Dict[typing.Tuple[str, ...], typing.Set[IndexedPropertyType]] = {}
+    for indexed_property in get_indexed_properties():
+        indexed_property_types_by_path.setdefault(indexed_property.path, set()).add(indexed_property.type)
+    return {
+        path: frozenset(types)
+        for path, types in indexed_property_types_by_path.items()
+    }
+
+
+def get_indexed_property_types(path: typing.Sequence[typing.Union[str, int]]) -> typing.FrozenSet[IndexedPropertyType]:
+    """
+    Return the types of indexes maintained for a property.
+
+    :param path: the property names and array indices leading to the property
+    :return: the index types
+    """
+    if not all(isinstance(property_name, str) for property_name in path):
+        # properties in arrays cannot be indexed
+        return frozenset()
+    if not _has_indexed_properties_table():
+        return frozenset()
+    return _get_indexed_property_types_by_path().get(tuple(typing.cast(typing.Sequence[str], path)), frozenset())
@@ -13,7 +13,7 @@ from flask_babel import _
 from .. import db
 from .languages import Language
 from .. import models
-from . import errors, languages, instruments
+from . import errors, languages, instruments, object_changes
 
 
 @dataclasses.dataclass(frozen=True)
@@ -88,6 +88,7 @@ def set_instrument_translation(
         instrument_translation.short_description = short_description
         instrument_translation.notes = notes
     db.session.add(instrument_translation)
+    object_changes.record_entity_change('instruments', instrument_id)
     db.session.commit()
     return InstrumentTranslation.from_database(instrument_translation)
 
@@ -138,4 +139,5 @@ def delete_instrument_translation(
     if instrument_translation is None:
         raise errors.InstrumentTranslationDoesNotExistError()
     db.session.delete(instrument_translation)
+    object_changes.record_entity_change('instruments', instrument_id)
     db.session.commit()
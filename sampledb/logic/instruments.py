@@ -17,8 +17,9 @@ from .components import check_component_exists
 from .. import db
 from .. import models
 from ..models.instruments import instrument_user_association_table
-from . import users, errors, components, locations, objects, topics
+from . import users, errors, components, locations, objects, topics, object_changes
 from .utils import cache
+from .effective_object_permissions import update_effective_object_permissions_for_users
 
 
 @dataclasses.dataclass(frozen=True)
@@ -182,6 +183,35 @@ def get_instruments() -> typing.List[Instrument]:
     ]
 
 
+def get_instruments_by_ids(instrument_ids: typing.Iterable[int]) -> typing.Dict[int, Instrument]:
+    """
+    Returns the instruments with the given instrument IDs.
+
+    The instruments and their related components, locations and topics are
+    loaded using a fixed number of queries. Instrument IDs that do not belong
+    to an existing instrument are ignored.
+
+    :param instrument_ids: the IDs of instruments
+    :return: a dict mapping instrument IDs to the instruments
+    """
+    instrument_ids = set(instrument_ids)
+    if not instrument_ids:
+        return {}
+    instruments = models.Instrument.query.filter(
+        models.Instrument.id.in_(instrument_ids)
+    ).options(
+        db.selectinload(models.Instrument.component),
+        db.selectinload(models.Instrument.topics),
+        db.selectinload(models.Instrument.location).selectinload(models.Location.component),
+        db.selectinload(models.Instrument.location).selectinload(models.Location.type),
+        db.selectinload(models.Instrument.location).selectinload(models.Location.responsible_users),
+    ).all()
+    return {
+        instrument.id: Instrument.from_database(instrument)
+        for instrument in instruments
+    }
+
+
 @cache
 def check_instrument_exists(
         instrument_id: int
@@ -292,6 +322,7 @@ def update_instrument(
     if show_linked_object_data is not None:
         instrument.show_linked_object_data = show_linked_object_data
     db.session.add(instrument)
+    object_changes.record_entity_change('instruments', instrument_id)
     db.session.commit()
 
 
@@ -317,6 +348,7 @@ def add_instrument_responsible_user(instrument_id: int, user_id: int) -> None:
         raise errors.UserAlreadyResponsibleForInstrumentError()
     instrument.responsible_users.append(user)
     db.session.add(instrument)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -342,6 +374,7 @@ def remove_instrument_responsible_user(instrument_id: int, user_id: int) -> None
         raise errors.UserNotResponsibleForInstrumentError()
     instrument.responsible_users.remove(user)
     db.session.add(instrument)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -359,11 +392,14 @@ def set_instrument_responsible_users(instrument_id: int, user_ids: typing.List[i
     instrument = models.Instrument.query.filter_by(id=instrument_id).first()
     if instrument is None:
         raise errors.InstrumentDoesNotExistError()
+    affected_user_ids = {user.id for user in instrument.responsible_users}
+    affected_user_ids.update(user_ids)
     instrument.responsible_users.clear()
     for user_id in user_ids:
         user = users.get_mutable_user(user_id)
         instrument.responsible_users.append(user)
     db.session.add(instrument)
+    update_effective_object_permissions_for_users(affected_user_ids)
     db.session.commit()
 
 
@@ -9,6 +9,7 @@ import typing
 from .. import db
 from . import errors, settings, locale
 from .. import models
+from .utils import request_cache
 if typing.TYPE_CHECKING:
     from .users import User
 
@@ -165,6 +166,7 @@ def update_language(
     db.session.commit()
 
 
+@request_cache
 def get_languages(
         only_enabled_for_input: bool = False
 ) -> typing.List[Language]:
@@ -186,6 +188,7 @@ def get_languages(
     ]
 
 
+@request_cache
 def get_language(language_id: int) -> Language:
     """
     Returns the language with the given language ID.
@@ -200,6 +203,7 @@ def get_language(language_id: int) -> Language:
     return Language.from_database(language)
 
 
+@request_cache
 def get_language_by_lang_code(lang_code: str) -> Language:
     """
     Returns the language with the given lang_code.
@@ -281,6 +285,7 @@ def filter_translations(
     return filtered_translations
 
 
+@request_cache
 def get_language_codes(
         only_enabled_for_input: bool = False,
         only_enabled_for_user_interface: bool = False
@@ -15,7 +15,7 @@ from .components import Component
 from . import actions
 from .action_types import check_action_type_exists
 from .. import db, models, logic
-from . import user_log, object_log, location_log, objects, users, errors, languages, components
+from . import user_log, object_log, object_changes, location_log, objects, users, errors, languages, components
 from .notifications import create_notification_for_being_assigned_as_responsible_user
 from ..models import locations
 
@@ -315,6 +315,7 @@ def update_location(
     location.type_id = type_id
     location.is_hidden = is_hidden
     db.session.add(location)
+    object_changes.record_entity_change('locations', location_id)
     db.session.commit()
     if user_id is not None:
         user_log.update_location(user_id, location.id)
@@ -335,6 +336,33 @@ def check_location_exists(
         raise errors.LocationDoesNotExistError()
 
 
+def get_locations_by_ids(location_ids: typing.Iterable[int]) -> typing.Dict[int, Location]:
+    """
+    Get the locations with the given location IDs.
+
+    The locations and their related components, types and responsible users
+    are loaded using a fixed number of queries. Location IDs that do not
+    belong to an existing location are ignored.
+
+    :param location_ids: the IDs of locations
+    :return: a dict mapping location IDs to the locations
+    """
+    location_ids = set(location_ids)
+    if not location_ids:
+        return {}
+    mutable_locations = locations.Location.query.filter(
+        locations.Location.id.in_(location_ids)
+    ).options(
+        db.selectinload(locations.Location.component),
+        db.selectinload(locations.Location.type),
+        db.selectinload(locations.Location.responsible_users),
+    ).all()
+    return {
+        location.id: Location.from_database(location)
+        for location in mutable_locations
+    }
+
+
 def get_location(location_id: int, component_id: typing.Optional[int] = None) -> Location:
     """
     Get a location.
@@ -499,6 +527,7 @@ def assign_location_to_object(
     )
     db.session.add(object_location_assignment)
     db.session.commit()
+    object_changes.record_object_change(object_id)
     if responsible_user_id is not None:
         users.check_user_exists(responsible_user_id)
         if user_id != responsible_user_id:
@@ -567,6 +596,7 @@ def create_fed_assignment(
     )
     db.session.add(object_location_assignment)
     db.session.commit()
+    object_changes.record_object_change(object_id)
     return object_location_assignment
 
 
@@ -727,6 +757,7 @@ def confirm_object_responsibility(object_location_assignment_id: int) -> None:
     object_location_assignment.confirmed = True
     db.session.add(object_location_assignment)
     db.session.commit()
+    object_changes.record_object_change(object_location_assignment.object_id)
 
 
 def decline_object_responsibility(object_location_assignment_id: int) -> None:
@@ -746,6 +777,7 @@ def decline_object_responsibility(object_location_assignment_id: int) -> None:
     object_location_assignment.declined = True
     db.session.add(object_location_assignment)
     db.session.commit()
+    object_changes.record_object_change(object_location_assignment.object_id)
 
 
 def get_unhandled_object_responsibility_assignments(
@@ -871,9 +903,29 @@ def update_location_type(
     location_type.enable_capacities = enable_capacities
     location_type.show_location_log = show_location_log
     db.session.add(location_type)
+    object_changes.record_entity_change('location_types', location_type_id)
     db.session.commit()
 
 
+def get_location_types_by_ids(location_type_ids: typing.Iterable[int]) -> typing.Dict[int, LocationType]:
+    """
+    Get the location types with the given location type IDs.
+
+    Location type IDs that do not belong to an existing location type are
+    ignored.
+
+    :param location_type_ids: the IDs of location types
+    :return: a dict mapping location type IDs to the location types
+    """
+    location_type_ids = set(location_type_ids)
+    if not location_type_ids:
+        return {}
+    return {
+        location_type.id: LocationType.from_database(location_type)
+        for location_type in locations.LocationType.query.filter(locations.LocationType.id.in_(location_type_ids)).all()
+    }
+
+
 def get_location_type(
         location_type_id: int,
         component_id: typing.Optional[int] = None
@@ -933,6 +985,7 @@ def set_location_responsible_users(
         user = users.get_mutable_user(user_id)
         location.responsible_users.append(user)
     db.session.add(location)
+    object_changes.record_entity_change('locations', location_id)
     db.session.commit()
 
 
@@ -0,0 +1,91 @@
+# coding: utf-8
+"""
+Logic module for tracking changes to objects
+
+The time of the last change to an object, i.e. to its versions, comments,
+files or location assignments, is recorded so that only objects changed since
+the last synchronization need to be sent to other components in a federation.
+
+Likewise, the time of the last change to an action, action type, instrument,
+location or location type is recorded, so that these entities can be sent
+again if they are referenced by shared objects which have not been changed.
+"""
+
+import datetime
+import typing
+
+from sqlalchemy.dialects import postgresql
+
+from .. import db
+from ..models import ObjectChange, EntityChange
+
+
+def record_object_change(object_id: int) -> None:
+    """
+    Record that an object has been changed now.
+
+    :param object_id: the ID of an existing object
+    """
+    utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    db.session.execute(
+        postgresql.insert(ObjectChange).values(
+            object_id=object_id,
+            utc_datetime=utc_datetime
+        ).on_conflict_do_update(
+            index_elements=[ObjectChange.object_id],
+            set_={'utc_datetime': utc_datetime}
+        )
+    )
+    db.session.commit()
+
+
+def get_object_change_time(object_id: int) -> typing.Optional[datetime.datetime]:
+    """
+    Return the time of the last recorded change to an object.
+
+    :param object_id: the ID of an existing object
+    :return: the time of the last change, or None if no change was recorded
+    """
+    utc_datetime: typing.Optional[datetime.datetime] = db.session.execute(
+        db.select(ObjectChange.utc_datetime).where(ObjectChange.object_id == object_id)
+    ).scalar()
+    return utc_datetime
+
+
+def record_entity_change(type: str, entity_id: int) -> None:
+    """
+    Record that an entity referenced by objects has been changed now.
+
+    The change is not committed, so that it is committed together with the
+    change to the entity.
+
+    :param type: the type of the entity as used for federation references,
+        e.g. 'actions'
+    :param entity_id: the ID of an existing entity
+    """
+    utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    db.session.execute(
+        postgresql.insert(EntityChange).values(
+            type=type,
+            entity_id=entity_id,
+            utc_datetime=utc_datetime
+        ).on_conflict_do_update(
+            index_elements=[EntityChange.type, EntityChange.entity_id],
+            set_={'utc_datetime': utc_datetime}
+        )
+    )
+
+
+def get_entity_change_time(type: str, entity_id: int) -> typing.Optional[datetime.datetime]:
+    """
+    Return the time of the last recorded change to an entity.
+
+    :param type: the type of the entity as used for federation references,
+        e.g. 'actions'
+    :param entity_id: the ID of an existing entity
+    :return: the time of the last change, or None if no change was recorded
+    """
+    utc_datetime: typing.Optional[datetime.datetime] = db.session.execute(
+        db.select(EntityChange.utc_datetime).where(EntityChange.type == type, EntityChange.entity_id == entity_id)
+    ).scalar()
+    return utc_datetime
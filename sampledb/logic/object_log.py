@@ -17,6 +17,13 @@ from .. import db
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
+# log entry types referencing another object, which may not be readable by every user
+REFERENCED_OBJECT_TYPE_BY_LOG_ENTRY_TYPE = {
+    ObjectLogEntryType.USE_OBJECT_IN_MEASUREMENT: 'measurement',
+    ObjectLogEntryType.USE_OBJECT_IN_SAMPLE_CREATION: 'sample',
+    ObjectLogEntryType.REFERENCE_OBJECT_IN_METADATA: 'object'
+}
+
 
 def object_log_entry_to_json(log_entry: ObjectLogEntry) -> typing.Dict[str, typing.Any]:
     return {
@@ -37,7 +44,7 @@ def get_object_log_entries_by_user(user_id: int, after_id: int = 0) -> typing.Li
     else:
         stmt = db.text("""
             SELECT DISTINCT object_id
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (user_id = :user_id OR user_id IS NULL) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
         """).columns(
             Objects._current_table.c.object_id,
@@ -57,11 +64,7 @@ def process_object_log_entries(object_log_entries: typing.List[ObjectLogEntry],
     processed_object_log_entries = []
     users_by_id: typing.Dict[typing.Optional[int], typing.Optional[users.User]] = {None: None}
     referenced_object_ids = {}
-    referenced_object_type_by_log_entry_type = {
-        ObjectLogEntryType.USE_OBJECT_IN_MEASUREMENT: 'measurement',
-        ObjectLogEntryType.USE_OBJECT_IN_SAMPLE_CREATION: 'sample',
-        ObjectLogEntryType.REFERENCE_OBJECT_IN_METADATA: 'object'
-    }
+    referenced_object_type_by_log_entry_type = REFERENCED_OBJECT_TYPE_BY_LOG_ENTRY_TYPE
     for object_log_entry in object_log_entries:
         using_object_type = referenced_object_type_by_log_entry_type.get(object_log_entry.type)
         if using_object_type is not None:
@@ -20,6 +20,8 @@ from . import objects
 from ..models import Permissions, UserObjectPermissions, GroupObjectPermissions, ProjectObjectPermissions, AllUserObjectPermissions, AnonymousUserObjectPermissions, Action, Object, Objects
 from .users import get_user
 from .permissions import ResourcePermissions
+from .effective_object_permissions import update_effective_object_permissions_for_objects
+from .utils import request_cache
 
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
@@ -32,7 +34,8 @@ object_permissions = ResourcePermissions(
     user_permissions_table=UserObjectPermissions,
     group_permissions_table=GroupObjectPermissions,
     project_permissions_table=ProjectObjectPermissions,
-    check_resource_exists=lambda resource_id: objects.check_object_exists(object_id=resource_id)
+    check_resource_exists=lambda resource_id: objects.check_object_exists(object_id=resource_id),
+    on_permissions_changed=lambda resource_id: update_effective_object_permissions_for_objects([resource_id])
 )
 
 
@@ -110,6 +113,7 @@ def _get_object_responsible_user_ids(object_id: int) -> typing.List[int]:
     return [user.id for user in instrument.responsible_users]
 
 
+@request_cache
 def get_user_object_permissions(
         object_id: int,
         user_id: typing.Optional[int],
@@ -142,12 +146,12 @@ def get_user_object_permissions(
             else:
                 return Permissions.GRANT
 
-    # select permissions from view for efficiency
+    # select permissions from materialized effective permissions for efficiency
     if include_instrument_responsible_users and include_groups and include_projects:
         stmt = db.text("""
         SELECT
         MAX(permissions_int)
-        FROM user_object_permissions_by_all
+        FROM effective_object_permissions
         WHERE (user_id = :user_id OR user_id IS NULL) AND (object_id = :object_id) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
         """)
         permissions_int_result = db.session.execute(stmt, {
@@ -270,7 +274,7 @@ def get_object_info_with_permissions(
         FROM (
             SELECT
             object_id, MAX(permissions_int) AS max_permission
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (user_id = :user_id OR user_id IS NULL) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (object_id)
             HAVING MAX(permissions_int) >= :min_permissions_int
@@ -358,7 +362,7 @@ def get_user_permissions_for_multiple_objects(
     stmt = db.text("""
     SELECT
     u.object_id, MAX(u.permissions_int)
-    FROM user_object_permissions_by_all as u
+    FROM effective_object_permissions as u
     WHERE (u.object_id IN :object_ids) AND (u.user_id = :user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
     GROUP BY (u.object_id)
     """)
@@ -413,13 +417,13 @@ def get_object_table_with_permissions(
     if name_only:
         stmt = """
         SELECT
-        o.object_id, o.version_id, o.action_id, jsonb_set('{"name": {"_type": "text", "text": ""}}', '{name,text}', o.name_cache::jsonb) as data, '{"title": "Object", "type": "object", "properties": {"name": {"title": "Name", "type": "text"}}}'::jsonb as schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full
+        o.object_id, o.version_id, o.action_id, jsonb_set('{"name": {"_type": "text", "text": ""}}', '{name,text}', o.name_cache::jsonb) as data, '{"title": "Object", "type": "object", "properties": {"name": {"title": "Name", "type": "text"}}}'::jsonb as schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full, o.search_vector, o.search_text
         FROM objects_current AS o
         """
     else:
         stmt = """
         SELECT
-        o.object_id, o.version_id, o.action_id, o.data, o.schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full
+        o.object_id, o.version_id, o.action_id, o.data, o.schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full, o.search_vector, o.search_text
         FROM objects_current AS o
         """
 
@@ -428,7 +432,7 @@ def get_object_table_with_permissions(
         JOIN (
             SELECT
             u.object_id
-            FROM user_object_permissions_by_all as u
+            FROM effective_object_permissions as u
             WHERE (u.user_id = :user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (u.object_id)
             HAVING MAX(u.permissions_int) >= :min_permissions_int
@@ -443,7 +447,7 @@ def get_object_table_with_permissions(
         JOIN (
             SELECT
             u.object_id
-            FROM user_object_permissions_by_all as u
+            FROM effective_object_permissions as u
             WHERE (u.user_id = :other_user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (u.object_id)
             HAVING MAX(u.permissions_int) >= :min_other_user_permissions_int
@@ -545,7 +549,9 @@ def get_object_table_with_permissions(
         Objects._current_table.c.component_id,
         Objects._current_table.c.eln_import_id,
         Objects._current_table.c.eln_object_id,
-        db.column('data_full', postgresql.JSONB)
+        db.column('data_full', postgresql.JSONB),
+        Objects._current_table.c.search_vector,
+        Objects._current_table.c.search_text
     ).subquery()
     return table, parameters
 
@@ -570,7 +576,12 @@ def get_objects_with_permissions(
         object_ids: typing.Optional[typing.Sequence[int]] = None,
         num_objects_found: typing.Optional[typing.List[int]] = None,
         name_only: bool = False,
-        **kwargs: typing.Dict[str, typing.Any]
+        *,
+        after: typing.Optional[typing.Tuple[typing.Any, int]] = None,
+        before: typing.Optional[typing.Tuple[typing.Any, int]] = None,
+        cursors: typing.Optional[typing.List[typing.Optional[typing.Tuple[typing.Any, int]]]] = None,
+        count_limit: typing.Optional[int] = None,
+        **kwargs: typing.Any
 ) -> typing.List[Object]:
     if object_ids is not None and not object_ids:
         return []
@@ -624,6 +635,10 @@ def get_objects_with_permissions(
         limit=limit,
         offset=offset,
         num_objects_found=num_objects_found,
+        after=after,
+        before=before,
+        cursors=cursors,
+        count_limit=count_limit,
         **kwargs
     )
 
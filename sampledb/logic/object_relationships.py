@@ -6,7 +6,6 @@ from __future__ import annotations
 
 import dataclasses
 import datetime
-import itertools
 import typing
 import sys
 
@@ -16,7 +15,8 @@ from .actions import get_action, Action
 from .files import get_files_for_object, File
 from .objects import get_object, find_object_references
 from .object_permissions import get_user_permissions_for_multiple_objects, get_objects_with_permissions
-from ..models import ObjectLogEntryType, ObjectLogEntry, Permissions, Object
+from .users import get_user
+from ..models import Permissions, Object
 from .. import db
 from .utils import get_translated_text
 
@@ -59,26 +59,8 @@ def get_related_object_ids(
             if referenced_object_id is not None:
                 referenced_object_ids.add(referenced_object_id)
     if include_referencing_objects:
-        object_log_entries = ObjectLogEntry.query.filter(
-            db.and_(
-                ObjectLogEntry.object_id == object_id,
-                ObjectLogEntry.type.in_((
-                    ObjectLogEntryType.USE_OBJECT_IN_MEASUREMENT,
-                    ObjectLogEntryType.USE_OBJECT_IN_SAMPLE_CREATION,
-                    ObjectLogEntryType.REFERENCE_OBJECT_IN_METADATA
-                ))
-            )
-        ).all()
-        object_id_key_map = {
-            ObjectLogEntryType.USE_OBJECT_IN_MEASUREMENT: 'measurement_id',
-            ObjectLogEntryType.USE_OBJECT_IN_SAMPLE_CREATION: 'sample_id',
-            ObjectLogEntryType.REFERENCE_OBJECT_IN_METADATA: 'object_id',
-        }
-        for object_log_entry in object_log_entries:
-            object_id_key = object_id_key_map.get(object_log_entry.type, 'object_id')
-            referencing_object_id = object_log_entry.data.get(object_id_key)
-            if referencing_object_id is not None:
-                referencing_object_ids.add((referencing_object_id, None))
+        for referencing_object_id in _get_referencing_local_object_ids({object_id})[object_id]:
+            referencing_object_ids.add((referencing_object_id, None))
         if filter_referencing_objects_by_permissions:
             object_permissions = get_user_permissions_for_multiple_objects(user_id, [referencing_object_id[0] for referencing_object_id in referencing_object_ids])
             referencing_object_ids = {
@@ -109,6 +91,7 @@ class RelatedObjectsTree:
     object_name: typing.Optional[str]
     referenced_objects: typing.Optional[typing.List[RelatedObjectsTree]]
     referencing_objects: typing.Optional[typing.List[RelatedObjectsTree]]
+    action_type_id: typing.Optional[int] = dataclasses.field(default=None, compare=False)
 
     @property
     def object_id(self) -> int:
@@ -130,6 +113,7 @@ class RelatedObjectsTree:
 def build_related_objects_tree(
         object_id: int,
         user_id: typing.Optional[int],
+        maximum_depth: int = _MAXIMUM_TREE_DEPTH
 ) -> RelatedObjectsTree:
     """
     Get the tree of related objects for a given object.
@@ -144,6 +128,8 @@ def build_related_objects_tree(
 
     :param object_id: the ID of an existing object
     :param user_id: the ID of an existing user
+    :param maximum_depth: the maximum depth of nodes containing lists of
+        related objects
     :return: the related objects tree
     """
     object_ref = ObjectRef(
@@ -152,41 +138,102 @@ def build_related_objects_tree(
         eln_source_url=None,
         eln_object_url=None
     )
+    related_objects = _load_related_objects(
+        object_id=object_id,
+        user_id=user_id,
+        maximum_depth=maximum_depth
+    )
     subtrees = _gather_subtrees(
-        object_ref=object_ref
+        object_ref=object_ref,
+        related_objects=related_objects
     )
+    return _assemble_tree(subtrees[object_ref][0], related_objects, subtrees, maximum_depth=maximum_depth)
 
-    object_ids = tuple(
-        object_ref.object_id
-        for object_ref in subtrees
-        if object_ref.is_local
-    )
-    objects = get_objects_with_permissions(user_id=user_id, permissions=Permissions.READ, object_ids=object_ids, name_only=True)
-    objects_by_id = {
-        object.object_id: object
-        for object in objects
-    }
-    return _assemble_tree(subtrees[object_ref][0], objects_by_id, subtrees)
 
+@dataclasses.dataclass(frozen=True)
+class _RelatedObjects:
+    """
+    The objects related to an object, up to a maximum depth.
 
-def get_referencing_object_ids(
-        object_ids: typing.Set[int]
-) -> typing.Dict[int, typing.Set[ObjectRef]]:
+    References are only included for objects that can be read by the user and
+    that are closer to the object than the maximum depth.
+    """
+    objects_by_id: typing.Dict[int, Object]
+    action_type_ids_by_id: typing.Dict[int, typing.Optional[int]]
+    referenced_object_ids_by_id: typing.Dict[int, typing.Set[ObjectRef]]
+    referencing_object_ids_by_id: typing.Dict[int, typing.Set[ObjectRef]]
+
+
+# conditions for a reference in object_references to target an object in
+# objects_current, either by its local ID or, for an imported object, by its
+# ID on the component it was imported from
+_REFERENCES_TO_LOCAL_OBJECTS = """
+        SELECT objects_current.object_id, object_references.source_object_id, object_references.source_version_id
+        FROM objects_current
+        JOIN object_references ON object_references.target_object_id = objects_current.object_id
+        WHERE object_references.target_component_uuid IS NULL AND object_references.target_eln_source_url IS NULL
+    UNION ALL
+        SELECT objects_current.object_id, object_references.source_object_id, object_references.source_version_id
+        FROM objects_current
+        JOIN components ON components.id = objects_current.component_id
+        JOIN object_references ON object_references.target_object_id = objects_current.fed_object_id AND object_references.target_component_uuid = components.uuid
+        WHERE object_references.target_eln_source_url IS NULL
+"""
+
+
+def _get_referencing_local_object_ids(
+        object_ids: typing.Set[int],
+        current_versions_only: bool = False
+) -> typing.Dict[int, typing.Set[int]]:
+    """
+    Get the IDs of objects referencing the given objects.
+
+    :param object_ids: the IDs of existing objects
+    :param current_versions_only: whether only references in the current
+        versions of the referencing objects should be considered, instead of
+        references in any version
+    :return: the referencing object IDs by referenced object ID
+    """
     if not object_ids:
         return {}
-    referencing_object_ids_by_id: typing.Dict[int, typing.Set[ObjectRef]] = {
+    referencing_object_ids_by_id: typing.Dict[int, typing.Set[int]] = {
         object_id: set()
         for object_id in object_ids
     }
-    for object_id, referencing_object_id, referencing_component_uuid, referencing_eln_source_url, referencing_eln_object_url in db.session.execute(db.text("""
-        SELECT DISTINCT object_id, coalesce(data -> 'object_id', data -> 'sample_id', data -> 'measurement_id', NULL)::text::integer AS referencing_object_id, NULL AS referencing_component_uuid, NULL AS eln_source_url, NULL AS eln_object_url
-        FROM object_log_entries
-        WHERE object_id IN :object_ids AND type IN ('USE_OBJECT_IN_MEASUREMENT', 'USE_OBJECT_IN_SAMPLE_CREATION', 'REFERENCE_OBJECT_IN_METADATA')
+    if current_versions_only:
+        current_version_join = """
+        JOIN objects_current AS referencing_objects ON referencing_objects.object_id = local_references.source_object_id AND referencing_objects.version_id = local_references.source_version_id
+        """
+    else:
+        current_version_join = ""
+    for object_id, referencing_object_id in db.session.execute(db.text(f"""
+        SELECT DISTINCT local_references.object_id, local_references.source_object_id
+        FROM ({_REFERENCES_TO_LOCAL_OBJECTS}) AS local_references
+        {current_version_join}
+        WHERE local_references.object_id IN :object_ids
     """), {'object_ids': tuple(object_ids)}).fetchall():
-        referencing_object_ids_by_id[object_id].add(ObjectRef(object_id=referencing_object_id, component_uuid=referencing_component_uuid, eln_source_url=referencing_eln_source_url, eln_object_url=referencing_eln_object_url))
+        referencing_object_ids_by_id[object_id].add(referencing_object_id)
     return referencing_object_ids_by_id
 
 
+def get_referencing_object_ids(
+        object_ids: typing.Set[int]
+) -> typing.Dict[int, typing.Set[ObjectRef]]:
+    """
+    Get references to the objects referencing the given objects in any version.
+
+    :param object_ids: the IDs of existing objects
+    :return: the referencing objects by referenced object ID
+    """
+    return {
+        object_id: {
+            ObjectRef(object_id=referencing_object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)
+            for referencing_object_id in referencing_object_ids
+        }
+        for object_id, referencing_object_ids in _get_referencing_local_object_ids(object_ids).items()
+    }
+
+
 def _get_referenced_object_ids(
         object_ids: typing.Set[int]
 ) -> typing.Dict[int, typing.Set[ObjectRef]]:
@@ -197,40 +244,160 @@ def _get_referenced_object_ids(
         for object_id in object_ids
     }
     for object_id, referenced_object_id, referenced_component_uuid, referenced_eln_source_url, referenced_eln_object_url in db.session.execute(db.text("""
-        WITH RECURSIVE properties(object_id, value) AS (
-            SELECT objects_current.object_id, data.value
-            FROM objects_current, jsonb_each(objects_current.data) AS data
-            WHERE objects_current.object_id IN :object_ids AND jsonb_typeof(objects_current.data) = 'object'
-        UNION ALL
-            SELECT properties.object_id, coalesce(object_data.value, array_data.value)
-            FROM properties
-            LEFT OUTER JOIN jsonb_each(CASE
-                WHEN jsonb_typeof(properties.value) = 'object' THEN properties.value
-                ELSE '{}'::jsonb
-            END) AS object_data ON jsonb_typeof(properties.value) = 'object'
-            LEFT OUTER JOIN jsonb_array_elements(CASE
-                WHEN jsonb_typeof(properties.value) = 'array' THEN properties.value
-                ELSE '[]'::jsonb
-            END) AS array_data ON jsonb_typeof(properties.value) = 'array'
-            WHERE jsonb_typeof(properties.value) = 'object' OR jsonb_typeof(properties.value) = 'array'
-        )
-        SELECT object_id, (properties.value -> 'object_id')::integer, properties.value ->> 'component_uuid', properties.value ->> 'eln_source_url', properties.value ->> 'eln_object_url'
-        FROM properties
-        WHERE jsonb_typeof(properties.value) = 'object' AND properties.value ? '_type' AND properties.value ? 'object_id' AND properties.value ->> '_type' IN ('object_reference', 'sample', 'measurement')
+        SELECT DISTINCT objects_current.object_id, object_references.target_object_id, object_references.target_component_uuid, object_references.target_eln_source_url, object_references.target_eln_object_url
+        FROM objects_current
+        JOIN object_references ON object_references.source_object_id = objects_current.object_id AND object_references.source_version_id = objects_current.version_id
+        WHERE objects_current.object_id IN :object_ids
     """), {'object_ids': tuple(object_ids)}).fetchall():
         referenced_object_ids_by_id[object_id].add(ObjectRef(object_id=referenced_object_id, component_uuid=referenced_component_uuid, eln_source_url=referenced_eln_source_url, eln_object_url=referenced_eln_object_url))
     return referenced_object_ids_by_id
 
 
+# condition for the user to have READ permissions for objects_current
+_READ_PERMISSIONS_CONDITION = """
+    (
+        CAST(:has_admin_permissions AS boolean) OR
+        EXISTS (
+            SELECT 1
+            FROM effective_object_permissions AS u
+            WHERE u.object_id = objects_current.object_id AND (u.user_id = :user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE) AND u.permissions_int >= :min_permissions_int
+        )
+    )
+"""
+
+
+def _load_related_objects(
+        object_id: int,
+        user_id: typing.Optional[int],
+        maximum_depth: int
+) -> _RelatedObjects:
+    """
+    Load the objects related to an object in a single query.
+
+    Related objects are found by a breadth-first search over the references
+    between local objects, which only continues at objects the user can read
+    and which ends at the maximum depth. References are followed in both
+    directions, so the objects related to the objects at one depth are found
+    either at that depth, the previous one or the next one. The objects at
+    the next depth are therefore found without keeping track of all objects
+    found before, and each object the user can read is visited only once.
+    Objects the user cannot read may be found again at a greater depth, which
+    is ignored.
+
+    :param object_id: the ID of an existing object
+    :param user_id: the ID of an existing user
+    :param maximum_depth: the maximum depth of objects to load references for
+    :return: the related objects
+    """
+    related_objects = _RelatedObjects(
+        objects_by_id={},
+        action_type_ids_by_id={},
+        referenced_object_ids_by_id={},
+        referencing_object_ids_by_id={}
+    )
+    if user_id is None:
+        if not flask.current_app.config['ENABLE_ANONYMOUS_USERS']:
+            return related_objects
+        has_admin_permissions = False
+    else:
+        has_admin_permissions = get_user(user_id).has_admin_permissions
+    # each row of frontiers contains the objects found at one depth and the
+    # objects found at the previous depth, as a recursive term may only refer
+    # to the rows of the previous iteration
+    rows = db.session.execute(db.text(f"""
+        WITH RECURSIVE frontiers(depth, object_ids, previous_object_ids) AS (
+            SELECT 0, ARRAY[CAST(:object_id AS integer)], ARRAY[]::integer[]
+        UNION ALL
+            SELECT frontiers.depth + 1, next_frontier.object_ids, frontiers.object_ids
+            FROM frontiers
+            CROSS JOIN LATERAL (
+                SELECT array_agg(related_objects.object_id) AS object_ids
+                FROM (
+                    (
+                            SELECT COALESCE(referenced_objects.object_id, object_references.target_object_id) AS object_id
+                            FROM objects_current
+                            JOIN object_references ON object_references.source_object_id = objects_current.object_id
+                            LEFT OUTER JOIN components ON components.uuid = object_references.target_component_uuid
+                            LEFT OUTER JOIN objects_current AS referenced_objects ON referenced_objects.fed_object_id = object_references.target_object_id AND referenced_objects.component_id = components.id
+                            WHERE objects_current.object_id = ANY(frontiers.object_ids) AND {_READ_PERMISSIONS_CONDITION} AND object_references.target_eln_source_url IS NULL AND (object_references.target_component_uuid IS NULL OR referenced_objects.object_id IS NOT NULL)
+                        UNION
+                            SELECT object_references.source_object_id
+                            FROM objects_current
+                            LEFT OUTER JOIN components ON components.id = objects_current.component_id
+                            JOIN object_references ON object_references.target_object_id IN (objects_current.object_id, objects_current.fed_object_id)
+                            WHERE objects_current.object_id = ANY(frontiers.object_ids) AND {_READ_PERMISSIONS_CONDITION} AND object_references.target_eln_source_url IS NULL AND (
+                                (object_references.target_object_id = objects_current.object_id AND object_references.target_component_uuid IS NULL) OR
+                                (object_references.target_object_id = objects_current.fed_object_id AND object_references.target_component_uuid = components.uuid)
+                            )
+                    )
+                    EXCEPT
+                    SELECT unnest(frontiers.object_ids)
+                    EXCEPT
+                    SELECT unnest(frontiers.previous_object_ids)
+                ) AS related_objects
+            ) AS next_frontier
+            WHERE frontiers.depth < :maximum_depth AND next_frontier.object_ids IS NOT NULL
+        ), related_objects AS (
+            -- objects the user cannot read may have been found more than once
+            SELECT DISTINCT ON (related_object.object_id) related_object.object_id, frontiers.depth
+            FROM frontiers
+            CROSS JOIN unnest(frontiers.object_ids) AS related_object(object_id)
+            ORDER BY related_object.object_id, frontiers.depth
+        )
+        SELECT
+            related_objects.object_id,
+            objects_current.object_id IS NOT NULL AND {_READ_PERMISSIONS_CONDITION} AS is_readable,
+            related_objects.depth < :maximum_depth AS has_references,
+            objects_current.version_id, objects_current.action_id, jsonb_set('{{"name": {{"_type": "text", "text": ""}}}}', '{{name,text}}', objects_current.name_cache::jsonb) AS data, '{{"title": "Object", "type": "object", "properties": {{"name": {{"title": "Name", "type": "text"}}}}}}'::jsonb AS schema, objects_current.user_id, objects_current.utc_datetime, objects_current.fed_object_id, objects_current.fed_version_id, objects_current.component_id, objects_current.eln_import_id, objects_current.eln_object_id,
+            actions.type_id,
+            (
+                SELECT jsonb_agg(DISTINCT jsonb_build_array(object_references.target_object_id, object_references.target_component_uuid, object_references.target_eln_source_url, object_references.target_eln_object_url))
+                FROM object_references
+                WHERE object_references.source_object_id = objects_current.object_id AND object_references.source_version_id = objects_current.version_id
+            ) AS referenced_objects,
+            ARRAY(
+                SELECT DISTINCT local_references.source_object_id
+                FROM ({_REFERENCES_TO_LOCAL_OBJECTS}) AS local_references
+                WHERE local_references.object_id = objects_current.object_id
+            ) AS referencing_object_ids
+        FROM related_objects
+        LEFT OUTER JOIN objects_current ON objects_current.object_id = related_objects.object_id
+        LEFT OUTER JOIN actions ON actions.id = objects_current.action_id
+    """), {
+        'object_id': object_id,
+        'maximum_depth': maximum_depth,
+        'user_id': user_id,
+        'has_admin_permissions': has_admin_permissions,
+        'enable_anonymous_users': flask.current_app.config['ENABLE_ANONYMOUS_USERS'],
+        'enable_instruments': not flask.current_app.config['DISABLE_INSTRUMENTS'],
+        'min_permissions_int': Permissions.READ.value
+    }).fetchall()
+    for row in rows:
+        related_object_id, is_readable, has_references = row[:3]
+        if not is_readable:
+            continue
+        related_objects.objects_by_id[related_object_id] = Object(related_object_id, *row[3:14])
+        related_objects.action_type_ids_by_id[related_object_id] = row[14]
+        if has_references:
+            related_objects.referenced_object_ids_by_id[related_object_id] = {
+                ObjectRef(object_id=referenced_object_id, component_uuid=referenced_component_uuid, eln_source_url=referenced_eln_source_url, eln_object_url=referenced_eln_object_url)
+                for referenced_object_id, referenced_component_uuid, referenced_eln_source_url, referenced_eln_object_url in (row[15] or [])
+            }
+            related_objects.referencing_object_ids_by_id[related_object_id] = {
+                ObjectRef(object_id=referencing_object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)
+                for referencing_object_id in row[16]
+            }
+    return related_objects
+
+
 def _gather_subtrees(
         object_ref: ObjectRef,
+        related_objects: _RelatedObjects
 ) -> typing.Dict[ObjectRef, typing.Tuple[RelatedObjectsTree, typing.List[ObjectRef], typing.List[ObjectRef]]]:
     subtrees: typing.Dict[ObjectRef, typing.Tuple[RelatedObjectsTree, typing.List[ObjectRef], typing.List[ObjectRef]]] = {}
     object_ref_stack: typing.List[typing.Tuple[ObjectRef, typing.Optional[ObjectRef]]] = [
         (object_ref, None)
     ]
-    referencing_object_ids_by_id: typing.Dict[int, typing.Set[ObjectRef]] = {}
-    referenced_object_ids_by_id: typing.Dict[int, typing.Set[ObjectRef]] = {}
     while object_ref_stack:
         object_ref, parent_object_ref = object_ref_stack.pop()
         if object_ref not in subtrees:
@@ -245,12 +412,8 @@ def _gather_subtrees(
             subtrees[object_ref] = (tree, [], [])
 
             if object_ref.is_local:
-                referencing_object_ids = referencing_object_ids_by_id.get(object_ref.object_id)
-                referenced_object_ids = referenced_object_ids_by_id.get(object_ref.object_id)
-                if referencing_object_ids is None:
-                    referencing_object_ids = get_referencing_object_ids({object_ref.object_id})[object_ref.object_id]
-                if referenced_object_ids is None:
-                    referenced_object_ids = _get_referenced_object_ids({object_ref.object_id})[object_ref.object_id]
+                referencing_object_ids = related_objects.referencing_object_ids_by_id.get(object_ref.object_id, set())
+                referenced_object_ids = related_objects.referenced_object_ids_by_id.get(object_ref.object_id, set())
 
                 for child_object_list, filtered_child_object_list in [
                     (referenced_object_ids, subtrees[object_ref][1]),
@@ -260,24 +423,19 @@ def _gather_subtrees(
                         if child_object_ref != parent_object_ref:
                             filtered_child_object_list.append(child_object_ref)
                             object_ref_stack.append((child_object_ref, object_ref))
-                local_child_object_ids = {
-                    child_object_ref.object_id
-                    for child_object_ref in itertools.chain(subtrees[object_ref][1], subtrees[object_ref][2])
-                    if child_object_ref.is_local and child_object_ref not in subtrees
-                }
-                referencing_object_ids_by_id.update(get_referencing_object_ids(local_child_object_ids))
-                referenced_object_ids_by_id.update(_get_referenced_object_ids(local_child_object_ids))
     return subtrees
 
 
 def _assemble_tree(
         tree: RelatedObjectsTree,
-        objects_by_id: typing.Dict[int, Object],
+        related_objects: _RelatedObjects,
         subtrees: typing.Dict[ObjectRef, typing.Tuple[RelatedObjectsTree, typing.List[ObjectRef], typing.List[ObjectRef]]],
-        path_prefix: typing.Optional[typing.List[typing.Union[int, ObjectRef]]] = None
+        path_prefix: typing.Optional[typing.List[typing.Union[int, ObjectRef]]] = None,
+        maximum_depth: int = _MAXIMUM_TREE_DEPTH
 ) -> RelatedObjectsTree:
     if path_prefix is None:
         path_prefix = []
+    objects_by_id = related_objects.objects_by_id
     root_object_ref = tree.object_ref
     root_tree = tree
     tree_stack: typing.List[typing.Tuple[ObjectRef, typing.List[typing.Union[int, ObjectRef]], typing.Optional[RelatedObjectsTree]]] = [
@@ -290,10 +448,11 @@ def _assemble_tree(
         if not tree.path:
 
             tree.path = path_prefix + [object_ref]
-            if len(path_prefix) // 2 < _MAXIMUM_TREE_DEPTH:
+            if len(path_prefix) // 2 < maximum_depth:
                 if object_ref.is_local and object_ref.object_id in objects_by_id:
                     object = objects_by_id[object_ref.object_id]
                     tree.object = object
+                    tree.action_type_id = related_objects.action_type_ids_by_id.get(object_ref.object_id)
                     if object is not None and object.name is not None:
                         tree.object_name = get_translated_text(object.name)
                     # create a copy that will contain subtrees
@@ -349,22 +508,8 @@ def get_workflow_references(object: Object, user_id: int, actions_by_id: typing.
     if actions_by_id is None:
         actions_by_id = {}
 
-    referencing_object_ids = {
-        object_ref.object_id
-        for object_ref in get_referencing_object_ids({object.object_id})[object.object_id]
-        if object_ref.is_local}
-    referencing_objects_current = {}
-    for referencing_object_id in referencing_object_ids:
-        referencing_objects_current[referencing_object_id] = False
-        referencing_object = get_object(referencing_object_id)
-        for referenced_object_id, _previously_referenced_object_id, _schema_type in find_object_references(
-                object_id=referencing_object.object_id,
-                version_id=referencing_object.version_id,
-                object_data=referencing_object.data
-        ):
-            if referenced_object_id == object.object_id:
-                referencing_objects_current[referencing_object_id] = True
-                break
+    referencing_object_ids = _get_referencing_local_object_ids({object.object_id})[object.object_id]
+    currently_referencing_object_ids = _get_referencing_local_object_ids({object.object_id}, current_versions_only=True)[object.object_id]
     referenced_object_ids = {
         object_ref.object_id
         for object_ref in _get_referenced_object_ids({object.object_id})[object.object_id]
@@ -468,7 +613,7 @@ def get_workflow_references(object: Object, user_id: int, actions_by_id: typing.
                         is_referenced=object_id in referenced_object_ids,
                         is_referencing=object_id in referencing_object_ids,
                         files=files,
-                        is_current=(object_id in referenced_object_ids) or referencing_objects_current.get(object_id, False),
+                        is_current=(object_id in referenced_object_ids) or (object_id in currently_referencing_object_ids),
                     )
                 )
 
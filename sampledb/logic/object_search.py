@@ -1,6 +1,7 @@
 # coding: utf-8
 import functools
 import json
+import re
 import typing
 
 from sqlalchemy import String, and_, or_
@@ -8,10 +9,33 @@ from sqlalchemy.sql.expression import select, true, false, not_
 from sqlalchemy.dialects import postgresql
 
 from . import where_filters
+from . import database_indexes
 from . import datatypes
+from . import indexed_properties
 from . import object_search_parser
+from .schemas.utils import data_iter
 from .. import db
 
+# PostgreSQL text search configurations for language codes, used in addition
+# to the language-independent 'simple' configuration
+TEXT_SEARCH_CONFIGURATIONS = {
+    'da': 'danish',
+    'de': 'german',
+    'en': 'english',
+    'es': 'spanish',
+    'fi': 'finnish',
+    'fr': 'french',
+    'hu': 'hungarian',
+    'it': 'italian',
+    'nl': 'dutch',
+    'no': 'norwegian',
+    'pt': 'portuguese',
+    'ro': 'romanian',
+    'ru': 'russian',
+    'sv': 'swedish',
+    'tr': 'turkish',
+}
+
 
 class Attribute:
     def __init__(
@@ -1219,7 +1243,10 @@ def transform_literal_to_query(
         search_notes: typing.List[typing.Tuple[str, str, int, typing.Optional[int]]]
 ) -> typing.Tuple[typing.Any, typing.Optional[typing.Callable[[typing.Any], typing.Any]]]:
     if isinstance(literal, object_search_parser.Tag):
-        return Expression(literal.input_text, literal.start_position, where_filters.tags_contain(data[('tags',)], literal.value)), None
+        db_obj = data[('tags',)]
+        # set indexed_property_types to allow where_filters to use the indexes of indexed properties
+        db_obj.indexed_property_types = indexed_properties.get_indexed_property_types(['tags'])
+        return Expression(literal.input_text, literal.start_position, where_filters.tags_contain(db_obj, literal.value)), None
 
     if isinstance(literal, object_search_parser.Attribute):
         attributes = literal.value
@@ -1251,7 +1278,7 @@ def transform_literal_to_query(
         reference_attribute_indices = [
             index
             for index, attribute in enumerate(attributes)
-            if attribute.startswith('*')
+            if isinstance(attribute, str) and attribute.startswith('*')
         ]
         if len(reference_attribute_indices) == 1:
             reference_placeholder_index = reference_attribute_indices[0]
@@ -1287,7 +1314,14 @@ def transform_literal_to_query(
                     filter
                 )
             ).exists()
-        return Attribute(literal.input_text, literal.start_position, data[attributes]), None
+        db_obj = data[attributes]
+        # set search_vector_column to allow where_filters to use the full-text search index
+        db_obj.search_vector_column = getattr(data, 'search_vector_column', None)
+        # set search_text_column to allow where_filters to use the trigram index
+        db_obj.search_text_column = getattr(data, 'search_text_column', None)
+        # set indexed_property_types to allow where_filters to use the indexes of indexed properties
+        db_obj.indexed_property_types = indexed_properties.get_indexed_property_types(attributes)
+        return Attribute(literal.input_text, literal.start_position, db_obj), None
 
     if isinstance(literal, object_search_parser.Null):
         return literal, None
@@ -1645,8 +1679,22 @@ def generate_filter_func(
             ) -> typing.Any:
                 """ Filter objects based on search query string """
                 # The query string is converted to json to escape quotes, backslashes, etc
-                query_string = json.dumps(query_string)[1:-1]
-                return data.cast(String).ilike('%: "%' + query_string + '%"%')
+                json_query_string = json.dumps(query_string)[1:-1]
+                data_filter = data.cast(String).ilike('%: "%' + json_query_string + '%"%')
+                search_vector_column = getattr(data, 'search_vector_column', None)
+                if search_vector_column is None:
+                    return data_filter
+                search_query = get_text_search_query(query_string)
+                if search_query is None:
+                    return data_filter
+                text_search_filter = search_vector_column.op('@@')(search_query)
+                # substrings of words and values other than texts, e.g.
+                # datetimes or units, are only found in the data itself, which
+                # would require checking the data of all objects unless the
+                # trigram index can be used for at least three characters
+                if len(query_string) >= 3 and database_indexes.is_data_trigram_search_available():
+                    return or_(text_search_filter, data_filter)
+                return text_search_filter
     else:
         def filter_func(
                 data: typing.Any,
@@ -1657,6 +1705,90 @@ def generate_filter_func(
     return filter_func, tree, use_advanced_search
 
 
+def extract_search_texts(
+        data: typing.Dict[str, typing.Any]
+) -> typing.List[typing.Tuple[str, str, str]]:
+    """
+    Extract the texts to include in the full-text search vector of object data.
+
+    All texts are included using the 'simple' text search configuration, so
+    that words can be found regardless of their language. Translated texts
+    are additionally included using the configuration for their language, if
+    there is one, to allow finding different forms of a word.
+
+    The name is weighted highest, followed by tags and all other texts.
+
+    :param data: the object data
+    :return: a list of tuples of text search configuration, weight and text
+    """
+    texts: typing.Dict[typing.Tuple[str, str], typing.List[str]] = {}
+    for path, property_data in data_iter(data, filter_property_types={'text', 'tags', 'plotly_chart'}):
+        if not isinstance(property_data, dict):
+            continue
+        property_texts: typing.List[typing.Tuple[typing.Optional[str], typing.Any]] = []
+        if property_data['_type'] == 'text':
+            if tuple(path) == ('name',):
+                weight = 'A'
+            else:
+                weight = 'C'
+            text = property_data.get('text')
+            if isinstance(text, dict):
+                property_texts.extend(text.items())
+            else:
+                property_texts.append((None, text))
+        elif property_data['_type'] == 'tags':
+            weight = 'B'
+            tags = property_data.get('tags')
+            if isinstance(tags, list):
+                property_texts.extend((None, tag) for tag in tags)
+        else:
+            weight = 'C'
+            title = property_data.get('plotly', {}).get('layout', {}).get('title', {})
+            if isinstance(title, dict):
+                title = title.get('text')
+            property_texts.append((None, title))
+        for language_code, text in property_texts:
+            if not isinstance(text, str) or not text:
+                continue
+            texts.setdefault(('simple', weight), []).append(text)
+            if language_code in TEXT_SEARCH_CONFIGURATIONS:
+                texts.setdefault((TEXT_SEARCH_CONFIGURATIONS[language_code], weight), []).append(text)
+    return [
+        (config, weight, '\n'.join(config_texts))
+        for (config, weight), config_texts in sorted(texts.items())
+    ]
+
+
+def get_text_search_query(
+        query_string: str
+) -> typing.Any:
+    """
+    Create a full-text search query for a simple search.
+
+    Objects will match the query if they contain all words of the query
+    string as a word or the beginning of a word, or if they contain all words
+    of the query string in a form known to the text search configuration of
+    one of the languages.
+
+    :param query_string: the query string
+    :return: the tsquery expression, or None if the query string contains no words
+    """
+    if not re.search(r'[^\W_]', query_string):
+        return None
+    # parse the query string like the object texts, then allow prefix matches for each word
+    search_query = db.func.regexp_replace(
+        db.func.plainto_tsquery(db.cast('simple', postgresql.REGCONFIG), query_string).cast(String),
+        "'( |$)",
+        "':*\\1",
+        'g'
+    ).cast(postgresql.TSQUERY)
+    # the configurations of all languages are used, as looking up the known
+    # languages would require an additional query for every search
+    for config in sorted(set(TEXT_SEARCH_CONFIGURATIONS.values())):
+        search_query = search_query.op('||')(db.func.plainto_tsquery(db.cast(config, postgresql.REGCONFIG), query_string))
+    return search_query
+
+
 def wrap_filter_func(
         filter_func: typing.Callable[[typing.Any, typing.List[typing.Tuple[str, str, int, typing.Optional[int]]]], typing.Any]
 ) -> typing.Tuple[typing.Callable[[typing.Any], typing.Any], typing.List[typing.Tuple[str, str, int, typing.Optional[int]]]]:
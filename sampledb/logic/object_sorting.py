@@ -2,25 +2,44 @@
 """
 
 """
+import base64
+import datetime
+import json
 import typing
 
 import sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+
+from .indexed_properties import get_datetime_index_key, get_indexed_property_types, get_quantity_index_key
+from .object_search import get_text_search_query
+from ..models import IndexedPropertyType
 
 
 def ascending(sorting_func: typing.Any) -> typing.Any:
     """
     Modify a sorting function to sort in ascending order.
 
+    If the sorting function has already been modified to sort in a specific
+    order, its original sorting function is used instead.
+
     :param sorting_func: the original sorting function
     :return: the modified sorting function
     """
+    sorting_func = getattr(sorting_func, 'sorting_key_func', sorting_func)
+
     def modified_sorting_func(
             current_columns: typing.Any,
             original_columns: typing.Any,
             sorting_func: typing.Callable[[typing.Any, typing.Any], typing.Any] = sorting_func
     ) -> typing.Any:
-        return sqlalchemy.sql.asc(sorting_func(current_columns, original_columns))
+        sorting_key = sorting_func(current_columns, original_columns)
+        if isinstance(sorting_key, tuple):
+            return tuple(sqlalchemy.sql.asc(key) for key in sorting_key)
+        return sqlalchemy.sql.asc(sorting_key)
     setattr(modified_sorting_func, 'require_original_columns', getattr(sorting_func, 'require_original_columns', False))
+    setattr(modified_sorting_func, 'sorting_key_func', sorting_func)
+    setattr(modified_sorting_func, 'is_descending', False)
     return modified_sorting_func
 
 
@@ -28,16 +47,26 @@ def descending(sorting_func: typing.Any) -> typing.Any:
     """
     Modify a sorting function to sort in descending order.
 
+    If the sorting function has already been modified to sort in a specific
+    order, its original sorting function is used instead.
+
     :param sorting_func: the original sorting function
     :return: the modified sorting function
     """
+    sorting_func = getattr(sorting_func, 'sorting_key_func', sorting_func)
+
     def modified_sorting_func(
             current_columns: typing.Any,
             original_columns: typing.Any,
             sorting_func: typing.Callable[[typing.Any, typing.Any], typing.Any] = sorting_func
     ) -> typing.Any:
-        return sqlalchemy.sql.desc(sorting_func(current_columns, original_columns))
+        sorting_key = sorting_func(current_columns, original_columns)
+        if isinstance(sorting_key, tuple):
+            return tuple(sqlalchemy.sql.desc(key) for key in sorting_key)
+        return sqlalchemy.sql.desc(sorting_key)
     setattr(modified_sorting_func, 'require_original_columns', getattr(sorting_func, 'require_original_columns', False))
+    setattr(modified_sorting_func, 'sorting_key_func', sorting_func)
+    setattr(modified_sorting_func, 'is_descending', True)
     return modified_sorting_func
 
 
@@ -75,44 +104,139 @@ def last_modification_date() -> typing.Callable[[typing.Any, typing.Any], typing
     return sorting_func
 
 
+def _get_property_value_sorting_key(columns: typing.Any, property_name: str) -> typing.Any:
+    return sqlalchemy.sql.expression.case(
+        (
+            columns.data[property_name]['_type'].astext == 'text',
+            columns.data[property_name]['text'].astext
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'quantity',
+            sqlalchemy.func.to_char(columns.data[property_name]['magnitude_in_base_units'].astext.cast(sqlalchemy.Float), '00000000000000000000.00000000000000000000')
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'bool',
+            columns.data[property_name]['value'].astext
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'datetime',
+            columns.data[property_name]['utc_datetime'].astext
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'sample',
+            columns.data[property_name]['object_id'].astext
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'measurement',
+            columns.data[property_name]['object_id'].astext
+        ),
+        (
+            columns.data[property_name]['_type'].astext == 'object_reference',
+            columns.data[property_name]['object_id'].astext
+        ),
+        else_=sqlalchemy.sql.null()
+    )
+
+
 def property_value(property_name: str) -> typing.Callable[[typing.Any, typing.Any], typing.Any]:
     """
     Create a sorting function to sort by an arbitrary property.
 
+    If the property is indexed as quantity or datetime property, the index
+    key is used for sorting first, so that quantities are sorted by their
+    magnitude in base units. Values of other types follow the indexed values
+    and are sorted as for properties without an index.
+
     :param property_name: the name of the property to sort by
     :return: the sorting function
     """
     def sorting_func(current_columns: typing.Any, original_columns: typing.Any) -> typing.Any:
         columns = current_columns
-        return sqlalchemy.sql.expression.case(
-            (
-                columns.data[property_name]['_type'].astext == 'text',
-                columns.data[property_name]['text'].astext
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'quantity',
-                sqlalchemy.func.to_char(columns.data[property_name]['magnitude_in_base_units'].astext.cast(sqlalchemy.Float), '00000000000000000000.00000000000000000000')
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'bool',
-                columns.data[property_name]['value'].astext
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'datetime',
-                columns.data[property_name]['utc_datetime'].astext
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'sample',
-                columns.data[property_name]['object_id'].astext
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'measurement',
-                columns.data[property_name]['object_id'].astext
-            ),
-            (
-                columns.data[property_name]['_type'].astext == 'object_reference',
-                columns.data[property_name]['object_id'].astext
-            ),
-            else_=sqlalchemy.sql.null()
-        )
+        sorting_key = _get_property_value_sorting_key(columns, property_name)
+        indexed_property_types = get_indexed_property_types([property_name])
+        if IndexedPropertyType.QUANTITY in indexed_property_types:
+            return get_quantity_index_key(columns.data[[property_name]]), sorting_key
+        if IndexedPropertyType.DATETIME in indexed_property_types:
+            return get_datetime_index_key(columns.data[[property_name]]), sorting_key
+        return sorting_key
+    return sorting_func
+
+
+def search_rank(query_string: str) -> typing.Callable[[typing.Any, typing.Any], typing.Any]:
+    """
+    Create a sorting function to sort by relevance for a simple search.
+
+    :param query_string: the query string of the simple search
+    :return: the sorting function
+    """
+    search_query = get_text_search_query(query_string)
+
+    def sorting_func(current_columns: typing.Any, original_columns: typing.Any) -> typing.Any:
+        if search_query is None:
+            return sqlalchemy.sql.expression.literal(0)
+        return sqlalchemy.func.coalesce(sqlalchemy.func.ts_rank(current_columns.search_vector, search_query, type_=postgresql.REAL), 0)
     return sorting_func
+
+
+def _encode_cursor_value(value: typing.Any) -> typing.Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _is_valid_cursor_value(value: typing.Any) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (str, int, float, type(None)))
+
+
+def encode_cursor(
+        cursor: typing.Tuple[typing.Any, int],
+        sorting_name: str
+) -> str:
+    """
+    Encode a cursor for keyset pagination as URL-safe token.
+
+    :param cursor: the sorting key (or tuple of sorting keys) and object ID
+        of the cursor
+    :param sorting_name: a name for the sorting property and order
+    :return: the cursor token
+    """
+    value, object_id = cursor
+    if isinstance(value, tuple):
+        value = [_encode_cursor_value(element) for element in value]
+    else:
+        value = _encode_cursor_value(value)
+    cursor_json = json.dumps([sorting_name, value, object_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(cursor_json.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(
+        cursor_token: str,
+        sorting_name: str
+) -> typing.Optional[typing.Tuple[typing.Any, int]]:
+    """
+    Decode a cursor token created by encode_cursor.
+
+    :param cursor_token: the cursor token
+    :param sorting_name: a name for the current sorting property and order
+    :return: the sorting key and object ID of the cursor, or None if the
+        token is invalid or was created for a different sorting
+    """
+    try:
+        cursor_data = json.loads(base64.urlsafe_b64decode(cursor_token + '=' * (-len(cursor_token) % 4)).decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(cursor_data, list) or len(cursor_data) != 3:
+        return None
+    cursor_sorting_name, value, object_id = cursor_data
+    if cursor_sorting_name != sorting_name:
+        return None
+    if type(object_id) is not int:
+        return None
+    if isinstance(value, list):
+        # cursors of sorting functions with several sorting keys
+        if not value or not all(_is_valid_cursor_value(element) for element in value):
+            return None
+        return tuple(value), object_id
+    if not _is_valid_cursor_value(value):
+        return None
+    return value, object_id
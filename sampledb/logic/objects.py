@@ -12,20 +12,26 @@ the functions in this module should be called from within a Flask app context.
 """
 
 
+import dataclasses
 import typing
 import datetime
 
 import flask
 import sqlalchemy
 
-from .components import get_component_by_uuid
-from ..models import Objects, Object, Action, ActionType, Permissions
-from . import object_log, user_log, object_permissions, errors, users, actions, tags
+from .. import db
+from .components import get_component_by_uuid, get_components
+from ..models import Objects, Object, Action, ActionType, Permissions, ObjectReference, ObjectReferenceKind
+from . import object_changes, object_log, user_log, object_permissions, errors, users, actions, tags
+from .effective_object_permissions import update_effective_object_permissions_for_objects
 from .notifications import create_notification_for_being_referenced_by_object_metadata
 from .errors import CreatingObjectsDisabledError
-from .utils import cache
+from .utils import cache, request_cache
 from ..logic.schemas.utils import data_iter
 
+if typing.TYPE_CHECKING:
+    from .files import File
+
 
 def create_object(
         action_id: int,
@@ -102,6 +108,7 @@ def create_object(
     _update_object_references(object, user_id=user_id)
     _send_user_references_notifications(object, user_id)
     tags.update_object_tag_usage(object)
+    object_changes.record_object_change(object.object_id)
     return object
 
 
@@ -133,10 +140,13 @@ def create_eln_import_object(
     )
     if user_id:
         _update_object_references(object, user_id=user_id)
+    else:
+        _store_object_references(object)
     object_permissions.set_initial_permissions(object, user_id=importing_user_id)
     object_log.import_from_eln_file(object_id=object.object_id, user_id=importing_user_id)
     user_log.import_from_eln_file(object_id=object.object_id, user_id=importing_user_id)
     tags.update_object_tag_usage(object)
+    object_changes.record_object_change(object.object_id)
     return object
 
 
@@ -190,7 +200,12 @@ def insert_fed_object_version(
         get_missing_schema_from_action=get_missing_schema_from_action
     )
     if object is not None:
+        _store_object_references(object)
         tags.update_object_tag_usage(object)
+        # instrument responsible users may have permissions for a new object
+        update_effective_object_permissions_for_objects([object.object_id])
+        db.session.commit()
+        object_changes.record_object_change(object.object_id)
     return object
 
 
@@ -272,6 +287,7 @@ def create_object_batch(
                     object_permissions.set_object_permissions_for_all_users(object.id, permissions_for_all_users)
                 object_log.create_batch(object_id=object.object_id, user_id=user_id, batch_object_ids=batch_object_ids)
                 tags.update_object_tag_usage(object)
+                object_changes.record_object_change(object.object_id)
     return objects
 
 
@@ -326,6 +342,7 @@ def update_object(
     _update_object_references(object, user_id=user_id)
     _send_user_references_notifications(object, user_id)
     tags.update_object_tag_usage(object)
+    object_changes.record_object_change(object.object_id)
 
 
 def update_object_version(
@@ -353,7 +370,9 @@ def update_object_version(
     if object is None:
         check_object_version_exists(object_id, version_id)
         raise errors.ObjectNotFederatedError()
+    _store_object_references(object)
     tags.update_object_tag_usage(object, new_subversion=True)
+    object_changes.record_object_change(object.object_id)
 
     return object
 
@@ -386,7 +405,9 @@ def restore_object_version(object_id: int, version_id: int, user_id: int) -> Non
         return
     user_log.restore_object_version(user_id=user_id, object_id=object_id, restored_version_id=version_id, version_id=object.version_id)
     object_log.restore_object_version(object_id=object_id, user_id=user_id, restored_version_id=version_id, version_id=object.version_id)
+    _store_object_references(object)
     tags.update_object_tag_usage(object)
+    object_changes.record_object_change(object_id)
 
 
 @cache
@@ -421,6 +442,7 @@ def check_object_version_exists(object_id: int, version_id: int) -> None:
         raise errors.ObjectVersionDoesNotExistError()
 
 
+@request_cache
 def get_object(object_id: int, version_id: typing.Optional[int] = None) -> Object:
     """
     Returns either the current or a specific version of the object.
@@ -488,16 +510,22 @@ def get_fed_object(fed_object_id: int, component_id: int, fed_version_id: typing
     return object
 
 
-def get_object_versions(object_id: int) -> typing.List[Object]:
+def get_object_versions(
+        object_id: int,
+        *,
+        created_since: typing.Optional[datetime.datetime] = None
+) -> typing.List[Object]:
     """
     Returns all versions of an object, sorted from oldest to newest.
 
     :param object_id: the ID of the existing object
+    :param created_since: if not None, only versions created since this time
+        and the current version are returned
     :return: the object versions
     :raise errors.ObjectDoesNotExistError: when no object with the given
         object ID exists
     """
-    object_versions = Objects.get_object_versions(object_id=object_id)
+    object_versions = Objects.get_object_versions(object_id=object_id, created_since=created_since)
     if not object_versions:
         raise errors.ObjectDoesNotExistError()
     return object_versions
@@ -623,27 +651,74 @@ def _update_object_references(object: Object, user_id: int) -> None:
     """
     Searches for references to other objects and updates these accordingly.
 
-    At this time, only measurements or samples referencing other measurements
-    or samples will be handled, adding an entry to the object's log about
-    being used in a sample or measurement.
+    The references are stored for the object version and for measurements or
+    samples referencing other measurements or samples, an entry is added to
+    the object's log about being used in a sample or measurement.
 
     :param object: the updated (or newly created) object
     :param user_id: the user who caused the object update or creation
     """
-    if object.action_id is None:
-        action_type_id = None
-    else:
-        action_type_id = actions.get_action(object.action_id).type_id
+    _store_object_references(object)
+    action_type_id = _get_action_type_id(object)
     for referenced_object_id, previous_referenced_object_id, schema_type in find_object_references(object_id=object.object_id, version_id=object.version_id, object_data=object.data):
         if referenced_object_id != previous_referenced_object_id:
-            if action_type_id == ActionType.MEASUREMENT and schema_type == 'sample':
+            kind = _get_object_reference_kind(action_type_id, schema_type)
+            if kind == ObjectReferenceKind.MEASUREMENT:
                 object_log.use_object_in_measurement(object_id=referenced_object_id, user_id=user_id, measurement_id=object.object_id)
-            elif action_type_id == ActionType.SAMPLE_CREATION and schema_type == 'sample':
+            elif kind == ObjectReferenceKind.SAMPLE_CREATION:
                 object_log.use_object_in_sample(object_id=referenced_object_id, user_id=user_id, sample_id=object.object_id)
             else:
                 object_log.reference_object_in_metadata(object_id=referenced_object_id, user_id=user_id, referencing_object_id=object.object_id)
 
 
+def _get_action_type_id(object: Object) -> typing.Optional[int]:
+    if object.action_id is None:
+        return None
+    return actions.get_action(object.action_id).type_id
+
+
+def _get_object_reference_kind(action_type_id: typing.Optional[int], schema_type: str) -> ObjectReferenceKind:
+    if action_type_id == ActionType.MEASUREMENT and schema_type == 'sample':
+        return ObjectReferenceKind.MEASUREMENT
+    if action_type_id == ActionType.SAMPLE_CREATION and schema_type == 'sample':
+        return ObjectReferenceKind.SAMPLE_CREATION
+    return ObjectReferenceKind.METADATA
+
+
+def _store_object_references(object: Object) -> None:
+    """
+    Stores the references to other objects in an object version, replacing
+    those previously stored for it.
+
+    References are stored as they are found in the object data, so that
+    references to objects on other components or in .eln files are kept as
+    well. References to objects on this component are stored without the
+    component UUID.
+
+    :param object: the object version
+    """
+    ObjectReference.query.filter_by(source_object_id=object.object_id, source_version_id=object.version_id).delete()
+    if object.data is not None:
+        action_type_id = _get_action_type_id(object)
+        for path, data in data_iter(data=object.data, filter_property_types={'sample', 'measurement', 'object_reference'}):
+            if not isinstance(data, dict) or not isinstance(data.get('object_id'), int):
+                continue
+            component_uuid = data.get('component_uuid')
+            if component_uuid == flask.current_app.config['FEDERATION_UUID']:
+                component_uuid = None
+            db.session.add(ObjectReference(
+                source_object_id=object.object_id,
+                source_version_id=object.version_id,
+                path=list(path),
+                kind=_get_object_reference_kind(action_type_id, data['_type']),
+                target_object_id=data['object_id'],
+                target_component_uuid=component_uuid,
+                target_eln_source_url=data.get('eln_source_url'),
+                target_eln_object_url=data.get('eln_object_url')
+            ))
+    db.session.commit()
+
+
 def _send_user_references_notifications(object: Object, user_id: int) -> None:
     """
     Searches for references to users and notifies them accordingly.
@@ -711,3 +786,127 @@ def get_action_ids_for_object_ids(
     :return: the objects' action IDs
     """
     return Objects.get_action_ids_for_object_ids(object_ids)
+
+
+@dataclasses.dataclass(frozen=True)
+class ObjectListContext:
+    """
+    Information needed to display a list of objects.
+    """
+    original_objects_by_id: typing.Dict[int, Object]
+    users_by_id: typing.Dict[int, 'users.User']
+    actions_by_id: typing.Dict[int, 'actions.Action']
+    files_by_object_id: typing.Dict[int, typing.List['File']]
+
+    def get_original_object(self, object: Object) -> Object:
+        return self.original_objects_by_id.get(object.object_id, object)
+
+    def get_user(self, user_id: typing.Optional[int]) -> typing.Optional['users.User']:
+        if user_id is None:
+            return None
+        return self.users_by_id.get(user_id)
+
+    def get_action(self, action_id: typing.Optional[int]) -> typing.Optional['actions.Action']:
+        if action_id is None:
+            return None
+        return self.actions_by_id.get(action_id)
+
+    def get_files(self, object_id: int) -> typing.List['File']:
+        return self.files_by_object_id.get(object_id, [])
+
+
+def load_object_list_context(
+        objects: typing.Sequence[Object],
+        *,
+        load_original_objects: bool = True,
+        load_users: bool = True,
+        load_actions: bool = True,
+        load_files: bool = True,
+        known_actions: typing.Optional[typing.Sequence['actions.Action']] = None
+) -> ObjectListContext:
+    """
+    Load the information needed to display a list of objects.
+
+    Instead of querying the original versions, users, actions, components,
+    .eln file imports and files for each object individually, they are loaded
+    for all objects at once, using a fixed number of queries independent of
+    the number of objects. The components and .eln file imports are stored in
+    the objects themselves, so that their component and eln_import properties
+    do not need to be queried individually either.
+
+    :param objects: the current versions of existing objects
+    :param load_original_objects: whether the original versions of the
+        objects should be loaded
+    :param load_users: whether the creators and last modifying users of the
+        objects should be loaded
+    :param load_actions: whether the actions of the objects should be loaded
+    :param load_files: whether the files of the objects should be loaded
+    :param known_actions: actions that have already been loaded, or None
+    :return: the object list context
+    """
+    # local imports to avoid circular dependencies
+    from .eln_import import get_eln_imports_by_ids
+    from .files import get_files_for_objects
+
+    original_objects_by_id = {}
+    if load_original_objects:
+        original_objects_by_id = Objects.get_previous_object_versions(
+            object_ids={
+                object.object_id
+                for object in objects
+                if object.version_id != 0
+            },
+            version_id=0
+        )
+
+    users_by_id = {}
+    if load_users:
+        user_ids = {object.user_id for object in objects}
+        user_ids.update(
+            original_object.user_id
+            for original_object in original_objects_by_id.values()
+        )
+        user_ids.discard(None)
+        users_by_id = users.get_users_by_ids(typing.cast(typing.Set[int], user_ids))
+
+    actions_by_id = {}
+    if load_actions:
+        if known_actions is not None:
+            actions_by_id = {
+                action.id: action
+                for action in known_actions
+            }
+        actions_by_id.update(actions.get_actions_by_ids(
+            object.action_id
+            for object in objects
+            if object.action_id is not None and object.action_id not in actions_by_id
+        ))
+
+    files_by_object_id = {}
+    if load_files:
+        files_by_object_id = get_files_for_objects(object.object_id for object in objects)
+
+    if any(object.component_id is not None for object in objects):
+        components_by_id = {
+            component.id: component
+            for component in get_components()
+        }
+        for object in objects:
+            if object.component_id is not None:
+                object._component_cache[0] = components_by_id.get(object.component_id)
+
+    eln_imports_by_id = get_eln_imports_by_ids(
+        object.eln_import_id
+        for object in objects
+        if object.eln_import_id is not None
+    )
+    for object in objects:
+        if object.eln_import_id is not None:
+            object._eln_import_cache[0] = eln_imports_by_id.get(object.eln_import_id)
+
+    return ObjectListContext(
+        original_objects_by_id=original_objects_by_id,
+        users_by_id=users_by_id,
+        actions_by_id=actions_by_id,
+        files_by_object_id=files_by_object_id
+    )
@@ -43,7 +43,8 @@ class ResourcePermissions:
             user_permissions_table: typing.Any,
             group_permissions_table: typing.Any,
             project_permissions_table: typing.Any,
-            check_resource_exists: typing.Callable[[int], typing.Any]
+            check_resource_exists: typing.Callable[[int], typing.Any],
+            on_permissions_changed: typing.Optional[typing.Callable[[int], typing.Any]] = None
     ) -> None:
         self._resource_id_name = resource_id_name
         self._all_user_permissions_table = all_user_permissions_table
@@ -52,6 +53,23 @@ class ResourcePermissions:
         self._group_permissions_table = group_permissions_table
         self._project_permissions_table = project_permissions_table
         self._check_resource_exists = check_resource_exists
+        self._on_permissions_changed = on_permissions_changed
+
+    def _handle_permissions_changed(
+            self,
+            resource_id: int
+    ) -> None:
+        """
+        Notify the resource type that the permissions for a resource changed.
+
+        This is called before the change is committed, so that derived data,
+        e.g. materialized effective permissions, can be updated in the same
+        transaction.
+
+        :param resource_id: the ID of an existing resource
+        """
+        if self._on_permissions_changed is not None:
+            self._on_permissions_changed(resource_id)
 
     def _get_user_independent_permissions(
             self,
@@ -129,6 +147,7 @@ class ResourcePermissions:
             else:
                 all_user_permissions.permissions = permissions
             db.session.add(all_user_permissions)
+        self._handle_permissions_changed(resource_id)
         db.session.commit()
 
     def get_permissions_for_all_users(
@@ -304,6 +323,7 @@ class ResourcePermissions:
             else:
                 user_permissions.permissions = permissions
             db.session.add(user_permissions)
+        self._handle_permissions_changed(resource_id)
         db.session.commit()
 
     def get_permissions_for_groups(
@@ -367,6 +387,7 @@ class ResourcePermissions:
             else:
                 group_permissions.permissions = permissions
             db.session.add(group_permissions)
+        self._handle_permissions_changed(resource_id)
         db.session.commit()
 
     def get_permissions_for_projects(
@@ -418,6 +439,7 @@ class ResourcePermissions:
             else:
                 project_permissions.permissions = permissions
             db.session.add(project_permissions)
+        self._handle_permissions_changed(resource_id)
         db.session.commit()
 
     def get_permissions_for_user(
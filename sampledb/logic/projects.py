@@ -33,7 +33,9 @@ from . import errors
 from . import objects
 from . import object_log
 from .notifications import create_notification_for_being_invited_to_a_project
+from .effective_object_permissions import update_effective_object_permissions_for_users
 from .languages import get_language_by_lang_code, Language
+from .utils import request_cache
 
 
 # project names are limited to this (semi-arbitrary) length
@@ -224,10 +226,12 @@ def delete_project(project_id: int) -> None:
     project = projects.Project.query.filter_by(id=project_id).first()
     if project is None:
         raise errors.ProjectDoesNotExistError()
+    member_user_ids = list(get_project_member_user_ids_and_permissions(project_id, include_groups=True))
     # project object permissions and project default permissions will be
     # deleted due to ondelete = "CASCADE" in the model. No need to delete
     # them manually here.
     db.session.delete(project)
+    update_effective_object_permissions_for_users(member_user_ids)
     db.session.commit()
 
 
@@ -335,6 +339,7 @@ def get_project_member_group_ids_and_permissions(project_id: int) -> typing.Dict
     }
 
 
+@request_cache
 def get_user_projects(
         user_id: int,
         include_groups: bool = False,
@@ -469,6 +474,7 @@ def add_user_to_project(project_id: int, user_id: int, permissions: Permissions,
     for mutable_invitation in mutable_invitations:
         mutable_invitation.accepted = True
         db.session.add(mutable_invitation)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
     if other_project_ids:
         ancestor_project_ids = get_ancestor_project_ids(project_id, only_if_child_can_add_users_to_ancestor=True)
@@ -509,6 +515,7 @@ def add_group_to_project(project_id: int, group_id: int, permissions: Permission
         raise errors.GroupAlreadyMemberOfProjectError()
     group_permissions = GroupProjectPermissions(project_id=project_id, group_id=group_id, permissions=permissions)
     db.session.add(group_permissions)
+    update_effective_object_permissions_for_users(groups.get_group_member_ids(group_id))
     db.session.commit()
 
 
@@ -551,6 +558,7 @@ def remove_user_from_project(project_id: int, user_id: int) -> None:
         db.session.delete(project)
     else:
         db.session.delete(existing_permissions)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -579,6 +587,7 @@ def remove_group_from_project(project_id: int, group_id: int) -> None:
     if existing_permissions is None:
         raise errors.GroupNotMemberOfProjectError()
     db.session.delete(existing_permissions)
+    update_effective_object_permissions_for_users(groups.get_group_member_ids(group_id))
     db.session.commit()
 
 
@@ -626,6 +635,7 @@ def update_user_project_permissions(project_id: int, user_id: int, permissions:
 
     existing_permissions.permissions = permissions
     db.session.add(existing_permissions)
+    update_effective_object_permissions_for_users([user_id])
     db.session.commit()
 
 
@@ -663,6 +673,7 @@ def update_group_project_permissions(project_id: int, group_id: int, permissions
 
     existing_permissions.permissions = permissions
     db.session.add(existing_permissions)
+    update_effective_object_permissions_for_users(groups.get_group_member_ids(group_id))
     db.session.commit()
 
 
@@ -1,3 +1,4 @@
+import copy
 import typing
 
 from .. import actions
@@ -73,7 +74,8 @@ def substitute_templates(
         template_action = actions.get_action(schema['template'])
         if template_action.schema is None or template_action.type is None or not (template_action.type.is_template or template_action.type.fed_id == ActionType.TEMPLATE):
             raise InvalidTemplateIDError()
-        template_schema = template_action.schema
+        # the template action schema is shared with other callers and must not be modified
+        template_schema = copy.deepcopy(template_action.schema)
         template_schema = process_template_action_schema(template_schema)
         if schema.get('title'):
             del template_schema['title']
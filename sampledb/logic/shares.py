@@ -25,17 +25,23 @@ class ObjectShare:
     utc_datetime: datetime.datetime
     component: Component
     user_id: typing.Optional[int]
+    last_modified: datetime.datetime
     import_status: typing.Optional[typing.Dict[str, typing.Any]] = None
 
     @classmethod
-    def from_database(cls, object_share: models.ObjectShare) -> 'ObjectShare':
+    def from_database(
+            cls,
+            object_share: models.ObjectShare,
+            component: typing.Optional[Component] = None
+    ) -> 'ObjectShare':
         return ObjectShare(
             object_id=object_share.object_id,
             component_id=object_share.component_id,
             policy=object_share.policy,
             utc_datetime=object_share.utc_datetime,
-            component=Component.from_database(object_share.component),
+            component=component if component is not None else Component.from_database(object_share.component),
             user_id=object_share.user_id,
+            last_modified=object_share.last_modified,
             import_status=object_share.import_status
         )
 
@@ -52,22 +58,183 @@ def get_all_shares() -> typing.List[ObjectShare]:
     ]
 
 
-def get_shares_for_component(component_id: int) -> typing.List[ObjectShare]:
+def get_shares_for_component(
+        component_id: int,
+        *,
+        modified_since: typing.Optional[datetime.datetime] = None,
+        after_object_id: typing.Optional[int] = None,
+        limit: typing.Optional[int] = None
+) -> typing.List[ObjectShare]:
     """
-    Returns a list of all objects shared with a component.
+    Returns a list of objects shared with a component, sorted by object ID.
 
-    :param: the component's ID
+    :param component_id: the component's ID
+    :param modified_since: if not None, only shares that have been modified
+        since this time or for objects that have been changed since this time
+        are returned
+    :param after_object_id: if not None, only shares for objects with a
+        greater ID are returned
+    :param limit: the maximum number of shares to return, or None
     :return: the list of shares
     """
-    shares = models.ObjectShare.query.filter_by(component_id=component_id).all()
+    query = db.select(models.ObjectShare).where(
+        models.ObjectShare.component_id == component_id
+    ).options(
+        db.joinedload(models.ObjectShare.component)
+    )
+    if modified_since is not None:
+        query = query.outerjoin(
+            models.ObjectChange,
+            models.ObjectChange.object_id == models.ObjectShare.object_id
+        ).where(db.or_(
+            models.ObjectShare.last_modified >= modified_since,
+            models.ObjectChange.utc_datetime >= modified_since
+        ))
+    if after_object_id is not None:
+        query = query.where(models.ObjectShare.object_id > after_object_id)
+    query = query.order_by(models.ObjectShare.object_id)
+    if limit is not None:
+        query = query.limit(limit)
+    shares = db.session.execute(query).scalars().all()
     if len(shares) == 0:
         check_component_exists(component_id)
+        return []
+    # all shares belong to the same component, which only needs to be
+    # wrapped once
+    component = Component.from_database(shares[0].component)
     return [
-        ObjectShare.from_database(object_share)
+        ObjectShare.from_database(object_share, component)
         for object_share in shares
     ]
 
 
+def get_changed_entities_referenced_by_shares(
+        component_id: int,
+        modified_since: datetime.datetime
+) -> typing.List[typing.Tuple[str, int]]:
+    """
+    Returns the actions, action types, instruments, locations and location
+    types that have been changed since a given time and are referenced by the
+    objects shared with a component.
+
+    Only references that the share policies allow to be sent are considered,
+    i.e. actions of objects if their action is shared and locations of
+    objects if their location assignments are shared, as well as the action
+    types and instruments of these actions and the parent locations and
+    location types of these locations.
+
+    :param component_id: the component's ID
+    :param modified_since: the time since which the entities have been changed
+    :return: a list of entity types and IDs, sorted by type and ID
+    """
+    if not db.session.execute(
+        db.select(db.exists().where(models.EntityChange.utc_datetime >= modified_since))
+    ).scalar():
+        # usually none of these entities have been changed since the last sync
+        return []
+    rows = db.session.execute(db.text("""
+        WITH RECURSIVE shared_actions(id) AS (
+            SELECT DISTINCT objects_current.action_id
+            FROM object_shares
+            JOIN objects_current ON objects_current.object_id = object_shares.object_id
+            WHERE object_shares.component_id = :component_id
+            AND (object_shares.policy -> 'access' ->> 'action') = 'true'
+            AND objects_current.action_id IS NOT NULL
+        ), shared_locations(id) AS (
+            SELECT object_location_assignments.location_id
+            FROM object_shares
+            JOIN object_location_assignments ON object_location_assignments.object_id = object_shares.object_id
+            WHERE object_shares.component_id = :component_id
+            AND (object_shares.policy -> 'access' ->> 'object_location_assignments') = 'true'
+            AND object_location_assignments.location_id IS NOT NULL
+            UNION
+            SELECT locations.parent_location_id
+            FROM shared_locations
+            JOIN locations ON locations.id = shared_locations.id
+            WHERE locations.parent_location_id IS NOT NULL
+        ), referenced_entities(type, id) AS (
+            SELECT 'actions', id FROM shared_actions
+            UNION
+            SELECT 'action_types', actions.type_id
+            FROM shared_actions JOIN actions ON actions.id = shared_actions.id
+            WHERE actions.type_id IS NOT NULL
+            UNION
+            SELECT 'instruments', actions.instrument_id
+            FROM shared_actions JOIN actions ON actions.id = shared_actions.id
+            WHERE actions.instrument_id IS NOT NULL
+            UNION
+            SELECT 'locations', id FROM shared_locations
+            UNION
+            SELECT 'location_types', locations.type_id
+            FROM shared_locations JOIN locations ON locations.id = shared_locations.id
+        )
+        SELECT entity_changes.type, entity_changes.entity_id
+        FROM entity_changes
+        JOIN referenced_entities ON referenced_entities.type = entity_changes.type AND referenced_entities.id = entity_changes.entity_id
+        WHERE entity_changes.utc_datetime >= :modified_since
+        ORDER BY entity_changes.type, entity_changes.entity_id
+    """), {
+        'component_id': component_id,
+        'modified_since': modified_since
+    }).all()
+    return [
+        (type, entity_id)
+        for type, entity_id in rows
+    ]
+
+
+def get_entities_referenced_by_objects(
+        object_ids: typing.Iterable[int]
+) -> typing.List[typing.Tuple[str, int]]:
+    """
+    Returns the users, actions and locations referenced by objects.
+
+    This includes the action and the users of all versions of the objects,
+    the users of their comments and files, and the locations and users of
+    their location assignments, regardless of whether a share policy allows
+    sending them, so that the entities referenced by shared objects can be
+    loaded in bulk before the shared objects are preprocessed.
+
+    :param object_ids: the IDs of objects
+    :return: a list of entity types and IDs, sorted by type and ID
+    """
+    object_ids = tuple(set(object_ids))
+    if not object_ids:
+        return []
+    rows = db.session.execute(db.text("""
+        SELECT 'actions', action_id FROM objects_current
+        WHERE object_id IN :object_ids AND action_id IS NOT NULL
+        UNION
+        SELECT 'users', user_id FROM objects_current
+        WHERE object_id IN :object_ids AND user_id IS NOT NULL
+        UNION
+        SELECT 'users', user_id FROM objects_previous
+        WHERE object_id IN :object_ids AND user_id IS NOT NULL
+        UNION
+        SELECT 'users', user_id FROM comments
+        WHERE object_id IN :object_ids AND user_id IS NOT NULL
+        UNION
+        SELECT 'users', user_id FROM files
+        WHERE object_id IN :object_ids AND user_id IS NOT NULL
+        UNION
+        SELECT 'users', user_id FROM object_location_assignments
+        WHERE object_id IN :object_ids AND user_id IS NOT NULL
+        UNION
+        SELECT 'users', responsible_user_id FROM object_location_assignments
+        WHERE object_id IN :object_ids AND responsible_user_id IS NOT NULL
+        UNION
+        SELECT 'locations', location_id FROM object_location_assignments
+        WHERE object_id IN :object_ids AND location_id IS NOT NULL
+        ORDER BY 1, 2
+    """), {
+        'object_ids': object_ids
+    }).all()
+    return [
+        (type, entity_id)
+        for type, entity_id in rows
+    ]
+
+
 def get_shares_for_object(object_id: int) -> typing.List[ObjectShare]:
     shares = models.ObjectShare.query.filter_by(object_id=object_id).all()
     if len(shares) == 0:
@@ -129,6 +296,7 @@ def update_object_share(
     if share.policy != policy:
         share.policy = policy
         share.user_id = user_id
+        share.last_modified = datetime.datetime.now(datetime.timezone.utc)
         db.session.add(share)
         db.session.commit()
         fed_logs.update_object_policy(object_id, component_id, user_id=user_id)
@@ -15,7 +15,7 @@ from flask_babel import gettext
 from .components import get_component, get_components, Component, check_component_exists
 from .. import db, logic
 from . import errors, settings
-from .utils import cache
+from .utils import cache, request_cache
 from .notifications import create_notification_for_being_automatically_linked
 from .. models import users, UserType, FederatedIdentity, Authentication, AuthenticationType
 
@@ -276,10 +276,13 @@ class UserFederationAlias:
 
     @classmethod
     def from_user_profile(cls, user_id: int, component_id: int) -> 'UserFederationAlias':
-        user = get_user(user_id)
+        return cls.from_user(get_user(user_id), component_id)
+
+    @classmethod
+    def from_user(cls, user: User, component_id: int) -> 'UserFederationAlias':
         return UserFederationAlias(
             is_default=True,
-            user_id=user_id,
+            user_id=user.id,
             component_id=component_id,
             name=user.name,
             use_real_name=True,
@@ -311,10 +314,29 @@ def check_user_exists(
         raise errors.UserDoesNotExistError()
 
 
+@request_cache
 def get_user(user_id: int, component_id: typing.Optional[int] = None) -> User:
     return User.from_database(get_mutable_user(user_id, component_id))
 
 
+def get_users_by_ids(user_ids: typing.Iterable[int]) -> typing.Dict[int, User]:
+    """
+    Returns the users with the given user IDs using a single query.
+
+    User IDs that do not belong to an existing user are ignored.
+
+    :param user_ids: the IDs of users
+    :return: a dict mapping user IDs to the users
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {
+        user.id: User.from_database(user)
+        for user in users.User.query.filter(users.User.id.in_(user_ids)).all()
+    }
+
+
 def get_mutable_user(user_id: int, component_id: typing.Optional[int] = None) -> users.User:
     """
     Get the mutable user instance to perform changes in the database on.
@@ -690,6 +712,30 @@ def get_user_alias(user_id: int, component_id: int) -> UserFederationAlias:
     return UserFederationAlias.from_database(alias)
 
 
+def get_user_aliases_by_user_ids(user_ids: typing.Iterable[int], component_id: int) -> typing.Dict[int, UserFederationAlias]:
+    """
+    Get the existing aliases of the given users for a component using a
+    single query.
+
+    Default aliases are not included, so users without an alias for the
+    component are ignored.
+
+    :param user_ids: the IDs of users
+    :param component_id: the ID of an existing component
+    :return: a dict mapping user IDs to the user aliases
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {
+        alias.user_id: UserFederationAlias.from_database(alias)
+        for alias in users.UserFederationAlias.query.filter(
+            users.UserFederationAlias.user_id.in_(user_ids),
+            users.UserFederationAlias.component_id == component_id
+        ).all()
+    }
+
+
 def get_user_aliases_for_user(user_id: int) -> typing.List[UserFederationAlias]:
     """
     Get all aliases for a user.
@@ -1007,6 +1053,7 @@ def _create_federated_identity(user_id: int, eln_or_fed_user: User, update_if_in
     return fed_identity
 
 
+@request_cache
 def get_user_by_federated_user(federated_user_id: int) -> typing.Optional[User]:
     """
     Get the local user of a federated identity by a federated user if exists.
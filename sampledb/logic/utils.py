@@ -4,13 +4,16 @@
 """
 import datetime
 import functools
+import inspect
 import re
 import typing
 import sys
 
 import flask
 import pytz
+import sqlalchemy
 from flask_login import current_user
+from sqlalchemy.sql.util import find_tables
 
 from . import errors
 from .. import db
@@ -347,6 +350,196 @@ def clear_cache_functions() -> None:
         cache_function.cache_clear()  # type: ignore
 
 
+def request_cache(function: typing.Callable[..., _T]) -> typing.Callable[..., _T]:
+    """
+    Decorator for caching function results for the current request.
+
+    While handling a request, results of functions with this decorator are
+    stored in flask.g, so that repeated calls with the same arguments do not
+    need to query the database again. Outside of requests, the functions are
+    called as usual. Exceptions raised by the functions are not cached.
+
+    The tables read while a result is computed are recorded, and the result
+    is dropped from the cache once a statement modifying one of these tables
+    is executed using the app's engine or a transaction modifying one of them
+    is rolled back. Results are shared by all callers and must not be
+    modified, except for lists, which are returned as shallow copies.
+
+    :param function: the function to decorate
+    :return: the decorated function
+    """
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(*args: typing.Any, **kwargs: typing.Any) -> _T:
+        if not flask.has_request_context():
+            return function(*args, **kwargs)
+        bound_arguments = signature.bind(*args, **kwargs)
+        bound_arguments.apply_defaults()
+        key = (function, tuple(bound_arguments.arguments.items()))
+        request_cache_values = flask.g.setdefault('request_cache_values', {})
+        read_tables_stack = flask.g.setdefault('request_cache_read_tables_stack', [])
+        if key in request_cache_values:
+            result, read_tables = request_cache_values[key]
+            # results computed while calling this function depend on the same tables
+            for outer_read_tables in read_tables_stack:
+                outer_read_tables.update(read_tables)
+        else:
+            read_tables = set()
+            read_tables_stack.append(read_tables)
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                read_tables_stack.pop()
+            request_cache_values[key] = (result, read_tables)
+            request_cache_keys_by_table = flask.g.setdefault('request_cache_keys_by_table', {})
+            for table_name in read_tables:
+                request_cache_keys_by_table.setdefault(table_name, set()).add(key)
+        if isinstance(result, list):
+            result = list(result)
+        return typing.cast(_T, result)
+    return wrapper
+
+
+def clear_request_cache() -> None:
+    """
+    Clear the cache of all functions decorated with the request_cache decorator.
+    """
+    if flask.has_app_context():
+        flask.g.pop('request_cache_values', None)
+        flask.g.pop('request_cache_keys_by_table', None)
+
+
+# placeholder for tables that could not be determined from a statement
+_ALL_TABLES = '*'
+
+# statements modifying a single table, e.g. as issued by the ORM
+_TABLE_MODIFYING_STATEMENT_PATTERN = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)"?', re.IGNORECASE)
+# other statements which may modify data; this may also match statements
+# which do not, which only causes the request cache to be cleared unnecessarily
+_MODIFYING_STATEMENT_PATTERN = re.compile(r'\b(INSERT|UPDATE|DELETE|TRUNCATE|MERGE|ALTER|DROP|CREATE)\b', re.IGNORECASE)
+
+
+def setup_request_cache_invalidation(engine: sqlalchemy.engine.Engine) -> None:
+    """
+    Invalidate request cache entries whenever data is modified using the given engine.
+
+    :param engine: the SQLAlchemy engine used by the app
+    """
+    listeners: typing.List[typing.Tuple[str, typing.Callable[..., None]]] = [
+        ('before_cursor_execute', _track_request_cache_statement),
+        ('commit', _forget_modified_request_cache_tables),
+        ('rollback', _invalidate_request_cache_on_rollback),
+        ('rollback_savepoint', _invalidate_request_cache_on_savepoint_rollback),
+    ]
+    for event_name, listener in listeners:
+        if not sqlalchemy.event.contains(engine, event_name, listener):
+            sqlalchemy.event.listen(engine, event_name, listener)
+
+
+@cache
+def _get_affected_table_names(table_name: str) -> typing.FrozenSet[str]:
+    # rows in tables referencing a modified table may be modified or deleted
+    # by the database due to foreign key constraints as well
+    table_names = {table_name}
+    unchecked_table_names = [table_name]
+    while unchecked_table_names:
+        unchecked_table_name = unchecked_table_names.pop()
+        for table in db.metadata.tables.values():
+            if table.name in table_names:
+                continue
+            for foreign_key in table.foreign_keys:
+                if (foreign_key.ondelete or foreign_key.onupdate) and foreign_key.column.table.name == unchecked_table_name:
+                    table_names.add(table.name)
+                    unchecked_table_names.append(table.name)
+                    break
+    return frozenset(table_names)
+
+
+def _get_modified_table_names(statement: str) -> typing.Optional[typing.FrozenSet[str]]:
+    match = _TABLE_MODIFYING_STATEMENT_PATTERN.match(statement)
+    if match is not None:
+        return _get_affected_table_names(match.group(1))
+    if statement.lstrip()[:6].upper() != 'SELECT' and _MODIFYING_STATEMENT_PATTERN.search(statement):
+        return frozenset({_ALL_TABLES})
+    return None
+
+
+def _get_read_table_names(context: typing.Any) -> typing.Set[str]:
+    compiled = getattr(context, 'compiled', None)
+    if compiled is not None and isinstance(compiled.statement, sqlalchemy.sql.Select):
+        table_names = {
+            table.name
+            for table in find_tables(compiled.statement)
+            if isinstance(table, sqlalchemy.sql.expression.TableClause)
+        }
+        if table_names:
+            return table_names
+    # tables read by textual statements are unknown
+    return {_ALL_TABLES}
+
+
+def _invalidate_request_cache(table_names: typing.Iterable[str]) -> None:
+    request_cache_values = flask.g.get('request_cache_values')
+    if not request_cache_values:
+        return
+    if _ALL_TABLES in table_names:
+        clear_request_cache()
+        return
+    request_cache_keys_by_table = flask.g.request_cache_keys_by_table
+    for table_name in [*table_names, _ALL_TABLES]:
+        for key in request_cache_keys_by_table.pop(table_name, ()):
+            request_cache_values.pop(key, None)
+
+
+def _track_request_cache_statement(
+        connection: sqlalchemy.engine.Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: typing.Any,
+        executemany: bool
+) -> None:
+    if not flask.has_app_context():
+        return
+    modified_table_names = _get_modified_table_names(statement)
+    if modified_table_names is not None:
+        # cached results which were computed after this modification need to
+        # be invalidated as well if the transaction is rolled back
+        flask.g.setdefault('request_cache_modified_tables', set()).update(modified_table_names)
+        _invalidate_request_cache(modified_table_names)
+        return
+    read_tables_stack = flask.g.get('request_cache_read_tables_stack')
+    if read_tables_stack:
+        read_table_names = _get_read_table_names(context)
+        for read_tables in read_tables_stack:
+            read_tables.update(read_table_names)
+
+
+def _forget_modified_request_cache_tables(
+        connection: sqlalchemy.engine.Connection
+) -> None:
+    if flask.has_app_context():
+        flask.g.pop('request_cache_modified_tables', None)
+
+
+def _invalidate_request_cache_on_rollback(
+        connection: sqlalchemy.engine.Connection
+) -> None:
+    if flask.has_app_context():
+        _invalidate_request_cache(flask.g.pop('request_cache_modified_tables', ()))
+
+
+def _invalidate_request_cache_on_savepoint_rollback(
+        connection: sqlalchemy.engine.Connection,
+        name: str,
+        context: typing.Any
+) -> None:
+    if flask.has_app_context():
+        # the outer transaction may still be rolled back, so the modified tables are kept
+        _invalidate_request_cache(flask.g.get('request_cache_modified_tables', ()))
+
+
 def get_data_and_schema_by_id_path(
         data: typing.Optional[typing.Union[typing.List[typing.Any], typing.Dict[str, typing.Any]]],
         schema: typing.Optional[typing.Dict[str, typing.Any]],
@@ -3,18 +3,33 @@
 Logic module for webhooks
 
 Webhooks allow users to subscribe to the creation of new object log entries.
+
+Data is sent to webhooks using one pooled HTTP session per target host, so
+that connections can be reused, and several webhooks can be sent data in
+parallel using send_data_to_webhooks. As these sessions are shared between
+the webhooks of different users, they do not store any cookies. If sending
+data to a target URL fails WEBHOOK_CIRCUIT_BREAKER_THRESHOLD times in a row,
+no further requests are sent to it for WEBHOOK_CIRCUIT_BREAKER_TIMEOUT
+seconds. Afterwards, a single trial request is sent and further requests
+are only sent once it has succeeded.
 """
 
+import concurrent.futures
 import dataclasses
 import datetime
 import hashlib
 import hmac
+import http.cookiejar
 import json
 import secrets
+import threading
+import time
 import typing
+import urllib.parse
 
 import flask
 import requests
+import requests.adapters
 
 from . import errors
 from .components import validate_address
@@ -23,6 +38,21 @@ from .. import db
 from ..models import webhooks as whmodel
 
 WEBHOOK_TIMEOUT = 10
+# maximum number of requests sent to webhooks in parallel
+WEBHOOK_MAX_PARALLEL_REQUESTS = 8
+# number of consecutive failures after which requests to a target URL are paused
+WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 5
+# time in seconds that requests to a target URL are paused after repeated failures
+WEBHOOK_CIRCUIT_BREAKER_TIMEOUT = 5 * 60
+
+_sessions_by_host: typing.Dict[typing.Tuple[str, str], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# number of consecutive failures and monotonic time of the last failure per target URL
+_failures_by_target_url: typing.Dict[str, typing.Tuple[int, float]] = {}
+# target URLs that a trial request is currently being sent to after the timeout
+_trial_request_target_urls: typing.Set[str] = set()
+_failures_lock = threading.Lock()
 
 
 @dataclasses.dataclass(frozen=True)
@@ -51,27 +81,143 @@ class Webhook:
         )
 
     def send_data(self, data: typing.Dict[str, typing.Any]) -> None:
-        data_str = json.dumps(data)
+        """
+        Send data to the target URL of this webhook.
+
+        :param data: the data to send as JSON
+        :raise errors.WebhookConnectionException: when the data could not be
+            sent or requests to the target URL are paused after repeated
+            failures
+        """
+        self._post_data(json.dumps(data))
+        update_webhook(self.id, datetime.datetime.utcnow())
+
+    def _post_data(self, data_str: str) -> None:
+        if not _start_request(self.target_url):
+            raise errors.WebhookConnectionException()
         headers = {
             'X-SampleDB-Event-Type': str(self.type.name),
             'X-Sampledb-Signature': self.get_signature(data_str)
         }
         try:
-            requests.post(
+            _get_session(self.target_url).post(
                 self.target_url,
                 data=data_str,
                 timeout=WEBHOOK_TIMEOUT,
                 headers=headers
             )
-            update_webhook(self.id, datetime.datetime.utcnow())
         except requests.RequestException:
+            _record_failure(self.target_url)
             raise errors.WebhookConnectionException()
+        _record_success(self.target_url)
 
     def get_signature(self, data: str) -> str:
         hash_object = hmac.new(self.secret.encode('utf-8'), msg=data.encode('utf-8'), digestmod=hashlib.sha256)
         return "sha256=" + hash_object.hexdigest()
 
 
+def _get_session(target_url: str) -> requests.Session:
+    parsed_url = urllib.parse.urlparse(target_url)
+    host = (parsed_url.scheme, parsed_url.netloc)
+    with _sessions_lock:
+        session = _sessions_by_host.get(host)
+        if session is None:
+            session = requests.Session()
+            # the session is shared between webhooks of different users
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=WEBHOOK_MAX_PARALLEL_REQUESTS)
+            session.mount(f'{parsed_url.scheme}://', adapter)
+            _sessions_by_host[host] = session
+    return session
+
+
+def _start_request(target_url: str) -> bool:
+    """
+    Check whether a request may be sent to a target URL.
+
+    :param target_url: the URL to send a request to
+    :return: whether the request may be sent
+    """
+    with _failures_lock:
+        num_failures, last_failure_time = _failures_by_target_url.get(target_url, (0, 0.0))
+        if num_failures < WEBHOOK_CIRCUIT_BREAKER_THRESHOLD:
+            return True
+        if time.monotonic() - last_failure_time < WEBHOOK_CIRCUIT_BREAKER_TIMEOUT:
+            return False
+        # after the timeout, a single trial request is sent to find out
+        # whether the target has recovered, until it has succeeded or failed
+        if target_url in _trial_request_target_urls:
+            return False
+        _trial_request_target_urls.add(target_url)
+        return True
+
+
+def _record_failure(target_url: str) -> None:
+    with _failures_lock:
+        num_failures, _ = _failures_by_target_url.get(target_url, (0, 0.0))
+        _failures_by_target_url[target_url] = (num_failures + 1, time.monotonic())
+        _trial_request_target_urls.discard(target_url)
+
+
+def _record_success(target_url: str) -> None:
+    with _failures_lock:
+        _failures_by_target_url.pop(target_url, None)
+        _trial_request_target_urls.discard(target_url)
+
+
+def send_data_to_webhooks(
+        webhooks_and_data: typing.Sequence[typing.Tuple[Webhook, typing.Dict[str, typing.Any]]]
+) -> typing.List[Webhook]:
+    """
+    Send data to several webhooks in parallel.
+
+    The last contact of all webhooks that the data was sent to is updated
+    at once afterwards.
+
+    :param webhooks_and_data: pairs of webhooks and the data to send to them
+    :return: the webhooks that the data could not be sent to
+    """
+    if not webhooks_and_data:
+        return []
+    # data shared by several webhooks only needs to be serialized once
+    data_strs_by_id: typing.Dict[int, str] = {}
+    requests_to_send = []
+    for webhook, data in webhooks_and_data:
+        if id(data) not in data_strs_by_id:
+            data_strs_by_id[id(data)] = json.dumps(data)
+        requests_to_send.append((webhook, data_strs_by_id[id(data)]))
+
+    def post_data(request_to_send: typing.Tuple[Webhook, str]) -> bool:
+        webhook, data_str = request_to_send
+        try:
+            webhook._post_data(data_str)
+        except errors.WebhookConnectionException:
+            return False
+        return True
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(WEBHOOK_MAX_PARALLEL_REQUESTS, len(requests_to_send))) as executor:
+        results = list(executor.map(post_data, requests_to_send))
+    contacted_webhook_ids = [
+        webhook.id
+        for (webhook, _), success in zip(requests_to_send, results)
+        if success
+    ]
+    if contacted_webhook_ids:
+        db.session.execute(
+            db.update(whmodel.Webhook).where(
+                whmodel.Webhook.id.in_(contacted_webhook_ids)
+            ).values(
+                last_contact=datetime.datetime.utcnow()
+            )
+        )
+        db.session.commit()
+    return [
+        webhook
+        for (webhook, _), success in zip(requests_to_send, results)
+        if not success
+    ]
+
+
 def _get_mutable_webhook(webhook_id: int) -> whmodel.Webhook:
     webhook = whmodel.Webhook.query.filter_by(id=webhook_id).first()
     if webhook is None:
@@ -179,7 +325,7 @@ def get_object_log_webhooks_for_object(object_id: int) -> typing.List[Webhook]:
         SELECT DISTINCT user_id
         FROM (
             SELECT DISTINCT user_id
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (object_id = :object_id) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             UNION
             SELECT id as user_id
@@ -8,22 +8,34 @@ VersionedJSONSerializableObjectTables.get_current_objects().
 Filters that use equality cannot be expected to be exact due to floating point
 precision. These filters use operators that include a range of EPSILON of the
 left operand's magnitude in base units.
+
+If the property of a filter is indexed (see logic.indexed_properties), the
+filter is combined with a less exact condition that can be answered using the
+index, e.g. a range of magnitudes or dates including all matching values.
+Likewise, substring searches in texts are combined with a substring search in
+all texts of an object, which can be answered using a trigram index if the
+pg_trgm extension is available (see logic.database_indexes).
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import operator
 import json
+import re
 import typing
 
 import flask
 import sqlalchemy as db
+from sqlalchemy.dialects import postgresql
 from flask_login import current_user
 
 from . import datatypes
 from . import languages
+from .database_indexes import is_trigram_search_available
+from .indexed_properties import get_datetime_index_key, get_quantity_index_key
 from .utils import get_translated_text, get_postgres_timezone_alias
 from ..models.files import File
 from ..models.file_log import FileLogEntry
+from ..models.indexed_properties import IndexedPropertyType
 
 EPSILON = 1e-7
 
@@ -45,6 +57,64 @@ def float_operator_greater_than_equals(left: typing.Any, right: typing.Any) -> t
     return left * (1 + db.func.sign(left) * EPSILON) >= right
 
 
+def _with_index_condition(
+        db_obj: typing.Any,
+        index_type: IndexedPropertyType,
+        filter: typing.Any,
+        get_index_condition: typing.Callable[[], typing.Any]
+) -> typing.Any:
+    # indexed_property_types is set by the advanced search for indexed properties
+    if index_type not in getattr(db_obj, 'indexed_property_types', ()):
+        return filter
+    return db.and_(get_index_condition(), filter)
+
+
+def _get_float_tolerance(value: float) -> float:
+    # twice the tolerance of the float operators, to include all values
+    # matched by them despite rounding
+    return 2 * EPSILON * abs(value)
+
+
+def _with_quantity_index_condition(
+        db_obj: typing.Any,
+        filter: typing.Any,
+        min_magnitude_in_base_units: typing.Optional[float],
+        max_magnitude_in_base_units: typing.Optional[float],
+        including: bool = True
+) -> typing.Any:
+    def get_index_condition() -> typing.Any:
+        index_key = get_quantity_index_key(db_obj)
+        conditions = []
+        if min_magnitude_in_base_units is not None:
+            conditions.append(index_key >= min_magnitude_in_base_units if including else index_key > min_magnitude_in_base_units)
+        if max_magnitude_in_base_units is not None:
+            conditions.append(index_key <= max_magnitude_in_base_units if including else index_key < max_magnitude_in_base_units)
+        return db.and_(*conditions)
+    return _with_index_condition(db_obj, IndexedPropertyType.QUANTITY, filter, get_index_condition)
+
+
+def _with_datetime_index_condition(
+        db_obj: typing.Any,
+        filter: typing.Any,
+        min_date: typing.Optional[date],
+        max_date: typing.Optional[date]
+) -> typing.Any:
+    # the date of a datetime in the timezone of the current user differs from
+    # its UTC date by at most one day, so callers comparing local dates extend
+    # the range of dates by one day in each direction
+    def get_index_condition() -> typing.Any:
+        # UTC datetime strings in the format YYYY-MM-DD HH:MM:SS are sorted
+        # like the datetimes, so they can be compared to ISO format dates
+        index_key = get_datetime_index_key(db_obj)
+        conditions = []
+        if min_date is not None:
+            conditions.append(index_key >= min_date.isoformat())
+        if max_date is not None:
+            conditions.append(index_key < (max_date + timedelta(days=1)).isoformat())
+        return db.and_(*conditions)
+    return _with_index_condition(db_obj, IndexedPropertyType.DATETIME, filter, get_index_condition)
+
+
 def quantity_binary_operator(db_obj: typing.Any, other: datatypes.Quantity, operator: typing.Callable[[typing.Any, typing.Any], typing.Any]) -> typing.Any:
     return db.and_(
         db_obj['_type'].astext == 'quantity',
@@ -54,28 +124,67 @@ def quantity_binary_operator(db_obj: typing.Any, other: datatypes.Quantity, oper
 
 
 def quantity_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_equals)
+    magnitude = other.magnitude_in_base_units
+    return _with_quantity_index_condition(
+        db_obj,
+        quantity_binary_operator(db_obj, other, float_operator_equals),
+        magnitude - _get_float_tolerance(magnitude),
+        magnitude + _get_float_tolerance(magnitude)
+    )
 
 
 def quantity_less_than(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, operator.lt)
+    return _with_quantity_index_condition(
+        db_obj,
+        quantity_binary_operator(db_obj, other, operator.lt),
+        None,
+        other.magnitude_in_base_units,
+        including=False
+    )
 
 
 def quantity_less_than_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_less_than_equals)
+    magnitude = other.magnitude_in_base_units
+    return _with_quantity_index_condition(
+        db_obj,
+        quantity_binary_operator(db_obj, other, float_operator_less_than_equals),
+        None,
+        magnitude + _get_float_tolerance(magnitude)
+    )
 
 
 def quantity_greater_than(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, operator.gt)
+    return _with_quantity_index_condition(
+        db_obj,
+        quantity_binary_operator(db_obj, other, operator.gt),
+        other.magnitude_in_base_units,
+        None,
+        including=False
+    )
 
 
 def quantity_greater_than_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_greater_than_equals)
+    magnitude = other.magnitude_in_base_units
+    return _with_quantity_index_condition(
+        db_obj,
+        quantity_binary_operator(db_obj, other, float_operator_greater_than_equals),
+        magnitude - _get_float_tolerance(magnitude),
+        None
+    )
 
 
 def quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: datatypes.Quantity, including: bool = True) -> typing.Any:
     if left.dimensionality != right.dimensionality:
         return False
+    return _with_quantity_index_condition(
+        db_obj,
+        _quantity_between(db_obj, left, right, including),
+        left.magnitude_in_base_units - _get_float_tolerance(left.magnitude_in_base_units),
+        right.magnitude_in_base_units + _get_float_tolerance(right.magnitude_in_base_units)
+    )
+
+
+def _quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: datatypes.Quantity, including: bool) -> typing.Any:
     if including:
         return db.and_(
             db_obj['_type'].astext == 'quantity',
@@ -92,10 +201,14 @@ def quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: dataty
         )
 
 
-def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime], operator: typing.Callable[[typing.Any, date], typing.Any]) -> typing.Any:
+def _get_date(other: typing.Union[datatypes.DateTime, datetime]) -> date:
     if isinstance(other, datatypes.DateTime):
         other = other.utc_datetime
-    other_date = other.date()
+    return other.date()
+
+
+def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime], operator: typing.Callable[[typing.Any, date], typing.Any]) -> typing.Any:
+    other_date = _get_date(other)
 
     if flask.g.get('user') is not None and flask.g.user.timezone is not None:
         current_timezone_name = flask.g.user.timezone
@@ -114,32 +227,64 @@ def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.D
 
 
 def datetime_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.eq)
+    other_date = _get_date(other)
+    return _with_datetime_index_condition(
+        db_obj,
+        datetime_binary_operator(db_obj, other, operator.eq),
+        other_date - timedelta(days=1),
+        other_date + timedelta(days=1)
+    )
 
 
 def datetime_less_than(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.lt)
+    return _with_datetime_index_condition(
+        db_obj,
+        datetime_binary_operator(db_obj, other, operator.lt),
+        None,
+        _get_date(other)
+    )
 
 
 def datetime_less_than_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.le)
+    return _with_datetime_index_condition(
+        db_obj,
+        datetime_binary_operator(db_obj, other, operator.le),
+        None,
+        _get_date(other) + timedelta(days=1)
+    )
 
 
 def datetime_greater_than(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.gt)
+    return _with_datetime_index_condition(
+        db_obj,
+        datetime_binary_operator(db_obj, other, operator.gt),
+        _get_date(other),
+        None
+    )
 
 
 def datetime_greater_than_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.ge)
+    return _with_datetime_index_condition(
+        db_obj,
+        datetime_binary_operator(db_obj, other, operator.ge),
+        _get_date(other) - timedelta(days=1),
+        None
+    )
 
 
 def datetime_between(db_obj: typing.Any, left: typing.Union[datatypes.DateTime, datetime], right: typing.Union[datatypes.DateTime, datetime], including: bool = True) -> typing.Any:
-    if isinstance(left, datatypes.DateTime):
-        left = left.utc_datetime
-    if isinstance(right, datatypes.DateTime):
-        right = right.utc_datetime
-    left_date = left.date()
-    right_date = right.date()
+    left_date = _get_date(left)
+    right_date = _get_date(right)
+    # the dates are compared in UTC, so no additional day is needed
+    return _with_datetime_index_condition(
+        db_obj,
+        _datetime_between(db_obj, left_date, right_date, including),
+        left_date,
+        right_date
+    )
+
+
+def _datetime_between(db_obj: typing.Any, left_date: date, right_date: date, including: bool) -> typing.Any:
     if including:
         return db.and_(
             db_obj['_type'].astext == 'datetime',
@@ -157,9 +302,14 @@ def datetime_between(db_obj: typing.Any, left: typing.Union[datatypes.DateTime,
 def boolean_equals(db_obj: typing.Any, value: typing.Union[datatypes.Boolean, bool]) -> typing.Any:
     if isinstance(value, datatypes.Boolean):
         value = value.value
-    return db.and_(
-        db_obj['_type'].astext == 'bool',
-        db_obj['value'].astext.cast(db.Boolean) == value
+    return _with_index_condition(
+        db_obj,
+        IndexedPropertyType.VALUE,
+        db.and_(
+            db_obj['_type'].astext == 'bool',
+            db_obj['value'].astext.cast(db.Boolean) == value
+        ),
+        lambda: db_obj.contains({'_type': 'bool', 'value': value})
     )
 
 
@@ -176,7 +326,7 @@ def text_equals(db_obj: typing.Any, text: typing.Union[datatypes.Text, str]) ->
         text_str = get_translated_text(text.text)
     else:
         text_str = text
-    return db.or_(
+    text_filter = db.or_(
         db.and_(
             db_obj['_type'].astext == 'text',
             db.or_(
@@ -198,6 +348,19 @@ def text_equals(db_obj: typing.Any, text: typing.Union[datatypes.Text, str]) ->
             db_obj['plotly']['layout']['title']['text'].astext == text_str
         )
     )
+    return _with_index_condition(
+        db_obj,
+        IndexedPropertyType.VALUE,
+        text_filter,
+        lambda: db.or_(
+            db_obj.contains({'_type': 'text', 'text': text_str}),
+            *[
+                db_obj.contains({'_type': 'text', 'text': {lang_code: text_str}})
+                for lang_code in languages.get_language_codes()
+            ],
+            db_obj.contains({'_type': 'plotly_chart', 'plotly': {'layout': {'title': {'text': text_str}}}})
+        )
+    )
 
 
 def text_contains(db_obj: typing.Any, text: typing.Union[datatypes.Text, str]) -> typing.Any:
@@ -205,7 +368,7 @@ def text_contains(db_obj: typing.Any, text: typing.Union[datatypes.Text, str]) -
         text_str = get_translated_text(text.text)
     else:
         text_str = text
-    return db.or_(
+    text_filter = db.or_(
         db.and_(
             db_obj['_type'].astext == 'text',
             db.or_(
@@ -227,37 +390,84 @@ def text_contains(db_obj: typing.Any, text: typing.Union[datatypes.Text, str]) -
             db_obj['plotly']['layout']['title']['text'].astext.like('%' + text_str + '%')
         )
     )
+    search_vector_column = getattr(db_obj, 'search_vector_column', None)
+    if search_vector_column is not None:
+        # words surrounded by whitespace in the text must be complete words in
+        # the object data, so the full-text search index can be used to limit
+        # the objects that need to be checked
+        words = [
+            word
+            for word in text_str.split()[1:-1]
+            if re.fullmatch(r'[^\W_]+', word)
+        ]
+        if words:
+            text_filter = db.and_(
+                search_vector_column.op('@@')(db.func.plainto_tsquery(db.cast('simple', postgresql.REGCONFIG), ' '.join(words))),
+                text_filter
+            )
+    search_text_column = getattr(db_obj, 'search_text_column', None)
+    # trigram indexes can only limit the objects for at least three characters
+    if search_text_column is not None and len(text_str.replace('%', '')) >= 3 and is_trigram_search_available():
+        # a text containing the search text is part of the search text of the
+        # object, so the trigram index can be used to limit the objects that
+        # need to be checked
+        text_filter = db.and_(
+            search_text_column.like('%' + text_str + '%'),
+            text_filter
+        )
+    return text_filter
 
 
 def sample_equals(db_obj: typing.Any, object_id: int) -> typing.Any:
-    return db.and_(
-        db_obj['_type'].astext == 'sample',
-        db_obj['object_id'].astext.cast(db.Integer) == object_id
+    return _with_index_condition(
+        db_obj,
+        IndexedPropertyType.VALUE,
+        db.and_(
+            db_obj['_type'].astext == 'sample',
+            db_obj['object_id'].astext.cast(db.Integer) == object_id
+        ),
+        lambda: db_obj.contains({'_type': 'sample', 'object_id': object_id})
     )
 
 
 def reference_equals(db_obj: typing.Any, reference_id: int) -> typing.Any:
-    return db.or_(
-        db.and_(
-            db.or_(
-                db_obj['_type'].astext == 'object_reference',
-                db_obj['_type'].astext == 'sample',
-                db_obj['_type'].astext == 'measurement'
+    return _with_index_condition(
+        db_obj,
+        IndexedPropertyType.VALUE,
+        db.or_(
+            db.and_(
+                db.or_(
+                    db_obj['_type'].astext == 'object_reference',
+                    db_obj['_type'].astext == 'sample',
+                    db_obj['_type'].astext == 'measurement'
+                ),
+                db_obj['object_id'].astext.cast(db.Integer) == reference_id
+            ),
+            db.and_(
+                db_obj['_type'].astext == 'user',
+                db_obj['user_id'].astext.cast(db.Integer) == reference_id
             ),
-            db_obj['object_id'].astext.cast(db.Integer) == reference_id
-        ),
-        db.and_(
-            db_obj['_type'].astext == 'user',
-            db_obj['user_id'].astext.cast(db.Integer) == reference_id
         ),
+        lambda: db.or_(
+            *[
+                db_obj.contains({'_type': reference_type, 'object_id': reference_id})
+                for reference_type in ('object_reference', 'sample', 'measurement')
+            ],
+            db_obj.contains({'_type': 'user', 'user_id': reference_id})
+        )
     )
 
 
 def tags_contain(db_obj: typing.Any, tag: str) -> typing.Any:
     tag = tag.strip().lower()
-    return db.and_(
-        db_obj['_type'].astext == 'tags',
-        db_obj['tags'].contains(json.dumps(tag))
+    return _with_index_condition(
+        db_obj,
+        IndexedPropertyType.VALUE,
+        db.and_(
+            db_obj['_type'].astext == 'tags',
+            db_obj['tags'].contains(json.dumps(tag))
+        ),
+        lambda: db_obj.contains({'_type': 'tags', 'tags': [tag]})
     )
 
 
@@ -23,6 +23,7 @@ from . import markdown_to_html_cache
 from . import markdown_images
 from . import objects
 from . import object_permissions
+from . import object_references
 from . import projects
 from . import scicat_export
 from . import settings
@@ -35,7 +36,7 @@ from .action_translations import ActionTranslation, ActionTypeTranslation
 from .action_permissions import UserActionPermissions, GroupActionPermissions, ProjectActionPermissions, AllUserActionPermissions
 from .api_log import APILogEntry, HTTPMethod
 from .authentication import Authentication, AuthenticationType, TwoFactorAuthenticationMethod
-from .background_tasks import BackgroundTask, BackgroundTaskStatus
+from .background_tasks import BackgroundTask, BackgroundTaskStatus, FinishedBackgroundTask
 from .comments import Comment
 from .components import Component
 from .component_authentication import ComponentAuthentication, OwnComponentAuthentication, ComponentAuthenticationType
@@ -45,9 +46,11 @@ from .download_service import DownloadServiceJobFile
 from .eln_imports import ELNImport, ELNImportObject, ELNImportAction
 from .favorites import FavoriteAction, FavoriteInstrument
 from .fed_logs import FedUserLogEntry, FedUserLogEntryType, FedObjectLogEntry, FedObjectLogEntryType, FedLocationLogEntryType, FedLocationLogEntry, FedActionLogEntryType, FedActionLogEntry, FedActionTypeLogEntry, FedActionTypeLogEntryType, FedInstrumentLogEntry, FedInstrumentLogEntryType, FedCommentLogEntry, FedCommentLogEntryType, FedFileLogEntry, FedFileLogEntryType, FedObjectLocationAssignmentLogEntry, FedObjectLocationAssignmentLogEntryType, FedLocationTypeLogEntry, FedLocationTypeLogEntryType
-from .files import File
+from .files import File, FileBlob
+from .file_uploads import FileUpload
 from .file_log import FileLogEntry, FileLogEntryType
 from .groups import Group
+from .indexed_properties import IndexedProperty, IndexedPropertyType
 from .group_categories import GroupCategory
 from .instruments import Instrument
 from .instrument_log_entries import InstrumentLogEntry
@@ -60,8 +63,10 @@ from .markdown_to_html_cache import MarkdownToHTMLCacheEntry
 from .markdown_images import MarkdownImage
 from .notifications import Notification, NotificationType, NotificationMode, NotificationModeForType
 from .objects import Objects, Object
+from .object_changes import ObjectChange, EntityChange
 from .object_log import ObjectLogEntry, ObjectLogEntryType
-from .object_permissions import UserObjectPermissions, GroupObjectPermissions, ProjectObjectPermissions, AllUserObjectPermissions, AnonymousUserObjectPermissions
+from .object_references import ObjectReference, ObjectReferenceKind
+from .object_permissions import UserObjectPermissions, GroupObjectPermissions, ProjectObjectPermissions, AllUserObjectPermissions, AnonymousUserObjectPermissions, EffectiveObjectPermissions
 from .object_publications import ObjectPublication
 from .permissions import Permissions
 from .projects import Project, UserProjectPermissions, GroupProjectPermissions, SubprojectRelationship
@@ -87,6 +92,7 @@ __all__ = [
     'file_log',
     'groups',
     'group_categories',
+    'indexed_properties',
     'instruments',
     'instrument_log_entries',
     'instrument_translation',
@@ -97,6 +103,7 @@ __all__ = [
     'markdown_images',
     'objects',
     'object_permissions',
+    'object_references',
     'projects',
     'scicat_export',
     'settings',
@@ -109,6 +116,7 @@ __all__ = [
     'ActionTypeTranslation',
     'BackgroundTask',
     'BackgroundTaskStatus',
+    'FinishedBackgroundTask',
     'UserActionPermissions',
     'GroupActionPermissions',
     'ProjectActionPermissions',
@@ -126,10 +134,14 @@ __all__ = [
     'FavoriteAction',
     'FavoriteInstrument',
     'File',
+    'FileBlob',
+    'FileUpload',
     'FileLogEntry',
     'FileLogEntryType',
     'Group',
     'GroupCategory',
+    'IndexedProperty',
+    'IndexedPropertyType',
     'HTTPMethod',
     'Instrument',
     'InstrumentTranslation',
@@ -156,11 +168,14 @@ __all__ = [
     'ObjectLogEntry',
     'ObjectLogEntryType',
     'ObjectPublication',
+    'ObjectReference',
+    'ObjectReferenceKind',
     'UserObjectPermissions',
     'GroupObjectPermissions',
     'ProjectObjectPermissions',
     'AllUserObjectPermissions',
     'AnonymousUserObjectPermissions',
+    'EffectiveObjectPermissions',
     'DefaultUserPermissions',
     'DefaultGroupPermissions',
     'DefaultProjectPermissions',
@@ -188,6 +203,8 @@ __all__ = [
     'OwnComponentAuthentication',
     'ComponentAuthenticationType',
     'ObjectShare',
+    'ObjectChange',
+    'EntityChange',
     'FedUserLogEntry',
     'FedUserLogEntryType',
     'FedObjectLogEntry',
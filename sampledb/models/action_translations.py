@@ -19,7 +19,7 @@ class ActionTypeTranslation(Model):
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
 
     language_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('languages.id'), nullable=False)
-    language: Mapped['Language'] = relationship('Language')
+    language: Mapped['Language'] = relationship('Language', lazy='joined')
 
     action_type_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('action_types.id'), nullable=False)
 
@@ -85,7 +85,7 @@ class ActionTranslation(Model):
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
 
     language_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('languages.id'), nullable=False)
-    language: Mapped['Language'] = relationship('Language')
+    language: Mapped['Language'] = relationship('Language', lazy='joined')
 
     action_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('actions.id'), nullable=False)
 
@@ -75,7 +75,8 @@ class ActionType(Model):
         'ActionType',
         secondary=usable_in_action_types_table,
         primaryjoin=id == usable_in_action_types_table.c.owner_action_type,
-        secondaryjoin=id == usable_in_action_types_table.c.usable_in_action_types
+        secondaryjoin=id == usable_in_action_types_table.c.usable_in_action_types,
+        lazy='selectin'
     )
     component: Mapped[typing.Optional['Component']] = relationship('Component')
     scicat_export_type: Mapped[typing.Optional[SciCatExportType]] = db.Column(db.Enum(SciCatExportType), nullable=True)
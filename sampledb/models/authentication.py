@@ -36,6 +36,20 @@ class Authentication(Model):
     confirmed: Mapped[bool] = db.Column(db.Boolean, default=False, nullable=False)
     user: Mapped['User'] = relationship('User', back_populates="authentication_methods")
 
+    __table_args__ = (
+        db.Index('ix_authentications_login_login', login['login'].astext),
+        db.Index('ix_authentications_login_access_token_expiration', login['access_token'].astext, login['expiration_utc_datetime'].astext),
+        db.Index('ix_authentications_login_refresh_token_login', login['refresh_token_login'].astext),
+        # the identification part of API tokens is unique, so that only one
+        # bcrypt hash has to be checked when authenticating
+        db.Index(
+            'ix_authentications_api_token_login',
+            login['login'].astext,
+            unique=True,
+            postgresql_where=(type == AuthenticationType.API_TOKEN)
+        ),
+    )
+
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["Authentication"]]
 
@@ -32,6 +32,23 @@ class BackgroundTask(Model):
     status: Mapped[BackgroundTaskStatus] = db.Column(db.Enum(BackgroundTaskStatus), nullable=False)
     result: Mapped[typing.Optional[typing.Dict[str, typing.Any]]] = db.Column(db.JSON, nullable=True)
     expiration_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    priority: Mapped[int] = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    num_attempts: Mapped[int] = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_attempt_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    posted_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    started_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    finished_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    last_heartbeat_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # index for claiming the next posted task
+        db.Index(
+            'ix_background_tasks_posted_priority',
+            priority.desc(),
+            id,
+            postgresql_where=(status == BackgroundTaskStatus.POSTED)
+        ),
+    )
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["BackgroundTask"]]
@@ -44,4 +61,26 @@ class BackgroundTask(Model):
         db.session.commit()
 
     def __repr__(self) -> str:
-        return f'<{type(self).__name__}(id={self.id}, type={self.type}, auto_delete={self.auto_delete}, data={self.data}, status={self.status})>'
+        return f'<{type(self).__name__}(id={self.id}, type={self.type}, auto_delete={self.auto_delete}, data={self.data}, status={self.status}, priority={self.priority})>'
+
+
+class FinishedBackgroundTask(Model):
+    """
+    Record of a finished background task, kept for collecting metrics even
+    after the task itself has been deleted.
+    """
+    __tablename__ = 'finished_background_tasks'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    type: Mapped[str] = db.Column(db.Text, nullable=False)
+    status: Mapped[BackgroundTaskStatus] = db.Column(db.Enum(BackgroundTaskStatus), nullable=False)
+    num_attempts: Mapped[int] = db.Column(db.Integer, nullable=False)
+    posted_date: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    started_date: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    finished_date: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False, index=True)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["FinishedBackgroundTask"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(id={self.id}, type={self.type}, status={self.status}, num_attempts={self.num_attempts})>'
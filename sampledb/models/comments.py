@@ -24,7 +24,8 @@ class Comment(Model):
             '(fed_id IS NOT NULL AND component_id IS NOT NULL) OR (user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
             name='comments_not_null_check'
         ),
-        db.UniqueConstraint('fed_id', 'component_id', name='comments_fed_id_component_id_key')
+        db.UniqueConstraint('fed_id', 'component_id', name='comments_fed_id_component_id_key'),
+        db.Index('ix_comments_object_id', 'object_id'),
     )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
@@ -45,6 +45,7 @@ class FileLogEntry(Model):
 
     __table_args__ = (
         db.ForeignKeyConstraint([object_id, file_id], [File.object_id, File.id]),
+        db.Index('ix_file_log_entries_object_id_file_id_type', object_id, file_id, type),
     )
 
     def __init__(
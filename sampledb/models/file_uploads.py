@@ -0,0 +1,38 @@
+# coding: utf-8
+"""
+Models for resumable file uploads.
+"""
+
+import datetime
+import typing
+
+from sqlalchemy.orm import Mapped, Query, relationship
+
+from .. import db
+from .objects import Objects
+from .utils import Model
+
+if typing.TYPE_CHECKING:
+    from .users import User
+
+
+class FileUpload(Model):
+    """
+    A file upload in progress, which is staged on disk until it is finalized.
+    """
+    __tablename__ = 'file_uploads'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    object_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey(Objects.object_id_column), nullable=False)
+    user_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    file_name: Mapped[str] = db.Column(db.String, nullable=False)
+    size: Mapped[int] = db.Column(db.BigInteger, nullable=False)
+    received_size: Mapped[int] = db.Column(db.BigInteger, nullable=False, default=0)
+    utc_datetime: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+    uploader: Mapped['User'] = relationship('User')
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["FileUpload"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(id={self.id}, object_id={self.object_id}, file_name={self.file_name}, size={self.size}, received_size={self.received_size})>'
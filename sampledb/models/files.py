@@ -17,6 +17,32 @@ if typing.TYPE_CHECKING:
     from .users import User
 
 
+class FileBlob(Model):
+    """
+    Content of uploaded files, addressed by its SHA-256 hash.
+
+    Identical content uploaded several times is only stored once and the
+    number of files referencing it is counted in reference_count. The content
+    is either stored in binary_data or, for other storage backends, in the
+    backend under storage_key.
+    """
+    __tablename__ = 'file_blobs'
+
+    sha256: Mapped[str] = db.Column(db.String(64), primary_key=True)
+    size: Mapped[int] = db.Column(db.BigInteger, nullable=False)
+    storage_backend: Mapped[str] = db.Column(db.String, nullable=False)
+    storage_key: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    binary_data: Mapped[typing.Optional[bytes]] = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    reference_count: Mapped[int] = db.Column(db.Integer, nullable=False, default=0)
+    utc_datetime: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["FileBlob"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(sha256={self.sha256}, size={self.size}, storage_backend={self.storage_backend}, reference_count={self.reference_count})>'
+
+
 class File(Model):
     __tablename__ = 'files'
     __table_args__ = (
@@ -28,7 +54,9 @@ class File(Model):
             '(fed_id IS NOT NULL AND component_id IS NOT NULL) OR data IS NOT NULL',
             name='files_not_null_check_data'
         ),
-        db.UniqueConstraint('fed_id', 'object_id', 'component_id', name='files_fed_id_component_id_key')
+        db.UniqueConstraint('fed_id', 'object_id', 'component_id', name='files_fed_id_component_id_key'),
+        # the primary key starts with the file ID, so it cannot be used to find the files of an object
+        db.Index('ix_files_object_id', 'object_id'),
     )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
@@ -43,6 +71,8 @@ class File(Model):
     component: Mapped[typing.Optional['Component']] = relationship('Component')
     preview_image_binary_data: Mapped[typing.Optional[bytes]] = db.deferred(db.Column(db.LargeBinary, nullable=True))  # TODO: migration
     preview_image_mime_type: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    blob_sha256: Mapped[typing.Optional[str]] = db.Column(db.String(64), db.ForeignKey(FileBlob.sha256), nullable=True, index=True)
+    blob: Mapped[typing.Optional[FileBlob]] = relationship(FileBlob)
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["File"]]
@@ -0,0 +1,51 @@
+# coding: utf-8
+"""
+
+"""
+
+import enum
+import typing
+
+from sqlalchemy.orm import Mapped, Query
+
+from .. import db
+from .utils import Model
+
+
+@enum.unique
+class IndexedPropertyType(enum.Enum):
+    # B-tree index on the magnitude of quantities in base units
+    QUANTITY = 0
+    # B-tree index on the UTC datetime of datetimes
+    DATETIME = 1
+    # GIN index on the whole property, for comparing text, booleans,
+    # references and tags
+    VALUE = 2
+
+
+class IndexedProperty(Model):
+    __tablename__ = 'indexed_properties'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    path: Mapped[str] = db.Column(db.String, nullable=False)
+    type: Mapped[IndexedPropertyType] = db.Column(db.Enum(IndexedPropertyType), nullable=False)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["IndexedProperty"]]
+
+    __table_args__ = (
+        db.UniqueConstraint(path, type),
+    )
+
+    def __init__(
+            self,
+            path: str,
+            type: IndexedPropertyType
+    ) -> None:
+        super().__init__(
+            path=path,
+            type=type
+        )
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(id={self.id}, path="{self.path}", type={self.type.name})>'
@@ -23,7 +23,7 @@ class InstrumentTranslation(Model):
     instrument_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('instruments.id'), nullable=False)
 
     language_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('languages.id'), nullable=False)
-    language: Mapped['Language'] = relationship('Language')
+    language: Mapped['Language'] = relationship('Language', lazy='joined')
 
     name: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True, default='')
     description: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True, default='')
@@ -157,6 +157,9 @@ class ObjectLocationAssignment(Model):
             name='object_location_assignments_not_both_states_check'
         ),
         db.UniqueConstraint('fed_id', 'component_id', name='object_location_assignments_fed_id_component_id_key'),
+        db.Index('ix_object_location_assignments_object_id_utc_datetime', 'object_id', 'utc_datetime'),
+        db.Index('ix_object_location_assignments_location_id', 'location_id'),
+        db.Index('ix_object_location_assignments_responsible_user_id', 'responsible_user_id'),
     )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
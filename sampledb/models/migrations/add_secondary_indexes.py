@@ -0,0 +1,47 @@
+# coding: utf-8
+"""
+Add indexes for looking up log entries, files, comments, location
+assignments, permissions, notifications and objects by the IDs they are
+queried by.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_index
+
+# table name, index name and indexed columns
+INDEXES = [
+    ('object_log_entries', 'ix_object_log_entries_object_id_utc_datetime', 'object_id, utc_datetime'),
+    ('object_log_entries', 'ix_object_log_entries_user_id', 'user_id'),
+    ('user_log_entries', 'ix_user_log_entries_user_id_utc_datetime', 'user_id, utc_datetime'),
+    ('files', 'ix_files_object_id', 'object_id'),
+    ('file_log_entries', 'ix_file_log_entries_object_id_file_id_type', 'object_id, file_id, type'),
+    ('comments', 'ix_comments_object_id', 'object_id'),
+    ('object_location_assignments', 'ix_object_location_assignments_object_id_utc_datetime', 'object_id, utc_datetime'),
+    ('object_location_assignments', 'ix_object_location_assignments_location_id', 'location_id'),
+    ('object_location_assignments', 'ix_object_location_assignments_responsible_user_id', 'responsible_user_id'),
+    ('user_object_permissions', 'ix_user_object_permissions_user_id', 'user_id'),
+    ('group_object_permissions', 'ix_group_object_permissions_group_id', 'group_id'),
+    ('project_object_permissions', 'ix_project_object_permissions_project_id', 'project_id'),
+    ('notifications', 'ix_notifications_user_id_utc_datetime', 'user_id, utc_datetime'),
+    ('objects_current', 'ix_objects_current_action_id', 'action_id'),
+]
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    missing_indexes = [
+        (table_name, index_name, columns)
+        for table_name, index_name, columns in INDEXES
+        if not table_has_index(table_name, index_name)
+    ]
+    if not missing_indexes:
+        return False
+
+    # Perform migration
+    for table_name, index_name, columns in missing_indexes:
+        db.session.execute(db.text(f"""
+            CREATE INDEX IF NOT EXISTS {index_name}
+            ON {table_name} ({columns})
+        """))
+    return True
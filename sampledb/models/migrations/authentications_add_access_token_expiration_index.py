@@ -0,0 +1,25 @@
+# coding: utf-8
+"""
+Replace the index for looking up authentication methods by API access token
+with one that includes the expiration datetime.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_index
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if not table_has_index('authentications', 'ix_authentications_login_access_token'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        CREATE INDEX IF NOT EXISTS ix_authentications_login_access_token_expiration
+        ON authentications ((login ->> 'access_token'), (login ->> 'expiration_utc_datetime'))
+    """))
+    db.session.execute(db.text("""
+        DROP INDEX ix_authentications_login_access_token
+    """))
+    return True
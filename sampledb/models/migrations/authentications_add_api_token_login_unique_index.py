@@ -0,0 +1,34 @@
+# coding: utf-8
+"""
+Add a unique index for the identification part of API tokens.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_index
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_index('authentications', 'ix_authentications_api_token_login'):
+        return False
+    # API tokens created before their identification part was checked for
+    # uniqueness might share it, in which case the index cannot be created
+    duplicate_login = db.session.execute(db.text("""
+        SELECT login ->> 'login'
+        FROM authentications
+        WHERE type = 'API_TOKEN'
+        GROUP BY login ->> 'login'
+        HAVING COUNT(*) > 1
+        LIMIT 1
+    """)).first()
+    if duplicate_login is not None:
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        CREATE UNIQUE INDEX ix_authentications_api_token_login
+        ON authentications ((login ->> 'login'))
+        WHERE type = 'API_TOKEN'
+    """))
+    return True
@@ -0,0 +1,30 @@
+# coding: utf-8
+"""
+Add indexes for looking up authentication methods by login, API access token
+and refresh token login.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_index
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_index('authentications', 'ix_authentications_login_refresh_token_login'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        CREATE INDEX IF NOT EXISTS ix_authentications_login_login
+        ON authentications ((login ->> 'login'))
+    """))
+    db.session.execute(db.text("""
+        CREATE INDEX IF NOT EXISTS ix_authentications_login_access_token
+        ON authentications ((login ->> 'access_token'))
+    """))
+    db.session.execute(db.text("""
+        CREATE INDEX IF NOT EXISTS ix_authentications_login_refresh_token_login
+        ON authentications ((login ->> 'refresh_token_login'))
+    """))
+    return True
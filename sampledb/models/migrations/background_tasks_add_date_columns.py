@@ -0,0 +1,25 @@
+"""
+Add the posted_date, started_date and finished_date columns to the
+background_tasks table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('background_tasks', 'posted_date'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text(
+        """
+        ALTER TABLE background_tasks
+        ADD posted_date TIMESTAMP WITH TIME ZONE NULL,
+        ADD started_date TIMESTAMP WITH TIME ZONE NULL,
+        ADD finished_date TIMESTAMP WITH TIME ZONE NULL
+        """
+    ))
+    return True
@@ -0,0 +1,22 @@
+"""
+Add the last_heartbeat_date column to the background_tasks table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('background_tasks', 'last_heartbeat_date'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text(
+        """
+        ALTER TABLE background_tasks
+        ADD last_heartbeat_date TIMESTAMP WITH TIME ZONE NULL
+        """
+    ))
+    return True
@@ -0,0 +1,32 @@
+"""
+Add the priority, num_attempts and next_attempt_date columns to the
+background_tasks table, as well as an index for claiming posted tasks.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('background_tasks', 'priority'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text(
+        """
+        ALTER TABLE background_tasks
+        ADD priority INTEGER NOT NULL DEFAULT 0,
+        ADD num_attempts INTEGER NOT NULL DEFAULT 0,
+        ADD next_attempt_date TIMESTAMP WITH TIME ZONE NULL
+        """
+    ))
+    db.session.execute(db.text(
+        """
+        CREATE INDEX IF NOT EXISTS ix_background_tasks_posted_priority
+        ON background_tasks (priority DESC, id)
+        WHERE status = 'POSTED'
+        """
+    ))
+    return True
@@ -0,0 +1,27 @@
+# coding: utf-8
+"""
+Fill the effective_object_permissions table from the view
+user_object_permissions_by_all.
+"""
+
+import flask_sqlalchemy
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if db.session.execute(db.text("""
+        SELECT EXISTS (SELECT 1 FROM effective_object_permissions)
+    """)).scalar():
+        return False
+    if not db.session.execute(db.text("""
+        SELECT EXISTS (SELECT 1 FROM objects_current)
+    """)).scalar():
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        INSERT INTO effective_object_permissions (user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments)
+        SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+        FROM user_object_permissions_by_all
+    """))
+    return True
@@ -0,0 +1,25 @@
+# coding: utf-8
+"""
+Add blob_sha256 column to files table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('files', 'blob_sha256'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE files
+        ADD blob_sha256 VARCHAR(64) NULL REFERENCES file_blobs(sha256)
+    """))
+    db.session.execute(db.text("""
+        CREATE INDEX ix_files_blob_sha256
+        ON files (blob_sha256)
+    """))
+    return True
@@ -0,0 +1,74 @@
+# coding: utf-8
+"""
+Fill the object_references table from the data of all object versions.
+"""
+
+import flask
+import flask_sqlalchemy
+
+from ..actions import ActionType
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if db.session.execute(db.text("""
+        SELECT EXISTS (SELECT 1 FROM object_references)
+    """)).scalar():
+        return False
+    if not db.session.execute(db.text("""
+        SELECT EXISTS (SELECT 1 FROM objects_current)
+    """)).scalar():
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        WITH RECURSIVE versions(object_id, version_id, action_id, data) AS (
+            SELECT object_id, version_id, action_id, data
+            FROM objects_previous
+        UNION ALL
+            SELECT object_id, version_id, action_id, data
+            FROM objects_current
+        ), properties(object_id, version_id, action_id, path, value) AS (
+            SELECT versions.object_id, versions.version_id, versions.action_id, jsonb_build_array(data.key), data.value
+            FROM versions, jsonb_each(versions.data) AS data
+            WHERE jsonb_typeof(versions.data) = 'object'
+        UNION ALL
+            SELECT properties.object_id, properties.version_id, properties.action_id, properties.path || CASE
+                WHEN object_data.key IS NOT NULL THEN to_jsonb(object_data.key)
+                ELSE to_jsonb(array_data.index - 1)
+            END, coalesce(object_data.value, array_data.value)
+            FROM properties
+            LEFT OUTER JOIN jsonb_each(CASE
+                WHEN jsonb_typeof(properties.value) = 'object' THEN properties.value
+                ELSE '{}'::jsonb
+            END) AS object_data ON jsonb_typeof(properties.value) = 'object'
+            LEFT OUTER JOIN jsonb_array_elements(CASE
+                WHEN jsonb_typeof(properties.value) = 'array' THEN properties.value
+                ELSE '[]'::jsonb
+            END) WITH ORDINALITY AS array_data(value, index) ON jsonb_typeof(properties.value) = 'array'
+            -- like logic.schemas.utils.data_iter, only descend into arrays and objects without type
+            WHERE (jsonb_typeof(properties.value) = 'object' AND NOT properties.value ? '_type') OR jsonb_typeof(properties.value) = 'array'
+        )
+        INSERT INTO object_references (source_object_id, source_version_id, path, kind, target_object_id, target_component_uuid, target_eln_source_url, target_eln_object_url)
+        SELECT
+            properties.object_id,
+            properties.version_id,
+            properties.path,
+            CAST(CASE
+                WHEN properties.value ->> '_type' = 'sample' AND actions.type_id = :measurement_type_id THEN 'MEASUREMENT'
+                WHEN properties.value ->> '_type' = 'sample' AND actions.type_id = :sample_creation_type_id THEN 'SAMPLE_CREATION'
+                ELSE 'METADATA'
+            END AS objectreferencekind),
+            (properties.value ->> 'object_id')::integer,
+            nullif(properties.value ->> 'component_uuid', :own_component_uuid),
+            properties.value ->> 'eln_source_url',
+            properties.value ->> 'eln_object_url'
+        FROM properties
+        LEFT OUTER JOIN actions ON actions.id = properties.action_id
+        WHERE jsonb_typeof(properties.value) = 'object' AND properties.value ->> '_type' IN ('object_reference', 'sample', 'measurement') AND jsonb_typeof(properties.value -> 'object_id') = 'number'
+    """), {
+        'measurement_type_id': ActionType.MEASUREMENT,
+        'sample_creation_type_id': ActionType.SAMPLE_CREATION,
+        'own_component_uuid': flask.current_app.config['FEDERATION_UUID']
+    })
+    return True
@@ -0,0 +1,27 @@
+# coding: utf-8
+"""
+Add last_modified column to object_shares table.
+
+Existing shares are marked as modified when the migration runs, so that all
+shared objects are sent once to components synchronizing changes since an
+earlier time, as changes to objects have not been tracked before.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('object_shares', 'last_modified'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE object_shares
+        ADD last_modified TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+        ALTER TABLE object_shares
+        ALTER COLUMN last_modified DROP DEFAULT;
+    """))
+    return True
@@ -0,0 +1,28 @@
+# coding: utf-8
+"""
+Add search_text column and the trigram indexes to objects_current table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column, table_has_index
+from ..objects import Objects
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    has_search_text_column = table_has_column('objects_current', 'search_text')
+    if has_search_text_column and table_has_index('objects_current', Objects.search_text_trigram_index_name) and table_has_index('objects_current', Objects.data_trigram_index_name):
+        return False
+
+    # Perform migration
+    if not has_search_text_column:
+        db.session.execute(db.text("""
+        ALTER TABLE objects_current
+        ADD COLUMN search_text TEXT NULL
+        """))
+        Objects.update_search_texts(connection=db.session.connection())
+    # without the pg_trgm extension, substring searches only check the object
+    # data, so the indexes can be created later using enable_trigram_search
+    Objects.create_trigram_indexes(connection=db.session.connection())
+    return True
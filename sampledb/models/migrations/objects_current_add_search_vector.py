@@ -0,0 +1,28 @@
+# coding: utf-8
+"""
+Add search_vector column to objects_current table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+from ..objects import Objects
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('objects_current', 'search_vector'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+    ALTER TABLE objects_current
+    ADD COLUMN search_vector TSVECTOR NULL
+    """))
+    db.session.execute(db.text("""
+    CREATE INDEX objects_current_search_vector_idx
+    ON objects_current
+    USING gin (search_vector)
+    """))
+    Objects.update_search_vectors(connection=db.session.connection())
+    return True
@@ -242,6 +242,19 @@ def get_migrations() -> typing.List[typing.Tuple[int, str, typing.Callable[[typi
         "files_add_preview_image",
         "group_invitations_add_revoked",
         "project_invitations_add_revoked",
+        "effective_object_permissions_fill",
+        "objects_current_add_search_vector",
+        "files_add_blob_sha256",
+        "authentications_add_login_indexes",
+        "authentications_add_access_token_expiration_index",
+        "background_tasks_add_priority_and_retry_columns",
+        "background_tasks_add_date_columns",
+        "object_shares_add_last_modified",
+        "add_secondary_indexes",
+        "objects_current_add_search_text",
+        "object_references_fill",
+        "authentications_add_api_token_login_unique_index",
+        "background_tasks_add_last_heartbeat_date_column",
     ]
 
     migrations = []
@@ -277,6 +290,27 @@ def table_has_column(table_name: str, column_name: str) -> bool:
     ).scalar())
 
 
+def table_has_index(table_name: str, index_name: str) -> bool:
+    """
+    Return whether a table has an index with a given name.
+
+    :param table_name: the name of the table
+    :param index_name: the name of the index to check for
+    :return: whether the index exists
+    """
+    return bool(db.session.execute(
+        db.text("""
+            SELECT COUNT(*)
+            FROM pg_indexes
+            WHERE tablename = :table_name AND indexname = :index_name
+        """),
+        params={
+            'table_name': table_name,
+            'index_name': index_name
+        }
+    ).scalar())
+
+
 def column_is_nullable(table_name: str, column_name: str) -> bool:
     """
     Return whether a column may contain NULL values.
@@ -51,6 +51,10 @@ class Notification(Model):
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["Notification"]]
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_utc_datetime', user_id, utc_datetime),
+    )
+
     def __init__(
             self,
             type: NotificationType,
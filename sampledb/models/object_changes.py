@@ -0,0 +1,41 @@
+# coding: utf-8
+"""
+Models for tracking changes to objects and the entities they reference.
+"""
+
+import datetime
+import typing
+
+from sqlalchemy.orm import Mapped, Query
+
+from .. import db
+from .objects import Objects
+from .utils import Model
+
+
+class ObjectChange(Model):
+    __tablename__ = 'object_changes'
+
+    object_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey(Objects.object_id_column), primary_key=True)
+    utc_datetime: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["ObjectChange"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(object_id={self.object_id}, utc_datetime={self.utc_datetime})>'
+
+
+class EntityChange(Model):
+    __tablename__ = 'entity_changes'
+
+    # the type as used for federation references, e.g. 'actions'
+    type: Mapped[str] = db.Column(db.String, primary_key=True)
+    entity_id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    utc_datetime: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False, index=True)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["EntityChange"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(type={self.type!r}, entity_id={self.entity_id}, utc_datetime={self.utc_datetime})>'
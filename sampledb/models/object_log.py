@@ -53,6 +53,11 @@ class ObjectLogEntry(Model):
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["ObjectLogEntry"]]
 
+    __table_args__ = (
+        db.Index('ix_object_log_entries_object_id_utc_datetime', object_id, utc_datetime),
+        db.Index('ix_object_log_entries_user_id', user_id),
+    )
+
     def __init__(
             self,
             type: ObjectLogEntryType,
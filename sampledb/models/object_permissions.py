@@ -28,6 +28,7 @@ class UserObjectPermissions(Model):
 
     __table_args__ = (
         db.PrimaryKeyConstraint(object_id, user_id),
+        db.Index('ix_user_object_permissions_user_id', user_id),
     )
 
 
@@ -43,6 +44,7 @@ class GroupObjectPermissions(Model):
 
     __table_args__ = (
         db.PrimaryKeyConstraint(object_id, group_id),
+        db.Index('ix_group_object_permissions_group_id', group_id),
     )
 
 
@@ -58,6 +60,7 @@ class ProjectObjectPermissions(Model):
 
     __table_args__ = (
         db.PrimaryKeyConstraint(object_id, project_id),
+        db.Index('ix_project_object_permissions_project_id', project_id),
     )
 
 
@@ -79,3 +82,22 @@ class AnonymousUserObjectPermissions(Model):
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["AnonymousUserObjectPermissions"]]
+
+
+class EffectiveObjectPermissions(Model):
+    __tablename__ = 'effective_object_permissions'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    user_id: Mapped[typing.Optional[int]] = db.Column(db.Integer, db.ForeignKey(User.id), nullable=True)
+    object_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey(Objects.object_id_column), nullable=False)
+    permissions_int: Mapped[int] = db.Column(db.Integer, nullable=False)
+    requires_anonymous_users: Mapped[bool] = db.Column(db.Boolean, nullable=False)
+    requires_instruments: Mapped[bool] = db.Column(db.Boolean, nullable=False)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["EffectiveObjectPermissions"]]
+
+    __table_args__ = (
+        db.Index('ix_effective_object_permissions_user_id_object_id', user_id, object_id),
+        db.Index('ix_effective_object_permissions_object_id', object_id),
+    )
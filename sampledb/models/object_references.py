@@ -0,0 +1,80 @@
+# coding: utf-8
+"""
+
+"""
+
+import enum
+import typing
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Mapped, Query
+
+from .. import db
+from .objects import Objects
+from .utils import Model
+
+
+@enum.unique
+class ObjectReferenceKind(enum.Enum):
+    # a sample used in a measurement
+    MEASUREMENT = 0
+    # a sample used to create another sample
+    SAMPLE_CREATION = 1
+    # any other reference in object metadata
+    METADATA = 2
+
+
+class ObjectReference(Model):
+    """
+    A reference from a version of an object to another object.
+
+    The referenced object is identified as in the object data: by its ID on
+    the component with the given UUID, in the .eln file with the given URLs,
+    or by its local ID if neither is set.
+    """
+    __tablename__ = 'object_references'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    source_object_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey(Objects.object_id_column), nullable=False)
+    source_version_id: Mapped[int] = db.Column(db.Integer, nullable=False)
+    path: Mapped[typing.List[typing.Union[str, int]]] = db.Column(postgresql.JSONB, nullable=False)
+    kind: Mapped[ObjectReferenceKind] = db.Column(db.Enum(ObjectReferenceKind), nullable=False)
+    target_object_id: Mapped[int] = db.Column(db.Integer, nullable=False)
+    target_component_uuid: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    target_eln_source_url: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    target_eln_object_url: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["ObjectReference"]]
+
+    __table_args__ = (
+        # the unique constraint is used for finding the objects referenced by
+        # an object version, this index for finding the referencing objects
+        db.UniqueConstraint('source_object_id', 'source_version_id', 'path', name='object_references_source_object_id_source_version_id_path_key'),
+        db.Index('ix_object_references_target_object_id', target_object_id),
+    )
+
+    def __init__(
+            self,
+            source_object_id: int,
+            source_version_id: int,
+            path: typing.List[typing.Union[str, int]],
+            kind: ObjectReferenceKind,
+            target_object_id: int,
+            target_component_uuid: typing.Optional[str] = None,
+            target_eln_source_url: typing.Optional[str] = None,
+            target_eln_object_url: typing.Optional[str] = None
+    ) -> None:
+        super().__init__(
+            source_object_id=source_object_id,
+            source_version_id=source_version_id,
+            path=path,
+            kind=kind,
+            target_object_id=target_object_id,
+            target_component_uuid=target_component_uuid,
+            target_eln_source_url=target_eln_source_url,
+            target_eln_object_url=target_eln_object_url
+        )
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(source_object_id={self.source_object_id}, source_version_id={self.source_version_id}, path={self.path}, target_object_id={self.target_object_id})>'
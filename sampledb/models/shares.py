@@ -29,6 +29,7 @@ class ObjectShare(Model):
     user_id: Mapped[typing.Optional[int]] = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     user: Mapped[typing.Optional['User']] = relationship('User')
     import_status: Mapped[typing.Optional[typing.Dict[str, typing.Any]]] = db.Column(postgresql.JSONB)
+    last_modified: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["ObjectShare"]]
@@ -41,12 +42,15 @@ class ObjectShare(Model):
             utc_datetime: typing.Optional[datetime.datetime] = None,
             user_id: typing.Optional[int] = None
     ) -> None:
+        if utc_datetime is None:
+            utc_datetime = datetime.datetime.now(datetime.timezone.utc)
         super().__init__(
             object_id=object_id,
             component_id=component_id,
             policy=policy,
-            utc_datetime=utc_datetime if utc_datetime is not None else datetime.datetime.now(datetime.timezone.utc),
-            user_id=user_id
+            utc_datetime=utc_datetime,
+            user_id=user_id,
+            last_modified=utc_datetime
         )
 
     def __repr__(self) -> str:
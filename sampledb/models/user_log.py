@@ -52,6 +52,10 @@ class UserLogEntry(Model):
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["UserLogEntry"]]
 
+    __table_args__ = (
+        db.Index('ix_user_log_entries_user_id_utc_datetime', user_id, utc_datetime),
+    )
+
     def __init__(
             self,
             type: UserLogEntryType,
@@ -60,6 +60,14 @@ class SchemaValidator(typing.Protocol):
         ...
 
 
+class SearchTextExtractor(typing.Protocol):
+    def __call__(
+        self,
+        data: typing.Dict[str, typing.Any]
+    ) -> typing.Sequence[typing.Tuple[str, str, str]]:
+        ...
+
+
 @dataclasses.dataclass
 class Object:
     object_id: int
@@ -107,6 +115,77 @@ class Object:
         return self._eln_import_cache[0]
 
 
+def _default_sorting_func(current_columns: typing.Any, original_columns: typing.Any) -> typing.Any:
+    return db.sql.desc(current_columns.object_id)
+
+
+setattr(_default_sorting_func, 'sorting_key_func', lambda current_columns, original_columns: current_columns.object_id)
+setattr(_default_sorting_func, 'is_descending', True)
+
+
+def _get_keyset_condition(
+        sorting_key: typing.Any,
+        object_id_column: typing.Any,
+        cursor: typing.Tuple[typing.Any, int],
+        is_descending: bool
+) -> typing.Any:
+    """
+    Creates a condition for objects following a cursor in the sorting order.
+
+    PostgreSQL sorts NULL values last in ascending and first in descending
+    order, and the object ID is used to break ties between equal keys.
+
+    :param sorting_key: the sorting key expression, or a tuple of sorting key
+        expressions which are compared in order
+    :param object_id_column: the object ID column
+    :param cursor: the sorting key (or tuple of sorting keys) and object ID
+        of the cursor
+    :param is_descending: whether the objects are sorted in descending order
+    :return: the SQLAlchemy filter
+    """
+    value, object_id = cursor
+    if sorting_key is object_id_column:
+        if is_descending:
+            return object_id_column < object_id
+        return object_id_column > object_id
+    if isinstance(sorting_key, tuple):
+        sorting_keys = sorting_key
+        values = tuple(value)
+    else:
+        sorting_keys = (sorting_key,)
+        values = (value,)
+    if is_descending:
+        condition = object_id_column < object_id
+    else:
+        condition = object_id_column > object_id
+    # build the condition from the last sorting key to the first, so that
+    # each key is only compared if all previous keys are equal
+    for key, value in reversed(list(zip(sorting_keys, values))):
+        if value is None:
+            equals_condition = key.is_(None)
+            if is_descending:
+                follows_condition = key.is_not(None)
+            else:
+                follows_condition = None
+        else:
+            value = db.cast(value, key.type)
+            equals_condition = key == value
+            if is_descending:
+                follows_condition = key < value
+            else:
+                follows_condition = db.or_(key > value, key.is_(None))
+        condition = db.and_(equals_condition, condition)
+        if follows_condition is not None:
+            condition = db.or_(follows_condition, condition)
+    return condition
+
+
+def _get_sorting_key_value(row: typing.Any, num_sorting_keys: int) -> typing.Any:
+    if num_sorting_keys == 1:
+        return row.sorting_key_0
+    return tuple(getattr(row, f'sorting_key_{index}') for index in range(num_sorting_keys))
+
+
 class VersionedJSONSerializableObjectTables:
     """
     A class for storing JSON-serializable objects without deletes and with versioned updates.
@@ -135,7 +214,8 @@ class VersionedJSONSerializableObjectTables:
             action_schema_column: typing.Optional[typing.Any] = None,
             metadata: typing.Optional[db.MetaData] = None,
             data_validator: typing.Optional[DataValidator] = None,
-            schema_validator: typing.Optional[SchemaValidator] = None
+            schema_validator: typing.Optional[SchemaValidator] = None,
+            search_text_extractor: typing.Optional[SearchTextExtractor] = None
     ) -> None:
         """
         Creates new instance for storing versioned, JSON-serializable objects using three tables.
@@ -147,6 +227,7 @@ class VersionedJSONSerializableObjectTables:
         :param metadata: an SQLAlchemy MetaData object used for creating the two tables (optional)
         :param data_validator: a data validator function (given the data and the schema) (optional)
         :param schema_validator: a schema validator function (given the schema) (optional)
+        :param search_text_extractor: a function returning tuples of text search configuration, weight and text for data (optional)
         """
         if metadata is None:
             metadata = db.MetaData()
@@ -168,10 +249,14 @@ class VersionedJSONSerializableObjectTables:
             db.Column('tags_cache', db.JSON),
             db.Column('eln_import_id', db.Integer, nullable=True),
             db.Column('eln_object_id', db.String, nullable=True),
+            db.Column('search_vector', postgresql.TSVECTOR, nullable=True),
+            db.Column('search_text', db.Text, nullable=True),
             db.CheckConstraint(
                 '(fed_object_id IS NOT NULL AND fed_version_id IS NOT NULL AND component_id IS NOT NULL) OR (eln_import_id IS NOT NULL AND eln_object_id IS NOT NULL) OR (action_id IS NOT NULL AND data IS NOT NULL AND schema IS NOT NULL AND user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
                 name=table_name_prefix + '_current_not_null_check'
             ),
+            db.Index(table_name_prefix + '_current_search_vector_idx', 'search_vector', postgresql_using='gin'),
+            db.Index('ix_' + table_name_prefix + '_current_action_id', 'action_id'),
             db.UniqueConstraint('fed_object_id', 'fed_version_id', 'component_id', name=table_name_prefix + '_current_fed_object_id_component_id_key')
         )
         self._previous_table = db.Table(
@@ -230,11 +315,58 @@ class VersionedJSONSerializableObjectTables:
         self._component_id_column = component_id_column
         self._eln_import_id_column = eln_import_id_column
         self.object_id_column = self._current_table.c.object_id
+        # the trigram indexes are not part of the table definition, as they
+        # require the pg_trgm extension, which might not be available
+        self.search_text_trigram_index_name = table_name_prefix + '_current_search_text_trgm_idx'
+        self.data_trigram_index_name = table_name_prefix + '_current_data_trgm_idx'
         self.bind = bind
         if self.bind is not None:
             self.metadata.create_all(self.bind)
         self._data_validator = data_validator
         self._schema_validator = schema_validator
+        self._search_text_extractor = search_text_extractor
+
+    def _get_search_vector(
+            self,
+            data: typing.Optional[typing.Dict[str, typing.Any]]
+    ) -> typing.Any:
+        """
+        Creates an SQL expression for the full-text search vector of object data.
+
+        :param data: the object data
+        :return: the tsvector expression, or None if no vector can be created
+        """
+        if data is None or self._search_text_extractor is None:
+            return None
+        search_vector: db.ColumnElement[typing.Any] = db.cast('', postgresql.TSVECTOR)
+        for config, weight, text in self._search_text_extractor(data):
+            search_vector = search_vector.op('||')(
+                db.func.setweight(
+                    db.func.to_tsvector(db.cast(config, postgresql.REGCONFIG), text),
+                    weight
+                )
+            )
+        return search_vector
+
+    def _get_search_text(
+            self,
+            data: typing.Optional[typing.Dict[str, typing.Any]]
+    ) -> typing.Optional[str]:
+        """
+        Creates the text for substring searches in object data.
+
+        :param data: the object data
+        :return: the extracted texts separated by newlines, or None if no text can be extracted
+        """
+        if data is None or self._search_text_extractor is None:
+            return None
+        # the same texts may be extracted for several text search
+        # configurations, but they only need to be included once
+        texts = dict.fromkeys(
+            text
+            for config, weight, text in self._search_text_extractor(data)
+        )
+        return '\n'.join(texts)
 
     @_use_transaction
     def create_object(
@@ -311,6 +443,8 @@ class VersionedJSONSerializableObjectTables:
                 data=data,
                 name_cache=data.get('name', {}).get('text') if data else None,
                 tags_cache=data.get('tags') if data else None,
+                search_vector=self._get_search_vector(data),
+                search_text=self._get_search_text(data),
                 schema=schema,
                 user_id=user_id,
                 utc_datetime=utc_datetime,
@@ -438,6 +572,8 @@ class VersionedJSONSerializableObjectTables:
                 data=data,
                 name_cache=data.get('name', {}).get('text') if data else None,
                 tags_cache=data.get('tags') if data else None,
+                search_vector=self._get_search_vector(data),
+                search_text=self._get_search_text(data),
                 schema=schema,
                 user_id=user_id,
                 utc_datetime=utc_datetime
@@ -570,6 +706,8 @@ class VersionedJSONSerializableObjectTables:
                     data=data,
                     name_cache=data.get('name', {}).get('text') if data else None,
                     tags_cache=data.get('tags') if data else None,
+                    search_vector=self._get_search_vector(data),
+                    search_text=self._get_search_text(data),
                     schema=schema,
                     action_id=action_id,
                     user_id=user_id,
@@ -738,6 +876,8 @@ class VersionedJSONSerializableObjectTables:
             cache_values = {
                 'name_cache': data.get('name', {}).get('text') if data else None,
                 'tags_cache': data.get('tags') if data else None,
+                'search_vector': self._get_search_vector(data),
+                'search_text': self._get_search_text(data),
             }
         else:
             cache_values = {}
@@ -757,6 +897,134 @@ class VersionedJSONSerializableObjectTables:
         )
         return self.get_object_version(object_id, version_id, connection=connection)
 
+    @_use_transaction
+    def update_search_vectors(
+            self,
+            object_ids: typing.Optional[typing.Sequence[int]] = None,
+            batch_size: int = 1000,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> None:
+        """
+        Recomputes the full-text search vectors of current objects.
+
+        :param object_ids: the IDs of the objects to update, or None to update all objects
+        :param batch_size: the number of objects to load at once
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        """
+        assert connection is not None  # ensured by decorator
+        self._update_current_objects(
+            lambda data: {'search_vector': self._get_search_vector(data)},
+            object_ids=object_ids,
+            batch_size=batch_size,
+            connection=connection
+        )
+
+    @_use_transaction
+    def update_search_texts(
+            self,
+            object_ids: typing.Optional[typing.Sequence[int]] = None,
+            batch_size: int = 1000,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> None:
+        """
+        Recomputes the texts for substring searches of current objects.
+
+        :param object_ids: the IDs of the objects to update, or None to update all objects
+        :param batch_size: the number of objects to load at once
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        """
+        assert connection is not None  # ensured by decorator
+        self._update_current_objects(
+            lambda data: {'search_text': self._get_search_text(data)},
+            object_ids=object_ids,
+            batch_size=batch_size,
+            connection=connection
+        )
+
+    def _update_current_objects(
+            self,
+            get_values: typing.Callable[[typing.Optional[typing.Dict[str, typing.Any]]], typing.Dict[str, typing.Any]],
+            object_ids: typing.Optional[typing.Sequence[int]],
+            batch_size: int,
+            connection: db.engine.Connection
+    ) -> None:
+        previous_object_id = None
+        while True:
+            select_statement = db.select(
+                self._current_table.c.object_id,
+                self._current_table.c.data
+            ).order_by(
+                self._current_table.c.object_id
+            ).limit(batch_size)
+            if object_ids is not None:
+                select_statement = select_statement.where(self._current_table.c.object_id.in_(object_ids))
+            if previous_object_id is not None:
+                select_statement = select_statement.where(self._current_table.c.object_id > previous_object_id)
+            rows = connection.execute(select_statement).fetchall()
+            if rows:
+                # update all objects of a batch with a single statement
+                new_values = db.union_all(*[
+                    db.select(
+                        db.literal(object_id, db.Integer).label('object_id'),
+                        *[
+                            db.cast(value, self._current_table.c[column_name].type).label(column_name)
+                            for column_name, value in get_values(data).items()
+                        ]
+                    )
+                    for object_id, data in rows
+                ]).subquery()
+                connection.execute(
+                    self._current_table
+                    .update()
+                    .where(self._current_table.c.object_id == new_values.c.object_id)
+                    .values({
+                        column_name: new_values.c[column_name]
+                        for column_name in new_values.c.keys()
+                        if column_name != 'object_id'
+                    })
+                )
+            if len(rows) < batch_size:
+                break
+            previous_object_id = rows[-1][0]
+
+    @_use_transaction
+    def create_trigram_indexes(
+            self,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> bool:
+        """
+        Creates trigram indexes on the search texts and on the data of current
+        objects.
+
+        The search text index is used for substring searches in text
+        properties, while the data index is used by the simple search, which
+        searches the data cast to a string.
+
+        The indexes require the pg_trgm extension, which is created if it is
+        available and if the database user is allowed to create it.
+
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :return: whether the indexes exist
+        """
+        assert connection is not None  # ensured by decorator
+        try:
+            with connection.begin_nested():
+                connection.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except db.exc.DBAPIError:
+            return False
+        connection.execute(db.text(f"""
+            CREATE INDEX IF NOT EXISTS {self.search_text_trigram_index_name}
+            ON {self._current_table.name}
+            USING gin (search_text gin_trgm_ops)
+        """))
+        # the expression must match the simple search filter on the data
+        connection.execute(db.text(f"""
+            CREATE INDEX IF NOT EXISTS {self.data_trigram_index_name}
+            ON {self._current_table.name}
+            USING gin ((CAST(data AS VARCHAR)) gin_trgm_ops)
+        """))
+        return True
+
     @_use_transaction
     def is_existing_object(
             self,
@@ -966,7 +1234,11 @@ class VersionedJSONSerializableObjectTables:
             sorting_func: typing.Optional[typing.Callable[[typing.Any, typing.Any], typing.Any]] = None,
             limit: typing.Optional[int] = None,
             offset: typing.Optional[int] = None,
-            num_objects_found: typing.Optional[typing.List[int]] = None
+            num_objects_found: typing.Optional[typing.List[int]] = None,
+            after: typing.Optional[typing.Tuple[typing.Any, int]] = None,
+            before: typing.Optional[typing.Tuple[typing.Any, int]] = None,
+            cursors: typing.Optional[typing.List[typing.Optional[typing.Tuple[typing.Any, int]]]] = None,
+            count_limit: typing.Optional[int] = None
     ) -> typing.List[Object]:
         """
         Queries and returns all objects matching a given filter.
@@ -981,7 +1253,13 @@ class VersionedJSONSerializableObjectTables:
         :param limit: limits the number of returned objects, if set
         :param offset: an offset to apply to the query
         :param num_objects_found: a list used to return the number of objects found in, using the 0-th element
+        :param after: a cursor (sorting key and object ID) to only return objects following it
+        :param before: a cursor (sorting key and object ID) to only return objects preceding it
+        :param cursors: a list used to return the cursors for the previous and next objects, or None if there are none
+        :param count_limit: the maximum number of objects to count for num_objects_found, or None to count all
         :return: a list of objects as object_type
+        :raise ValueError: if after and before are both set, or if keyset
+            pagination is used with a sorting function without sorting key
         """
         assert connection is not None  # ensured by decorator
 
@@ -991,25 +1269,22 @@ class VersionedJSONSerializableObjectTables:
         if table is None:
             table = self._current_table
 
-        select_statement = db.select(
-            table.c.object_id,
-            table.c.version_id,
-            table.c.action_id,
-            table.c.data,
-            table.c.schema,
-            table.c.user_id,
-            table.c.utc_datetime,
-            table.c.fed_object_id,
-            table.c.fed_version_id,
-            table.c.component_id,
-            table.c.eln_import_id,
-            table.c.eln_object_id,
-            db.sql.expression.text('COUNT(*) OVER()')
-        )
+        if after is not None and before is not None:
+            raise ValueError("Only one of after and before may be set")
+
+        if sorting_func is None:
+            sorting_func = _default_sorting_func
+
+        # sorting functions created by logic.object_sorting.ascending or
+        # logic.object_sorting.descending provide the sorting key itself,
+        # which is required for keyset pagination
+        sorting_key_func = getattr(sorting_func, 'sorting_key_func', None)
+        if sorting_key_func is None and (after is not None or before is not None or cursors is not None):
+            raise ValueError("Keyset pagination requires a sorting function with a sorting key")
 
         selectable = table
 
-        if sorting_func is not None and getattr(sorting_func, 'require_original_columns', False):
+        if getattr(sorting_func, 'require_original_columns', False):
             selectable = selectable.outerjoin(
                 self._previous_table,
                 db.and_(table.c.object_id == self._previous_table.c.object_id, self._previous_table.c.version_id == 0),
@@ -1025,23 +1300,78 @@ class VersionedJSONSerializableObjectTables:
                 db.and_(table.c.action_id == self._action_id_column, action_filter)
             )
 
-        select_statement = select_statement.select_from(selectable)
-
-        if sorting_func is None:
-            def default_sorting_func(current_columns: typing.Any, original_columns: typing.Any) -> typing.Any:
-                return db.sql.desc(current_columns.object_id)
-
-            sorting_func = default_sorting_func
-
         # use data_full column for filtering, as data might only contain the name property
         filter_data_column = table.c.data_full if hasattr(table.c, 'data_full') else table.c.data
         # set object_id_column to allow access to table.c.object_id in filter_func (e.g. for file search)
         filter_data_column.object_id_column = table.c.object_id
-        select_statement = select_statement.where(filter_func(filter_data_column))
-        select_statement = select_statement.order_by(sorting_func(table.c, self._previous_table.c))
+        # set search_vector_column to allow use of the full-text search index in filter_func
+        if self._search_text_extractor is not None and hasattr(table.c, 'search_vector'):
+            filter_data_column.search_vector_column = table.c.search_vector
+        else:
+            filter_data_column.search_vector_column = None
+        # set search_text_column to allow use of the trigram index in filter_func
+        if self._search_text_extractor is not None and hasattr(table.c, 'search_text'):
+            filter_data_column.search_text_column = table.c.search_text
+        else:
+            filter_data_column.search_text_column = None
+        filter_condition = filter_func(filter_data_column)
+
+        # the window function counts all objects matching the filter, but it
+        # cannot be used when a cursor limits the objects or the count is capped
+        use_window_count = num_objects_found is not None and count_limit is None and after is None and before is None
+
+        select_statement = db.select(
+            table.c.object_id,
+            table.c.version_id,
+            table.c.action_id,
+            table.c.data,
+            table.c.schema,
+            table.c.user_id,
+            table.c.utc_datetime,
+            table.c.fed_object_id,
+            table.c.fed_version_id,
+            table.c.component_id,
+            table.c.eln_import_id,
+            table.c.eln_object_id,
+        ).select_from(selectable).where(filter_condition)
+
+        if use_window_count:
+            select_statement = select_statement.add_columns(
+                db.sql.func.count().over().label('num_objects_found')  # pylint: disable=not-callable
+            )
+
+        if sorting_key_func is not None:
+            sorting_key = sorting_key_func(table.c, self._previous_table.c)
+            # sorting functions may provide several keys, e.g. to sort values
+            # which do not have the primary key's type
+            sorting_keys = sorting_key if isinstance(sorting_key, tuple) else (sorting_key,)
+            is_descending = bool(getattr(sorting_func, 'is_descending', False))
+            if before is not None:
+                # query the objects preceding the cursor in reverse order
+                is_descending = not is_descending
+            sorting_order = db.sql.desc if is_descending else db.sql.asc
+            select_statement = select_statement.add_columns(*[
+                key.label(f'sorting_key_{index}')
+                for index, key in enumerate(sorting_keys)
+            ]).order_by(
+                *[sorting_order(key) for key in sorting_keys],
+                sorting_order(table.c.object_id)
+            )
+            cursor = after if after is not None else before
+            if cursor is not None:
+                select_statement = select_statement.where(
+                    _get_keyset_condition(sorting_key, table.c.object_id, cursor, is_descending)
+                )
+        else:
+            sorting_order = sorting_func(table.c, self._previous_table.c)
+            if isinstance(sorting_order, tuple):
+                select_statement = select_statement.order_by(*sorting_order)
+            else:
+                select_statement = select_statement.order_by(sorting_order)
 
         if limit is not None:
-            select_statement = select_statement.limit(limit)
+            # query one additional object to find out whether there are more objects
+            select_statement = select_statement.limit(limit + 1 if cursors is not None else limit)
 
         if offset is not None:
             select_statement = select_statement.offset(offset)
@@ -1050,19 +1380,56 @@ class VersionedJSONSerializableObjectTables:
             select_statement,
             parameters
         ).fetchall()
+        has_more_objects = limit is not None and len(objects) > limit
+        if has_more_objects:
+            objects = objects[:limit]
+        if before is not None:
+            objects = objects[::-1]
+
         if num_objects_found is not None:
             num_objects_found.clear()
-            if objects:
-                num_objects_found.append(objects[0][-1])
+            if use_window_count:
+                if objects:
+                    num_objects_found.append(objects[0].num_objects_found)
+                else:
+                    num_objects_found.append(0)
+            else:
+                count_statement = db.select(
+                    table.c.object_id
+                ).select_from(selectable).where(filter_condition)
+                if count_limit is not None:
+                    count_statement = count_statement.limit(count_limit)
+                num_objects_found.append(connection.execute(
+                    db.select(
+                        db.sql.func.count()  # pylint: disable=not-callable
+                    ).select_from(count_statement.subquery()),
+                    parameters
+                ).scalar() or 0)
+
+        if cursors is not None:
+            cursors.clear()
+            if before is not None:
+                has_previous_objects = has_more_objects
+                has_next_objects = True
+            else:
+                has_previous_objects = after is not None or bool(offset)
+                has_next_objects = has_more_objects
+            if objects and has_previous_objects:
+                cursors.append((_get_sorting_key_value(objects[0], len(sorting_keys)), objects[0].object_id))
             else:
-                num_objects_found.append(0)
-        return [Object(*obj[:-1]) for obj in objects]
+                cursors.append(None)
+            if objects and has_next_objects:
+                cursors.append((_get_sorting_key_value(objects[-1], len(sorting_keys)), objects[-1].object_id))
+            else:
+                cursors.append(None)
+        return [Object(*obj[:12]) for obj in objects]
 
     @_use_transaction
     def get_object_versions(
             self,
             object_id: int,
-            connection: typing.Optional[db.engine.Connection] = None
+            connection: typing.Optional[db.engine.Connection] = None,
+            created_since: typing.Optional[datetime.datetime] = None
     ) -> typing.List[Object]:
         """
         Queries and returns all versions of an object with a given ID, sorted ascendingly by the version ID, from first
@@ -1070,12 +1437,23 @@ class VersionedJSONSerializableObjectTables:
 
         :param object_id: the ID of the existing object
         :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :param created_since: if not None, previous versions created before this datetime are skipped, while the current
+            version is always returned
         :return: a list of objects as object_type
         """
         assert connection is not None  # ensured by decorator
         current_object = self.get_current_object(object_id, connection=connection)
         if current_object is None:
             return []
+        previous_objects_condition = self._previous_table.c.object_id == object_id
+        if created_since is not None:
+            previous_objects_condition = db.and_(
+                previous_objects_condition,
+                db.or_(
+                    self._previous_table.c.utc_datetime.is_(None),
+                    self._previous_table.c.utc_datetime >= created_since
+                )
+            )
         previous_objects = connection.execute(
             db
             .select(
@@ -1092,7 +1470,7 @@ class VersionedJSONSerializableObjectTables:
                 self._previous_table.c.eln_import_id,
                 self._previous_table.c.eln_object_id,
             )
-            .where(self._previous_table.c.object_id == object_id)
+            .where(previous_objects_condition)
             # .order_by(db.asc(self._previous_table.c.version_id))
             .order_by(db.asc(self._previous_table.c.utc_datetime))
         ).fetchall()
@@ -1146,6 +1524,54 @@ class VersionedJSONSerializableObjectTables:
             return current_object
         return None
 
+    @_use_transaction
+    def get_previous_object_versions(
+            self,
+            object_ids: typing.Iterable[int],
+            version_id: int,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> typing.Dict[int, Object]:
+        """
+        Queries and returns a previous version of several objects at once.
+
+        Objects whose version with the given version ID is the current
+        version are not included in the result.
+
+        :param object_ids: the IDs of existing objects
+        :param version_id: the ID of the versions to return
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :return: a dict mapping object IDs to the versions as object_type
+        """
+        assert connection is not None  # ensured by decorator
+        object_ids = set(object_ids)
+        if not object_ids:
+            return {}
+        previous_objects = connection.execute(
+            db
+            .select(
+                self._previous_table.c.object_id,
+                self._previous_table.c.version_id,
+                self._previous_table.c.action_id,
+                self._previous_table.c.data,
+                self._previous_table.c.schema,
+                self._previous_table.c.user_id,
+                self._previous_table.c.utc_datetime,
+                self._previous_table.c.fed_object_id,
+                self._previous_table.c.fed_version_id,
+                self._previous_table.c.component_id,
+                self._previous_table.c.eln_import_id,
+                self._previous_table.c.eln_object_id,
+            )
+            .where(db.and_(
+                self._previous_table.c.object_id.in_(object_ids),
+                self._previous_table.c.version_id == version_id
+            ))
+        ).fetchall()
+        return {
+            previous_object[0]: Object(*previous_object)
+            for previous_object in previous_objects
+        }
+
     @_use_transaction
     def get_current_object_version_id(
             self,
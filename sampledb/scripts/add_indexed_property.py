@@ -0,0 +1,40 @@
+# coding: utf-8
+"""
+Script for indexing a property of objects, so that the advanced search can
+use an index when searching and sorting by it.
+
+Usage: sampledb add_indexed_property <quantity|datetime|value> <property_path>
+
+Use "quantity" or "datetime" for comparing and sorting quantities or
+datetimes, and "value" for comparing text, booleans, references and tags.
+The property path consists of the property names separated by dots, as in
+the advanced search, e.g. "sample_details.mass".
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.indexed_properties import create_indexed_property, parse_property_path
+from ..logic.errors import IndexedPropertyAlreadyExistsError, InvalidPropertyPathError
+from ..models import IndexedPropertyType
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 2 or arguments[0].upper() not in IndexedPropertyType.__members__:
+        print(__doc__)
+        sys.exit(1)
+    type_name, path_str = arguments
+    try:
+        path = parse_property_path(path_str)
+    except InvalidPropertyPathError:
+        print("Error: property_path must consist of property names separated by dots", file=sys.stderr)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        try:
+            indexed_property = create_indexed_property(path, IndexedPropertyType[type_name.upper()])
+        except IndexedPropertyAlreadyExistsError:
+            print("Error: this property is already indexed with this type", file=sys.stderr)
+            sys.exit(1)
+        print(f"Success: the property is indexed as #{indexed_property.id}")
@@ -0,0 +1,27 @@
+# coding: utf-8
+"""
+Script for creating the trigram indexes used for substring searches in object
+texts and data, e.g. after the pg_trgm extension has been installed for
+PostgreSQL.
+
+Usage: sampledb enable_trigram_search
+"""
+import sys
+import typing
+
+from .. import create_app, db
+from ..models import Objects
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 0:
+        print(__doc__)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        if not Objects.create_trigram_indexes(connection=db.session.connection()):
+            db.session.rollback()
+            print("Error: the pg_trgm extension is not available or cannot be created by the database user", file=sys.stderr)
+            sys.exit(1)
+        db.session.commit()
+    print("Success: substring searches can use the trigram indexes")
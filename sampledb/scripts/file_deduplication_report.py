@@ -0,0 +1,32 @@
+# coding: utf-8
+"""
+Script for reporting how much storage is saved by deduplicating the content
+of uploaded files, per object or per uploading user.
+
+Usage: sampledb file_deduplication_report [--by-user]
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.file_storage import get_file_deduplication_statistics
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1 or (arguments and arguments[0] != '--by-user'):
+        print(__doc__)
+        sys.exit(1)
+    group_by = 'user' if arguments else 'object'
+    app = create_app()
+    with app.app_context():
+        statistics = get_file_deduplication_statistics(group_by)
+        for entry in statistics:
+            if group_by == 'user':
+                name = f"user #{entry.id}" if entry.id is not None else "federation"
+            else:
+                name = f"object #{entry.id}"
+            print(f" - {name}: {entry.num_files} files, {entry.total_size} bytes, {entry.saved_size} bytes saved")
+        total_size = sum(entry.total_size for entry in statistics)
+        saved_size = sum(entry.saved_size for entry in statistics)
+        print(f"Total: {total_size} bytes in files, {saved_size} bytes saved by deduplication")
@@ -0,0 +1,21 @@
+# coding: utf-8
+"""
+Script for listing all indexed properties.
+
+Usage: sampledb list_indexed_properties
+"""
+import sys
+import typing
+
+from .. import create_app
+from ..logic.indexed_properties import get_indexed_properties
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 0:
+        print(__doc__)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        for indexed_property in get_indexed_properties():
+            print(f" - #{indexed_property.id}: {'.'.join(indexed_property.path)} ({indexed_property.type.name.lower()})")
@@ -0,0 +1,59 @@
+# coding: utf-8
+"""
+Script for moving the content of files stored in the database to the storage
+backend set via the FILE_STORAGE_BACKEND configuration value.
+
+Files uploaded before the content of files was deduplicated are moved to
+file blobs as well, even if FILE_STORAGE_BACKEND is set to the database.
+
+Usage: sampledb move_files_to_storage_backend [--dry-run]
+"""
+
+import sys
+import typing
+
+from .. import create_app, db
+from ..logic.files import get_file_ids_without_blob, move_file_content_to_blob
+from ..logic.file_storage import DATABASE_STORAGE_BACKEND, get_file_blob_hashes_stored_in_database, move_file_blob_to_storage_backend
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1 or (arguments and arguments[0] != '--dry-run'):
+        print(__doc__)
+        sys.exit(1)
+    dry_run = bool(arguments)
+    app = create_app()
+    with app.app_context():
+        backend_name = app.config['FILE_STORAGE_BACKEND'] or DATABASE_STORAGE_BACKEND
+        file_ids = get_file_ids_without_blob()
+        if dry_run:
+            for object_id, file_id in file_ids:
+                print(f" - object #{object_id} / file #{file_id}")
+            print(f"{len(file_ids)} files would be moved to file blobs in the {backend_name} storage backend")
+            if backend_name != DATABASE_STORAGE_BACKEND:
+                print(f"{len(get_file_blob_hashes_stored_in_database())} file blobs in the database would be moved to the {backend_name} storage backend")
+            return
+        num_failed_files = 0
+        for object_id, file_id in file_ids:
+            # files are moved one at a time, so that only one file is held in memory
+            try:
+                move_file_content_to_blob(object_id, file_id)
+            except Exception as e:
+                db.session.rollback()
+                num_failed_files += 1
+                print(f" - object #{object_id} / file #{file_id}: failed to move file: {e}", file=sys.stderr)
+        blob_hashes = []
+        num_failed_blobs = 0
+        if backend_name != DATABASE_STORAGE_BACKEND:
+            blob_hashes = get_file_blob_hashes_stored_in_database()
+            for sha256 in blob_hashes:
+                try:
+                    move_file_blob_to_storage_backend(sha256)
+                except Exception as e:
+                    db.session.rollback()
+                    num_failed_blobs += 1
+                    print(f" - file blob {sha256}: failed to move file blob: {e}", file=sys.stderr)
+        if num_failed_files or num_failed_blobs:
+            print(f"Error: {num_failed_files} of {len(file_ids)} files and {num_failed_blobs} of {len(blob_hashes)} file blobs could not be moved", file=sys.stderr)
+            sys.exit(1)
+        print(f"Success: {len(file_ids)} files and {len(blob_hashes)} file blobs have been moved to the {backend_name} storage backend")
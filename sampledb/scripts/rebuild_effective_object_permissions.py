@@ -0,0 +1,35 @@
+# coding: utf-8
+"""
+Script for rebuilding the materialized effective object permissions and
+verifying them against the user_object_permissions_by_all view.
+
+Usage: sampledb rebuild_effective_object_permissions [--verify-only]
+"""
+
+import sys
+import typing
+
+from .. import create_app, db
+from ..logic.effective_object_permissions import rebuild_effective_object_permissions, verify_effective_object_permissions
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1 or (arguments and arguments[0] != '--verify-only'):
+        print(__doc__)
+        sys.exit(1)
+    verify_only = bool(arguments)
+    app = create_app()
+    with app.app_context():
+        if not verify_only:
+            rebuild_effective_object_permissions()
+            db.session.commit()
+        differences = verify_effective_object_permissions()
+        if differences:
+            for difference in differences:
+                print(f" - {'missing' if difference.is_missing else 'superfluous'}: object #{difference.object_id} / user {'#' + str(difference.user_id) if difference.user_id is not None else '(all)'}: {difference.permissions_int} (requires_anonymous_users={difference.requires_anonymous_users}, requires_instruments={difference.requires_instruments})")
+            print(f"Error: {len(differences)} effective object permissions differ from the view", file=sys.stderr)
+            sys.exit(1)
+        if verify_only:
+            print("Success: the effective object permissions are consistent")
+        else:
+            print("Success: the effective object permissions have been rebuilt")
@@ -0,0 +1,32 @@
+# coding: utf-8
+"""
+Script for removing an indexed property and its index.
+
+Usage: sampledb remove_indexed_property <indexed_property_id>
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.indexed_properties import delete_indexed_property
+from ..logic.errors import IndexedPropertyDoesNotExistError
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 1:
+        print(__doc__)
+        sys.exit(1)
+    try:
+        indexed_property_id = int(arguments[0])
+    except ValueError:
+        print("Error: indexed_property_id must be an integer", file=sys.stderr)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        try:
+            delete_indexed_property(indexed_property_id)
+        except IndexedPropertyDoesNotExistError:
+            print("Error: No indexed property with this ID exists", file=sys.stderr)
+            sys.exit(1)
+        print("Success: the property is no longer indexed")
@@ -0,0 +1,52 @@
+# coding: utf-8
+"""
+Script for handling background tasks in a separate worker process.
+
+Tasks posted by the SampleDB server are handled by this process. To handle
+them only here, set BACKGROUND_TASK_HANDLER_THREADS to 0 for the server. The
+number of handler threads defaults to BACKGROUND_TASK_HANDLER_THREADS, or to 4
+if it is set to 0.
+
+Usage: sampledb run_background_task_worker [<num_threads>]
+"""
+
+import sys
+import time
+import typing
+
+from .. import create_app
+from ..logic import background_tasks
+
+DEFAULT_NUM_HANDLER_THREADS = 4
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1:
+        print(__doc__)
+        sys.exit(1)
+    num_threads = None
+    if arguments:
+        try:
+            num_threads = int(arguments[0])
+            if num_threads < 1:
+                raise ValueError()
+        except ValueError:
+            print("Error: num_threads must be a positive integer", file=sys.stderr)
+            sys.exit(1)
+    app = create_app()
+    if not app.config['ENABLE_BACKGROUND_TASKS']:
+        print("Error: background tasks are not enabled, set SAMPLEDB_ENABLE_BACKGROUND_TASKS to handle them in a worker process", file=sys.stderr)
+        sys.exit(1)
+    if num_threads is None:
+        num_threads = app.config['BACKGROUND_TASK_HANDLER_THREADS']
+        if num_threads <= 0:
+            num_threads = DEFAULT_NUM_HANDLER_THREADS
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = num_threads
+    background_tasks.start_handler_threads(app)
+    print(f"Handling background tasks with {num_threads} threads")
+    try:
+        # the handler threads are stopped by the signal handler for SIGTERM
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        background_tasks.stop_handler_threads(app)
@@ -0,0 +1,41 @@
+# coding: utf-8
+"""
+Script for reporting missing, unused and bloated indexes, as well as
+sequential scans of large tables by frequently sent queries.
+
+Usage: sampledb verify_indexes
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.database_indexes import get_index_report, get_sequential_scans
+
+
+def main(arguments: typing.List[str]) -> None:
+    if arguments:
+        print(__doc__)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        report = get_index_report()
+        sequential_scans = get_sequential_scans()
+    if report.missing_indexes:
+        print("Missing indexes:")
+        for table_name, index_name in report.missing_indexes:
+            print(f" - {index_name} on {table_name}")
+    if report.unused_indexes:
+        print("Unused indexes (not scanned since the statistics were reset):")
+        for index in report.unused_indexes:
+            print(f" - {index.index_name} on {index.table_name}: {index.size} bytes")
+    if report.bloated_indexes:
+        print("Bloated indexes:")
+        for index in report.bloated_indexes:
+            print(f" - {index.index_name} on {index.table_name}: {index.size} bytes, about {index.estimated_size} bytes expected")
+    if sequential_scans:
+        print("Sequential scans of large tables:")
+        for sequential_scan in sequential_scans:
+            print(f" - {sequential_scan.table_name} ({sequential_scan.num_rows} rows) for {sequential_scan.query_name}")
+    if report.missing_indexes:
+        sys.exit(1)
@@ -0,0 +1,28 @@
+'use strict';
+/* eslint-env jquery */
+
+const POLLING_SLEEP_TIME = 5000;
+const POLLING_URL = window.getTemplateValue('polling_url');
+
+function poll () {
+  $.ajax({
+    url: POLLING_URL,
+    success: function (data, statusText, xhr) {
+      if (xhr.status === 200) { // export was created successfully
+        window.location.replace(data.url);
+      } else if (xhr.status === 202) { // continue polling
+        if (data.progress_text) {
+          $('#export-progress-text').text(data.progress_text);
+        }
+        setTimeout(poll, POLLING_SLEEP_TIME);
+      }
+    },
+    error: function (xhr, statusText, err) {
+      if (xhr.status === 406) { // export has failed
+        window.location.replace(xhr.responseJSON.url);
+      }
+    }
+  });
+}
+
+poll();
@@ -6,14 +6,18 @@
 import base64
 import functools
 import json
+import mimetypes
 import os
 import typing
 import secrets
+import unicodedata
+import urllib.parse
 
 import flask
 import flask_login
 import sqlalchemy
 import werkzeug
+import werkzeug.exceptions
 
 from . import logic, db
 from .models import Permissions, migrations
@@ -164,3 +168,68 @@ def generate_content_security_policy_nonce() -> str:
 
 def text_to_bool(text: str) -> bool:
     return text.lower() not in {'', 'false', 'no', 'off', '0'}
+
+
+def send_file_content(
+        file: 'logic.files.File',
+        *,
+        mimetype: typing.Optional[str] = None,
+        as_attachment: bool = False
+) -> flask.Response:
+    """
+    Send the content of a file, with support for range requests.
+
+    Files in the local filesystem are sent directly. Files stored in other
+    components are streamed from them, passing on range requests, so that
+    their content is never held in memory completely.
+
+    :param file: the file to send the content of
+    :param mimetype: the MIME type of the content, or None to guess it from
+        the original file name
+    :param as_attachment: whether the content should be downloaded instead of
+        displayed by the browser
+    :return: the response
+    :raise logic.errors.FederationFileNotAvailableError: when the file is
+        stored in another component and cannot be requested from it
+    :raise werkzeug.exceptions.RequestedRangeNotSatisfiable: when the
+        requested range is not within the content
+    """
+    local_path = file.local_path
+    if local_path is not None:
+        return flask.send_file(local_path, mimetype=mimetype, as_attachment=as_attachment, download_name=file.original_file_name, last_modified=file.utc_datetime)
+    if file.storage == 'federation':
+        stream = file.open_stream(range=flask.request.headers.get('Range'))
+        if mimetype is None:
+            mimetype = mimetypes.guess_type(file.original_file_name)[0] or 'application/octet-stream'
+        response = flask.Response(stream.chunks, status=stream.status_code, headers=stream.headers, mimetype=mimetype, direct_passthrough=True)
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', **_get_content_disposition_file_names(file.original_file_name))
+        response.last_modified = file.utc_datetime
+        return response
+    file_content = file.open()
+    response = flask.send_file(file_content, mimetype=mimetype, as_attachment=as_attachment, download_name=file.original_file_name, last_modified=file.utc_datetime, conditional=False)
+    # send_file only knows the size of files given by path, which is needed for range requests
+    if file_content.seekable():
+        response.content_length = file_content.seek(0, os.SEEK_END)
+        file_content.seek(0)
+        try:
+            response.make_conditional(flask.request.environ, accept_ranges=True, complete_length=response.content_length)
+        except werkzeug.exceptions.RequestedRangeNotSatisfiable:
+            file_content.close()
+            raise
+    return response
+
+
+def _get_content_disposition_file_names(file_name: str) -> typing.Dict[str, str]:
+    # like werkzeug's send_file, use an ASCII file name with the original file name as extended parameter
+    try:
+        file_name.encode('ascii')
+    except UnicodeEncodeError:
+        ascii_file_name = unicodedata.normalize('NFKD', file_name).encode('ascii', 'ignore').decode('ascii')
+        quoted_file_name = urllib.parse.quote(file_name, safe="!#$&+-.^_`|~")
+        return {
+            'filename': ascii_file_name,
+            'filename*': f"UTF-8''{quoted_file_name}"
+        }
+    return {
+        'filename': file_name
+    }
@@ -1,15 +1,17 @@
 import datetime
+import re
 import secrets
 import time
 
 import flask
 import requests
 import pytest
+import sqlalchemy
 
 import sampledb
 from sampledb import logic
 from sampledb import models
-from sampledb.logic import shares, actions, objects, component_authentication, components, files
+from sampledb.logic import shares, actions, action_translations, objects, comments, component_authentication, components, files, locations
 from sampledb.logic.component_authentication import add_token_authentication
 from sampledb.logic.components import add_component
 from sampledb.logic.users import create_user_alias
@@ -344,3 +346,163 @@ def test_import_status(flask_server, component_token, simple_object, user):
         json=import_status_data
     )
     assert r.status_code == 404
+
+
+def test_compressed_responses(flask_server, component_token, monkeypatch):
+    component, token = component_token
+    monkeypatch.setattr(sampledb.api.federation, 'MIN_COMPRESSED_RESPONSE_SIZE', 0)
+    headers = {'Authorization': 'Bearer ' + token}
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/users/', headers={**headers, 'Accept-Encoding': 'identity'})
+    assert r.status_code == 200
+    assert 'Content-Encoding' not in r.headers
+    uncompressed_result = r.json()
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/users/', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert r.status_code == 200
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in r.headers['Vary']
+    result = r.json()
+    assert result['users'] == uncompressed_result['users']
+
+
+def test_get_objects_incremental(flask_server, component_token, user, action):
+    component, token = component_token
+    flask_server.app.config['VALID_TIME_DELTA'] = 0
+    headers = {'Authorization': 'Bearer ' + token}
+    policy = {'access': {'data': True, 'action': True, 'users': True, 'files': True, 'comments': True, 'object_location_assignments': True}, 'permissions': {}}
+    data = {'name': {'_type': 'text', 'text': 'Object'}}
+    object1 = objects.create_object(user_id=user.id, action_id=action.id, data=data)
+    object2 = objects.create_object(user_id=user.id, action_id=action.id, data=data)
+    object3 = objects.create_object(user_id=user.id, action_id=action.id, data=data)
+    for object in [object1, object2, object3]:
+        shares.add_object_share(object.object_id, component.id, policy)
+    objects.update_object(object1.object_id, data=data, user_id=user.id)
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers)
+    assert r.status_code == 200
+    result = r.json()
+    assert [object_data['object_id'] for object_data in result['objects']] == [object1.object_id, object2.object_id, object3.object_id]
+    assert [version['version_id'] for version in result['objects'][0]['versions']] == [0, 1]
+    assert result['next_cursor'] is None
+
+    time.sleep(0.01)
+    last_sync_timestamp = datetime.datetime.now(datetime.timezone.utc)
+    time.sleep(0.01)
+    parameters = {'last_sync_timestamp': last_sync_timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')}
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=parameters)
+    assert r.status_code == 200
+    assert r.json()['objects'] == []
+    assert r.json()['actions'] == []
+
+    # changed entities referenced by unchanged objects are sent as well
+    action_translations.set_action_translation(models.Language.ENGLISH, action.id, name='Updated Action')
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=parameters)
+    assert r.status_code == 200
+    result = r.json()
+    assert result['objects'] == []
+    assert [action_data['action_id'] for action_data in result['actions']] == [action.id]
+    assert result['actions'][0]['translations']['en']['name'] == 'Updated Action'
+
+    objects.update_object(object1.object_id, data=data, user_id=user.id)
+    comments.create_comment(object2.object_id, user.id, 'Comment')
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=parameters)
+    assert r.status_code == 200
+    result = r.json()
+    assert [object_data['object_id'] for object_data in result['objects']] == [object1.object_id, object2.object_id]
+    # only new versions and the current version are sent for unmodified shares
+    assert [version['version_id'] for version in result['objects'][0]['versions']] == [2]
+    assert [version['version_id'] for version in result['objects'][1]['versions']] == [0]
+    assert [comment['content'] for comment in result['objects'][1]['comments']] == ['Comment']
+
+    # all versions are sent for modified shares
+    shares.update_object_share(object1.object_id, component.id, {**policy, 'permissions': {'users': {str(user.id): 'read'}}})
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=parameters)
+    assert r.status_code == 200
+    result = r.json()
+    assert [version['version_id'] for version in result['objects'][0]['versions']] == [0, 1, 2]
+
+    received_object_ids = []
+    cursor = None
+    while True:
+        page_parameters = {'limit': '2'}
+        if cursor is not None:
+            page_parameters['cursor'] = cursor
+        r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=page_parameters)
+        assert r.status_code == 200
+        result = r.json()
+        assert len(result['objects']) <= 2
+        received_object_ids.extend(object_data['object_id'] for object_data in result['objects'])
+        cursor = result['next_cursor']
+        if cursor is None:
+            break
+    assert received_object_ids == [object1.object_id, object2.object_id, object3.object_id]
+
+    for invalid_parameters in [{'limit': '0'}, {'limit': 'a'}, {'cursor': '-1'}]:
+        r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params=invalid_parameters)
+        assert r.status_code == 400
+
+
+def _count_shared_objects_queries(flask_server, token):
+    statements = []
+
+    def count_statement(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(sampledb.db.engine, 'before_cursor_execute', count_statement)
+    try:
+        r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers={'Authorization': 'Bearer ' + token})
+    finally:
+        sqlalchemy.event.remove(sampledb.db.engine, 'before_cursor_execute', count_statement)
+    assert r.status_code == 200
+    return r.json(), statements
+
+
+def test_get_objects_loads_referenced_entities_in_bulk(flask_server, component_token, action):
+    component, token = component_token
+    policy = {'access': {'data': True, 'action': True, 'users': True, 'files': True, 'comments': True, 'object_location_assignments': True}, 'permissions': {}}
+    data = {'name': {'_type': 'text', 'text': 'Object'}}
+    num_statements = []
+    num_entity_statements = []
+    for num_objects in (5, 20):
+        for _ in range(num_objects - len(shares.get_shares_for_component(component.id))):
+            # every object references its own users, action and location
+            creating_user, editing_user, responsible_user = [
+                logic.users.create_user(name='User', email='example@example.com', type=models.UserType.PERSON)
+                for _ in range(3)
+            ]
+            object_action = actions.create_action(
+                action_type_id=models.ActionType.SAMPLE_CREATION,
+                schema=action.schema,
+                instrument_id=None,
+                user_id=creating_user.id
+            )
+            location = locations.create_location(
+                name={'en': 'Location'},
+                description={'en': ''},
+                parent_location_id=None,
+                user_id=creating_user.id,
+                type_id=locations.LocationType.LOCATION
+            )
+            object = objects.create_object(user_id=creating_user.id, action_id=object_action.id, data=data)
+            objects.update_object(object.object_id, data=data, user_id=editing_user.id)
+            locations.assign_location_to_object(object.object_id, location.id, responsible_user.id, responsible_user.id, None)
+            shares.add_object_share(object.object_id, component.id, policy)
+        result, statements = _count_shared_objects_queries(flask_server, token)
+        assert len(result['objects']) == num_objects
+        assert len(result['actions']) == num_objects
+        assert len(result['locations']) == num_objects
+        assert len(result['users']) == 3 * num_objects
+        num_statements.append(len(statements))
+        num_entity_statements.append(len([
+            statement
+            for statement in statements
+            if re.search('\nFROM (users|fed_user_aliases|actions|locations) \n', statement)
+        ]))
+    # the referenced users, actions and locations are loaded with a fixed
+    # number of queries, so that only the queries for the objects themselves
+    # and for the translations of their actions depend on the number of
+    # shared objects
+    assert num_entity_statements[0] == num_entity_statements[1]
+    queries_per_object = (num_statements[1] - num_statements[0]) / 15
+    assert queries_per_object <= 7
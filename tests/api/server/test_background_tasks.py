@@ -0,0 +1,42 @@
+# coding: utf-8
+"""
+
+"""
+
+import requests
+import pytest
+
+import sampledb
+import sampledb.logic
+import sampledb.models
+
+
+@pytest.fixture
+def auth_user(flask_server):
+    with flask_server.app.app_context():
+        user = sampledb.logic.users.create_user(name="Basic User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+        sampledb.logic.authentication.add_other_authentication(user.id, 'username', 'password')
+        assert user.id is not None
+    return ('username', 'password'), user
+
+
+def test_get_background_task_metrics(flask_server, auth_user):
+    auth, user = auth_user
+    r = requests.get(flask_server.base_url + 'api/v1/background_tasks/metrics', auth=auth)
+    assert r.status_code == 403
+
+    sampledb.logic.users.set_user_administrator(user.id, True)
+    sampledb.db.session.add(sampledb.models.BackgroundTask(
+        type='send_mail',
+        auto_delete=True,
+        data={},
+        status=sampledb.models.BackgroundTaskStatus.POSTED
+    ))
+    sampledb.db.session.commit()
+    r = requests.get(flask_server.base_url + 'api/v1/background_tasks/metrics', auth=auth)
+    assert r.status_code == 200
+    assert r.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE sampledb_background_tasks_queued gauge\n' in r.text
+    assert 'sampledb_background_tasks_queued{type="send_mail"} 1.0\n' in r.text
+    assert 'sampledb_background_tasks_queued{type="dataverse_export"} 0.0\n' in r.text
+    assert '# TYPE sampledb_api_log_entries_dropped_total counter\n' in r.text
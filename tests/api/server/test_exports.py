@@ -0,0 +1,120 @@
+# coding: utf-8
+"""
+
+"""
+
+import requests
+import pytest
+
+import sampledb
+import sampledb.logic
+import sampledb.models
+
+
+@pytest.fixture
+def auth_user(flask_server):
+    with flask_server.app.app_context():
+        user = sampledb.logic.users.create_user(name="Basic User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+        sampledb.logic.authentication.add_other_authentication(user.id, 'username', 'password')
+        assert user.id is not None
+    return ('username', 'password'), user
+
+
+@pytest.fixture
+def auth(auth_user):
+    return auth_user[0]
+
+
+@pytest.fixture
+def user(auth_user):
+    return auth_user[1]
+
+
+def test_create_export_without_background_tasks(flask_server, auth):
+    flask_server.app.config['ENABLE_BACKGROUND_TASKS'] = False
+    r = requests.post(flask_server.base_url + 'api/v1/exports/', json={'file_extension': '.zip'}, auth=auth)
+    assert r.status_code == 400
+    assert r.json() == {
+        "message": "exports require background tasks to be enabled"
+    }
+
+
+def test_get_export(flask_server, auth, user):
+    with flask_server.app.app_context():
+        other_user = sampledb.logic.users.create_user(name="Other User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+        task = sampledb.models.BackgroundTask(
+            type='export',
+            auto_delete=False,
+            data={
+                'user_id': user.id,
+                'requesting_user_id': user.id,
+                'file_extension': '.zip',
+                'base_url': flask_server.base_url
+            },
+            status=sampledb.models.BackgroundTaskStatus.CLAIMED,
+            result={'progress': {'written_bytes': 1024}}
+        )
+        other_task = sampledb.models.BackgroundTask(
+            type='export',
+            auto_delete=False,
+            data={
+                'user_id': other_user.id,
+                'requesting_user_id': other_user.id,
+                'file_extension': '.zip',
+                'base_url': flask_server.base_url
+            },
+            status=sampledb.models.BackgroundTaskStatus.CLAIMED
+        )
+        sampledb.db.session.add(task)
+        sampledb.db.session.add(other_task)
+        sampledb.db.session.commit()
+        task_id = task.id
+        other_task_id = other_task.id
+
+    r = requests.get(flask_server.base_url + f'api/v1/exports/{task_id}', auth=auth)
+    assert r.status_code == 200
+    assert r.json() == {
+        'export_id': task_id,
+        'status': 'pending',
+        'progress': {'written_bytes': 1024}
+    }
+
+    r = requests.get(flask_server.base_url + f'api/v1/exports/{task_id}/file', auth=auth)
+    assert r.status_code == 404
+
+    r = requests.get(flask_server.base_url + f'api/v1/exports/{other_task_id}', auth=auth)
+    assert r.status_code == 404
+
+
+def test_get_export_file(flask_server, auth, user):
+    with flask_server.app.app_context():
+        task = sampledb.models.BackgroundTask(
+            type='export',
+            auto_delete=False,
+            data={
+                'user_id': user.id,
+                'requesting_user_id': user.id,
+                'file_extension': '.zip',
+                'base_url': flask_server.base_url
+            },
+            status=sampledb.models.BackgroundTaskStatus.CLAIMED
+        )
+        sampledb.db.session.add(task)
+        sampledb.db.session.commit()
+        task_id = task.id
+        success, result = sampledb.logic.background_tasks.background_export._store_export_result(task_id, 'sampledb_export.zip', 'application/zip', [b'Example', b' Content'])
+        assert success
+        task = sampledb.models.BackgroundTask.query.filter_by(id=task_id).first()
+        task.status = sampledb.models.BackgroundTaskStatus.DONE
+        sampledb.db.session.commit()
+
+    r = requests.get(flask_server.base_url + f'api/v1/exports/{task_id}', auth=auth)
+    assert r.status_code == 200
+    assert r.json()['status'] == 'done'
+    assert r.json()['size'] == len(b'Example Content')
+
+    r = requests.get(flask_server.base_url + f'api/v1/exports/{task_id}/file', auth=auth)
+    assert r.status_code == 200
+    assert r.content == b'Example Content'
+    assert r.headers['Content-Type'] == 'application/zip'
+    assert 'sampledb_export.zip' in r.headers['Content-Disposition']
@@ -0,0 +1,158 @@
+# coding: utf-8
+"""
+
+"""
+
+import hashlib
+import os
+
+import requests
+import pytest
+
+import sampledb
+import sampledb.logic
+import sampledb.models
+
+
+@pytest.fixture
+def auth_user(flask_server):
+    with flask_server.app.app_context():
+        user = sampledb.logic.users.create_user(name="Basic User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+        sampledb.logic.authentication.add_other_authentication(user.id, 'username', 'password')
+        assert user.id is not None
+    return ('username', 'password'), user
+
+
+@pytest.fixture
+def auth(auth_user):
+    return auth_user[0]
+
+
+@pytest.fixture
+def user(auth_user):
+    return auth_user[1]
+
+
+@pytest.fixture
+def object(user):
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Object Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        }
+    )
+    return sampledb.logic.objects.create_object(
+        action_id=action.id,
+        data={
+            'name': {
+                '_type': 'text',
+                'text': 'Example'
+            }
+        },
+        user_id=user.id
+    )
+
+
+def test_chunked_file_upload(flask_server, object, auth):
+    content = os.urandom(3000)
+    base_url = flask_server.base_url + f'api/v1/objects/{object.object_id}/file_uploads/'
+    r = requests.post(base_url, json={'original_file_name': 'test.bin', 'size': len(content)}, auth=auth)
+    assert r.status_code == 201
+    upload_id = r.json()['upload_id']
+    assert r.headers['Location'] == base_url + str(upload_id)
+    assert r.json() == {
+        'object_id': object.object_id,
+        'upload_id': upload_id,
+        'original_file_name': 'test.bin',
+        'size': len(content),
+        'received_size': 0
+    }
+
+    r = requests.put(base_url + f'{upload_id}/chunks/0', data=content[:1000], auth=auth)
+    assert r.status_code == 200
+    assert r.json()['received_size'] == 1000
+
+    r = requests.put(base_url + f'{upload_id}/chunks/2000', data=content[2000:], auth=auth)
+    assert r.status_code == 409
+    assert r.json()['received_size'] == 1000
+
+    r = requests.post(base_url + f'{upload_id}/finalize', auth=auth, allow_redirects=False)
+    assert r.status_code == 400
+    assert r.json() == {
+        'message': 'the file upload is incomplete'
+    }
+
+    # resume the upload
+    r = requests.get(base_url + str(upload_id), auth=auth)
+    assert r.status_code == 200
+    received_size = r.json()['received_size']
+    r = requests.put(base_url + f'{upload_id}/chunks/{received_size}', data=content[received_size:], auth=auth)
+    assert r.status_code == 200
+    assert r.json()['received_size'] == len(content)
+
+    r = requests.post(base_url + f'{upload_id}/finalize', json={'hash': {'algorithm': 'sha256', 'hexdigest': hashlib.sha256(b'').hexdigest()}}, auth=auth, allow_redirects=False)
+    assert r.status_code == 400
+    assert r.json() == {
+        'message': 'hash hexdigest mismatch'
+    }
+
+    r = requests.post(base_url + f'{upload_id}/finalize', json={'hash': {'algorithm': 'sha256', 'hexdigest': hashlib.sha256(content).hexdigest()}}, auth=auth, allow_redirects=False)
+    assert r.status_code == 201
+    assert r.headers['Location'] == flask_server.base_url + f'api/v1/objects/{object.object_id}/files/0'
+    files = sampledb.logic.files.get_files_for_object(object.object_id)
+    assert len(files) == 1
+    assert files[0].original_file_name == 'test.bin'
+    assert files[0].open().read() == content
+
+    r = requests.get(base_url + str(upload_id), auth=auth)
+    assert r.status_code == 404
+
+
+def test_delete_file_upload(flask_server, object, auth):
+    base_url = flask_server.base_url + f'api/v1/objects/{object.object_id}/file_uploads/'
+    r = requests.post(base_url, json={'original_file_name': 'test.bin', 'size': 10}, auth=auth)
+    assert r.status_code == 201
+    upload_id = r.json()['upload_id']
+    r = requests.delete(base_url + str(upload_id), auth=auth)
+    assert r.status_code == 204
+    r = requests.get(base_url + str(upload_id), auth=auth)
+    assert r.status_code == 404
+    r = requests.delete(base_url + str(upload_id), auth=auth)
+    assert r.status_code == 404
+
+
+def test_create_invalid_file_upload(flask_server, object, auth):
+    base_url = flask_server.base_url + f'api/v1/objects/{object.object_id}/file_uploads/'
+    r = requests.post(base_url, json={'original_file_name': 'test.bin'}, auth=auth)
+    assert r.status_code == 400
+    assert r.json() == {
+        'message': 'size must be a non-negative integer'
+    }
+    r = requests.post(base_url, json={'size': 10}, auth=auth)
+    assert r.status_code == 400
+    assert r.json() == {
+        'message': 'original_file_name must be set'
+    }
+    r = requests.post(base_url, json={'original_file_name': 'test.bin', 'size': 10, 'base64_content': ''}, auth=auth)
+    assert r.status_code == 400
+    assert r.json() == {
+        'message': "invalid key 'base64_content'"
+    }
+
+
+def test_file_upload_of_other_user(flask_server, object, user, auth):
+    other_user = sampledb.logic.users.create_user(name="Other User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+    sampledb.logic.object_permissions.set_user_object_permissions(object.object_id, other_user.id, sampledb.models.Permissions.WRITE)
+    file_upload = sampledb.logic.file_uploads.create_file_upload(object.object_id, other_user.id, 'test.bin', 10)
+    r = requests.get(flask_server.base_url + f'api/v1/objects/{object.object_id}/file_uploads/{file_upload.id}', auth=auth)
+    assert r.status_code == 404
+    r = requests.put(flask_server.base_url + f'api/v1/objects/{object.object_id}/file_uploads/{file_upload.id}/chunks/0', data=b'content', auth=auth)
+    assert r.status_code == 404
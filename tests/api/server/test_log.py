@@ -3,6 +3,8 @@
 
 """
 
+import contextlib
+
 import requests
 import pytest
 import secrets
@@ -73,3 +75,68 @@ def test_api_log_remove_token(flask_server, auth_user, action):
 
     api_log_entries = sampledb.logic.api_log.get_api_log_entries(api_token_id=api_token_id)
     assert len(api_log_entries) == 0
+
+
+def test_api_log_unbuffered(flask_server, auth_user, action):
+    flask_server.app.config['ENABLE_BUFFERED_API_LOG'] = False
+    auth, user = auth_user
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+
+    requests.get(flask_server.base_url + 'api/v1/objects/1/versions/0', headers=auth)
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_pending_log_entries == 0
+    api_log_entries = sampledb.models.APILogEntry.query.filter_by(api_token_id=api_token_id).all()
+    assert len(api_log_entries) == 1
+    assert api_log_entries[0].route == '/api/v1/objects/1/versions/0'
+
+
+def test_api_log_flush(flask_server, auth_user, action):
+    flask_server.app.config['ENABLE_BUFFERED_API_LOG'] = True
+    auth, user = auth_user
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    sampledb.logic.api_log.flush_log_entries()
+    statistics = sampledb.logic.api_log.get_log_writer_statistics()
+
+    for _ in range(3):
+        sampledb.logic.api_log.create_log_entry(api_token_id, sampledb.models.HTTPMethod.GET, '/api/v1/objects/')
+    sampledb.logic.api_log.flush_log_entries()
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_flushed_log_entries == statistics.num_flushed_log_entries + 3
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_pending_log_entries == 0
+    assert len(sampledb.models.APILogEntry.query.filter_by(api_token_id=api_token_id).all()) == 3
+
+
+def test_api_log_flush_removed_token(flask_server, auth_user, action):
+    flask_server.app.config['ENABLE_BUFFERED_API_LOG'] = True
+    auth, user = auth_user
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    sampledb.logic.api_log.flush_log_entries()
+    statistics = sampledb.logic.api_log.get_log_writer_statistics()
+
+    with sampledb.logic.api_log._get_log_writer().flush_lock:
+        # prevent the writer thread from writing the entry before the token is removed
+        sampledb.logic.api_log.create_log_entry(api_token_id, sampledb.models.HTTPMethod.GET, '/api/v1/objects/')
+        sampledb.logic.authentication.remove_authentication_method(api_token_id)
+    sampledb.logic.api_log.flush_log_entries()
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_dropped_log_entries == statistics.num_dropped_log_entries + 1
+    assert len(sampledb.models.APILogEntry.query.filter_by(api_token_id=api_token_id).all()) == 0
+
+
+def test_api_log_failed_flush(flask_server, auth_user, action, monkeypatch):
+    flask_server.app.config['ENABLE_BUFFERED_API_LOG'] = True
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    sampledb.logic.api_log.flush_log_entries()
+    statistics = sampledb.logic.api_log.get_log_writer_statistics()
+
+    def insert_log_entries(log_entries):
+        raise RuntimeError()
+
+    with sampledb.logic.api_log._get_log_writer().flush_lock:
+        # prevent the writer thread from writing the entry before insertion fails
+        sampledb.logic.api_log.create_log_entry(api_token_id, sampledb.models.HTTPMethod.GET, '/api/v1/objects/')
+        monkeypatch.setattr(sampledb.logic.api_log, '_insert_log_entries', insert_log_entries)
+    # the writer thread might try to write the entry first, logging the error
+    with contextlib.suppress(RuntimeError):
+        sampledb.logic.api_log.flush_log_entries()
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_failed_flushes == statistics.num_failed_flushes + 1
+    assert sampledb.logic.api_log.get_log_writer_statistics().num_dropped_log_entries == statistics.num_dropped_log_entries + 1
+    text = sampledb.logic.api_log.get_log_writer_statistics_as_prometheus_text()
+    assert f'sampledb_api_log_flushes_failed_total {float(statistics.num_failed_flushes + 1)!r}\n' in text
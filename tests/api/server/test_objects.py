@@ -849,6 +849,77 @@ def test_get_objects_with_limit_and_offset(flask_server, auth, user, action):
     ]
 
 
+
+def test_get_objects_with_cursors(flask_server, auth, user, action):
+    for i in range(10):
+        data = {
+            'name': {
+                '_type': 'text',
+                'text': str(i)
+            }
+        }
+        sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"limit": 4}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [
+        object["data"]["name"]["text"]
+        for object in r.json()
+    ] == ['9', '8', '7', '6']
+    assert 'prev' not in r.links
+
+    r = requests.get(r.links['next']['url'], auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [
+        object["data"]["name"]["text"]
+        for object in r.json()
+    ] == ['5', '4', '3', '2']
+
+    next_url = r.links['next']['url']
+    r = requests.get(r.links['prev']['url'], auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [
+        object["data"]["name"]["text"]
+        for object in r.json()
+    ] == ['9', '8', '7', '6']
+    assert 'prev' not in r.links
+
+    r = requests.get(next_url, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [
+        object["data"]["name"]["text"]
+        for object in r.json()
+    ] == ['1', '0']
+    assert 'next' not in r.links
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"limit": 4, "after": "invalid"}, auth=auth, allow_redirects=False)
+    assert r.status_code == 400
+
+
+def test_get_objects_with_embedded_actions_and_users(flask_server, auth, user, action):
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Example'
+        }
+    }
+    object = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    sampledb.logic.action_permissions.set_action_permissions_for_all_users(object.action_id, sampledb.models.Permissions.READ)
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"embed_action": 1, "embed_user": 1}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    objects = r.json()
+    assert len(objects) == 1
+    r = requests.get(flask_server.base_url + f'api/v1/objects/{object.object_id}/versions/{object.version_id}', params={"embed_action": 1, "embed_user": 1}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert objects[0]['action'] == r.json()['action']
+    assert objects[0]['user'] == r.json()['user']
+    assert objects[0]['action']['action_id'] == action.id
+    assert objects[0]['user']['user_id'] == user.id
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert 'action' not in r.json()[0]
+    assert 'user' not in r.json()[0]
+
 def test_get_objects_with_name_only(flask_server, auth, user):
     action = sampledb.logic.actions.create_action(
         action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
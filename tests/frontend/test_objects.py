@@ -10,6 +10,7 @@ from copy import deepcopy
 
 import requests
 import pytest
+import sqlalchemy
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 
@@ -433,6 +434,77 @@ def test_get_object(flask_server, user):
     assert 'Save' not in r.content.decode('utf-8')
 
 
+# upper bound for the number of queries needed for rendering a simple object
+# page, this should be lowered whenever queries are removed from the page
+MAX_OBJECT_PAGE_QUERIES = 72
+
+
+def _count_object_page_queries(flask_server, session, object_id):
+    statements = []
+
+    def count_statement(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(sampledb.db.engine, 'before_cursor_execute', count_statement)
+    try:
+        r = session.get(flask_server.base_url + 'objects/{}'.format(object_id))
+    finally:
+        sqlalchemy.event.remove(sampledb.db.engine, 'before_cursor_execute', count_statement)
+    assert r.status_code == 200
+    return len(statements)
+
+
+def test_get_object_query_count(flask_server, user):
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'users': {
+                    'title': 'Users',
+                    'type': 'array',
+                    'items': {
+                        'title': 'User',
+                        'type': 'user'
+                    }
+                }
+            },
+            'required': ['name']
+        }
+    )
+    objects = [
+        sampledb.logic.objects.create_object(
+            data={
+                'name': {'_type': 'text', 'text': 'Example'},
+                'users': [
+                    {'_type': 'user', 'user_id': user.id}
+                ] * num_user_references
+            },
+            user_id=user.id,
+            action_id=action.id
+        )
+        for num_user_references in (1, 10)
+    ]
+    session = requests.session()
+    assert session.get(flask_server.base_url + 'users/{}/autologin'.format(user.id)).status_code == 200
+    # render once to fill caches that are not specific to a request
+    for object in objects:
+        _count_object_page_queries(flask_server, session, object.object_id)
+
+    num_queries = [
+        _count_object_page_queries(flask_server, session, object.object_id)
+        for object in objects
+    ]
+    assert num_queries[0] <= MAX_OBJECT_PAGE_QUERIES
+    # repeated references to the same user should not cause additional queries
+    assert num_queries[1] == num_queries[0]
+
+
 def test_get_object_no_permissions(flask_server, user):
     schema = json.load(open(os.path.join(SCHEMA_DIR, 'minimal.json'), encoding="utf-8"))
     action = sampledb.logic.actions.create_action(
@@ -3,8 +3,14 @@
 
 """
 
+import secrets
+
+import flask
 import pytest
+
+import sampledb
 from sampledb.logic import errors, users, authentication
+from sampledb.models import Authentication, AuthenticationType
 
 
 @pytest.fixture
@@ -76,4 +82,115 @@ def test_delete_two_factor_authentication_method(user_id):
     authentication.delete_two_factor_authentication_method(method_id)
     assert not authentication.get_two_factor_authentication_methods(user_id)
     with pytest.raises(errors.TwoFactorAuthenticationMethodDoesNotExistError):
-        authentication.delete_two_factor_authentication_method(method_id)
\ No newline at end of file
+        authentication.delete_two_factor_authentication_method(method_id)
+
+@pytest.fixture
+def bcrypt_calls(monkeypatch):
+    authentication.invalidate_verified_credentials()
+    calls = []
+    validate_password_hash = authentication._validate_password_hash
+
+    def counting_validate_password_hash(password, password_hash):
+        calls.append(password_hash)
+        return validate_password_hash(password, password_hash)
+
+    monkeypatch.setattr(authentication, '_validate_password_hash', counting_validate_password_hash)
+    yield calls
+    authentication.invalidate_verified_credentials()
+
+
+def test_login_via_api_token_cache(user_id, bcrypt_calls):
+    api_token = secrets.token_hex(32)
+    authentication.add_api_token(user_id, api_token, 'Test Token')
+    with flask.current_app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert len(bcrypt_calls) == 1
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert len(bcrypt_calls) == 1
+        # a token with the same identification part is verified again
+        assert authentication.login_via_api_token(api_token[:8] + '0' * 56) is None
+        assert len(bcrypt_calls) == 2
+
+        authentication_method = Authentication.query.filter_by(user_id=user_id, type=AuthenticationType.API_TOKEN).first()
+        authentication.remove_authentication_method(authentication_method.id)
+        assert authentication.login_via_api_token(api_token) is None
+
+    authentication.add_api_token(user_id, api_token, 'Test Token')
+    with pytest.raises(errors.AuthenticationMethodAlreadyExists):
+        authentication.add_api_token(user_id, api_token[:8] + secrets.token_hex(28), 'Test Token')
+
+
+def test_login_cache(user_id, bcrypt_calls):
+    authentication.add_other_authentication(user_id, 'username', 'password')
+    assert authentication.login('username', 'password').id == user_id
+    assert authentication.login('username', 'password').id == user_id
+    assert len(bcrypt_calls) == 1
+    assert authentication.login('username', 'wrong password') is None
+    assert len(bcrypt_calls) == 2
+
+    authentication_method = Authentication.query.filter_by(user_id=user_id, type=AuthenticationType.OTHER).first()
+    authentication.change_password_in_authentication_method(authentication_method.id, 'new password')
+    assert authentication.login('username', 'password') is None
+    assert authentication.login('username', 'new password').id == user_id
+
+
+def test_login_cache_disabled(user_id, bcrypt_calls):
+    authentication.add_other_authentication(user_id, 'username', 'password')
+    flask.current_app.config['API_AUTHENTICATION_CACHE_TIME'], cache_time = 0, flask.current_app.config['API_AUTHENTICATION_CACHE_TIME']
+    try:
+        assert authentication.login('username', 'password').id == user_id
+        assert authentication.login('username', 'password').id == user_id
+    finally:
+        flask.current_app.config['API_AUTHENTICATION_CACHE_TIME'] = cache_time
+    assert len(bcrypt_calls) == 2
+
+
+def test_login_via_api_access_token(user_id):
+    token_data = authentication.generate_api_access_token(user_id, 'Test Token')
+    with flask.current_app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_access_token(token_data['access_token']).id == user_id
+        assert authentication.login_via_api_refresh_token(token_data['refresh_token']).id == user_id
+
+        authentication_method = Authentication.query.filter_by(user_id=user_id, type=AuthenticationType.API_ACCESS_TOKEN).first()
+        authentication_method.login = dict(authentication_method.login, expiration_utc_datetime='2000-01-01 00:00:00')
+        sampledb.db.session.commit()
+        assert authentication.login_via_api_access_token(token_data['access_token']) is None
+        assert authentication.login_via_api_refresh_token(token_data['refresh_token']) is None
+
+
+def test_remove_expired_api_access_tokens(user_id):
+    expired_token_data = authentication.generate_api_access_token(user_id, 'Expired Token')
+    token_data = authentication.generate_api_access_token(user_id, 'Test Token')
+    authentication_method = Authentication.query.filter(Authentication.login['access_token'].astext == expired_token_data['access_token']).first()
+    authentication_method.login = dict(authentication_method.login, expiration_utc_datetime='2000-01-01 00:00:00')
+    sampledb.db.session.commit()
+    sampledb.db.session.add(sampledb.models.APILogEntry(authentication_method.id, sampledb.models.HTTPMethod.GET, '/api/v1/objects/'))
+    sampledb.db.session.commit()
+
+    assert authentication.remove_expired_api_access_tokens() == 1
+    assert authentication.remove_expired_api_access_tokens() == 0
+    access_tokens = [
+        authentication_method.login['access_token']
+        for authentication_method in Authentication.query.filter_by(user_id=user_id, type=AuthenticationType.API_ACCESS_TOKEN).all()
+    ]
+    assert access_tokens == [token_data['access_token']]
+
+
+def test_remove_expired_api_access_tokens_task(user_id):
+    token_data = authentication.generate_api_access_token(user_id, 'Expired Token')
+    authentication_method = Authentication.query.filter_by(user_id=user_id, type=AuthenticationType.API_ACCESS_TOKEN).first()
+    authentication_method.login = dict(authentication_method.login, expiration_utc_datetime='2000-01-01 00:00:00')
+    sampledb.db.session.commit()
+
+    sampledb.logic.background_tasks.core.next_periodic_task_times.clear()
+    sampledb.logic.background_tasks.core._post_due_periodic_tasks()
+    task = sampledb.models.BackgroundTask.query.filter_by(type='remove_expired_api_access_tokens').first()
+    assert task is not None
+    assert task.status == sampledb.models.BackgroundTaskStatus.POSTED
+
+    # the task is only posted again after the interval
+    sampledb.logic.background_tasks.core._post_due_periodic_tasks()
+    assert sampledb.models.BackgroundTask.query.filter_by(type='remove_expired_api_access_tokens').count() == 1
+
+    assert sampledb.logic.background_tasks.core._handle_background_task(task.type, task.data, task.id) == sampledb.models.BackgroundTaskStatus.DONE
+    assert Authentication.query.filter(Authentication.login['access_token'].astext == token_data['access_token']).first() is None
@@ -1,6 +1,9 @@
+import datetime
+
 from sampledb import db
 import sampledb.logic.background_tasks
 import sampledb.logic.background_tasks.core
+import sampledb.models
 import time
 
 
@@ -55,3 +58,214 @@ def test_background_tasks(app):
     # stopped now
     sampledb.logic.background_tasks.stop_handler_threads(app)
     app.config['ENABLE_BACKGROUND_TASKS'] = False
+
+
+def test_claim_background_tasks_by_priority(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    # handle tasks manually instead of in handler threads
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    try:
+        low_priority_task = sampledb.logic.background_tasks.post_background_task('test', {'value': 1}, False, priority=-1)[1]
+        default_priority_task = sampledb.logic.background_tasks.post_background_task('test', {'value': 2}, False)[1]
+        high_priority_task = sampledb.logic.background_tasks.post_background_task('test', {'value': 3}, False, priority=1)[1]
+    finally:
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+    assert default_priority_task.priority == 0
+
+    claimed_task_ids = []
+    while True:
+        task = sampledb.logic.background_tasks.core._claim_background_task()
+        if task is None:
+            break
+        claimed_task_ids.append(task[0])
+    sampledb.logic.background_tasks.core._num_running_tasks.clear()
+    assert claimed_task_ids == [high_priority_task.id, default_priority_task.id, low_priority_task.id]
+    db.session.expire_all()
+    assert sampledb.logic.background_tasks.core.get_background_task(high_priority_task.id).status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.CLAIMED
+    assert sampledb.logic.background_tasks.core.get_background_task(high_priority_task.id).num_attempts == 1
+
+
+def test_background_task_concurrency_limit(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test'] = sampledb.logic.background_tasks.core.TaskTypePolicy(priority=1, max_concurrency=1)
+    try:
+        limited_task_ids = [
+            sampledb.logic.background_tasks.post_background_task('test', {'value': i}, False)[1].id
+            for i in range(2)
+        ]
+        other_task_id = sampledb.logic.background_tasks.post_background_task('other_test', {}, False)[1].id
+
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == limited_task_ids[0]
+        # the second task of the limited type has to wait for the first one
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == other_task_id
+        assert sampledb.logic.background_tasks.core._claim_background_task() is None
+        sampledb.logic.background_tasks.core._num_running_tasks['test'] -= 1
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == limited_task_ids[1]
+    finally:
+        del sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test']
+        sampledb.logic.background_tasks.core._num_running_tasks.clear()
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+
+
+def test_retry_background_task(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test'] = sampledb.logic.background_tasks.core.TaskTypePolicy(max_attempts=2, retry_delay=60)
+    try:
+        task_id = sampledb.logic.background_tasks.post_background_task('test', {}, False)[1].id
+
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+        sampledb.logic.background_tasks.core._finish_background_task(task_id, 'test', sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED)
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.POSTED
+        assert task.num_attempts == 1
+        assert task.next_attempt_date is not None
+        # the task is only claimed again after the retry delay
+        assert sampledb.logic.background_tasks.core._claim_background_task() is None
+
+        task.next_attempt_date = None
+        db.session.commit()
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+        sampledb.logic.background_tasks.core._finish_background_task(task_id, 'test', sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED)
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED
+        assert task.num_attempts == 2
+    finally:
+        del sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test']
+        sampledb.logic.background_tasks.core._num_running_tasks.clear()
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+
+
+def test_fail_stale_claimed_tasks(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test'] = sampledb.logic.background_tasks.core.TaskTypePolicy(max_attempts=2, retry_delay=60)
+    try:
+        task_id = sampledb.logic.background_tasks.post_background_task('test', {}, False)[1].id
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+
+        # tasks with a recent heartbeat are still being handled
+        sampledb.logic.background_tasks.core._fail_stale_claimed_tasks()
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.CLAIMED
+
+        # the process handling the task might have crashed, so it is posted again
+        task.last_heartbeat_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=sampledb.logic.background_tasks.core.STALE_CLAIM_TIMEOUT + 1)
+        db.session.commit()
+        sampledb.logic.background_tasks.core._fail_stale_claimed_tasks()
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.POSTED
+        assert task.num_attempts == 1
+
+        task.next_attempt_date = None
+        db.session.commit()
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        task.last_heartbeat_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=sampledb.logic.background_tasks.core.STALE_CLAIM_TIMEOUT + 1)
+        db.session.commit()
+        sampledb.logic.background_tasks.core._fail_stale_claimed_tasks()
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED
+        assert task.num_attempts == 2
+    finally:
+        del sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test']
+        sampledb.logic.background_tasks.core._num_running_tasks.clear()
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+
+
+def test_fail_stale_claimed_task_finished_concurrently(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test'] = sampledb.logic.background_tasks.core.TaskTypePolicy(max_attempts=2, retry_delay=60)
+    try:
+        task_id = sampledb.logic.background_tasks.post_background_task('test', {}, False)[1].id
+        assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+        # the handler finishes the task after it has been found to be stale
+        sampledb.logic.background_tasks.core._finish_background_task(task_id, 'test', sampledb.logic.background_tasks.core.BackgroundTaskStatus.DONE)
+        sampledb.logic.background_tasks.core._finish_background_task(
+            task_id,
+            'test',
+            sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED,
+            conditions=(sampledb.models.BackgroundTask.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.CLAIMED,)
+        )
+        task = sampledb.logic.background_tasks.core.get_background_task(task_id)
+        assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.DONE
+    finally:
+        del sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['test']
+        sampledb.logic.background_tasks.core._num_running_tasks.clear()
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+
+
+def test_background_task_metrics():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(10):
+        db.session.add(sampledb.models.FinishedBackgroundTask(
+            type='send_mail',
+            status=sampledb.models.BackgroundTaskStatus.DONE if i < 9 else sampledb.models.BackgroundTaskStatus.FAILED,
+            num_attempts=1 if i < 8 else 2,
+            posted_date=now - datetime.timedelta(seconds=60),
+            started_date=now - datetime.timedelta(seconds=60 - i - 1),
+            finished_date=now - datetime.timedelta(seconds=60 - i - 1) + datetime.timedelta(seconds=2)
+        ))
+    # tasks finished outside of the time window are ignored
+    db.session.add(sampledb.models.FinishedBackgroundTask(
+        type='send_mail',
+        status=sampledb.models.BackgroundTaskStatus.DONE,
+        num_attempts=1,
+        posted_date=now - datetime.timedelta(hours=3),
+        started_date=now - datetime.timedelta(hours=3),
+        finished_date=now - datetime.timedelta(hours=3)
+    ))
+    db.session.add(sampledb.models.BackgroundTask(
+        type='webhook_send',
+        auto_delete=True,
+        data={},
+        status=sampledb.models.BackgroundTaskStatus.CLAIMED
+    ))
+    db.session.commit()
+
+    metrics = {
+        type_metrics.type: type_metrics
+        for type_metrics in sampledb.logic.background_tasks.metrics.get_background_task_metrics(time_window=60 * 60)
+    }
+    assert set(sampledb.logic.background_tasks.core.HANDLERS).issubset(metrics)
+    assert metrics['webhook_send'].num_running_tasks == 1
+    assert metrics['webhook_send'].num_finished_tasks == 0
+    assert metrics['webhook_send'].wait_time_p50 is None
+    send_mail_metrics = metrics['send_mail']
+    assert send_mail_metrics.num_queued_tasks == 0
+    assert send_mail_metrics.num_done_tasks == 9
+    assert send_mail_metrics.num_failed_tasks == 1
+    assert send_mail_metrics.num_retried_tasks == 2
+    assert abs(send_mail_metrics.throughput - 10 / 60) < 1e-9
+    assert abs(send_mail_metrics.wait_time_p50 - 5.5) < 0.01
+    assert abs(send_mail_metrics.wait_time_p95 - 9.55) < 0.01
+    assert abs(send_mail_metrics.run_time_p50 - 2) < 0.01
+    assert abs(send_mail_metrics.run_time_sum - 20) < 0.01
+    assert abs(send_mail_metrics.wait_time_sum - 55) < 0.01
+
+    text = sampledb.logic.background_tasks.metrics.get_background_task_metrics_as_prometheus_text(time_window=60 * 60)
+    assert 'sampledb_background_tasks_running{type="webhook_send"} 1.0\n' in text
+    assert 'sampledb_background_tasks_finished{type="send_mail",status="failed"} 1.0\n' in text
+    assert 'sampledb_background_task_wait_seconds{type="webhook_send",quantile="0.5"}' not in text
+    assert '# TYPE sampledb_background_task_run_seconds summary\n' in text
+    assert 'sampledb_background_task_run_seconds_count{type="send_mail"} 10.0\n' in text
+    assert 'sampledb_background_task_run_seconds_count{type="webhook_send"} 0.0\n' in text
+
+
+def test_finished_background_task_record(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    try:
+        task_id = sampledb.logic.background_tasks.post_background_task('test', {}, True)[1].id
+    finally:
+        app.config['ENABLE_BACKGROUND_TASKS'] = False
+    assert sampledb.logic.background_tasks.core._claim_background_task()[0] == task_id
+    sampledb.logic.background_tasks.core._num_running_tasks.clear()
+    sampledb.logic.background_tasks.core._finish_background_task(task_id, 'test', sampledb.logic.background_tasks.core.BackgroundTaskStatus.DONE)
+    assert sampledb.models.BackgroundTask.query.filter_by(id=task_id).first() is None
+    finished_task = sampledb.models.FinishedBackgroundTask.query.filter_by(type='test').one()
+    assert finished_task.status == sampledb.models.BackgroundTaskStatus.DONE
+    assert finished_task.num_attempts == 1
+    assert finished_task.posted_date <= finished_task.started_date <= finished_task.finished_date
@@ -0,0 +1,51 @@
+# coding: utf-8
+"""
+
+"""
+
+from sampledb import db
+from sampledb.logic import database_indexes
+
+
+def test_declared_indexes_exist():
+    declared_indexes = database_indexes.get_declared_indexes()
+    assert ('object_log_entries', 'ix_object_log_entries_object_id_utc_datetime') in declared_indexes
+    assert ('objects_current', 'ix_objects_current_action_id') in declared_indexes
+    report = database_indexes.get_index_report()
+    assert report.missing_indexes == []
+
+
+def test_index_statistics():
+    statistics = {
+        index.index_name: index
+        for index in database_indexes.get_index_statistics()
+    }
+    assert statistics['ix_files_object_id'].table_name == 'files'
+    assert not statistics['ix_files_object_id'].is_unique
+    assert statistics['ix_files_object_id'].estimated_size is not None
+    assert statistics['objects_current_pkey'].is_unique
+    assert not statistics['objects_current_pkey'].is_unused
+    assert statistics['objects_current_search_vector_idx'].estimated_size is None
+
+
+def test_missing_index():
+    db.session.execute(db.text("DROP INDEX ix_comments_object_id"))
+    report = database_indexes.get_index_report()
+    assert report.missing_indexes == [('comments', 'ix_comments_object_id')]
+    db.session.rollback()
+
+
+def test_hot_queries_use_indexes():
+    # with sequential scans disabled, they are only chosen if no index can be
+    # used for a query, regardless of the size of the tables
+    assert database_indexes.get_sequential_scans(min_num_rows=0, disable_sequential_scans=True) == []
+
+
+def test_sequential_scans_are_reported():
+    db.session.execute(db.text("DROP INDEX ix_comments_object_id"))
+    sequential_scans = database_indexes.get_sequential_scans(min_num_rows=0, disable_sequential_scans=True)
+    assert [
+        (sequential_scan.query_name, sequential_scan.table_name)
+        for sequential_scan in sequential_scans
+    ] == [('comments of an object', 'comments')]
+    db.session.rollback()
@@ -0,0 +1,182 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+
+import sampledb
+import sampledb.logic
+from sampledb.logic import effective_object_permissions, object_permissions, groups, projects, instruments
+from sampledb.models import User, UserType, Action, Instrument, Permissions, EffectiveObjectPermissions
+
+
+@pytest.fixture
+def users():
+    names = ['User 1', 'User 2', 'User 3']
+    users = [User(name=name, email="example@example.com", type=UserType.PERSON) for name in names]
+    for user in users:
+        sampledb.db.session.add(user)
+        sampledb.db.session.commit()
+        # force attribute refresh
+        assert user.id is not None
+    return users
+
+
+@pytest.fixture
+def instrument():
+    instrument = Instrument()
+    sampledb.db.session.add(instrument)
+    sampledb.db.session.commit()
+    # force attribute refresh
+    assert instrument.id is not None
+    return instrument
+
+
+@pytest.fixture
+def action(instrument):
+    action = Action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        },
+        instrument_id=instrument.id
+    )
+    sampledb.db.session.add(action)
+    sampledb.db.session.commit()
+    # force attribute refresh
+    assert action.id is not None
+    return action
+
+
+@pytest.fixture
+def object(users, action):
+    return sampledb.logic.objects.create_object(user_id=users[0].id, action_id=action.id, data={
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        }
+    })
+
+
+def _get_effective_permissions_int(user_id, object_id):
+    return max(
+        [
+            row.permissions_int
+            for row in EffectiveObjectPermissions.query.filter_by(user_id=user_id, object_id=object_id).all()
+        ],
+        default=0
+    )
+
+
+def test_effective_object_permissions_for_new_object(users, object):
+    assert _get_effective_permissions_int(users[0].id, object.id) == 3
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_user_permissions(users, object):
+    object_permissions.set_user_object_permissions(object.id, users[1].id, Permissions.WRITE)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 2
+    object_permissions.set_user_object_permissions(object.id, users[1].id, Permissions.NONE)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_all_users(users, object):
+    object_permissions.set_object_permissions_for_all_users(object.id, Permissions.READ)
+    assert _get_effective_permissions_int(None, object.id) == 1
+    assert object_permissions.get_user_object_permissions(object.id, users[1].id) == Permissions.READ
+    object_permissions.set_object_permissions_for_all_users(object.id, Permissions.NONE)
+    assert _get_effective_permissions_int(None, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_groups(users, object):
+    group_id = groups.create_group("Example Group", "", users[1].id).id
+    object_permissions.set_group_object_permissions(object.id, group_id, Permissions.WRITE)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 2
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+    groups.add_user_to_group(group_id, users[2].id)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 2
+    groups.remove_user_from_group(group_id, users[2].id)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+    groups.delete_group(group_id)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_projects(users, object):
+    project_id = projects.create_project("Example Project", "", users[1].id).id
+    object_permissions.set_project_object_permissions(object.id, project_id, Permissions.WRITE)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 2
+    projects.add_user_to_project(project_id, users[2].id, Permissions.READ)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 1
+    projects.update_user_project_permissions(project_id, users[2].id, Permissions.GRANT)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 2
+    projects.remove_user_from_project(project_id, users[2].id)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+
+    group_id = groups.create_group("Example Group", "", users[2].id).id
+    projects.add_group_to_project(project_id, group_id, Permissions.READ)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 1
+    projects.update_group_project_permissions(project_id, group_id, Permissions.WRITE)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 2
+    projects.remove_group_from_project(project_id, group_id)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+    projects.delete_project(project_id)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_instrument_responsible_users(users, instrument, object):
+    instruments.add_instrument_responsible_user(instrument.id, users[1].id)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 3
+    instruments.set_instrument_responsible_users(instrument.id, [users[2].id])
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert _get_effective_permissions_int(users[2].id, object.id) == 3
+    instruments.remove_instrument_responsible_user(instrument.id, users[2].id)
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_effective_object_permissions_for_changed_action_instrument(users, instrument, action, object):
+    instruments.add_instrument_responsible_user(instrument.id, users[1].id)
+    other_instrument = Instrument()
+    sampledb.db.session.add(other_instrument)
+    sampledb.db.session.commit()
+    instruments.add_instrument_responsible_user(other_instrument.id, users[2].id)
+    assert _get_effective_permissions_int(users[1].id, object.id) == 3
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
+    action.instrument_id = other_instrument.id
+    effective_object_permissions.update_effective_object_permissions_for_actions([action.id])
+    sampledb.db.session.commit()
+    assert _get_effective_permissions_int(users[1].id, object.id) == 0
+    assert _get_effective_permissions_int(users[2].id, object.id) == 3
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+
+def test_rebuild_effective_object_permissions(users, object):
+    object_permissions.set_user_object_permissions(object.id, users[1].id, Permissions.READ)
+    EffectiveObjectPermissions.query.filter_by(user_id=users[1].id).delete()
+    sampledb.db.session.add(EffectiveObjectPermissions(user_id=users[2].id, object_id=object.id, permissions_int=3, requires_anonymous_users=False, requires_instruments=False))
+    sampledb.db.session.commit()
+    differences = effective_object_permissions.verify_effective_object_permissions()
+    assert len(differences) == 2
+    assert {(difference.user_id, difference.is_missing) for difference in differences} == {(users[1].id, True), (users[2].id, False)}
+    effective_object_permissions.rebuild_effective_object_permissions()
+    sampledb.db.session.commit()
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+    assert _get_effective_permissions_int(users[1].id, object.id) == 1
+    assert _get_effective_permissions_int(users[2].id, object.id) == 0
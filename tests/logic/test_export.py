@@ -5,6 +5,7 @@
 
 import io
 import json
+import os
 import sys
 import tarfile
 import zipfile
@@ -276,6 +277,37 @@ def test_zip_export(user, app):
             assert text_file.read() == b'Example Content'
 
 
+def test_export_task(user, app):
+    set_up_state(user)
+    object_id = sampledb.logic.objects.get_objects()[0].id
+
+    with app.app_context():
+        success, result = sampledb.logic.background_tasks.background_export.handle_export_task({
+            'user_id': user.id,
+            'requesting_user_id': user.id,
+            'file_extension': '.zip',
+            'base_url': 'http://localhost/'
+        }, None)
+    assert success
+    assert result['file_name'] == 'sampledb_export.zip'
+    assert result['mime_type'] == 'application/zip'
+    assert os.path.basename(result['file_path']) == 'sampledb_export.zip'
+    assert os.path.getsize(result['file_path']) == result['size']
+    with zipfile.ZipFile(result['file_path']) as zip_file:
+        assert zip_file.testzip() is None
+        assert f'sampledb_export/objects/{object_id}/files/0/test.txt' in zip_file.namelist()
+
+    with app.app_context():
+        success, result = sampledb.logic.background_tasks.background_export.handle_export_task({
+            'user_id': user.id,
+            'requesting_user_id': user.id,
+            'file_extension': '.exe',
+            'base_url': 'http://localhost/'
+        }, None)
+    assert not success
+    assert result == {'error_message': 'Unknown export format.'}
+
+
 def test_tar_gz_export(user, app):
     set_up_state(user)
     object_id = sampledb.logic.objects.get_objects()[0].id
@@ -307,6 +339,52 @@ def test_tar_gz_export(user, app):
             assert text_file.read() == b'Example Content'
 
 
+class _UnseekableBytesIO(io.BytesIO):
+    def seekable(self):
+        return False
+
+
+def test_generate_archive_files():
+    opened_file_names = []
+
+    def open_file(file_name, content):
+        opened_file_names.append(file_name)
+        return io.BytesIO(content)
+
+    large_content = b'0123456789' * export.CHUNK_SIZE
+    archive_files = {
+        'text.txt': 'Text',
+        'binary.bin': b'Binary',
+        'large.bin': lambda: open_file('large.bin', large_content),
+        'lazy.bin': lambda: open_file('lazy.bin', b'Lazy'),
+        'unseekable.bin': lambda: _UnseekableBytesIO(large_content),
+    }
+
+    zip_chunks = export.generate_zip_file(archive_files)
+    assert opened_file_names == []
+    zip_chunks = list(zip_chunks)
+    assert opened_file_names == ['large.bin', 'lazy.bin']
+    assert len(zip_chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b''.join(zip_chunks))) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == list(archive_files)
+        assert zip_file.read('text.txt') == b'Text'
+        assert zip_file.read('binary.bin') == b'Binary'
+        assert zip_file.read('large.bin') == large_content
+        assert zip_file.read('lazy.bin') == b'Lazy'
+        assert zip_file.read('unseekable.bin') == large_content
+
+    tar_gz_chunks = list(export.generate_tar_gz_file(archive_files))
+    assert len(tar_gz_chunks) > 1
+    with tarfile.open('sampledb_export.tar.gz', 'r:gz', fileobj=io.BytesIO(b''.join(tar_gz_chunks))) as tar_file:
+        assert tar_file.getnames() == list(archive_files)
+        assert tar_file.extractfile('text.txt').read() == b'Text'
+        assert tar_file.extractfile('binary.bin').read() == b'Binary'
+        assert tar_file.extractfile('large.bin').read() == large_content
+        assert tar_file.extractfile('lazy.bin').read() == b'Lazy'
+        assert tar_file.extractfile('unseekable.bin').read() == large_content
+
+
 def test_eln_export(user, app):
     set_up_state(user)
     object_id = sampledb.logic.objects.get_objects()[0].id
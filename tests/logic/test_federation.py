@@ -30,6 +30,7 @@ from sampledb.logic.federation.locations import parse_location, shared_location_
 from sampledb.logic.federation.markdown_images import parse_import_markdown_image
 from sampledb.logic.federation.object_location_assignments import parse_import_object_location_assignment
 from sampledb.logic.federation.objects import shared_object_preprocessor, parse_import_object
+from sampledb.logic.federation.references import ReferenceCollector
 from sampledb.logic.federation.users import parse_user, shared_user_preprocessor, parse_import_user
 from sampledb.logic.federation.update import update_shares
 from sampledb.logic.federation.components import parse_import_component_info
@@ -1774,6 +1775,24 @@ def test_update_action(component):
     assert log_entries[0].utc_datetime >= log_entries[1].utc_datetime
 
 
+def test_update_action_instrument_updates_object_permissions(component, user):
+    action = parse_import_action(deepcopy(ACTION_DATA), component)
+    object = create_object(action_id=action.id, data={'name': {'_type': 'text', 'text': 'Example'}}, user_id=user.id)
+    responsible_user = User(name='Responsible User', email='example@example.com', type=UserType.PERSON)
+    db.session.add(responsible_user)
+    db.session.commit()
+    instruments.add_instrument_responsible_user(action.instrument.id, responsible_user.id)
+    assert object_permissions.get_user_object_permissions(object.id, responsible_user.id) == Permissions.GRANT
+
+    action_data = deepcopy(ACTION_DATA)
+    action_data['instrument'] = {
+        'instrument_id': 7,
+        'component_uuid': UUID_1
+    }
+    parse_import_action(action_data, component)
+    assert object_permissions.get_user_object_permissions(object.id, responsible_user.id) == Permissions.NONE
+
+
 def test_parse_action_invalid_data():
     _invalid_component_uuid_test(ACTION_DATA, parse_action)
     _invalid_id_test(ACTION_DATA, 'action_id', parse_action)
@@ -3046,7 +3065,7 @@ def test_shared_object_preprocessor(complex_object, app):
                 'object_location_assignments': True
             }
         }
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_object = shared_object_preprocessor(complex_object.object_id, policy, refs, markdown_images)
 
@@ -3132,7 +3151,7 @@ def test_shared_object_preprocessor_array(array_object):
             'object_location_assignments': True
         }
     }
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_object = shared_object_preprocessor(array_object.object_id, policy, refs, markdown_images)
 
@@ -3157,7 +3176,7 @@ def test_shared_object_preprocessor_array_object(array_object_object):
             'object_location_assignments': True
         }
     }
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_object = shared_object_preprocessor(array_object_object.object_id, policy, refs, markdown_images)
     assert processed_object['object_id'] == array_object_object.object_id
@@ -3184,7 +3203,7 @@ def test_shared_object_preprocessor_markdown_images(markdown_object, markdown_im
                 'object_location_assignments': True
             }
         }
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_object = shared_object_preprocessor(markdown_object.object_id, policy, refs, markdown_images)
 
@@ -3238,7 +3257,7 @@ def test_shared_object_preprocessor_modification_insert(complex_object, app):
             }
         }
 
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_object = shared_object_preprocessor(complex_object.object_id, policy, refs, markdown_images)
         assert 'license' in processed_object['versions'][0]['data']
@@ -3276,7 +3295,7 @@ def test_shared_object_preprocessor_modification_update(complex_object, app):
                 }
             }
         }
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_object = shared_object_preprocessor(complex_object.object_id, policy, refs, markdown_images)
 
@@ -3302,7 +3321,7 @@ def test_shared_object_preprocessor_file_references(file_object, app):
                 'object_location_assignments': True
             }
         }
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_object = shared_object_preprocessor(file_object.object_id, policy, refs, markdown_images)
         assert processed_object['versions'][0]['data']['file']['file_id'] == 0
@@ -3315,7 +3334,7 @@ def test_shared_action_preprocessor(action, component, app):
         type = action.type
         user = action.user
         instrument = action.instrument
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_action = shared_action_preprocessor(action.id, component, refs, markdown_images)
 
@@ -3348,12 +3367,12 @@ def test_shared_action_preprocessor(action, component, app):
 
 
 def test_shared_action_preprocessor_does_not_exist(action, component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     with pytest.raises(errors.ActionDoesNotExistError):
         shared_action_preprocessor(action.id + 1, component, refs, markdown_images)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
@@ -3380,7 +3399,7 @@ def test_shared_action_preprocessor_markdown_images(simple_action, markdown_imag
             short_description='![image](/markdown_images/' + md2.file_name + ')'
         )
 
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_action = shared_action_preprocessor(simple_action.id, component, refs, markdown_images)
 
@@ -3406,7 +3425,7 @@ def test_shared_action_preprocessor_markdown_images(simple_action, markdown_imag
             'description': '![image](/markdown_images/' + flask.current_app.config['FEDERATION_UUID'] + '/' + md0.file_name + ')',
             'short_description': '![image](/markdown_images/' + flask.current_app.config['FEDERATION_UUID'] + '/' + md2.file_name + ')'
         }
-        assert refs == [('action_types', simple_action.type_id)]
+        assert list(refs) == [('action_types', simple_action.type_id)]
 
         assert markdown_images == {
             md0.file_name: base64.b64encode(md0.content).decode('utf-8'),
@@ -3417,7 +3436,7 @@ def test_shared_action_preprocessor_markdown_images(simple_action, markdown_imag
 
 def test_shared_action_type_preprocessor(component):
     action_type = get_action_type(-99)
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_action = shared_action_type_preprocessor(action_type.id, component, refs, markdown_images)
 
@@ -3442,25 +3461,25 @@ def test_shared_action_type_preprocessor(component):
         assert value['view_text'] == action_type.view_text.get(lang_code)
         assert value['perform_text'] == action_type.perform_text.get(lang_code)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_action_type_preprocessor_does_not_exist(component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
 
     with pytest.raises(errors.ActionTypeDoesNotExistError):
         shared_action_type_preprocessor(1, component, refs, markdown_images)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_instrument_preprocessor(instrument, component, app):
     app.config['SERVER_NAME'] = 'localhost'
     with app.app_context():
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_instrument = shared_instrument_preprocessor(instrument.id, component, refs, markdown_images)
 
@@ -3478,7 +3497,7 @@ def test_shared_instrument_preprocessor(instrument, component, app):
             assert value['short_description'] == instrument.short_description.get(lang_code)
             assert value['notes'] == instrument.notes.get(lang_code)
 
-        assert refs == []
+        assert list(refs) == []
         assert markdown_images == {}
 
 
@@ -3510,7 +3529,7 @@ def test_shared_instrument_preprocessor_markdown_images(component, markdown_imag
 
     app.config['SERVER_NAME'] = 'localhost'
     with app.app_context():
-        refs = []
+        refs = ReferenceCollector()
         markdown_images = {}
         processed_instrument = shared_instrument_preprocessor(instrument.id, component, refs, markdown_images)
 
@@ -3534,7 +3553,7 @@ def test_shared_instrument_preprocessor_markdown_images(component, markdown_imag
             'short_description': '![image](/markdown_images/' + flask.current_app.config['FEDERATION_UUID'] + '/' + md1.file_name + ')',
             'notes': '![image](/markdown_images/' + flask.current_app.config['FEDERATION_UUID'] + '/' + md2.file_name + ')'
         }
-        assert refs == []
+        assert list(refs) == []
 
         assert markdown_images == {
             md0.file_name: base64.b64encode(md0.content).decode('utf-8'),
@@ -3544,19 +3563,19 @@ def test_shared_instrument_preprocessor_markdown_images(component, markdown_imag
 
 
 def test_shared_instrument_preprocessor_does_not_exist(instrument, component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
 
     with pytest.raises(errors.InstrumentDoesNotExistError):
         shared_instrument_preprocessor(instrument.id + 1, component, refs, markdown_images)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_location_preprocessor(locations, component):
     parent_location, sub_location, _ = locations
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_location = shared_location_preprocessor(sub_location.id, component, refs, markdown_images)
 
@@ -3576,19 +3595,19 @@ def test_shared_location_preprocessor(locations, component):
 
 
 def test_shared_location_preprocessor_does_not_exist(component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
 
     with pytest.raises(errors.LocationDoesNotExistError):
         shared_location_preprocessor(1, component, refs, markdown_images)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_user_preprocessor_alias(user_alias_setup):
     user, component, user_alias = user_alias_setup
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_user = shared_user_preprocessor(user.id, component, refs, markdown_images)
 
@@ -3598,12 +3617,12 @@ def test_shared_user_preprocessor_alias(user_alias_setup):
     assert processed_user['email'] == user_alias.email
     assert processed_user['orcid'] == user_alias.orcid
     assert processed_user['affiliation'] == user_alias.affiliation
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_user_preprocessor_no_alias(user, component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_user = shared_user_preprocessor(user.id, component, refs, markdown_images)
 
@@ -3613,28 +3632,28 @@ def test_shared_user_preprocessor_no_alias(user, component):
     assert processed_user['email'] is None
     assert processed_user['orcid'] is None
     assert processed_user['affiliation'] is None
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_user_preprocessor_different_component(fed_user, component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
     processed_user = shared_user_preprocessor(fed_user.id, component, refs, markdown_images)
 
     assert processed_user is None
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
 def test_shared_user_preprocessor_does_not_exist(user, component):
-    refs = []
+    refs = ReferenceCollector()
     markdown_images = {}
 
     with pytest.raises(errors.UserDoesNotExistError):
         shared_user_preprocessor(user.id + 1, component, refs, markdown_images)
 
-    assert refs == []
+    assert list(refs) == []
     assert markdown_images == {}
 
 
@@ -4251,9 +4270,9 @@ def test_schema_entry_preprocessor(action):
         'required': ['name']
     }
     preprocessed_schema = copy.deepcopy(schema)
-    refs = []
+    refs = ReferenceCollector()
     schema_entry_preprocessor(preprocessed_schema, refs)
-    assert refs == []
+    assert list(refs) == []
     assert preprocessed_schema == schema
 
     schema = {
@@ -4273,9 +4292,9 @@ def test_schema_entry_preprocessor(action):
         'required': ['name']
     }
     preprocessed_schema = copy.deepcopy(schema)
-    refs = []
+    refs = ReferenceCollector()
     schema_entry_preprocessor(preprocessed_schema, refs)
-    assert refs == [('actions', action.id)]
+    assert list(refs) == [('actions', action.id)]
     assert preprocessed_schema == {
         'title': 'Test Schema',
         'type': 'object',
@@ -4317,9 +4336,9 @@ def test_schema_entry_preprocessor(action):
         'required': ['name']
     }
     preprocessed_schema = copy.deepcopy(schema)
-    refs = []
+    refs = ReferenceCollector()
     schema_entry_preprocessor(preprocessed_schema, refs)
-    assert refs == [('actions', action.id)]
+    assert list(refs) == [('actions', action.id)]
     assert preprocessed_schema == {
         'title': 'Test Schema',
         'type': 'object',
@@ -0,0 +1,263 @@
+# coding: utf-8
+"""
+
+"""
+import datetime
+import gzip
+import hashlib
+import http.server
+import json
+import threading
+
+import flask
+import pytest
+
+from sampledb.logic import component_authentication, components, errors, files, objects
+from sampledb.logic.federation import client, update
+
+UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
+UUID_2 = 'bbadfbe8-7950-4da8-80f1-136be4fd3b8d'
+FILE_CONTENT = bytes(range(256)) * 1000
+
+
+@pytest.fixture
+def component_server():
+    received_requests = []
+    responses = {}
+
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _respond(self):
+            received_requests.append((self.command, self.path, self.headers))
+            path = self.path.split('?')[0]
+            status_codes, body = responses.get(path, ([200], b'{}'))
+            status_code = status_codes.pop(0) if len(status_codes) > 1 else status_codes[0]
+            if status_code == 206:
+                self.send_response(status_code)
+                self.send_header('Content-Range', f'bytes 0-9/{len(body)}')
+                body = body[:10]
+            elif status_code != 200:
+                body = b''
+                self.send_response(status_code)
+            else:
+                self.send_response(status_code)
+            if 'gzip' in self.headers.get('Accept-Encoding', '') and body:
+                body = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._respond()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    flask.current_app.config['ALLOW_HTTP'] = True
+    try:
+        yield f'http://localhost:{server.server_port}', received_requests, responses
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def component(component_server):
+    address, _, _ = component_server
+    component = components.add_component(uuid=UUID_1, name='Example component', address=address, description='')
+    component_authentication.add_own_token_authentication(component.id, 'a' * 64, '')
+    return components.get_component(component.id)
+
+
+@pytest.fixture
+def fed_file(component):
+    schema = {
+        'title': 'Example Object',
+        'type': 'object',
+        'properties': {
+            'name': {
+                'title': 'Name',
+                'type': 'text'
+            }
+        },
+        'required': ['name']
+    }
+    fed_object = objects.insert_fed_object_version(1, 0, component.id, None, schema, {'name': {'_type': 'text', 'text': 'Fed Object'}}, None, None)
+    db_file = files._create_db_file(
+        object_id=fed_object.object_id,
+        user_id=None,
+        data={
+            'storage': 'federation',
+            'original_file_name': 'example.txt',
+            'hash': {
+                'algorithm': 'sha256',
+                'hexdigest': hashlib.sha256(FILE_CONTENT).hexdigest()
+            }
+        },
+        utc_datetime=datetime.datetime.now(datetime.timezone.utc),
+        fed_id=2,
+        component_id=component.id
+    )
+    return files.File.from_database(db_file)
+
+
+def test_get(component, component_server):
+    _, received_requests, responses = component_server
+    responses['/federation/v1/shares/users/'] = ([200], json.dumps({'users': []}).encode())
+    assert update.get('/federation/v1/shares/users/', component) == {'users': []}
+    assert len(received_requests) == 1
+    method, path, headers = received_requests[0]
+    assert method == 'GET'
+    assert path == '/federation/v1/shares/users/'
+    assert headers['Authorization'] == 'Bearer ' + 'a' * 64
+    assert 'gzip' in headers['Accept-Encoding']
+
+
+def test_get_status_errors(component, component_server):
+    _, _, responses = component_server
+    flask.current_app.config['FEDERATION_MAX_RETRIES'] = 0
+    responses['/unauthorized'] = ([401], b'')
+    responses['/unavailable'] = ([503], b'')
+    responses['/not_found'] = ([404], b'')
+    responses['/invalid'] = ([200], b'{')
+    with pytest.raises(errors.UnauthorizedRequestError):
+        update.get('/unauthorized', component)
+    with pytest.raises(errors.RequestServerError):
+        update.get('/unavailable', component)
+    with pytest.raises(errors.RequestError):
+        update.get('/not_found', component)
+    with pytest.raises(errors.InvalidJSONError):
+        update.get('/invalid', component)
+
+
+def test_get_retries_unavailable_component(component, component_server):
+    _, received_requests, responses = component_server
+    flask.current_app.config['FEDERATION_MAX_RETRIES'] = 2
+    responses['/federation/v1/shares/users/'] = ([503, 200], b'{"users": []}')
+    assert update.get('/federation/v1/shares/users/', component) == {'users': []}
+    assert len(received_requests) == 2
+
+
+def test_post_is_not_retried(component, component_server):
+    _, received_requests, responses = component_server
+    flask.current_app.config['FEDERATION_MAX_RETRIES'] = 2
+    responses['/federation/v1/hooks/update/'] = ([503, 200], b'')
+    update.update_poke_component(component)
+    assert len(received_requests) == 1
+
+
+def test_get_in_parallel(component, component_server):
+    _, received_requests, responses = component_server
+    responses['/a'] = ([200], b'{"a": 1}')
+    responses['/b'] = ([401], b'')
+    federation_client = client.get_federation_client()
+    futures = federation_client.get_in_parallel([
+        federation_client.prepare_request(endpoint, component)
+        for endpoint in ['/a', '/b', '/c']
+    ])
+    assert len(futures) == 3
+    assert all(future.done() for future in futures)
+    assert futures[0].result() == {'a': 1}
+    with pytest.raises(errors.UnauthorizedRequestError):
+        futures[1].result()
+    assert futures[2].result() == {}
+    assert len(received_requests) == 3
+
+
+def test_get_binary(component, component_server):
+    _, _, responses = component_server
+    content = bytes(range(256)) * 1000
+    responses['/federation/v1/shares/objects/1/files/0'] = ([200], content)
+    file_data = update.get_binary('/federation/v1/shares/objects/1/files/0', component)
+    assert file_data.read() == content
+
+
+def test_get_missing_address():
+    component = components.add_component(uuid=UUID_2, name='Component without address', address=None, description='')
+    with pytest.raises(errors.MissingComponentAddressError):
+        update.get('/federation/v1/shares/users/', component)
+    with pytest.raises(errors.MissingComponentAddressError):
+        update.get_binary('/federation/v1/shares/objects/1/files/0', component)
+
+
+def test_update_poke_components(component, component_server):
+    _, received_requests, _ = component_server
+    other_component = components.add_component(uuid=UUID_2, name='Component without address', address=None, description='')
+    failed_components = update.update_poke_components([component, other_component])
+    assert failed_components == [other_component]
+    assert [(method, path) for method, path, _ in received_requests] == [('POST', '/federation/v1/hooks/update/')]
+
+
+def test_get_federation_client():
+    flask.current_app.config['FEDERATION_CONNECTION_POOL_SIZE'] = 2
+    flask.current_app.config['FEDERATION_MAX_RETRIES'] = 1
+    federation_client = client.get_federation_client()
+    assert federation_client.pool_size == 2
+    assert federation_client.max_retries == 1
+    assert client.get_federation_client() is federation_client
+    flask.current_app.config['FEDERATION_CONNECTION_POOL_SIZE'] = 3
+    assert client.get_federation_client() is not federation_client
+    assert client.get_federation_client().pool_size == 3
+
+
+def test_open_stream(component, component_server):
+    _, received_requests, responses = component_server
+    responses['/federation/v1/shares/objects/1/files/0'] = ([206], FILE_CONTENT)
+    responses['/federation/v1/shares/objects/1/files/1'] = ([404], b'')
+    with update.open_stream('/federation/v1/shares/objects/1/files/0', component, {'Range': 'bytes=0-9'}) as response:
+        assert response.status_code == 206
+        assert response.content == FILE_CONTENT[:10]
+    assert received_requests[0][2]['Range'] == 'bytes=0-9'
+    with pytest.raises(errors.RequestError):
+        update.open_stream('/federation/v1/shares/objects/1/files/1', component)
+
+
+def test_stream_federation_file(fed_file, component_server, tmp_path):
+    _, received_requests, responses = component_server
+    flask.current_app.config['FEDERATION_FILE_CACHE_DIRECTORY'] = str(tmp_path)
+    responses['/federation/v1/shares/objects/1/files/2'] = ([200], FILE_CONTENT)
+    assert fed_file.local_path is None
+    stream = fed_file.open_stream()
+    assert stream.status_code == 200
+    assert stream.headers['Content-Length'] == str(len(FILE_CONTENT))
+    assert b''.join(stream.chunks) == FILE_CONTENT
+    assert received_requests[0][2]['Accept-Encoding'] == 'identity'
+    # the content has been cached, so it is not requested again
+    assert fed_file.local_path is not None
+    with open(fed_file.local_path, 'rb') as cached_file:
+        assert cached_file.read() == FILE_CONTENT
+    with fed_file.open() as file_content:
+        assert file_content.read() == FILE_CONTENT
+    assert len(received_requests) == 1
+
+
+def test_stream_federation_file_range(fed_file, component_server, tmp_path):
+    _, received_requests, responses = component_server
+    flask.current_app.config['FEDERATION_FILE_CACHE_DIRECTORY'] = str(tmp_path)
+    responses['/federation/v1/shares/objects/1/files/2'] = ([206], FILE_CONTENT)
+    stream = fed_file.open_stream(range='bytes=0-9')
+    assert stream.status_code == 206
+    assert stream.headers['Content-Range'] == f'bytes 0-9/{len(FILE_CONTENT)}'
+    assert b''.join(stream.chunks) == FILE_CONTENT[:10]
+    assert received_requests[0][2]['Range'] == 'bytes=0-9'
+    # partial content is not cached
+    assert fed_file.local_path is None
+
+
+def test_stream_federation_file_not_available(fed_file, component_server):
+    _, _, responses = component_server
+    flask.current_app.config['FEDERATION_MAX_RETRIES'] = 0
+    responses['/federation/v1/shares/objects/1/files/2'] = ([503], b'')
+    with pytest.raises(errors.FederationFileNotAvailableError):
+        fed_file.open_stream()
+    with pytest.raises(errors.FederationFileNotAvailableError):
+        fed_file.open()
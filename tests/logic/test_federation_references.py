@@ -0,0 +1,147 @@
+# coding: utf-8
+"""
+
+"""
+import flask
+import pytest
+import sqlalchemy
+
+from sampledb import models, db
+from sampledb.logic import actions, components, errors, users
+from sampledb.logic.components import add_component
+from sampledb.logic.federation.references import ReferenceCollector
+
+UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
+
+
+@pytest.fixture
+def user():
+    user = models.User(name='User', email='example@example.com', type=models.UserType.PERSON)
+    db.session.add(user)
+    db.session.commit()
+    # force attribute refresh
+    assert user.id is not None
+    return user
+
+
+@pytest.fixture
+def fed_user():
+    component = add_component(uuid=UUID_1, name='Example component', address=None, description='')
+    user = models.User(name='Federation User', email=None, type=models.UserType.FEDERATION_USER, fed_id=3, component_id=component.id)
+    db.session.add(user)
+    db.session.commit()
+    # force attribute refresh
+    assert user.id is not None
+    return user
+
+
+def test_add_references():
+    refs = ReferenceCollector()
+    refs.add('users', 1)
+    refs.add('actions', 1)
+    refs.add('users', 2)
+    refs.add('users', 1)
+    assert list(refs) == [('users', 1), ('actions', 1), ('users', 2)]
+    assert len(refs) == 3
+    assert ('users', 1) in refs
+    assert ('users', 3) not in refs
+    assert refs.get_pending_ids('users') == {1, 2}
+    assert refs.pop_pending() == ('users', 2)
+    # references are collected only once, even after they have been processed
+    refs.add('users', 2)
+    assert refs.pop_pending() == ('actions', 1)
+    refs.add('locations', 1)
+    assert refs.pop_pending() == ('locations', 1)
+    assert refs.pop_pending() == ('users', 1)
+    assert refs.pop_pending() is None
+    assert len(refs) == 4
+
+
+def test_get_user_ref(user, fed_user):
+    refs = ReferenceCollector()
+    refs.load_users([user.id, fed_user.id, fed_user.id + 1])
+    assert refs.get_user(user.id).id == user.id
+    assert refs.get_user_ref(user.id) == {
+        'user_id': user.id,
+        'component_uuid': flask.current_app.config['FEDERATION_UUID']
+    }
+    assert refs.get_user_ref(fed_user.id) == {
+        'user_id': 3,
+        'component_uuid': UUID_1
+    }
+    with pytest.raises(errors.UserDoesNotExistError):
+        refs.get_user_ref(fed_user.id + 1)
+    # modifying a returned reference must not modify the cached reference
+    refs.get_user_ref(user.id)['user_id'] = 0
+    assert refs.get_user_ref(user.id)['user_id'] == user.id
+
+
+def test_get_entities_loads_pending_references(user, fed_user):
+    schema = {
+        'title': 'Example Object',
+        'type': 'object',
+        'properties': {
+            'name': {
+                'title': 'Name',
+                'type': 'text'
+            }
+        },
+        'required': ['name']
+    }
+    action = actions.create_action(
+        action_type_id=models.ActionType.SAMPLE_CREATION,
+        schema=schema,
+        instrument_id=None
+    )
+    other_action = actions.create_action(
+        action_type_id=models.ActionType.MEASUREMENT,
+        schema=schema,
+        instrument_id=None
+    )
+    refs = ReferenceCollector()
+    refs.add('users', user.id)
+    refs.add('users', fed_user.id)
+    refs.add('actions', action.id)
+    refs.add('actions', other_action.id)
+    refs.add('action_types', models.ActionType.SAMPLE_CREATION)
+    assert refs.get_action(action.id).id == action.id
+    assert refs.get_action_type(models.ActionType.SAMPLE_CREATION).id == models.ActionType.SAMPLE_CREATION
+    assert refs.get_user(user.id).id == user.id
+    with pytest.raises(errors.ActionDoesNotExistError):
+        refs.get_action(other_action.id + 1)
+    with pytest.raises(errors.LocationDoesNotExistError):
+        refs.get_location(1)
+
+    statements = []
+
+    def count_statement(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        # the entities with pending references have been loaded together
+        # with the ones requested first
+        assert refs.get_action(other_action.id).id == other_action.id
+        assert refs.get_user(fed_user.id).id == fed_user.id
+    finally:
+        sqlalchemy.event.remove(db.engine, 'before_cursor_execute', count_statement)
+    assert statements == []
+
+
+def test_get_user_alias(user, fed_user, app):
+    component = components.get_component(fed_user.component_id)
+    other_user = models.User(name='Other User', email='other@example.com', type=models.UserType.PERSON)
+    db.session.add(other_user)
+    db.session.commit()
+    users.create_user_alias(other_user.id, component.id, name='Alias')
+    refs = ReferenceCollector()
+    refs.add('users', user.id)
+    refs.add('users', other_user.id)
+    assert refs.get_user_alias(other_user.id, component.id).name == 'Alias'
+    app.config['ENABLE_DEFAULT_USER_ALIASES'] = True
+    alias = refs.get_user_alias(user.id, component.id)
+    assert alias.is_default
+    assert alias.name == 'User'
+    app.config['ENABLE_DEFAULT_USER_ALIASES'] = False
+    with pytest.raises(errors.UserAliasDoesNotExistError):
+        refs.get_user_alias(user.id, component.id)
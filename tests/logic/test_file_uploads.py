@@ -0,0 +1,151 @@
+# coding: utf-8
+"""
+
+"""
+
+import hashlib
+import io
+import os
+
+import flask
+import pytest
+
+import sampledb
+from sampledb.models import User, UserType, Action, Object
+from sampledb.logic import actions, errors, file_uploads, files, objects
+
+
+@pytest.fixture
+def user():
+    user = User(name='User', email="example@example.com", type=UserType.PERSON)
+    sampledb.db.session.add(user)
+    sampledb.db.session.commit()
+    return sampledb.logic.users.User.from_database(user)
+
+
+@pytest.fixture
+def action():
+    return actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Sample Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        },
+        instrument_id=None
+    )
+
+
+@pytest.fixture
+def object(user: User, action: Action):
+    data = {'name': {'_type': 'text', 'text': 'Object'}}
+    return objects.create_object(user_id=user.id, action_id=action.id, data=data)
+
+
+@pytest.fixture(autouse=True)
+def file_upload_directory(tmp_path):
+    flask.current_app.config['FILE_UPLOAD_DIRECTORY'] = str(tmp_path)
+    yield tmp_path
+    flask.current_app.config['FILE_UPLOAD_DIRECTORY'] = None
+
+
+def test_file_upload(user: User, object: Object, file_upload_directory):
+    content = os.urandom(1000)
+    file_upload = file_uploads.create_file_upload(object.object_id, user.id, 'test.bin', len(content))
+    assert file_upload.received_size == 0
+    assert (file_upload_directory / str(file_upload.id)).read_bytes() == b''
+
+    file_upload = file_uploads.write_file_upload_chunk(file_upload.id, 0, io.BytesIO(content[:400]))
+    assert file_upload.received_size == 400
+    with pytest.raises(errors.InvalidFileUploadOffsetError) as exc_info:
+        file_uploads.write_file_upload_chunk(file_upload.id, 500, io.BytesIO(content[500:]))
+    assert exc_info.value.received_size == 400
+    with pytest.raises(errors.FileUploadSizeError):
+        file_uploads.finalize_file_upload(file_upload.id)
+
+    # resend part of the first chunk, as if the response had been lost
+    file_upload = file_uploads.write_file_upload_chunk(file_upload.id, 300, io.BytesIO(content[300:600]))
+    assert file_upload.received_size == 600
+    with pytest.raises(errors.FileUploadSizeError):
+        file_uploads.write_file_upload_chunk(file_upload.id, 600, io.BytesIO(content[600:] + b'x'))
+    assert file_uploads.get_file_upload(file_upload.id).received_size == 600
+    file_upload = file_uploads.write_file_upload_chunk(file_upload.id, 600, io.BytesIO(content[600:]))
+    assert file_upload.received_size == len(content)
+
+    with pytest.raises(errors.FileUploadHashMismatchError):
+        file_uploads.finalize_file_upload(file_upload.id, hash=files.File.HashInfo(algorithm='sha256', hexdigest=hashlib.sha256(b'other').hexdigest()))
+    file = file_uploads.finalize_file_upload(file_upload.id, hash=files.File.HashInfo(algorithm='sha512', hexdigest=hashlib.sha512(content).hexdigest()))
+    assert file.object_id == object.object_id
+    assert file.user_id == user.id
+    assert file.original_file_name == 'test.bin'
+    assert file.hash.algorithm == 'sha512'
+    assert file.blob_sha256 == hashlib.sha256(content).hexdigest()
+    assert files.get_file_for_object(object.object_id, file.id).open().read() == content
+
+    with pytest.raises(errors.FileUploadDoesNotExistError):
+        file_uploads.get_file_upload(file_upload.id)
+    assert not (file_upload_directory / str(file_upload.id)).exists()
+
+
+def test_delete_file_upload(user: User, object: Object, file_upload_directory):
+    file_upload = file_uploads.create_file_upload(object.object_id, user.id, 'test.bin', 10)
+    file_uploads.write_file_upload_chunk(file_upload.id, 0, io.BytesIO(b'content'))
+    with pytest.raises(errors.FileUploadDoesNotExistError):
+        file_uploads.delete_file_upload(file_upload.id, object_id=object.object_id + 1)
+    file_uploads.delete_file_upload(file_upload.id)
+    with pytest.raises(errors.FileUploadDoesNotExistError):
+        file_uploads.get_file_upload(file_upload.id)
+    assert not (file_upload_directory / str(file_upload.id)).exists()
+    assert files.get_files_for_object(object.object_id) == []
+
+
+def test_delete_expired_file_uploads(user: User, object: Object, file_upload_directory):
+    file_upload = file_uploads.create_file_upload(object.object_id, user.id, 'test.bin', 10)
+    flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT'], time_limit = -1, flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT']
+    try:
+        file_uploads.delete_expired_file_uploads()
+    finally:
+        flask.current_app.config['TEMPORARY_FILE_TIME_LIMIT'] = time_limit
+    with pytest.raises(errors.FileUploadDoesNotExistError):
+        file_uploads.get_file_upload(file_upload.id)
+    assert not (file_upload_directory / str(file_upload.id)).exists()
+
+
+def test_create_invalid_file_upload(user: User, object: Object):
+    with pytest.raises(errors.FileNameTooLongError):
+        file_uploads.create_file_upload(object.object_id, user.id, 'a' * 151, 10)
+    with pytest.raises(errors.FileUploadSizeError):
+        file_uploads.create_file_upload(object.object_id, user.id, 'test.bin', -1)
+    with pytest.raises(errors.ObjectDoesNotExistError):
+        file_uploads.create_file_upload(object.object_id + 1, user.id, 'test.bin', 10)
+
+
+def test_finalize_file_upload_failed_storage(user: User, object: Object, file_upload_directory, monkeypatch):
+    content = os.urandom(1000)
+    file_upload = file_uploads.create_file_upload(object.object_id, user.id, 'test.bin', len(content))
+    file_uploads.write_file_upload_chunk(file_upload.id, 0, io.BytesIO(content))
+
+    def store_file_blob(*args, **kwargs):
+        raise RuntimeError()
+
+    with monkeypatch.context() as m:
+        m.setattr(files, 'store_file_blob', store_file_blob)
+        with pytest.raises(RuntimeError):
+            file_uploads.finalize_file_upload(file_upload.id)
+    assert file_uploads.get_file_upload(file_upload.id).received_size == len(content)
+    assert (file_upload_directory / str(file_upload.id)).read_bytes() == content
+    assert files.get_files_for_object(object.object_id) == []
+
+    # hexdigests are compared case-insensitively
+    file = file_uploads.finalize_file_upload(file_upload.id, hash=files.File.HashInfo(algorithm='sha256', hexdigest=hashlib.sha256(content).hexdigest().upper()))
+    assert file.hash.hexdigest == hashlib.sha256(content).hexdigest()
+    assert files.get_file_for_object(object.object_id, file.id).open().read() == content
+    with pytest.raises(errors.FileUploadDoesNotExistError):
+        file_uploads.get_file_upload(file_upload.id)
+    assert not (file_upload_directory / str(file_upload.id)).exists()
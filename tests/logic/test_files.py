@@ -4,13 +4,15 @@
 """
 
 import datetime
+import hashlib
 import os
 
+import flask
 import pytest
 
 import sampledb
-from sampledb.models import User, UserType, Action, Object
-from sampledb.logic import files, objects, actions, errors, components
+from sampledb.models import User, UserType, Action, Object, FileBlob
+from sampledb.logic import files, file_storage, objects, actions, errors, components
 
 UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
 
@@ -386,6 +388,88 @@ def test_create_fed_binary_file(object, user, component):
     assert file.utc_datetime == dt
 
 
+def test_filesystem_file_storage_backend(user: User, object: Object, tmp_path):
+    files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="database.txt", save_content=lambda stream: stream.write(b"database content"))
+    flask.current_app.config['FILE_STORAGE_BACKEND'] = 'filesystem'
+    flask.current_app.config['FILE_STORAGE_DIRECTORY'] = str(tmp_path)
+    try:
+        file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(b"content"))
+        sha256 = hashlib.sha256(b"content").hexdigest()
+        assert file.storage == 'database'
+        assert file.storage_backend == 'filesystem'
+        assert file.binary_data is None
+        assert file.hash.hexdigest == sha256
+        assert file.blob_sha256 == sha256
+        assert file.local_path == str(tmp_path / 'sha256' / sha256[:2] / sha256)
+        assert (tmp_path / 'sha256' / sha256[:2] / sha256).read_bytes() == b"content"
+        with files.get_file_for_object(object.object_id, file.id).open() as f:
+            assert f.read() == b"content"
+
+        database_sha256 = hashlib.sha256(b"database content").hexdigest()
+        assert file_storage.get_file_blob_hashes_stored_in_database() == [database_sha256]
+        file_storage.move_file_blob_to_storage_backend(database_sha256)
+        assert file_storage.get_file_blob_hashes_stored_in_database() == []
+        file = files.get_file_for_object(object.object_id, 0)
+        assert file.storage_backend == 'filesystem'
+        assert file.original_file_name == "database.txt"
+        with file.open() as f:
+            assert f.read() == b"database content"
+        with pytest.raises(errors.InvalidFileStorageError):
+            file_storage.move_file_blob_to_storage_backend(database_sha256)
+    finally:
+        flask.current_app.config['FILE_STORAGE_BACKEND'] = 'database'
+        flask.current_app.config['FILE_STORAGE_DIRECTORY'] = None
+
+
+def test_file_deduplication(user: User, object: Object):
+    first_file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="first.txt", save_content=lambda stream: stream.write(b"content"))
+    second_file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="second.txt", save_content=lambda stream: stream.write(b"content"))
+    other_file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="other.txt", save_content=lambda stream: stream.write(b"other"))
+    assert first_file.blob_sha256 == second_file.blob_sha256 == hashlib.sha256(b"content").hexdigest()
+    assert other_file.blob_sha256 == hashlib.sha256(b"other").hexdigest()
+    assert FileBlob.query.count() == 2
+    assert FileBlob.query.filter_by(sha256=first_file.blob_sha256).first().reference_count == 2
+    assert FileBlob.query.filter_by(sha256=other_file.blob_sha256).first().reference_count == 1
+    for file in files.get_files_for_object(object.object_id):
+        assert file.storage_backend == 'database'
+        assert file.local_path is None
+    assert files.get_file_for_object(object.object_id, second_file.id).open().read() == b"content"
+
+    assert file_storage.get_file_deduplication_statistics('object') == [
+        file_storage.FileDeduplicationStatistics(id=object.object_id, num_files=3, total_size=19, saved_size=7)
+    ]
+    assert file_storage.get_file_deduplication_statistics('user') == [
+        file_storage.FileDeduplicationStatistics(id=user.id, num_files=3, total_size=19, saved_size=7)
+    ]
+    with pytest.raises(ValueError):
+        file_storage.get_file_deduplication_statistics('action')
+
+
+def test_move_file_content_to_blob(user: User, object: Object):
+    db_file = sampledb.models.files.File(
+        file_id=0,
+        object_id=object.object_id,
+        user_id=user.id,
+        data={'storage': 'database', 'original_file_name': 'legacy.txt'},
+        binary_data=b"content"
+    )
+    sampledb.db.session.add(db_file)
+    sampledb.db.session.commit()
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(b"content"))
+    assert files.get_file_for_object(object.object_id, 0).blob_sha256 is None
+    assert files.get_file_ids_without_blob() == [(object.object_id, 0)]
+
+    files.move_file_content_to_blob(object.object_id, 0)
+    assert files.get_file_ids_without_blob() == []
+    legacy_file = files.get_file_for_object(object.object_id, 0)
+    assert legacy_file.blob_sha256 == file.blob_sha256
+    assert legacy_file.original_file_name == 'legacy.txt'
+    assert legacy_file.open().read() == b"content"
+    assert FileBlob.query.filter_by(sha256=file.blob_sha256).first().reference_count == 2
+    with pytest.raises(errors.InvalidFileStorageError):
+        files.move_file_content_to_blob(object.object_id, 0)
+
+
 def test_replace_file_reference_ids():
     data = {
         'array': [
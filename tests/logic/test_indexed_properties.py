@@ -0,0 +1,230 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sqlalchemy
+
+from sampledb import db
+import sampledb.logic
+import sampledb.models
+from sampledb.logic import errors, indexed_properties, object_search, object_sorting
+from sampledb.models import IndexedPropertyType
+
+
+@pytest.fixture
+def user():
+    user = sampledb.models.User(
+        name="User",
+        email="example@example.com",
+        type=sampledb.models.UserType.PERSON)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def action():
+    return sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'tags': {
+                    'title': 'Tags',
+                    'type': 'tags'
+                },
+                'length': {
+                    'title': 'Length',
+                    'type': 'quantity',
+                    'units': 'm'
+                },
+                'details': {
+                    'title': 'Details',
+                    'type': 'object',
+                    'properties': {
+                        'created': {
+                            'title': 'Created',
+                            'type': 'datetime'
+                        },
+                        'is_ready': {
+                            'title': 'Is Ready',
+                            'type': 'bool'
+                        }
+                    }
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+@pytest.fixture
+def objects(user, action):
+    objects = []
+    for i, (length, created, is_ready) in enumerate([
+        (-0.5, '2018-10-04 23:30:00', True),
+        (0.01, '2018-10-05 00:30:00', False),
+        (0.02, '2018-10-05 12:00:00', True),
+        (2.0, '2018-10-07 12:00:00', False),
+    ]):
+        objects.append(sampledb.logic.objects.create_object(action_id=action.id, data={
+            'name': {
+                '_type': 'text',
+                'text': f'Object {i}'
+            },
+            'tags': {
+                '_type': 'tags',
+                'tags': ['even' if i % 2 == 0 else 'odd']
+            },
+            'length': {
+                '_type': 'quantity',
+                'dimensionality': '[length]',
+                'magnitude_in_base_units': length,
+                'units': 'm'
+            },
+            'details': {
+                'created': {
+                    '_type': 'datetime',
+                    'utc_datetime': created
+                },
+                'is_ready': {
+                    '_type': 'bool',
+                    'value': is_ready
+                }
+            }
+        }, user_id=user.id))
+    return objects
+
+
+SEARCH_QUERIES = [
+    'length == 2cm',
+    'length < 2cm',
+    'length <= 2cm',
+    'length > 1cm',
+    'length >= 1cm',
+    'length < 0m',
+    'details.created on 2018-10-05',
+    'details.created before 2018-10-05',
+    'details.created after 2018-10-05',
+    'details.is_ready',
+    'details.is_ready == False',
+    'name == "Object 1"',
+    '#even',
+]
+
+
+def _search(query_string):
+    filter_func, _, _ = object_search.generate_filter_func(query_string, use_advanced_search=True)
+    filter_func, search_notes = object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert search_notes == []
+    return sorted(object.object_id for object in objects)
+
+
+def _uses_index(query_string, index_name):
+    filter_func, _, _ = object_search.generate_filter_func(query_string, use_advanced_search=True)
+    filter_func, _ = object_search.wrap_filter_func(filter_func)
+    objects_current = sampledb.models.Objects._current_table
+    query = db.select(objects_current.c.object_id).where(filter_func(objects_current.c.data))
+
+    def explain(connection, cursor, statement, parameters, context, executemany):
+        return 'EXPLAIN ' + statement, parameters
+
+    # the table is too small for the planner to use the index otherwise
+    db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    sqlalchemy.event.listen(db.engine, 'before_cursor_execute', explain, retval=True)
+    try:
+        plan = db.session.execute(query).scalars().all()
+    finally:
+        sqlalchemy.event.remove(db.engine, 'before_cursor_execute', explain)
+    db.session.rollback()
+    return any(index_name in line for line in plan)
+
+
+def test_create_indexed_property():
+    indexed_property = indexed_properties.create_indexed_property(['length'], IndexedPropertyType.QUANTITY)
+    assert indexed_property.path == ('length',)
+    assert indexed_property.type == IndexedPropertyType.QUANTITY
+    assert indexed_properties.get_indexed_properties() == [indexed_property]
+    assert indexed_properties.get_indexed_property(indexed_property.id) == indexed_property
+    assert indexed_properties.get_indexed_property_types(['length']) == {IndexedPropertyType.QUANTITY}
+    assert indexed_properties.get_indexed_property_types(['details']) == set()
+    assert indexed_properties.get_indexed_property_types(['length', 0]) == set()
+    with pytest.raises(errors.IndexedPropertyAlreadyExistsError):
+        indexed_properties.create_indexed_property(['length'], IndexedPropertyType.QUANTITY)
+    with pytest.raises(errors.InvalidPropertyPathError):
+        indexed_properties.create_indexed_property(['details', 'length)'], IndexedPropertyType.VALUE)
+    with pytest.raises(errors.InvalidPropertyPathError):
+        indexed_properties.create_indexed_property([], IndexedPropertyType.VALUE)
+    assert indexed_properties.get_indexed_properties() == [indexed_property]
+    assert sampledb.logic.database_indexes.get_index_report().missing_indexes == []
+
+
+def test_delete_indexed_property():
+    indexed_property = indexed_properties.create_indexed_property(['details', 'created'], IndexedPropertyType.DATETIME)
+    indexed_properties.delete_indexed_property(indexed_property.id)
+    assert indexed_properties.get_indexed_properties() == []
+    assert indexed_properties.get_indexed_property_types(['details', 'created']) == set()
+    with pytest.raises(errors.IndexedPropertyDoesNotExistError):
+        indexed_properties.delete_indexed_property(indexed_property.id)
+    existing_index_names = db.session.execute(db.text("SELECT indexname FROM pg_indexes")).scalars().all()
+    assert indexed_property.index_name not in existing_index_names
+
+
+def test_search_indexed_properties(objects):
+    expected_results = {
+        query_string: _search(query_string)
+        for query_string in SEARCH_QUERIES
+    }
+    assert expected_results['length < 2cm'] == [objects[0].object_id, objects[1].object_id]
+    assert expected_results['length <= 2cm'] == [objects[0].object_id, objects[1].object_id, objects[2].object_id]
+    indexed_properties.create_indexed_property(['length'], IndexedPropertyType.QUANTITY)
+    indexed_properties.create_indexed_property(['details', 'created'], IndexedPropertyType.DATETIME)
+    indexed_properties.create_indexed_property(['details', 'is_ready'], IndexedPropertyType.VALUE)
+    indexed_properties.create_indexed_property(['name'], IndexedPropertyType.VALUE)
+    indexed_properties.create_indexed_property(['tags'], IndexedPropertyType.VALUE)
+    for query_string in SEARCH_QUERIES:
+        assert _search(query_string) == expected_results[query_string], query_string
+
+
+def test_search_uses_indexes(objects):
+    quantity_index = indexed_properties.create_indexed_property(['length'], IndexedPropertyType.QUANTITY)
+    datetime_index = indexed_properties.create_indexed_property(['details', 'created'], IndexedPropertyType.DATETIME)
+    value_index = indexed_properties.create_indexed_property(['name'], IndexedPropertyType.VALUE)
+    assert _uses_index('length < 2cm', quantity_index.index_name)
+    assert _uses_index('details.created on 2018-10-05', datetime_index.index_name)
+    assert _uses_index('name == "Object 1"', value_index.index_name)
+
+
+def test_sort_by_indexed_property(objects):
+    indexed_properties.create_indexed_property(['length'], IndexedPropertyType.QUANTITY)
+    sorting_func = object_sorting.ascending(object_sorting.property_value('length'))
+    sorted_objects = sampledb.logic.objects.get_objects(filter_func=lambda data: True, sorting_func=sorting_func)
+    assert [object.object_id for object in sorted_objects] == [object.object_id for object in objects]
+    sorting_func = object_sorting.descending(object_sorting.property_value('length'))
+    sorted_objects = sampledb.logic.objects.get_objects(filter_func=lambda data: True, sorting_func=sorting_func)
+    assert [object.object_id for object in sorted_objects] == [object.object_id for object in objects[::-1]]
+
+
+def test_sort_by_indexed_property_with_other_types(objects):
+    # the names are text values, so the index keys are NULL for all objects
+    indexed_properties.create_indexed_property(['name'], IndexedPropertyType.QUANTITY)
+    sorting_func = object_sorting.descending(object_sorting.property_value('name'))
+    sorted_objects = sampledb.logic.objects.get_objects(filter_func=lambda data: True, sorting_func=sorting_func)
+    assert [object.object_id for object in sorted_objects] == [object.object_id for object in objects[::-1]]
+
+    cursors = []
+    sorted_objects = sampledb.logic.objects.get_objects(filter_func=lambda data: True, sorting_func=sorting_func, limit=2, cursors=cursors)
+    assert [object.object_id for object in sorted_objects] == [object.object_id for object in objects[:1:-1]]
+    assert cursors[1] == ((None, 'Object 2'), objects[2].object_id)
+    cursor = object_sorting.decode_cursor(object_sorting.encode_cursor(cursors[1], 'name'), 'name')
+    assert cursor == cursors[1]
+    sorted_objects = sampledb.logic.objects.get_objects(filter_func=lambda data: True, sorting_func=sorting_func, limit=2, after=cursor, cursors=cursors)
+    assert [object.object_id for object in sorted_objects] == [object.object_id for object in objects[1::-1]]
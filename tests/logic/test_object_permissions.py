@@ -9,7 +9,7 @@ import pytest
 import sampledb
 import sampledb.logic
 from sampledb.logic import object_permissions, default_permissions, groups, errors
-from sampledb.models import User, UserType, Action, Instrument, Permissions, UserObjectPermissions
+from sampledb.models import User, UserType, Action, Instrument, Permissions
 
 
 @pytest.fixture
@@ -131,8 +131,7 @@ def test_default_user_object_permissions(user, independent_action_object):
 def test_get_user_object_permissions(user, independent_action_object):
     user_id = user.id
     object_id = independent_action_object.object_id
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
 
 
@@ -145,8 +144,7 @@ def test_get_user_object_permissions_with_project(users, independent_action_obje
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.NONE
     sampledb.logic.projects.add_user_to_project(project_id, user_id, Permissions.READ)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.READ
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
     sampledb.logic.projects.update_user_project_permissions(project_id, user_id, Permissions.GRANT)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.GRANT
@@ -164,8 +162,7 @@ def test_get_user_object_permissions_with_group_project(users, independent_actio
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.NONE
     sampledb.logic.groups.add_user_to_group(group_id=group_id, user_id=user_id)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.READ
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
     sampledb.logic.projects.update_group_project_permissions(project_id, group_id, Permissions.GRANT)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.GRANT
@@ -174,10 +171,8 @@ def test_get_user_object_permissions_with_group_project(users, independent_actio
 def test_get_instrument_responsible_user_object_permissions(user, instrument, instrument_action_object):
     user_id = user.id
     object_id = instrument_action_object.object_id
-    instrument.responsible_users.append(user)
-    sampledb.db.session.add(instrument)
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    sampledb.logic.instruments.add_instrument_responsible_user(instrument.id, user_id)
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.GRANT
 
 
@@ -204,8 +199,7 @@ def test_get_object_permissions(users, instrument, instrument_action_object):
     }
     assert sampledb.models.Permissions.READ in sampledb.logic.object_permissions.get_object_permissions_for_all_users(object_id)
 
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_object_permissions_for_users(object_id=object_id) == {
         user_id: Permissions.WRITE,
         users[1].id: Permissions.GRANT
@@ -616,8 +610,7 @@ def test_get_object_permissions_for_readonly_users(users, instrument, instrument
     user_id = users[0].id
     object_id = instrument_action_object.object_id
 
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_object_permissions_for_users(object_id=object_id) == {
         user_id: Permissions.WRITE,
         users[1].id: Permissions.GRANT
@@ -645,8 +638,7 @@ def test_get_object_permissions_for_readonly_users(users, instrument, instrument
 def test_get_readonly_user_object_permissions(user, independent_action_object):
     user_id = user.id
     object_id = independent_action_object.object_id
-    sampledb.db.session.add(UserObjectPermissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE))
-    sampledb.db.session.commit()
+    object_permissions.set_user_object_permissions(object_id=object_id, user_id=user_id, permissions=Permissions.WRITE)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
     sampledb.logic.users.set_user_readonly(user_id, readonly=True)
     assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.READ
@@ -0,0 +1,234 @@
+# coding: utf-8
+"""
+
+"""
+import uuid
+
+import flask
+import pytest
+import sqlalchemy.exc
+
+import sampledb
+import sampledb.logic
+import sampledb.models
+from sampledb.logic.object_relationships import ObjectRef
+from sampledb.models import ObjectReference, ObjectReferenceKind, User, UserType
+from sampledb.models.migrations import object_references_fill
+
+
+@pytest.fixture
+def user():
+    user = User(name="User", email="example@example.com", type=UserType.PERSON)
+    sampledb.db.session.add(user)
+    sampledb.db.session.commit()
+    assert user.id is not None
+    return user
+
+
+def _create_action(action_type_id):
+    return sampledb.logic.actions.create_action(
+        action_type_id=action_type_id,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Object Name',
+                    'type': 'text'
+                },
+                'sample': {
+                    'title': 'Sample',
+                    'type': 'sample'
+                },
+                'references': {
+                    'title': 'References',
+                    'type': 'array',
+                    'items': {
+                        'title': 'Reference',
+                        'type': 'object_reference'
+                    }
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+@pytest.fixture
+def sample_action():
+    return _create_action(sampledb.models.ActionType.SAMPLE_CREATION)
+
+
+@pytest.fixture
+def measurement_action():
+    return _create_action(sampledb.models.ActionType.MEASUREMENT)
+
+
+def _create_object(action, user, sample_id=None, reference_ids=()):
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Object'
+        },
+        'references': [
+            {
+                '_type': 'object_reference',
+                'object_id': reference_id
+            }
+            for reference_id in reference_ids
+        ]
+    }
+    if sample_id is not None:
+        data['sample'] = {
+            '_type': 'sample',
+            'object_id': sample_id
+        }
+    return sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+
+
+def _get_object_references(object_id):
+    return {
+        (object_reference.source_version_id, tuple(object_reference.path), object_reference.kind, object_reference.target_object_id, object_reference.target_component_uuid)
+        for object_reference in ObjectReference.query.filter_by(source_object_id=object_id).all()
+    }
+
+
+def test_object_references_on_create(sample_action, measurement_action, user):
+    object1 = _create_object(sample_action, user)
+    object2 = _create_object(sample_action, user, sample_id=object1.object_id)
+    object3 = _create_object(measurement_action, user, sample_id=object1.object_id, reference_ids=[object2.object_id, object1.object_id])
+    assert _get_object_references(object1.object_id) == set()
+    assert _get_object_references(object2.object_id) == {
+        (0, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object1.object_id, None)
+    }
+    assert _get_object_references(object3.object_id) == {
+        (0, ('sample',), ObjectReferenceKind.MEASUREMENT, object1.object_id, None),
+        (0, ('references', 0), ObjectReferenceKind.METADATA, object2.object_id, None),
+        (0, ('references', 1), ObjectReferenceKind.METADATA, object1.object_id, None),
+    }
+
+
+def test_object_references_unique_path(sample_action, user):
+    object1 = _create_object(sample_action, user)
+    object2 = _create_object(sample_action, user, sample_id=object1.object_id)
+    object_reference = ObjectReference.query.filter_by(source_object_id=object2.object_id).one()
+    assert object_reference.id is not None
+    sampledb.db.session.add(ObjectReference(
+        source_object_id=object2.object_id,
+        source_version_id=0,
+        path=['sample'],
+        kind=ObjectReferenceKind.METADATA,
+        target_object_id=object2.object_id
+    ))
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        sampledb.db.session.commit()
+    sampledb.db.session.rollback()
+    assert ObjectReference.query.filter_by(source_object_id=object2.object_id).all() == [object_reference]
+
+
+def test_object_references_on_update_and_restore(sample_action, user):
+    object1 = _create_object(sample_action, user)
+    object2 = _create_object(sample_action, user)
+    object3 = _create_object(sample_action, user, sample_id=object1.object_id)
+    data = dict(object3.data)
+    data['sample'] = {
+        '_type': 'sample',
+        'object_id': object2.object_id,
+        'component_uuid': flask.current_app.config['FEDERATION_UUID']
+    }
+    sampledb.logic.objects.update_object(object_id=object3.object_id, data=data, user_id=user.id)
+    assert _get_object_references(object3.object_id) == {
+        (0, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object1.object_id, None),
+        (1, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object2.object_id, None),
+    }
+    sampledb.logic.objects.restore_object_version(object_id=object3.object_id, version_id=0, user_id=user.id)
+    assert _get_object_references(object3.object_id) == {
+        (0, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object1.object_id, None),
+        (1, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object2.object_id, None),
+        (2, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, object1.object_id, None),
+    }
+
+    # referencing objects include those that referenced an object in a
+    # previous version, referenced objects only those of the current version
+    assert sampledb.logic.object_relationships.get_referencing_object_ids({object1.object_id, object2.object_id}) == {
+        object1.object_id: {ObjectRef(object_id=object3.object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)},
+        object2.object_id: {ObjectRef(object_id=object3.object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)},
+    }
+    assert sampledb.logic.object_relationships._get_referenced_object_ids({object3.object_id}) == {
+        object3.object_id: {ObjectRef(object_id=object1.object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)},
+    }
+
+
+def test_object_references_to_imported_objects(sample_action, user):
+    component = sampledb.logic.components.add_component(
+        address=None,
+        uuid=str(uuid.uuid4()),
+        name='Example Component',
+        description=''
+    )
+    imported_object = sampledb.logic.objects.insert_fed_object_version(
+        fed_object_id=1,
+        fed_version_id=0,
+        component_id=component.id,
+        action_id=None,
+        schema=sample_action.schema,
+        data={
+            'name': {
+                '_type': 'text',
+                'text': 'Imported Object'
+            }
+        },
+        user_id=None,
+        utc_datetime=None
+    )
+    object = sampledb.logic.objects.create_object(action_id=sample_action.id, data={
+        'name': {
+            '_type': 'text',
+            'text': 'Object'
+        },
+        'sample': {
+            '_type': 'sample',
+            'object_id': 1,
+            'component_uuid': component.uuid
+        }
+    }, user_id=user.id)
+    assert _get_object_references(object.object_id) == {
+        (0, ('sample',), ObjectReferenceKind.SAMPLE_CREATION, 1, component.uuid)
+    }
+    assert sampledb.logic.object_relationships.get_referencing_object_ids({imported_object.object_id}) == {
+        imported_object.object_id: {ObjectRef(object_id=object.object_id, component_uuid=None, eln_source_url=None, eln_object_url=None)},
+    }
+    assert sampledb.logic.object_relationships._get_referenced_object_ids({object.object_id}) == {
+        object.object_id: {ObjectRef(object_id=1, component_uuid=component.uuid, eln_source_url=None, eln_object_url=None)},
+    }
+
+
+def test_object_references_fill_migration(sample_action, measurement_action, user):
+    object1 = _create_object(sample_action, user)
+    object2 = _create_object(sample_action, user, sample_id=object1.object_id)
+    _create_object(measurement_action, user, sample_id=object1.object_id, reference_ids=[object2.object_id])
+    data = dict(object1.data)
+    data['references'] = [
+        {
+            '_type': 'object_reference',
+            'object_id': object2.object_id,
+            'component_uuid': str(uuid.uuid4())
+        }
+    ]
+    sampledb.logic.objects.update_object(object_id=object1.object_id, data=data, user_id=user.id)
+
+    def get_all_object_references():
+        return {
+            (object_reference.source_object_id, object_reference.source_version_id, tuple(object_reference.path), object_reference.kind, object_reference.target_object_id, object_reference.target_component_uuid, object_reference.target_eln_source_url, object_reference.target_eln_object_url)
+            for object_reference in ObjectReference.query.all()
+        }
+
+    object_references = get_all_object_references()
+    assert len(object_references) == 4
+    # the migration is skipped while references are stored
+    assert not object_references_fill.run(sampledb.db)
+    ObjectReference.query.delete()
+    sampledb.db.session.commit()
+    assert object_references_fill.run(sampledb.db)
+    sampledb.db.session.commit()
+    assert get_all_object_references() == object_references
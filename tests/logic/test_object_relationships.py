@@ -2,9 +2,12 @@
 """
 
 """
+import json
+import time
 import uuid
 
 import pytest
+import sqlalchemy
 
 import sampledb
 import sampledb.logic
@@ -978,3 +981,151 @@ def test_get_workflow_references(sample_action, measurement_action, user):
             WorkflowElement(measurement.object_id, measurement, measurement_action, is_referenced=False, is_referencing=True, files=[]),
             WorkflowElement(fed_no_data_sample.object_id, fed_no_data_sample, None, is_referenced=True, is_referencing=False, files=[])
         ]
+
+
+def _insert_objects(action, user, num_objects, references):
+    # objects and references are inserted directly, as creating them one by
+    # one would take too long for a benchmark
+    object_ids = sorted(sampledb.db.session.execute(sampledb.db.text("""
+        INSERT INTO objects_current (version_id, action_id, data, schema, user_id, utc_datetime, name_cache)
+        SELECT
+            0,
+            :action_id,
+            jsonb_build_object('name', jsonb_build_object('_type', 'text', 'text', 'Object ' || i)),
+            CAST(:schema AS jsonb),
+            :user_id,
+            now(),
+            to_json('Object ' || i)
+        FROM generate_series(1, :num_objects) AS i
+        RETURNING object_id
+    """), {
+        'action_id': action.id,
+        'schema': json.dumps(action.schema),
+        'user_id': user.id,
+        'num_objects': num_objects
+    }).scalars().all())
+    sampledb.db.session.execute(sampledb.db.text("""
+        INSERT INTO object_references (source_object_id, source_version_id, path, kind, target_object_id)
+        VALUES (:source_object_id, 0, '["sample"]', 'SAMPLE_CREATION', :target_object_id)
+    """), [
+        {
+            'source_object_id': object_ids[source_index],
+            'target_object_id': object_ids[target_index]
+        }
+        for source_index, target_index in references
+    ])
+    for object_id in object_ids:
+        sampledb.db.session.add(sampledb.models.UserObjectPermissions(object_id=object_id, user_id=user.id, permissions=sampledb.models.Permissions.READ))
+    sampledb.logic.effective_object_permissions.rebuild_effective_object_permissions()
+    sampledb.db.session.commit()
+    # update the planner statistics, as autovacuum would for a database
+    # that has grown over time
+    sampledb.db.session.execute(sampledb.db.text("ANALYZE objects_current, object_references, effective_object_permissions"))
+    sampledb.db.session.commit()
+    return object_ids
+
+
+def _insert_wide_graph(action, user, num_objects):
+    # a sample used to create all other samples
+    return _insert_objects(action, user, num_objects, [
+        (index, 0)
+        for index in range(1, num_objects)
+    ])
+
+
+def _insert_deep_graph(action, user, num_objects):
+    # a cycle of samples, each created using the previous one
+    return _insert_objects(action, user, num_objects, [
+        (index, index - 1)
+        for index in range(1, num_objects)
+    ] + [(0, num_objects - 1)])
+
+
+def _get_tree_nodes(tree):
+    trees = [tree]
+    nodes = []
+    while trees:
+        tree = trees.pop()
+        nodes.append(tree)
+        trees.extend(tree.referenced_objects or [])
+        trees.extend(tree.referencing_objects or [])
+    return nodes
+
+
+def _build_related_objects_tree(object_id, user_id, maximum_depth):
+    statements = []
+
+    def count_statements(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy.event.listen(sampledb.db.engine, 'before_cursor_execute', count_statements)
+    try:
+        start_time = time.perf_counter()
+        tree = sampledb.logic.object_relationships.build_related_objects_tree(object_id=object_id, user_id=user_id, maximum_depth=maximum_depth)
+        run_time = time.perf_counter() - start_time
+    finally:
+        sqlalchemy.event.remove(sampledb.db.engine, 'before_cursor_execute', count_statements)
+    return tree, len(statements), run_time
+
+
+def test_related_objects_tree_action_types(sample_action, measurement_action, user):
+    sample = sampledb.logic.objects.create_object(sample_action.id, {
+        'name': {
+            '_type': 'text',
+            'text': 'Sample'
+        }
+    }, user.id)
+    measurement = sampledb.logic.objects.create_object(measurement_action.id, {
+        'name': {
+            '_type': 'text',
+            'text': 'Measurement'
+        },
+        'sample': {
+            '_type': 'sample',
+            'object_id': sample.id
+        }
+    }, user.id)
+    tree = sampledb.logic.object_relationships.build_related_objects_tree(object_id=sample.id, user_id=user.id)
+    assert tree.action_type_id == sampledb.models.ActionType.SAMPLE_CREATION
+    assert [subtree.object_id for subtree in tree.referencing_objects] == [measurement.id]
+    assert tree.referencing_objects[0].action_type_id == sampledb.models.ActionType.MEASUREMENT
+    assert tree.referencing_objects[0].object_name == 'Measurement'
+
+
+def test_related_objects_tree_maximum_depth(sample_action, user):
+    object_ids = _insert_deep_graph(sample_action, user, 10)
+    tree = sampledb.logic.object_relationships.build_related_objects_tree(object_id=object_ids[0], user_id=user.id, maximum_depth=3)
+    nodes = _get_tree_nodes(tree)
+    assert max(len(node.path) // 2 for node in nodes) == 3
+    for node in nodes:
+        if len(node.path) // 2 < 3:
+            assert node.object is not None
+            assert node.referenced_objects is not None
+        else:
+            assert node.object is None
+            assert node.referenced_objects is None
+    # the cycle is split in the middle, so the objects three steps away in
+    # either direction are the deepest nodes
+    assert {
+        node.object_id
+        for node in nodes
+        if len(node.path) // 2 == 3
+    } == {object_ids[3], object_ids[7]}
+
+
+@pytest.mark.parametrize('insert_graph', [_insert_wide_graph, _insert_deep_graph])
+def test_related_objects_tree_benchmark(sample_action, user, insert_graph):
+    object_ids = insert_graph(sample_action, user, 20)
+    small_tree, small_num_statements, small_time = _build_related_objects_tree(object_ids[0], user.id, maximum_depth=1000)
+    assert {node.object_id for node in _get_tree_nodes(small_tree)} == set(object_ids)
+
+    object_ids = insert_graph(sample_action, user, 2000)
+    large_tree, large_num_statements, large_time = _build_related_objects_tree(object_ids[0], user.id, maximum_depth=1000)
+    assert {node.object_id for node in _get_tree_nodes(large_tree)} == set(object_ids)
+
+    # the related objects are loaded in a single query, regardless of the
+    # number of objects or the depth of the graph
+    assert large_num_statements == small_num_statements
+    # a hundred times as many objects should take at most about a hundred
+    # times as long, as each object is only visited once
+    assert large_time < 200 * small_time
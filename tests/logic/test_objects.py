@@ -601,3 +601,41 @@ def test_get_object_log_entries_by_user(object, action, user2):
     assert len(entries) == 1    # ...but filters the results
     with pytest.raises(sampledb.logic.errors.UserDoesNotExistError):
         sampledb.logic.object_log.get_object_log_entries_by_user(user2.id + 1)
+
+
+def test_load_object_list_context(object, action, user, user2, empty_fed_object, component):
+    sampledb.logic.objects.update_object(object.object_id, data=object.data, user_id=user2.id)
+    object2 = create_object(user_id=user2.id, action_id=action.id, data=object.data)
+    sampledb.logic.files.create_url_file(object2.object_id, user2.id, 'https://example.com/file')
+    objects = [
+        sampledb.logic.objects.get_object(object.object_id),
+        object2,
+        sampledb.logic.objects.get_object(empty_fed_object.object_id)
+    ]
+    object_list_context = sampledb.logic.objects.load_object_list_context(objects)
+
+    original_object = object_list_context.get_original_object(objects[0])
+    assert original_object.version_id == 0
+    assert original_object.user_id == user.id
+    assert object_list_context.get_original_object(object2) == object2
+    assert object_list_context.get_user(user.id) == sampledb.logic.users.get_user(user.id)
+    assert object_list_context.get_user(user2.id) == sampledb.logic.users.get_user(user2.id)
+    assert object_list_context.get_user(None) is None
+    assert object_list_context.get_action(action.id) == action
+    assert object_list_context.get_action(None) is None
+    assert object_list_context.get_files(object.object_id) == []
+    assert object_list_context.get_files(object2.object_id) == sampledb.logic.files.get_files_for_object(object2.object_id)
+    assert len(object_list_context.get_files(object2.object_id)) == 1
+    assert objects[2]._component_cache[0] == component
+
+    object_list_context = sampledb.logic.objects.load_object_list_context(
+        objects,
+        load_original_objects=False,
+        load_users=False,
+        load_actions=False,
+        load_files=False
+    )
+    assert object_list_context.get_original_object(objects[0]) == objects[0]
+    assert object_list_context.get_user(user.id) is None
+    assert object_list_context.get_action(action.id) is None
+    assert object_list_context.get_files(object2.object_id) == []
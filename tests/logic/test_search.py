@@ -167,6 +167,113 @@ def test_find_by_simple_text(user, action) -> None:
         assert 'test' in object.data['text_attr']['text']
 
 
+
+def test_find_by_simple_text_prefix_and_word_forms(user, action) -> None:
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'text_attr': {
+            '_type': 'text',
+            'text': {
+                'en': "The samples were measured twice."
+            }
+        }
+    }
+    object = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'text_attr': {
+            '_type': 'text',
+            'text': "This is an example."
+        }
+    }
+    sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+
+    for query_string in ['sampl', 'Samples twice', 'measuring', 'sample']:
+        filter_func, search_tree, use_advanced_search = sampledb.logic.object_search.generate_filter_func(query_string, use_advanced_search=False)
+        assert not use_advanced_search
+        filter_func, search_notes = sampledb.logic.object_search.wrap_filter_func(filter_func)
+        objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+        assert [o.id for o in objects] == [object.id]
+        assert len(search_notes) == 0
+
+    filter_func, search_tree, use_advanced_search = sampledb.logic.object_search.generate_filter_func('samples example', use_advanced_search=False)
+    filter_func, search_notes = sampledb.logic.object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert len(objects) == 0
+
+
+def test_extract_search_texts() -> None:
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': {
+                'en': 'Sample',
+                'de': 'Probe'
+            }
+        },
+        'tags': {
+            '_type': 'tags',
+            'tags': ['tag1', 'tag2']
+        },
+        'array_attr': [
+            {
+                'text_attr': {
+                    '_type': 'text',
+                    'text': 'Item'
+                },
+                'bool_attr': {
+                    '_type': 'bool',
+                    'value': True
+                }
+            }
+        ]
+    }
+    assert sampledb.logic.object_search.extract_search_texts(data) == [
+        ('english', 'A', 'Sample'),
+        ('german', 'A', 'Probe'),
+        ('simple', 'A', 'Sample\nProbe'),
+        ('simple', 'B', 'tag1\ntag2'),
+        ('simple', 'C', 'Item'),
+    ]
+
+
+def test_sort_by_search_rank(user, action) -> None:
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'text_attr': {
+            '_type': 'text',
+            'text': "This is a test."
+        }
+    }
+    object1 = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Test'
+        }
+    }
+    object2 = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        }
+    }
+    object3 = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+
+    sorting_func = sampledb.logic.object_sorting.descending(sampledb.logic.object_sorting.search_rank('test'))
+    objects = sampledb.logic.objects.get_objects(sorting_func=sorting_func)
+    assert [o.id for o in objects] == [object2.id, object1.id, object3.id]
+
 def test_find_by_tag(user, action) -> None:
     data = {
         'name': {
@@ -1829,6 +1936,43 @@ def test_find_by_text_contains(user, action) -> None:
     assert len(search_notes) == 0
 
 
+
+def test_find_by_text_contains_words(user, action) -> None:
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'text_attr': {
+            '_type': 'text',
+            'text': 'This is an example text.'
+        }
+    }
+    object = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'text_attr': {
+            '_type': 'text',
+            'text': 'This is another example text.'
+        }
+    }
+    sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+
+    filter_func, search_tree, use_advanced_search = sampledb.logic.object_search.generate_filter_func('"s is an example te" in text_attr', use_advanced_search=True)
+    filter_func, search_notes = sampledb.logic.object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert [o.id for o in objects] == [object.id]
+    assert len(search_notes) == 0
+
+    filter_func, search_tree, use_advanced_search = sampledb.logic.object_search.generate_filter_func('"is an Example" in text_attr', use_advanced_search=True)
+    filter_func, search_notes = sampledb.logic.object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert len(objects) == 0
+    assert len(search_notes) == 0
+
 def test_find_by_text_attribute_equal(user, action) -> None:
     data = {
         'name': {
@@ -3,12 +3,14 @@
 
 """
 from copy import deepcopy
+import datetime
+
 import pytest
 
 from sampledb import models, db
 from sampledb import logic
 from sampledb.logic import errors
-from sampledb.logic.shares import add_object_share, update_object_share, get_share, get_object_if_shared, get_shares_for_object, get_shares_for_component, get_all_shares
+from sampledb.logic.shares import add_object_share, update_object_share, get_share, get_object_if_shared, get_shares_for_object, get_shares_for_component, get_all_shares, get_changed_entities_referenced_by_shares
 
 UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
 UUID_2 = '1e59c517-bd11-4390-aeb4-971f20b06612'
@@ -240,6 +242,51 @@ def test_get_shares_for_component(objects, components):
     assert share4 in shares
 
 
+def test_get_shares_for_component_modified_since(objects, component, user):
+    object1, object2 = objects
+    share1 = add_object_share(object1.object_id, component.id, POLICY)
+    share2 = add_object_share(object2.object_id, component.id, POLICY)
+    assert get_shares_for_component(component.id) == [share1, share2]
+    assert get_shares_for_component(component.id, limit=1) == [share1]
+    assert get_shares_for_component(component.id, after_object_id=object1.object_id) == [share2]
+
+    modified_since = datetime.datetime.now(datetime.timezone.utc)
+    assert get_shares_for_component(component.id, modified_since=modified_since) == []
+
+    logic.comments.create_comment(object2.object_id, user.id, 'Comment')
+    assert get_shares_for_component(component.id, modified_since=modified_since) == [share2]
+    assert logic.object_changes.get_object_change_time(object2.object_id) >= modified_since
+
+    share1 = update_object_share(object1.object_id, component.id, {'access': {'data': True}})
+    assert share1.last_modified >= modified_since
+    assert get_shares_for_component(component.id, modified_since=modified_since) == [share1, share2]
+
+
+def test_get_changed_entities_referenced_by_shares(objects, components, user, action):
+    object1, object2 = objects
+    component1, component2 = components
+    parent_location = logic.locations.create_location({'en': 'Parent'}, {}, None, user.id, models.LocationType.LOCATION)
+    location = logic.locations.create_location({'en': 'Location'}, {}, parent_location.id, user.id, models.LocationType.LOCATION)
+    logic.locations.assign_location_to_object(object1.object_id, location.id, None, user.id, None)
+    add_object_share(object1.object_id, component1.id, POLICY)
+    add_object_share(object2.object_id, component2.id, {**POLICY, 'access': {'data': True}})
+
+    modified_since = datetime.datetime.now(datetime.timezone.utc)
+    assert get_changed_entities_referenced_by_shares(component1.id, modified_since) == []
+
+    logic.action_translations.set_action_translation(models.Language.ENGLISH, action.id, name='Action')
+    logic.action_type_translations.set_action_type_translation(models.ActionType.SAMPLE_CREATION, models.Language.ENGLISH, name='Sample', description='', object_name='Sample', object_name_plural='Samples', view_text='', perform_text='')
+    logic.locations.update_location(parent_location.id, {'en': 'Parent Location'}, {}, None, user.id, models.LocationType.LOCATION, False)
+    assert logic.object_changes.get_entity_change_time('actions', action.id) >= modified_since
+    assert get_changed_entities_referenced_by_shares(component1.id, modified_since) == [
+        ('action_types', models.ActionType.SAMPLE_CREATION),
+        ('actions', action.id),
+        ('locations', parent_location.id),
+    ]
+    # the second component is only sent the object data
+    assert get_changed_entities_referenced_by_shares(component2.id, modified_since) == []
+
+
 def test_get_shares_for_component_exceptions(component):
     with pytest.raises(errors.ComponentDoesNotExistError):
         get_shares_for_component(component.id + 1)
@@ -0,0 +1,313 @@
+# coding: utf-8
+"""
+
+"""
+import hashlib
+import json
+
+import pytest
+import sqlalchemy
+
+from sampledb import db
+import sampledb.logic
+import sampledb.models
+from sampledb.logic import database_indexes, object_search
+from sampledb.models import Objects
+
+
+@pytest.fixture
+def user():
+    user = sampledb.models.User(
+        name="User",
+        email="example@example.com",
+        type=sampledb.models.UserType.PERSON)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def action():
+    return sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'tags': {
+                    'title': 'Tags',
+                    'type': 'tags'
+                },
+                'notes': {
+                    'title': 'Notes',
+                    'type': 'array',
+                    'items': {
+                        'title': 'Note',
+                        'type': 'text'
+                    }
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+@pytest.fixture
+def trigram_search():
+    if not database_indexes.is_trigram_search_available():
+        pytest.skip("the pg_trgm extension is not available")
+
+
+@pytest.fixture
+def objects(user, action):
+    objects = []
+    for name, tags, notes in [
+        ('Silicon Wafer', ['wafer'], ['polished on both sides']),
+        ({'en': 'Silicon Carbide'}, [], ['unpolished']),
+        ('Gold Foil', ['foil', 'silicon'], []),
+        ('100% Gold', [], ['Half of the wafer']),
+    ]:
+        objects.append(sampledb.logic.objects.create_object(action_id=action.id, data={
+            'name': {
+                '_type': 'text',
+                'text': name
+            },
+            'tags': {
+                '_type': 'tags',
+                'tags': tags
+            },
+            'notes': [
+                {
+                    '_type': 'text',
+                    'text': note
+                }
+                for note in notes
+            ]
+        }, user_id=user.id))
+    return objects
+
+
+SEARCH_QUERIES = [
+    '"Silicon" in name',
+    '"licon" in name',
+    '"Go" in name',
+    '"100%" in name',
+    '"G_ld" in name',
+    '"polished" in notes.0',
+    '"of the wafer" in notes.0',
+    '"wafer" in name',
+]
+
+
+def _search(query_string):
+    filter_func, _, _ = object_search.generate_filter_func(query_string, use_advanced_search=True)
+    filter_func, search_notes = object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert search_notes == []
+    return sorted(object.object_id for object in objects)
+
+
+def _search_simple(query_string):
+    filter_func, _, _ = object_search.generate_filter_func(query_string, use_advanced_search=False)
+    filter_func, search_notes = object_search.wrap_filter_func(filter_func)
+    objects = sampledb.logic.objects.get_objects(filter_func=filter_func)
+    assert search_notes == []
+    return sorted(object.object_id for object in objects)
+
+
+def _explain(query_string, use_advanced_search=True, enable_seqscan=False, analyze=False):
+    filter_func, _, _ = object_search.generate_filter_func(query_string, use_advanced_search=use_advanced_search)
+    filter_func, _ = object_search.wrap_filter_func(filter_func)
+
+    objects_current = Objects._current_table
+    data_column = objects_current.c.data
+    data_column.search_text_column = objects_current.c.search_text
+    data_column.search_vector_column = objects_current.c.search_vector
+    query = db.select(objects_current.c.object_id).where(filter_func(data_column))
+
+    explain_statement = 'EXPLAIN (ANALYZE, FORMAT JSON) ' if analyze else 'EXPLAIN '
+
+    def explain(connection, cursor, statement, parameters, context, executemany):
+        return explain_statement + statement, parameters
+
+    if not enable_seqscan:
+        # the table is too small for the planner to use the index otherwise
+        db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    sqlalchemy.event.listen(db.engine, 'before_cursor_execute', explain, retval=True)
+    try:
+        plan = db.session.execute(query).scalars().all()
+    finally:
+        sqlalchemy.event.remove(db.engine, 'before_cursor_execute', explain)
+    db.session.rollback()
+    return plan
+
+
+def _get_index_scan_rows(query_string, index_name, enable_seqscan=False):
+    plan = _explain(query_string, enable_seqscan=enable_seqscan, analyze=True)[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Index Name') == index_name:
+            return node['Actual Rows']
+        nodes.extend(node.get('Plans', []))
+    return None
+
+
+def _drop_trigram_indexes():
+    db.session.execute(db.text(f"DROP INDEX IF EXISTS {Objects.search_text_trigram_index_name}"))
+    db.session.execute(db.text(f"DROP INDEX IF EXISTS {Objects.data_trigram_index_name}"))
+    db.session.commit()
+
+
+def test_search_texts(objects):
+    search_text = db.session.execute(
+        db.select(Objects._current_table.c.search_text).where(Objects._current_table.c.object_id == objects[0].object_id)
+    ).scalar_one()
+    assert search_text.split('\n') == ['Silicon Wafer', 'wafer', 'polished on both sides']
+
+
+def test_trigram_search_is_available(trigram_search):
+    assert database_indexes.is_trigram_extension_installed()
+    assert (Objects._current_table.name, Objects.search_text_trigram_index_name) in database_indexes.get_declared_indexes()
+    assert (Objects._current_table.name, Objects.data_trigram_index_name) in database_indexes.get_declared_indexes()
+    _drop_trigram_indexes()
+    assert not database_indexes.is_trigram_search_available()
+    missing_indexes = database_indexes.get_index_report().missing_indexes
+    assert (Objects._current_table.name, Objects.search_text_trigram_index_name) in missing_indexes
+    assert (Objects._current_table.name, Objects.data_trigram_index_name) in missing_indexes
+    assert Objects.create_trigram_indexes()
+    assert database_indexes.is_trigram_search_available()
+
+
+def test_substring_search(objects):
+    results = {
+        query_string: _search(query_string)
+        for query_string in SEARCH_QUERIES
+    }
+    assert results['"Silicon" in name'] == [objects[0].object_id, objects[1].object_id]
+    assert results['"licon" in name'] == [objects[0].object_id, objects[1].object_id]
+    assert results['"Go" in name'] == [objects[2].object_id, objects[3].object_id]
+    assert results['"100%" in name'] == [objects[3].object_id]
+    assert results['"G_ld" in name'] == [objects[2].object_id, objects[3].object_id]
+    assert results['"polished" in notes.0'] == [objects[0].object_id, objects[1].object_id]
+    assert results['"of the wafer" in notes.0'] == [objects[3].object_id]
+    # the tag of the first object is part of its search text, but not of its name
+    assert results['"wafer" in name'] == []
+
+    # without the trigram index, the same objects are found
+    _drop_trigram_indexes()
+    for query_string in SEARCH_QUERIES:
+        assert _search(query_string) == results[query_string], query_string
+
+
+def test_substring_search_uses_trigram_index(objects, trigram_search):
+    assert any(
+        Objects.search_text_trigram_index_name in line
+        for line in _explain('"Silicon" in name')
+    )
+    _drop_trigram_indexes()
+    assert not any(
+        'search_text' in line
+        for line in _explain('"Silicon" in name')
+    )
+
+
+def test_simple_search_uses_trigram_index(objects, trigram_search):
+    assert _search_simple('licon') == [objects[0].object_id, objects[1].object_id]
+    assert any(
+        Objects.data_trigram_index_name in line
+        for line in _explain('licon', use_advanced_search=False)
+    )
+    _drop_trigram_indexes()
+    # without the trigram index, only words and beginnings of words are found
+    assert _search_simple('licon') == []
+    assert _search_simple('Silic') == [objects[0].object_id, objects[1].object_id]
+
+
+def test_simple_search_without_trigram_index(objects):
+    _drop_trigram_indexes()
+    assert _search_simple('Silicon') == [objects[0].object_id, objects[1].object_id, objects[2].object_id]
+    plan = _explain('Silicon', use_advanced_search=False)
+    assert any(
+        Objects._current_table.name + '_search_vector_idx' in line
+        for line in plan
+    )
+    # the data of all objects is not checked
+    assert not any(
+        'Seq Scan' in line
+        for line in plan
+    )
+
+
+def test_simple_search_substrings_and_values(user, action, trigram_search):
+    object1 = sampledb.logic.objects.create_object(action_id=action.id, data={
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'notes': [
+            {
+                '_type': 'text',
+                'text': "The samples were measured twice."
+            }
+        ]
+    }, user_id=user.id)
+    object2 = sampledb.logic.objects.create_object(action_id=action.id, data={
+        'name': {
+            '_type': 'text',
+            'text': '2018-10-05'
+        }
+    }, user_id=user.id)
+    # words are matched using the full-text search, other substrings and
+    # values other than words are matched in the object data
+    assert _search_simple('samples') == [object1.object_id]
+    assert _search_simple('ample') == [object1.object_id]
+    assert _search_simple('easured tw') == [object1.object_id]
+    assert _search_simple('18-10-0') == [object2.object_id]
+
+
+def _insert_objects(action, user, num_objects):
+    # objects are inserted directly, as creating them one by one would take
+    # too long for a benchmark
+    db.session.execute(db.text("""
+        INSERT INTO objects_current (version_id, action_id, data, schema, user_id, utc_datetime, name_cache, search_text)
+        SELECT
+            0,
+            :action_id,
+            jsonb_build_object('name', jsonb_build_object('_type', 'text', 'text', md5(i::text))),
+            CAST(:schema AS jsonb),
+            :user_id,
+            now(),
+            to_json(md5(i::text)),
+            md5(i::text)
+        FROM generate_series(1, :num_objects) AS i
+    """), {
+        'action_id': action.id,
+        'schema': json.dumps(action.schema),
+        'user_id': user.id,
+        'num_objects': num_objects
+    })
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE objects_current"))
+    db.session.commit()
+
+
+def test_substring_search_scaling_by_object_count(user, action, trigram_search):
+    # part of the name of a single object
+    query_string = '"' + hashlib.md5(b'1').hexdigest()[4:20] + '" in name'
+    for num_objects in [2000, 40000]:
+        db.session.execute(db.text("DELETE FROM objects_current"))
+        _insert_objects(action, user, num_objects)
+        assert len(_search(query_string)) == 1
+        # instead of checking the data of every object, the planner uses the
+        # trigram index, which only returns the objects that need to be
+        # checked, regardless of the number of objects
+        assert _get_index_scan_rows(query_string, Objects.search_text_trigram_index_name) == 1, num_objects
+    # with enough objects, the planner chooses the index on its own
+    assert _get_index_scan_rows(query_string, Objects.search_text_trigram_index_name, enable_seqscan=True) == 1
@@ -8,7 +8,7 @@ import pytest
 import pytz
 
 from sampledb.logic import utils, errors
-from sampledb.models import Tag
+from sampledb.models import Tag, User, UserType
 from sampledb import db, config
 
 
@@ -255,6 +255,101 @@ def test_cache():
     assert f() == 2
 
 
+def test_request_cache(app):
+    evaluations_counter = 0
+
+    @utils.request_cache
+    def f(a, b=None):
+        nonlocal evaluations_counter
+        evaluations_counter += 1
+        db.session.execute(db.select(Tag.id)).all()
+        return [evaluations_counter]
+
+    # no caching outside of requests
+    assert f(1) == [1]
+    assert f(1) == [2]
+
+    evaluations_counter = 0
+    with app.test_request_context():
+        assert f(1) == [1]
+        assert f(1) == [1]
+        assert f(1, None) == [1]
+        assert f(a=1) == [1]
+        assert f(2) == [2]
+        assert f(1, 2) == [3]
+        utils.clear_request_cache()
+        assert f(1) == [4]
+        assert f(1) == [4]
+        db.session.execute(db.text('SELECT 1'))
+        assert f(1) == [4]
+        db.session.add(Tag(name='request_cache', uses=1))
+        db.session.commit()
+        assert f(1) == [5]
+        db.session.execute(db.text('SELECT 1'))
+        assert f(1) == [5]
+        db.session.rollback()
+        assert f(1) == [5]
+        tag = Tag.query.filter_by(name='request_cache').first()
+        tag.uses = 2
+        db.session.flush()
+        assert f(1) == [6]
+        assert f(1) == [6]
+        db.session.rollback()
+        assert f(1) == [7]
+        # results are returned as shallow copies
+        f(1).append(0)
+        assert f(1) == [7]
+
+
+def test_request_cache_invalidation(app):
+    evaluations_counters = {'tags': 0, 'users': 0, 'text': 0, 'nested': 0}
+
+    @utils.request_cache
+    def get_tags():
+        evaluations_counters['tags'] += 1
+        return len(db.session.execute(db.select(Tag.id)).all())
+
+    @utils.request_cache
+    def get_users():
+        evaluations_counters['users'] += 1
+        return len(db.session.execute(db.select(User.id)).all())
+
+    @utils.request_cache
+    def get_text():
+        evaluations_counters['text'] += 1
+        return len(db.session.execute(db.text('SELECT id FROM tags')).all())
+
+    @utils.request_cache
+    def get_nested():
+        evaluations_counters['nested'] += 1
+        return get_tags()
+
+    with app.test_request_context():
+        get_nested()
+        get_users()
+        get_text()
+        assert evaluations_counters == {'tags': 1, 'users': 1, 'text': 1, 'nested': 1}
+
+        # modifying other tables does not invalidate results
+        db.session.add(User(name="Basic User", email="example@example.com", type=UserType.PERSON))
+        db.session.commit()
+        get_tags()
+        get_nested()
+        get_text()
+        assert evaluations_counters == {'tags': 1, 'users': 1, 'text': 2, 'nested': 1}
+        get_users()
+        assert evaluations_counters == {'tags': 1, 'users': 2, 'text': 2, 'nested': 1}
+
+        # results of functions calling cached functions are invalidated as well
+        db.session.add(Tag(name='request_cache', uses=1))
+        db.session.commit()
+        get_users()
+        get_nested()
+        assert evaluations_counters == {'tags': 2, 'users': 2, 'text': 2, 'nested': 2}
+        get_nested()
+        assert evaluations_counters == {'tags': 2, 'users': 2, 'text': 2, 'nested': 2}
+
+
 def test_get_data_and_schema_by_id_path():
     data = {
         'name': {
@@ -3,6 +3,11 @@
 
 """
 from datetime import datetime
+import http.server
+import json
+import socket
+import threading
+import time
 
 import flask
 import pytest
@@ -13,6 +18,38 @@ from sampledb.logic import webhooks, errors, actions, objects
 from sampledb.models.webhooks import WebhookType
 
 
+@pytest.fixture
+def webhook_server():
+    received_requests = []
+
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received_requests.append((self.path, self.headers, body))
+            self.send_response(200)
+            if 'set_cookie' in self.path:
+                self.send_header('Set-Cookie', 'session=secret; Path=/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    flask.current_app.config['WEBHOOKS_ALLOW_HTTP'] = True
+    webhooks._failures_by_target_url.clear()
+    webhooks._trial_request_target_urls.clear()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}', received_requests
+    finally:
+        server.shutdown()
+        server.server_close()
+        webhooks._failures_by_target_url.clear()
+        webhooks._trial_request_target_urls.clear()
+
+
 @pytest.fixture
 def user1():
     user = sampledb.logic.users.create_user(name="User 1", email="example1@example.com", type=sampledb.models.UserType.PERSON)
@@ -155,3 +192,81 @@ def test_remove_webhook(user1, user2):
         webhooks.get_webhook(wh2.id)
     with pytest.raises(errors.WebhookDoesNotExistError):
         webhooks.remove_webhook(wh2.id + 1)
+
+
+def test_send_data_to_webhooks(user1, user2, webhook_server):
+    base_url, received_requests = webhook_server
+    wh1 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, secret='secret1', target_url=base_url + '/1')
+    wh2 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user2.id, secret='secret2', target_url=base_url + '/2')
+    data = {'value': 1}
+    assert webhooks.send_data_to_webhooks([(wh1, data), (wh2, data)]) == []
+    assert sorted(path for path, headers, body in received_requests) == ['/1', '/2']
+    for path, headers, body in received_requests:
+        assert json.loads(body) == data
+        assert headers['X-SampleDB-Event-Type'] == 'OBJECT_LOG'
+        webhook = wh1 if path == '/1' else wh2
+        assert headers['X-Sampledb-Signature'] == webhook.get_signature(body.decode('utf-8'))
+    assert webhooks.get_webhook(wh1.id).last_contact is not None
+    assert webhooks.get_webhook(wh2.id).last_contact is not None
+
+
+def test_webhook_circuit_breaker(user1, webhook_server):
+    # find a port that nothing is listening on
+    with socket.socket() as unused_socket:
+        unused_socket.bind(('127.0.0.1', 0))
+        unused_port = unused_socket.getsockname()[1]
+    webhook = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url=f'http://127.0.0.1:{unused_port}')
+    for _ in range(webhooks.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD):
+        assert webhooks._start_request(webhook.target_url) is True
+        with pytest.raises(errors.WebhookConnectionException):
+            webhook.send_data({})
+    assert webhooks._start_request(webhook.target_url) is False
+    assert webhooks.send_data_to_webhooks([(webhook, {})]) == [webhook]
+    assert webhooks.get_webhook(webhook.id).last_contact is None
+
+    # after the timeout, a single trial request is allowed again
+    num_failures, last_failure_time = webhooks._failures_by_target_url[webhook.target_url]
+    webhooks._failures_by_target_url[webhook.target_url] = (num_failures, time.monotonic() - webhooks.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT)
+    assert webhooks._start_request(webhook.target_url) is True
+    assert webhooks._start_request(webhook.target_url) is False
+    webhooks._record_failure(webhook.target_url)
+    assert webhooks._start_request(webhook.target_url) is False
+
+    # a successful trial request allows all further requests
+    num_failures, last_failure_time = webhooks._failures_by_target_url[webhook.target_url]
+    webhooks._failures_by_target_url[webhook.target_url] = (num_failures, time.monotonic() - webhooks.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT)
+    assert webhooks._start_request(webhook.target_url) is True
+    webhooks._record_success(webhook.target_url)
+    assert webhooks._start_request(webhook.target_url) is True
+    assert webhooks._start_request(webhook.target_url) is True
+
+
+def test_webhook_retry_delay_matches_circuit_breaker_timeout():
+    policy = sampledb.logic.background_tasks.core.TASK_TYPE_POLICIES['webhook_send']
+    assert policy.get_retry_delay(1) >= webhooks.WEBHOOK_CIRCUIT_BREAKER_TIMEOUT
+
+
+def test_webhook_sessions_do_not_store_cookies(user1, user2, webhook_server):
+    base_url, received_requests = webhook_server
+    wh1 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url=base_url + '/1?set_cookie=1')
+    wh2 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user2.id, target_url=base_url + '/2')
+    wh1.send_data({})
+    wh2.send_data({})
+    assert [path for path, headers, body in received_requests] == ['/1?set_cookie=1', '/2']
+    for path, headers, body in received_requests:
+        assert 'Cookie' not in headers
+
+
+def test_trigger_object_log_webhooks(user1, user2, action, webhook_server):
+    base_url, received_requests = webhook_server
+    flask.current_app.config['ENABLE_WEBHOOKS_FOR_USERS'] = True
+    webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url=base_url + '/1')
+    webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url=base_url + '/2')
+    webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user2.id, target_url=base_url + '/3')
+    object = objects.create_object(user_id=user1.id, action_id=action.id, data={'name': {'_type': 'text', 'text': 'Object'}})
+    # user 2 cannot read the object
+    assert sorted(path for path, headers, body in received_requests) == ['/1', '/2']
+    for path, headers, body in received_requests:
+        object_log_entry_json = json.loads(body)
+        assert object_log_entry_json['type'] == 'CREATE_OBJECT'
+        assert object_log_entry_json['object_id'] == object.id
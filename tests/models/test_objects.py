@@ -13,6 +13,7 @@ import sqlalchemy.dialects.postgresql as postgresql
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 import sampledb
+import sampledb.logic
 import sampledb.utils
 from sampledb.models.versioned_json_object_tables import VersionedJSONSerializableObjectTables, Object
 
@@ -166,6 +167,67 @@ def test_get_current_objects_action_filter(session: sessionmaker(), objects: Ver
     assert current_objects == [object1]
 
 
+
+def test_get_current_objects_keyset_pagination(session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(id=0, name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    object_ids = [
+        objects.create_object(action_id=action.id, data=data, schema={}, user_id=user.id).object_id
+        for data in [
+            {'name': {'_type': 'text', 'text': 'b'}},
+            {'name': {'_type': 'text', 'text': 'a'}},
+            {'name': {'_type': 'text', 'text': 'b'}},
+            {},
+            {'name': {'_type': 'text', 'text': 'a'}},
+        ]
+    ]
+    sorting_func = sampledb.logic.object_sorting.ascending(sampledb.logic.object_sorting.property_value('name'))
+
+    cursors = []
+    num_objects_found = []
+    current_objects = objects.get_current_objects(sorting_func=sorting_func, limit=2, cursors=cursors, num_objects_found=num_objects_found)
+    assert [object.object_id for object in current_objects] == [object_ids[1], object_ids[4]]
+    assert cursors == [None, ('a', object_ids[4])]
+    assert num_objects_found == [5]
+
+    current_objects = objects.get_current_objects(sorting_func=sorting_func, limit=2, after=cursors[1], cursors=cursors, num_objects_found=num_objects_found)
+    assert [object.object_id for object in current_objects] == [object_ids[0], object_ids[2]]
+    assert cursors == [('b', object_ids[0]), ('b', object_ids[2])]
+    assert num_objects_found == [5]
+
+    current_objects = objects.get_current_objects(sorting_func=sorting_func, limit=2, after=cursors[1], cursors=cursors)
+    assert [object.object_id for object in current_objects] == [object_ids[3]]
+    assert cursors == [(None, object_ids[3]), None]
+
+    current_objects = objects.get_current_objects(sorting_func=sorting_func, limit=2, before=cursors[0], cursors=cursors)
+    assert [object.object_id for object in current_objects] == [object_ids[0], object_ids[2]]
+    assert cursors == [('b', object_ids[0]), ('b', object_ids[2])]
+
+    current_objects = objects.get_current_objects(sorting_func=sorting_func, limit=2, before=cursors[0], cursors=cursors)
+    assert [object.object_id for object in current_objects] == [object_ids[1], object_ids[4]]
+    assert cursors == [None, ('a', object_ids[4])]
+
+    current_objects = objects.get_current_objects(sorting_func=sampledb.logic.object_sorting.descending(sampledb.logic.object_sorting.property_value('name')), after=(None, object_ids[3]))
+    assert [object.object_id for object in current_objects] == [object_ids[2], object_ids[0], object_ids[4], object_ids[1]]
+
+    current_objects = objects.get_current_objects(limit=2, after=(None, object_ids[3]), cursors=cursors, num_objects_found=num_objects_found, count_limit=4)
+    assert [object.object_id for object in current_objects] == [object_ids[2], object_ids[1]]
+    assert cursors == [(object_ids[2], object_ids[2]), (object_ids[1], object_ids[1])]
+    assert num_objects_found == [4]
+
+    # sorting functions which already have an order are sorted in the new order
+    current_objects = objects.get_current_objects(sorting_func=sampledb.logic.object_sorting.descending(sorting_func), after=(None, object_ids[3]))
+    assert [object.object_id for object in current_objects] == [object_ids[2], object_ids[0], object_ids[4], object_ids[1]]
+
+    with pytest.raises(ValueError):
+        objects.get_current_objects(sorting_func=sampledb.logic.object_sorting.object_id(), after=(None, object_ids[3]))
+
+    with pytest.raises(ValueError):
+        objects.get_current_objects(after=(None, object_ids[3]), before=(None, object_ids[1]))
+
 def test_get_current_object(session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
     user = User(id=0, name="User")
     session.add(user)
@@ -0,0 +1,30 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+from sampledb import db
+from sampledb.logic import database_indexes
+from sampledb.models import Objects
+import sampledb.__main__ as scripts
+
+
+def test_enable_trigram_search(capsys):
+    if not database_indexes.is_trigram_search_available():
+        pytest.skip("the pg_trgm extension is not available")
+    db.session.execute(db.text(f"DROP INDEX IF EXISTS {Objects.search_text_trigram_index_name}"))
+    db.session.execute(db.text(f"DROP INDEX IF EXISTS {Objects.data_trigram_index_name}"))
+    db.session.commit()
+    assert not database_indexes.is_trigram_search_available()
+    scripts.main([scripts.__file__, 'enable_trigram_search'])
+    assert 'Success' in capsys.readouterr()[0]
+    assert database_indexes.is_trigram_search_available()
+    assert (Objects._current_table.name, Objects.data_trigram_index_name) not in database_indexes.get_index_report().missing_indexes
+
+
+def test_enable_trigram_search_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'enable_trigram_search', 'now'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
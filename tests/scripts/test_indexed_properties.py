@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+from sampledb.logic import indexed_properties
+from sampledb.models import IndexedPropertyType
+import sampledb.__main__ as scripts
+
+
+def test_add_indexed_property(capsys):
+    scripts.main([scripts.__file__, 'add_indexed_property', 'quantity', 'details.mass'])
+    assert 'Success' in capsys.readouterr()[0]
+    indexed_property, = indexed_properties.get_indexed_properties()
+    assert indexed_property.path == ('details', 'mass')
+    assert indexed_property.type == IndexedPropertyType.QUANTITY
+
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', 'quantity', 'details.mass'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+
+
+def test_add_indexed_property_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', 'number', 'mass'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
+
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', 'value', 'details..mass'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+    assert indexed_properties.get_indexed_properties() == []
+
+
+def test_list_indexed_properties(capsys):
+    indexed_property = indexed_properties.create_indexed_property(['name'], IndexedPropertyType.VALUE)
+    scripts.main([scripts.__file__, 'list_indexed_properties'])
+    assert capsys.readouterr()[0] == f" - #{indexed_property.id}: name (value)\n"
+
+
+def test_remove_indexed_property(capsys):
+    indexed_property = indexed_properties.create_indexed_property(['name'], IndexedPropertyType.VALUE)
+    scripts.main([scripts.__file__, 'remove_indexed_property', str(indexed_property.id)])
+    assert 'Success' in capsys.readouterr()[0]
+    assert indexed_properties.get_indexed_properties() == []
+
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'remove_indexed_property', str(indexed_property.id)])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
@@ -0,0 +1,60 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+
+import sampledb
+from sampledb.logic import effective_object_permissions
+from sampledb.models import EffectiveObjectPermissions
+import sampledb.__main__ as scripts
+
+
+@pytest.fixture
+def object():
+    user = sampledb.logic.users.create_user(name="Example User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        }
+    )
+    return sampledb.logic.objects.create_object(user_id=user.id, action_id=action.id, data={
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        }
+    })
+
+
+def test_rebuild_effective_object_permissions(capsys, object):
+    EffectiveObjectPermissions.query.delete()
+    sampledb.db.session.commit()
+
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'rebuild_effective_object_permissions', '--verify-only'])
+    assert exc_info.value.code != 0
+    assert 'missing' in capsys.readouterr()[0]
+
+    scripts.main([scripts.__file__, 'rebuild_effective_object_permissions'])
+    assert 'Success' in capsys.readouterr()[0]
+    assert effective_object_permissions.verify_effective_object_permissions() == []
+
+    scripts.main([scripts.__file__, 'rebuild_effective_object_permissions', '--verify-only'])
+    assert 'Success' in capsys.readouterr()[0]
+
+
+def test_rebuild_effective_object_permissions_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'rebuild_effective_object_permissions', '--invalid'])
+    assert exc_info.value.code != 0
+    assert 'Usage' in capsys.readouterr()[0]
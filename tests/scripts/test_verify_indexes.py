@@ -0,0 +1,20 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb.__main__ as scripts
+
+
+def test_verify_indexes(capsys):
+    scripts.main([scripts.__file__, 'verify_indexes'])
+    output = capsys.readouterr()[0]
+    assert 'Missing indexes' not in output
+
+
+def test_verify_indexes_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'verify_indexes', 'objects'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]